@@ -1,14 +1,74 @@
 # Data Academy - FastAPI Backend
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routers import grade, tutor, health
+from app.routers import admin, grade, tutor, health
+from app.services import ai_tutor, grading
+from app.services.achievements import achievement_engine
+from app.services.code_runner import execution_pool
+from app.services.curriculum import curriculum
+from app.services.llm_pool import registry as llm_registry
+from app.services.model_router import model_router
+from app.services.persistence import persistence
+from app.services.progress import progress_engine
+from app.services.similarity_index import similarity_index
+from app.services.submission_queue import submission_jobs
+from app.services.tutor_sessions import tutor_sessions
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: siapin connection pool Groq + client yang sering dipake
+    # (semua model yang mungkin dipake tiap route, termasuk tujuan eskalasi)
+    await llm_registry.startup(warm_keys=[
+        (model, temperature)
+        for route, temperature in [
+            ("tutor.chat", ai_tutor.CHAT_TEMPERATURE),
+            ("tutor.hint", ai_tutor.HINT_TEMPERATURE),
+            ("tutor.summary", ai_tutor.SUMMARY_TEMPERATURE),
+            ("grading", grading.GRADING_TEMPERATURE),
+            ("suggestions", grading.SUGGESTION_TEMPERATURE),
+        ]
+        for model in model_router.models_for(route)
+    ])
+    # Index kurikulum (konteks grading/hint per challenge_id) + hot reload kalau file berubah;
+    # index BM25 materi buat chat tutor (curriculum_search) ikut dibangun tiap load/reload
+    await curriculum.startup()
+    # Worker pool eksekusi code (pre-import pandas/numpy sekali di sini)
+    await execution_pool.startup()
+    # Index near-duplicate submission (pake ulang grading submission yang mirip)
+    await similarity_index.startup()
+    # Write-behind ke tabel Submission/UserProgress (sebelum worker grading, yang nyimpen hasilnya)
+    await persistence.startup()
+    # Agregat progress/unlock level per user, di-rebuild dari tabel Submission
+    await progress_engine.startup()
+    # Rules achievement dari tabel Achievement (butuh level COMPLETED dari progress engine)
+    await achievement_engine.startup()
+    # Worker grading async (POST /api/grade/submissions)
+    await submission_jobs.startup(
+        handler=grade.process_submission_job, on_failed=grade.record_failed_submission_job
+    )
+    # Sesi chat tutor server-side (kompaksi history pake model murah)
+    await tutor_sessions.startup(summarizer=ai_tutor.summarize_conversation)
+    yield
+    # Shutdown: tutup semua koneksi dan worker
+    await tutor_sessions.shutdown()
+    await submission_jobs.shutdown()
+    await persistence.shutdown()
+    await similarity_index.shutdown()
+    await execution_pool.shutdown()
+    await curriculum.shutdown()
+    await llm_registry.shutdown()
+
 
 app = FastAPI(
     title="Data Academy API",
     description="AI-driven LMS Backend for Data Analysts and Data Scientists",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS Configuration
@@ -24,6 +84,7 @@ app.add_middleware(
 app.include_router(health.router, tags=["Health"])
 app.include_router(tutor.router, prefix="/api/tutor", tags=["AI Tutor"])
 app.include_router(grade.router, prefix="/api/grade", tags=["Code Grading"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 
 
 @app.get("/")
@@ -0,0 +1,229 @@
+# Data Academy - Admin Router
+# Endpoint buat inspeksi dan invalidate cache, reload config routing model dan kurikulum,
+# plus rebuild progress user dan reload rules achievement
+# (wajib ADMIN_API_KEY; tanpa key endpoint ditutup, kecuali ADMIN_ALLOW_UNAUTHENTICATED=1 buat dev)
+
+import asyncio
+import hmac
+import os
+from dataclasses import asdict
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from app.services.achievements import achievement_engine
+from app.services.ai_tutor import hint_cache
+from app.services.curriculum import curriculum
+from app.services.grading import grading_cache
+from app.services.model_router import model_router
+from app.services.persistence import PersistenceBackpressure, persistence
+from app.services.progress import progress_engine
+from app.services.similarity_index import similarity_index
+
+
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
+# Buka endpoint admin tanpa key: cuma buat development lokal, jangan di production
+ADMIN_ALLOW_UNAUTHENTICATED = os.getenv("ADMIN_ALLOW_UNAUTHENTICATED", "0") == "1"
+
+
+async def require_admin(x_admin_key: Optional[str] = Header(default=None)):
+    """
+    Cek header X-Admin-Key. Fail closed: kalau ADMIN_API_KEY kosong, semua endpoint admin
+    balikin 503, kecuali ADMIN_ALLOW_UNAUTHENTICATED=1 (dev).
+    """
+    if not ADMIN_API_KEY:
+        if ADMIN_ALLOW_UNAUTHENTICATED:
+            return
+        raise HTTPException(status_code=503, detail="Admin API belum dikonfigurasi (ADMIN_API_KEY kosong)")
+    if not hmac.compare_digest(x_admin_key or "", ADMIN_API_KEY):
+        raise HTTPException(status_code=403, detail="Admin key invalid")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+# ============================================
+# HINT CACHE
+# ============================================
+
+@router.get("/hint-cache")
+async def inspect_hint_cache(challenge: Optional[str] = None):
+    """
+    Liat isi hint cache: statistik + entry (hint, level, persona, jumlah hit).
+    
+    - **challenge**: filter per challenge_id (atau tag `desc:<hash>` kalau request gak bawa challenge_id)
+    """
+    return {
+        "stats": hint_cache.stats(),
+        "entries": hint_cache.entries(tag=challenge, include_value=True),
+    }
+
+
+@router.delete("/hint-cache/challenges/{challenge}")
+async def invalidate_challenge_hints(challenge: str):
+    """
+    Hapus semua hint cache buat satu challenge (misal deskripsinya baru diupdate).
+    """
+    return {"challenge": challenge, "invalidated": hint_cache.invalidate_tag(challenge)}
+
+
+@router.delete("/hint-cache/entries/{key}")
+async def invalidate_hint_entry(key: str):
+    """
+    Hapus satu entry hint cache.
+    """
+    if not hint_cache.invalidate(key):
+        raise HTTPException(status_code=404, detail="Entry not found")
+    return {"invalidated": key}
+
+
+# ============================================
+# GRADING CACHE & SIMILARITY INDEX
+# ============================================
+
+@router.get("/grading/similarity")
+async def similarity_index_stats():
+    """
+    Statistik index near-duplicate submission (jumlah submission, match rate).
+    """
+    return similarity_index.stats()
+
+
+@router.delete("/grading/challenges/{challenge_id}")
+async def invalidate_challenge_grades(challenge_id: str):
+    """
+    Buang hasil grading yang bisa dipake ulang buat satu challenge
+    (grading cache + index near-duplicate), misal rubric-nya baru diubah.
+    """
+    return {
+        "challenge_id": challenge_id,
+        "cache_invalidated": grading_cache.invalidate_tag(challenge_id),
+        "similarity_invalidated": similarity_index.invalidate(challenge_id),
+    }
+
+
+# ============================================
+# MODEL ROUTING
+# ============================================
+
+@router.get("/model-routing")
+async def model_routing_stats():
+    """
+    Model per tier, aturan per route, dan statistik (latency per model, escalation rate).
+    """
+    return {
+        **model_router.stats(),
+        "rules": {name: asdict(route) for name, route in model_router.routes.items()},
+    }
+
+
+@router.post("/model-routing/reload")
+async def reload_model_routing():
+    """
+    Baca ulang file config routing tanpa restart. Config invalid → 400, config lama tetep dipake.
+    """
+    try:
+        model_router.load()
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Config routing invalid: {str(e)}")
+    return {"reloaded": str(model_router.config_path), "models": model_router.models}
+
+
+# ============================================
+# CURRICULUM
+# ============================================
+
+@router.get("/curriculum")
+async def curriculum_stats():
+    """
+    Statistik curriculum store (jumlah level/modul, file yang gagal divalidasi) + daftar level per track.
+    """
+    return {
+        **curriculum.stats(),
+        "levels_by_track": {
+            code: [asdict(summary) for summary in curriculum.levels_for(code)]
+            for code in curriculum.track_codes()
+        },
+    }
+
+
+@router.get("/curriculum/challenges/{challenge_id}")
+async def curriculum_challenge(challenge_id: str):
+    """
+    Konteks grading/hint yang dipake buat satu challenge_id (judul, deskripsi, rubric, passing score).
+    """
+    context = curriculum.get_challenge(challenge_id)
+    if context is None:
+        raise HTTPException(status_code=404, detail=f"Challenge '{challenge_id}' not found")
+    return asdict(context)
+
+
+@router.post("/curriculum/reload")
+async def reload_curriculum():
+    """
+    Baca ulang folder kurikulum sekarang juga (gak nunggu hot reload). File invalid di-skip dan
+    muncul di `errors`; versi valid terakhirnya tetep dipake.
+    """
+    try:
+        return await asyncio.to_thread(curriculum.load)
+    except OSError as e:
+        raise HTTPException(status_code=400, detail=f"Folder kurikulum gak kebaca: {str(e)}")
+
+
+# ============================================
+# PROGRESS
+# ============================================
+
+@router.post("/progress/rebuild")
+async def rebuild_progress(user_id: Optional[str] = None):
+    """
+    Hitung ulang progress level dari tabel Submission (backfill, misal abis ganti minPassingScore).
+    Hasilnya di-upsert ke UserProgress. `user_id` = cuma satu user; kosong = semua user.
+    """
+    if not persistence.enabled:
+        raise HTTPException(status_code=400, detail="Persistence mati (PERSISTENCE_BACKEND=none)")
+    try:
+        rows = await persistence.best_scores()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Database error: {str(e)}")
+    records = progress_engine.rebuild(rows, users={user_id} if user_id else None)
+    try:
+        for record in records:
+            await persistence.save_progress(record)
+    except PersistenceBackpressure as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return {"records": len(records), **progress_engine.stats()}
+
+
+# ============================================
+# ACHIEVEMENTS
+# ============================================
+
+@router.get("/achievements")
+async def achievement_rules():
+    """
+    Statistik rules engine achievement + rule per event type dan criteria yang gagal di-compile.
+    """
+    return {**achievement_engine.stats(), **achievement_engine.describe()}
+
+
+@router.post("/achievements/reload")
+async def reload_achievements():
+    """
+    Baca ulang tabel Achievement (misal abis nambah achievement baru), compile ulang criteria-nya,
+    lalu backfill: user yang udah memenuhi rule baru langsung dapet. Criteria invalid muncul di `errors`.
+    """
+    if not persistence.enabled:
+        raise HTTPException(status_code=400, detail="Persistence mati (PERSISTENCE_BACKEND=none)")
+    try:
+        definitions, _, _ = await persistence.load_achievements()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Database error: {str(e)}")
+    summary = achievement_engine.set_rules(definitions)
+    awards = achievement_engine.backfill()
+    try:
+        for award in awards:
+            await persistence.save_achievement(award)
+    except PersistenceBackpressure as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return {**summary, "awarded": len(awards)}
@@ -1,13 +1,42 @@
 # Data Academy - Code Grading Router
 # POST /api/grade/submit-code
 
-from fastapi import APIRouter, HTTPException
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Literal, Optional
 
+from app.routers.admin import require_admin
+from app.routers.streaming import SSE_HEADERS, cancel_on_disconnect, sse_event
+from app.services.batch_grading import BatchSubmission, grade_batch
+from app.services.code_runner import ExecutionResult, run_python_tests
+from app.services.curriculum import curriculum
+from app.services.deadline import (
+    DEADLINE_SUGGESTIONS_MIN_SECONDS,
+    GRADE_DEADLINE_SECONDS,
+    ClientDisconnected,
+    Deadline,
+    DeadlineExceeded,
+    record_skip,
+)
+from app.services.achievements import achievement_engine
+from app.services.llm_scheduler import LLMPriority, estimate_tokens
+from app.services.persistence import PersistenceBackpressure, SubmissionRecord, persistence, utcnow
+from app.services.progress import progress_engine
+from app.services.quick_check import QuickCheckResult, quick_checker
+from app.services.sql_runner import run_sql_tests
+from app.services.submission_queue import (
+    QueueFullError,
+    SubmissionJob,
+    SubmissionStatus,
+    submission_jobs,
+)
 from app.services.grading import (
     grade_code_submission,
     get_improvement_suggestions,
+    grading_cache,
     GradingResult,
 )
 
@@ -23,8 +52,11 @@ class SubmitCodeRequest(BaseModel):
     code_snippet: str = Field(..., min_length=1, description="The code to be graded")
     challenge_id: str = Field(..., description="ID of the challenge")
     language: Literal["python", "sql"] = Field(..., description="Programming language")
+    # Diisi frontend (session user) biar hasilnya disimpen ke tabel Submission; kosong = gak disimpen
+    user_id: Optional[str] = Field(default=None, description="ID user (buat nyimpen submission)")
     
-    # Optional challenge context (can be fetched from DB in production)
+    # Optional challenge context. Buat challenge yang ada di kurikulum (DA-L1-C01 dll) semua field
+    # ini diabaikan: konteks + rubric diambil dari curriculum store, cukup kirim challenge_id
     challenge_title: Optional[str] = None
     challenge_description: Optional[str] = None
     expected_behavior: Optional[str] = None
@@ -32,6 +64,12 @@ class SubmitCodeRequest(BaseModel):
     difficulty: Optional[int] = Field(default=1, ge=1, le=5)
     passing_score: Optional[int] = Field(default=70, ge=0, le=100)
 
+    # "single" = grading + saran dalam satu LLM call, "two_step" = grading lalu saran terpisah
+    grading_mode: Literal["single", "two_step"] = Field(
+        default="single",
+        description="single: satu LLM round trip; two_step: grading lalu suggestions terpisah",
+    )
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -55,6 +93,15 @@ class SubmitCodeResponse(BaseModel):
     improvements: list[str]
     passed: bool
     suggestions: Optional[list[str]] = None
+    execution: Optional[ExecutionResult] = None
+    partial: bool = Field(
+        default=False,
+        description="True kalau suggestions di-skip karena deadline request udah mepet",
+    )
+    new_achievements: list[str] = Field(
+        default_factory=list,
+        description="Nama achievement yang baru didapet dari submission ini (butuh user_id)",
+    )
 
     class Config:
         json_schema_extra = {
@@ -75,12 +122,308 @@ class SubmitCodeResponse(BaseModel):
         }
 
 
+class SubmissionJobResponse(BaseModel):
+    """Status job grading async (POST /submissions)"""
+    job_id: str
+    status: SubmissionStatus
+    attempts: int = 0
+    result: Optional[SubmitCodeResponse] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    completed_at: Optional[float] = None
+
+    @classmethod
+    def from_job(cls, job: SubmissionJob) -> "SubmissionJobResponse":
+        return cls(
+            job_id=job.job_id,
+            status=job.status,
+            attempts=job.attempts,
+            result=SubmitCodeResponse(**job.result) if job.result else None,
+            error=job.error,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            completed_at=job.completed_at,
+        )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "job_id": "3f2b8c1e9a4d4f0e8b7a6c5d4e3f2a1b",
+                "status": "PENDING",
+                "attempts": 0,
+                "result": None,
+                "error": None,
+                "created_at": 1760774400.0,
+            }
+        }
+
+
+class RunCodeRequest(BaseModel):
+    """Request body buat jalanin code terhadap test cases (tanpa grading AI)"""
+    code_snippet: str = Field(..., min_length=1)
+    language: Literal["python", "sql"] = "python"
+    test_cases: list[dict] = Field(..., min_length=1, max_length=50)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "code_snippet": "def calculate_average(numbers):\n    return sum(numbers) / len(numbers)",
+                "language": "python",
+                "test_cases": [
+                    {"function": "calculate_average", "args": [[1, 2, 3]], "expected": 2.0},
+                    {"expression": "calculate_average([10])", "expected": 10},
+                ],
+            }
+        }
+
+
+class BatchSubmissionItem(BaseModel):
+    """Satu submission di batch grading"""
+    submission_id: str = Field(..., min_length=1, max_length=128)
+    code_snippet: str = Field(..., min_length=1)
+
+
+class BatchGradeRequest(BaseModel):
+    """Request body buat regrade banyak submission satu challenge sekaligus"""
+    challenge_id: str
+    language: Literal["python", "sql"]
+    submissions: list[BatchSubmissionItem] = Field(..., min_length=1, max_length=1000)
+
+    # Konteks challenge (dipake bareng semua submission)
+    challenge_title: Optional[str] = None
+    challenge_description: Optional[str] = None
+    expected_behavior: Optional[str] = None
+    test_cases: Optional[list[dict]] = None
+    difficulty: Optional[int] = Field(default=1, ge=1, le=5)
+    passing_score: Optional[int] = Field(default=70, ge=0, le=100)
+
+    concurrency: int = Field(default=4, ge=1, le=32, description="Maksimal grading paralel")
+    requests_per_minute: Optional[int] = Field(
+        default=None, ge=1, description="Pacing LLM call biar gak nabrak rate limit Groq"
+    )
+    include_suggestions: bool = False
+    use_cache: bool = Field(default=True, description="False = paksa regrade walaupun ada di cache")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "challenge_id": "ch_python_basics_001",
+                "language": "python",
+                "challenge_title": "Calculate Average",
+                "challenge_description": "Write a function that calculates the average of a list of numbers",
+                "submissions": [
+                    {"submission_id": "sub_001", "code_snippet": "def calculate_average(numbers):\n    return sum(numbers) / len(numbers)"},
+                    {"submission_id": "sub_002", "code_snippet": "def calculate_average(xs):\n    return sum(xs) / len(xs) if xs else 0"},
+                ],
+                "concurrency": 4,
+                "requests_per_minute": 30,
+            }
+        }
+
+
+class QuickCheckRequest(BaseModel):
+    """Request body buat quick check dari editor"""
+    code: str = Field(..., max_length=100_000)
+    language: Literal["python", "sql"] = "python"
+    document_id: Optional[str] = Field(
+        default=None,
+        max_length=128,
+        description="ID dokumen editor (misal user + challenge) buat incremental parse",
+    )
+    lint: bool = True
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "code": "import pandas as pd\n\ndef total(df):\n    return df['amount'].sum()",
+                "language": "python",
+                "document_id": "user_123:ch_python_basics_001",
+                "lint": True,
+            }
+        }
+
+
+# ============================================
+# HELPERS
+# ============================================
+
+async def run_test_cases(
+    code_snippet: str,
+    language: Literal["python", "sql"],
+    test_cases: list[dict],
+    trusted: bool = False,
+) -> ExecutionResult:
+    """
+    Jalanin test cases sesuai bahasa: Python di sandbox pool, SQL di fixture SQLite.
+    `trusted` = test case dari kurikulum; test case dari body request gak boleh bawa fixture SQL inline.
+    """
+    if language == "sql":
+        return await run_sql_tests(code_snippet, test_cases, allow_inline=trusted)
+    return await run_python_tests(code_snippet, test_cases)
+
+
+async def grade_submission(
+    request: SubmitCodeRequest,
+    priority: LLMPriority = "interactive",
+    deadline: Optional[Deadline] = None,
+) -> SubmitCodeResponse:
+    """
+    Pipeline grading lengkap: jalanin test cases, grade, lalu saran perbaikan kalau perlu.
+    `priority` = lane scheduler LLM ('background' buat job dari queue).
+    `deadline` = batas waktu request; kalau udah mepet setelah grading, call suggestions di-skip
+    dan response-nya `partial` (grade tetep dibalikin, gak timeout).
+    """
+    # Test cases challenge kurikulum dari curriculum store, bukan dari body request
+    context = curriculum.get_challenge(request.challenge_id)
+    test_cases = context.test_cases if context is not None else request.test_cases
+
+    # Jalanin test cases beneran kalau ada
+    execution = None
+    if test_cases:
+        execution = await run_test_cases(
+            request.code_snippet, request.language, test_cases, trusted=context is not None
+        )
+    
+    # Grade the submission
+    grading_result: GradingResult = await grade_code_submission(
+        code_snippet=request.code_snippet,
+        challenge_id=request.challenge_id,
+        language=request.language,
+        challenge_title=request.challenge_title or "Coding Challenge",
+        challenge_description=request.challenge_description or "",
+        expected_behavior=request.expected_behavior or "",
+        test_cases=test_cases,
+        difficulty=request.difficulty or 1,
+        passing_score=request.passing_score or 70,
+        include_suggestions=request.grading_mode == "single",
+        execution=execution,
+        priority=priority,
+        deadline=deadline,
+    )
+    
+    # Get additional improvement suggestions if score is below 90
+    suggestions = None
+    partial = False
+    if grading_result.score < 90:
+        suggestions = grading_result.suggestions
+        if not suggestions:
+            # Mode two_step, atau model gak ngisi suggestions → fallback ke call kedua
+            if deadline is not None and not deadline.allows(DEADLINE_SUGGESTIONS_MIN_SECONDS):
+                record_skip("suggestions", estimate_tokens(request.code_snippet, grading_result.feedback_text))
+                partial = True
+            else:
+                try:
+                    suggestions = await get_improvement_suggestions(
+                        code_snippet=request.code_snippet,
+                        language=request.language,
+                        grading_result=grading_result,
+                        deadline=deadline,
+                    )
+                except DeadlineExceeded:
+                    partial = True
+    
+    response = SubmitCodeResponse(
+        score=grading_result.score,
+        feedback_text=grading_result.feedback_text,
+        criteria=grading_result.criteria.model_dump(),
+        strengths=grading_result.strengths,
+        improvements=grading_result.improvements,
+        passed=grading_result.passed,
+        suggestions=suggestions,
+        execution=execution,
+        partial=partial,
+    )
+    response.new_achievements = await persist_submission(request, "COMPLETED", response=response)
+    return response
+
+
+async def persist_submission(
+    request: SubmitCodeRequest,
+    status: Literal["COMPLETED", "FAILED"],
+    response: Optional[SubmitCodeResponse] = None,
+    error: Optional[str] = None,
+) -> list[str]:
+    """
+    Update progress level + achievement user, lalu simpen hasil grading ke tabel Submission,
+    UserProgress, dan UserAchievement lewat buffer write-behind (gak nunggu database).
+    Cuma buat request yang bawa user_id. Return nama achievement yang baru didapet.
+    Buffer penuh di titik ini gak bikin request gagal: grade-nya udah jadi, record-nya dicatet
+    sebagai rejected di metric persistence.
+    """
+    if request.user_id is None:
+        return []
+    graded_at = utcnow() if response is not None else None
+    updates = []
+    awards = []
+    # Cuma challenge dari kurikulum yang dihitung: challenge ad-hoc pake rubric + passing score
+    # dari body request, jadi skornya gak bisa dipercaya buat progress / achievement
+    if response is not None and curriculum.get_challenge(request.challenge_id) is not None:
+        updates = progress_engine.record_grade(request.user_id, request.challenge_id, response.score, graded_at)
+        awards = achievement_engine.on_submission_graded(
+            request.user_id, request.challenge_id, response.score, graded_at,
+        )
+        for update in updates:
+            if "COMPLETED" in update.transitions:
+                awards += achievement_engine.on_level_completed(
+                    request.user_id, update.record.level_id, update.track_code, graded_at,
+                )
+    names = [achievement_engine.names.get(award.achievement_id, award.achievement_id) for award in awards]
+    if not persistence.enabled:
+        return names
+    execution = response.execution if response is not None else None
+    record = SubmissionRecord(
+        user_id=request.user_id,
+        challenge_id=request.challenge_id,
+        code=request.code_snippet,
+        language=request.language.upper(),
+        status=status,
+        score=response.score if response is not None else None,
+        score_breakdown=response.criteria if response is not None else None,
+        ai_feedback=response.feedback_text if response is not None else None,
+        ai_suggestions=response.suggestions if response is not None else None,
+        execution_output=execution.output if execution is not None else None,
+        execution_error=execution.error if execution is not None else error,
+        execution_time_ms=execution.execution_time_ms if execution is not None else None,
+        attempt_number=await persistence.next_attempt(request.user_id, request.challenge_id),
+        graded_at=graded_at,
+    )
+    try:
+        await persistence.save_submission(record)
+        for update in updates:
+            await persistence.save_progress(update.record)
+        for award in awards:
+            await persistence.save_achievement(award)
+    except PersistenceBackpressure:
+        pass
+    return names
+
+
+def check_persistence_capacity() -> None:
+    """Tolak di depan (503) kalau buffer database penuh, sebelum grading yang hasilnya bakal hilang."""
+    try:
+        persistence.check_capacity()
+    except PersistenceBackpressure as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+
+async def process_submission_job(payload: dict) -> dict:
+    """Handler worker submission queue: payload = SubmitCodeRequest yang di-dump."""
+    response = await grade_submission(SubmitCodeRequest(**payload), priority="background")
+    return response.model_dump(mode="json")
+
+
+async def record_failed_submission_job(payload: dict, error: str) -> None:
+    """Job queue yang udah FAILED permanen dicatet ke tabel Submission, sama kayak /submit-code."""
+    await persist_submission(SubmitCodeRequest(**payload), "FAILED", error=error)
+
+
 # ============================================
 # ENDPOINTS
 # ============================================
 
 @router.post("/submit-code", response_model=SubmitCodeResponse)
-async def submit_code(request: SubmitCodeRequest):
+async def submit_code(request: SubmitCodeRequest, http_request: Request):
     """
     Submit code for AI grading.
     
@@ -91,60 +434,186 @@ async def submit_code(request: SubmitCodeRequest):
     - **Business Insight** (0-20): Does it show understanding?
     
     Returns a score (0-100) and detailed feedback.
+    
+    `grading_mode="single"` (default) minta suggestions di response grading yang sama,
+    jadi cuma satu LLM round trip. `two_step` pake alur lama (grading, lalu suggestions).
+    
+    Request dibatesin GRADE_DEADLINE_SECONDS: kalau waktunya mepet, grade dibalikin tanpa
+    suggestions (`partial: true`); kalau habis sebelum grade jadi → 504. Client yang nutup
+    tab di tengah jalan bikin call Groq-nya dibatalin.
+
+    Kalau `user_id` diisi, hasilnya (termasuk yang gagal) disimpen ke tabel Submission.
+    Buffer database penuh → 503 + Retry-After sebelum grading dimulai.
     """
+    if request.user_id is not None:
+        check_persistence_capacity()
     try:
-        # Grade the submission
-        grading_result: GradingResult = await grade_code_submission(
-            code_snippet=request.code_snippet,
-            challenge_id=request.challenge_id,
-            language=request.language,
-            challenge_title=request.challenge_title or "Coding Challenge",
-            challenge_description=request.challenge_description or "",
-            expected_behavior=request.expected_behavior or "",
-            test_cases=request.test_cases,
-            difficulty=request.difficulty or 1,
-            passing_score=request.passing_score or 70,
-        )
-        
-        # Get additional improvement suggestions if score is below 90
-        suggestions = None
-        if grading_result.score < 90:
-            suggestions = await get_improvement_suggestions(
-                code_snippet=request.code_snippet,
-                language=request.language,
-                grading_result=grading_result,
-            )
-        
-        return SubmitCodeResponse(
-            score=grading_result.score,
-            feedback_text=grading_result.feedback_text,
-            criteria=grading_result.criteria.model_dump(),
-            strengths=grading_result.strengths,
-            improvements=grading_result.improvements,
-            passed=grading_result.passed,
-            suggestions=suggestions,
+        return await cancel_on_disconnect(
+            http_request,
+            grade_submission(request, deadline=Deadline(GRADE_DEADLINE_SECONDS)),
+            "grading",
         )
-        
+    except ClientDisconnected as e:
+        # Client udah pergi, response ini gak bakal kebaca
+        raise HTTPException(status_code=499, detail=str(e))
+    except DeadlineExceeded as e:
+        await persist_submission(request, "FAILED", error=f"Grading timeout: {str(e)}")
+        raise HTTPException(status_code=504, detail=f"Grading timeout: {str(e)}")
     except Exception as e:
+        await persist_submission(request, "FAILED", error=f"Grading service error: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Grading service error: {str(e)}"
         )
 
 
-@router.post("/quick-check")
-async def quick_check(
-    code: str,
-    language: Literal["python", "sql"] = "python"
-):
-    """
-    Quick syntax check without full grading.
-    Useful for real-time feedback in the code editor.
-    """
-    # This would integrate with a code execution service
-    # For now, return a placeholder
-    return {
-        "valid": True,
-        "message": "Syntax check passed",
-        "language": language,
-    }
+@router.post("/submissions", response_model=SubmissionJobResponse, status_code=202)
+async def enqueue_submission(request: SubmitCodeRequest):
+    """
+    Submit code buat di-grade async. Langsung balik dengan `job_id` (status PENDING),
+    grading-nya jalan di worker pool.
+
+    Ambil hasilnya lewat `GET /submissions/{job_id}` (polling) atau
+    `GET /submissions/{job_id}/events` (SSE, di-push tiap status berubah).
+    """
+    if request.user_id is not None:
+        check_persistence_capacity()
+    try:
+        job = await submission_jobs.enqueue(request.model_dump())
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return SubmissionJobResponse.from_job(job)
+
+
+@router.get("/submissions/{job_id}", response_model=SubmissionJobResponse)
+async def get_submission(job_id: str):
+    """
+    Status dan hasil job grading: PENDING → GRADING → COMPLETED / FAILED.
+    """
+    job = await submission_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return SubmissionJobResponse.from_job(job)
+
+
+@router.get("/submissions/{job_id}/events")
+async def submission_events(job_id: str):
+    """
+    Stream status job lewat Server-Sent Events.
+
+    Event `status` dikirim tiap status berubah (payload sama kayak `GET /submissions/{job_id}`);
+    stream ditutup setelah COMPLETED atau FAILED.
+    """
+    if await submission_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+
+    async def events():
+        async for job in submission_jobs.watch(job_id):
+            yield sse_event("status", SubmissionJobResponse.from_job(job).model_dump(mode="json"))
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.get("/progress/{user_id}")
+async def user_progress(user_id: str):
+    """
+    Progress semua level buat satu user: status (LOCKED/UNLOCKED/IN_PROGRESS/COMPLETED),
+    currentScore, challenge yang udah lulus, dan skor terbaik per challenge.
+    Dibaca dari agregat in-memory (gak ngitung ulang dari tabel Submission).
+    """
+    return {"user_id": user_id, "levels": progress_engine.user_progress(user_id)}
+
+
+@router.get("/achievements/{user_id}")
+async def user_achievements(user_id: str):
+    """
+    Achievement yang udah didapet satu user (dari state rules engine in-memory).
+    """
+    return {"user_id": user_id, "achievements": achievement_engine.user_achievements(user_id)}
+
+
+@router.post("/run", response_model=ExecutionResult)
+async def run_code(request: RunCodeRequest):
+    """
+    Jalanin code terhadap test cases tanpa grading AI.
+    
+    - **python**: sandbox process pool (`function` / `expression` / `stdin` test cases)
+    - **sql**: fixture SQLite in-memory (`fixture` + `reference_sql` / `expected_rows`)
+    
+    Return pass/fail per test case dan waktu eksekusi dalam milidetik
+    (plus query plan buat SQL).
+    """
+    try:
+        return await run_test_cases(request.code_snippet, request.language, request.test_cases)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Execution service error: {str(e)}"
+        )
+
+
+@router.post("/batch", dependencies=[Depends(require_admin)])
+async def batch_grade(request: BatchGradeRequest):
+    """
+    Grade banyak submission satu challenge sekaligus (misal regrade cohort setelah rubric berubah).
+    Khusus admin (header X-Admin-Key), soalnya bisa bawa fixture inline dan makan kuota LLM gede.
+
+    Code yang identik (setelah dinormalisasi) cuma di-grade sekali. Grading jalan paralel
+    sebatas `concurrency`, di-pace pake `requests_per_minute`, dan lewat lane background
+    scheduler LLM (retry + pause bareng kalau kena 429).
+
+    Response-nya NDJSON (satu JSON per baris) yang di-stream begitu tiap submission selesai:
+    `{"type": "result" | "error", "submission_id": ...}`, ditutup `{"type": "summary", ...}`
+    yang berisi throughput `submissions_per_minute`.
+    """
+    events = grade_batch(
+        submissions=[
+            BatchSubmission(submission_id=item.submission_id, code_snippet=item.code_snippet)
+            for item in request.submissions
+        ],
+        challenge_id=request.challenge_id,
+        language=request.language,
+        challenge_title=request.challenge_title or "Coding Challenge",
+        challenge_description=request.challenge_description or "",
+        expected_behavior=request.expected_behavior or "",
+        test_cases=request.test_cases,
+        difficulty=request.difficulty or 1,
+        passing_score=request.passing_score or 70,
+        concurrency=request.concurrency,
+        requests_per_minute=request.requests_per_minute,
+        include_suggestions=request.include_suggestions,
+        use_cache=request.use_cache,
+    )
+
+    async def ndjson():
+        async for event in events:
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.post("/quick-check", response_model=QuickCheckResult)
+async def quick_check(request: QuickCheckRequest):
+    """
+    Quick syntax check + lint ringan tanpa grading, buat feedback real-time di editor.
+
+    - **python**: `ast.parse`, error dengan line/column; kirim `document_id` yang sama
+      tiap keystroke biar statement di bagian yang gak berubah gak di-parse ulang
+    - **sql**: EXPLAIN di SQLite in-memory (dialek SQLite), posisi error dari token yang disebut
+
+    Hasil di-cache per hash code. Sengaja gak lewat threadpool: kerjanya cuma sub-milidetik.
+    """
+    return quick_checker.check(
+        request.code,
+        language=request.language,
+        document_id=request.document_id,
+        lint=request.lint,
+    )
+
+
+@router.get("/cache/stats")
+async def grading_cache_stats():
+    """
+    Statistik grading cache: hit rate dan total latency LLM yang dihemat.
+    """
+    return grading_cache.stats()
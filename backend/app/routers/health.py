@@ -1,6 +1,21 @@
 # Data Academy - Health Check Router
 
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services.achievements import achievement_engine
+from app.services.ai_tutor import hint_cache, hint_flights
+from app.services.curriculum import curriculum
+from app.services.curriculum_search import curriculum_search
+from app.services.grading import grading_flights
+from app.services.llm_pool import registry as llm_registry
+from app.services.metrics import metrics
+from app.services.model_router import model_router
+from app.services.persistence import persistence
+from app.services.progress import progress_engine
+from app.services.similarity_index import similarity_index
+from app.services.submission_queue import submission_jobs
+from app.services.tutor_sessions import tutor_sessions
 
 router = APIRouter()
 
@@ -18,9 +33,34 @@ async def health_check():
 @router.get("/ready")
 async def readiness_check():
     """Readiness check - verify all dependencies are available"""
-    # In production, check database connection, Redis, etc.
-    return {
-        "ready": True,
-        "database": "connected",
+    # Database cuma dicek kalau persistence nyala (PERSISTENCE_BACKEND != none)
+    database = await persistence.ping()
+    ready = database is None or database == "connected"
+    body = {
+        "ready": ready,
+        "database": database or "disabled",
         "ai_service": "available"
     }
+    if not ready:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+
+@router.get("/metrics")
+async def service_metrics():
+    """Snapshot metric in-process (latency, counter, status pool LLM)"""
+    return {
+        **metrics.snapshot(),
+        "llm_pools": llm_registry.stats(),
+        "submission_queue": await submission_jobs.stats(),
+        "tutor_sessions": tutor_sessions.stats(),
+        "hint_cache": hint_cache.stats(),
+        "similarity_index": similarity_index.stats(),
+        "curriculum": curriculum.stats(),
+        "curriculum_search": curriculum_search.stats(),
+        "persistence": persistence.stats(),
+        "progress": progress_engine.stats(),
+        "achievements": achievement_engine.stats(),
+        "model_routing": model_router.stats(),
+        "single_flight": {"hint": hint_flights.stats(), "grading": grading_flights.stats()},
+    }
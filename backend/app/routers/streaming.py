@@ -0,0 +1,65 @@
+# Data Academy - Streaming Helpers
+# Helper Server-Sent Events + deteksi client disconnect yang dipake bareng router tutor dan grading
+
+import asyncio
+import json
+import os
+from typing import Awaitable, TypeVar
+
+from starlette.requests import Request
+
+from app.services.deadline import ClientDisconnected
+from app.services.metrics import metrics
+
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Biar nginx gak nge-buffer stream
+}
+
+# 0 = kerjaan request tetep jalan sampe selesai walau client udah pergi
+CANCEL_ON_DISCONNECT = os.getenv("CANCEL_ON_DISCONNECT", "1") != "0"
+
+T = TypeVar("T")
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format satu frame Server-Sent Events."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _wait_disconnect(request: Request) -> None:
+    # Body udah dibaca FastAPI, jadi receive() berikutnya baru balik pas koneksi ditutup
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def cancel_on_disconnect(request: Request, work: Awaitable[T], name: str) -> T:
+    """
+    Jalanin `work` (endpoint non-streaming); kalau client nutup koneksi duluan, `work` di-cancel.
+    Cancel-nya nerus ke scheduler / single-flight, jadi call Groq yang udah gak ditunggu siapa-siapa
+    ikut dibatalin. Endpoint streaming gak perlu ini: StreamingResponse udah berhenti sendiri.
+
+    Raises:
+        ClientDisconnected: Client pergi sebelum `work` selesai
+    """
+    if not CANCEL_ON_DISCONNECT:
+        return await work
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(_wait_disconnect(request))
+    try:
+        done, _ = await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        task.cancel()
+        watcher.cancel()
+        raise
+    if task in done:
+        watcher.cancel()
+        return task.result()
+    if watcher.exception() is not None:
+        return await task  # Gak bisa mantau koneksi; biarin kerjaannya selesai normal
+    task.cancel()
+    # Tunggu cancel-nya beres (slot scheduler dilepas, flight dilepas) sebelum balik
+    await asyncio.wait({task})
+    metrics.increment(f"disconnect.cancelled.{name}")
+    raise ClientDisconnected(f"Client disconnect, {name} dibatalin")
@@ -1,15 +1,26 @@
 # Data Academy - AI Tutor Router
 # Endpoints for interacting with AI tutors (Rendy & Abdul)
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
-from typing import Literal, Optional
+import contextlib
+import time
+from typing import AsyncIterator, Callable, Literal, Optional
 
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+
+from app.routers.streaming import SSE_HEADERS, cancel_on_disconnect, sse_event
 from app.services.ai_tutor import (
     get_ai_response,
     get_contextual_hint,
+    pack_chat_prompt,
+    stream_ai_response,
+    stream_contextual_hint,
     TutorResponse,
 )
+from app.services.curriculum import curriculum
+from app.services.deadline import TUTOR_DEADLINE_SECONDS, ClientDisconnected, Deadline, DeadlineExceeded
+from app.services.tutor_sessions import TutorSession, tutor_sessions
 
 router = APIRouter()
 
@@ -18,6 +29,12 @@ router = APIRouter()
 # REQUEST/RESPONSE MODELS
 # ============================================
 
+class ChatMessage(BaseModel):
+    """Satu pesan di chat history"""
+    role: Literal["user", "assistant"]
+    content: str = Field(..., max_length=8000)
+
+
 class ChatRequest(BaseModel):
     """Request body for tutor chat"""
     message: str = Field(..., min_length=1, max_length=2000)
@@ -27,12 +44,29 @@ class ChatRequest(BaseModel):
     )
     context: Optional[str] = Field(
         default=None,
-        description="Current lesson or challenge context"
+        max_length=20000,
+        description="Current lesson or challenge context (dipotong ke budget token)"
+    )
+    chat_history: Optional[list[ChatMessage]] = Field(
+        default=None,
+        max_length=50,
+        description="Previous messages for context (yang terbaru diprioritasin sesuai budget token)"
     )
-    chat_history: Optional[list[dict]] = Field(
+    session_id: Optional[str] = Field(
         default=None,
-        description="Previous messages for context"
+        pattern=r"^[A-Za-z0-9_-]{32,64}$",
+        description="ID sesi server-side dari response sebelumnya (id yang gak dikenal → 404)"
     )
+    start_session: bool = Field(
+        default=False,
+        description="Buka sesi baru (server yang bikin session_id-nya); chat_history dipake buat seed"
+    )
+
+    def history_dicts(self) -> Optional[list[dict]]:
+        """chat_history dalam bentuk dict buat service"""
+        if self.chat_history is None:
+            return None
+        return [message.model_dump() for message in self.chat_history]
 
     class Config:
         json_schema_extra = {
@@ -43,7 +77,8 @@ class ChatRequest(BaseModel):
                 "chat_history": [
                     {"role": "user", "content": "What is a primary key?"},
                     {"role": "assistant", "content": "A primary key is..."}
-                ]
+                ],
+                "start_session": True
             }
         }
 
@@ -53,17 +88,43 @@ class ChatResponse(BaseModel):
     persona: str
     message: str
     suggestions: Optional[list[str]] = None
+    prompt_tokens: Optional[int] = None
+    session_id: Optional[str] = None
+    partial: bool = False  # Jawaban kepotong karena deadline request habis
+
+
+class TutorSessionResponse(BaseModel):
+    """Isi sesi tutor server-side"""
+    session_id: str
+    persona: str
+    summary: str
+    turns: list[ChatMessage]
+    summarized_messages: int
+    created_at: float
+    last_active: float
 
 
 class HintRequest(BaseModel):
     """Request body for getting hints"""
-    challenge_description: str = Field(..., description="The challenge description")
+    challenge_description: str = Field(
+        default="",
+        description="The challenge description (gak perlu diisi kalau challenge_id ada di kurikulum)"
+    )
     user_code: str = Field(default="", description="Student's current code attempt")
     tutor_persona: Literal["RENDY", "ABDUL"] = Field(default="RENDY")
     hint_level: Literal[1, 2, 3] = Field(
         default=1,
         description="1=subtle, 2=moderate, 3=detailed"
     )
+    challenge_id: Optional[str] = Field(
+        default=None,
+        description="ID challenge/modul kurikulum (DA-L1-C01): deskripsi diambil dari kurikulum + tag hint cache"
+    )
+    language: Optional[Literal["python", "sql"]] = Field(
+        default=None,
+        description="Bahasa code murid buat normalisasi cache; kosong = ditebak"
+    )
+    use_cache: bool = Field(default=True, description="False = paksa bikin hint baru")
 
 
 class HintResponse(BaseModel):
@@ -73,32 +134,129 @@ class HintResponse(BaseModel):
     persona: str
 
 
+# ============================================
+# STREAMING HELPERS
+# ============================================
+
+async def _collect_stream(
+    tokens: AsyncIterator[str],
+    build_final: Callable[[str], BaseModel],
+    error_prefix: str,
+) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Terusin token dari service sebagai (event, data), ditutup frame `done`
+    yang isinya response lengkap plus timing (ttft_ms, total_ms).
+    """
+    start = time.perf_counter()
+    ttft_ms = None
+    parts: list[str] = []
+    try:
+        async for token in tokens:
+            if ttft_ms is None:
+                ttft_ms = round((time.perf_counter() - start) * 1000, 2)
+            parts.append(token)
+            yield "token", {"token": token}
+    except Exception as e:
+        yield "error", {"detail": f"{error_prefix}: {str(e)}"}
+        return
+
+    final = build_final("".join(parts)).model_dump()
+    final["timing"] = {
+        "ttft_ms": ttft_ms,
+        "total_ms": round((time.perf_counter() - start) * 1000, 2),
+        "tokens": len(parts),
+    }
+    yield "done", final
+
+
+async def _open_session(request: ChatRequest) -> Optional[TutorSession]:
+    """
+    Buka sesi server-side: lanjutin session_id yang ada, atau bikin baru kalau start_session
+    (sesi baru di-seed dari chat_history). session_id yang gak dikenal → 404.
+    """
+    if request.session_id is None and not request.start_session:
+        return None
+    session = await tutor_sessions.open(request.session_id, request.tutor_persona, request.history_dicts())
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
+
+def _check_hint_request(request: HintRequest) -> None:
+    """Hint butuh konteks: challenge_id yang ada di kurikulum, atau challenge_description."""
+    if not request.challenge_description.strip() and curriculum.get_challenge(request.challenge_id) is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Challenge '{request.challenge_id}' gak ada di kurikulum dan challenge_description kosong",
+        )
+
+
+async def _chat_stream(request: ChatRequest) -> tuple[AsyncIterator[str], Callable[[str], BaseModel]]:
+    """Pack prompt sekali di depan, biar frame `done` bisa bawa prompt_tokens."""
+    session = await _open_session(request)
+    packed = pack_chat_prompt(
+        request.message, request.context, request.tutor_persona, request.history_dicts(), session
+    )
+    tokens = stream_ai_response(
+        user_message=request.message,
+        tutor_persona=request.tutor_persona,
+        packed=packed,
+        session=session,
+    )
+    build_final = lambda message: TutorResponse(
+        persona=request.tutor_persona,
+        message=message,
+        prompt_tokens=packed.prompt_tokens,
+        session_id=session.session_id if session is not None else None,
+    )
+    return tokens, build_final
+
+
 # ============================================
 # ENDPOINTS
 # ============================================
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat_with_tutor(request: ChatRequest):
+async def chat_with_tutor(request: ChatRequest, http_request: Request):
     """
     Chat with an AI tutor.
     
     - **RENDY**: Data Analyst tutor - practical, SQL/Excel focused
     - **ABDUL**: Data Scientist tutor - ML/Python focused, more theoretical
+    
+    Dibatesin TUTOR_DEADLINE_SECONDS: kalau habis di tengah jawaban, yang udah jadi dibalikin
+    (`partial: true`). Client disconnect → call Groq-nya dibatalin.
+    
+    `start_session: true` → server bikin sesi baru, `session_id`-nya ada di response.
     """
+    session = await _open_session(request)
     try:
-        response: TutorResponse = await get_ai_response(
-            user_message=request.message,
-            context=request.context,
-            tutor_persona=request.tutor_persona,
-            chat_history=request.chat_history,
+        response: TutorResponse = await cancel_on_disconnect(
+            http_request,
+            get_ai_response(
+                user_message=request.message,
+                context=request.context,
+                tutor_persona=request.tutor_persona,
+                chat_history=request.history_dicts(),
+                session=session,
+                deadline=Deadline(TUTOR_DEADLINE_SECONDS),
+            ),
+            "tutor.chat",
         )
         
         return ChatResponse(
             persona=response.persona,
             message=response.message,
             suggestions=response.suggestions,
+            prompt_tokens=response.prompt_tokens,
+            session_id=response.session_id,
+            partial=response.partial,
         )
         
+    except ClientDisconnected as e:
+        raise HTTPException(status_code=499, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"Tutor timeout: {str(e)}")
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -106,8 +264,81 @@ async def chat_with_tutor(request: ChatRequest):
         )
 
 
+@router.post("/chat/stream")
+async def chat_with_tutor_stream(request: ChatRequest):
+    """
+    Chat dengan AI tutor, jawaban di-stream sebagai Server-Sent Events.
+    
+    - `event: token` → `{"token": "..."}` tiap potongan jawaban
+    - `event: done` → TutorResponse lengkap + `timing` (ttft_ms, total_ms, tokens)
+    - `event: error` → `{"detail": "..."}` kalau service gagal di tengah jalan
+    """
+    tokens, build_final = await _chat_stream(request)
+
+    async def events():
+        async for event, data in _collect_stream(tokens, build_final, "Tutor service error"):
+            yield sse_event(event, data)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.websocket("/chat/ws")
+async def chat_with_tutor_ws(websocket: WebSocket):
+    """
+    Chat dengan AI tutor lewat WebSocket.
+    
+    Client kirim ChatRequest (JSON) per pesan; server bales frame
+    `{"event": "token" | "done" | "error", "data": {...}}` sama kayak versi SSE.
+    Error yang gak ketangkep di tengah jalan → frame `error`, lalu koneksi ditutup (1011).
+    """
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                request = ChatRequest.model_validate(await websocket.receive_json())
+            except (ValidationError, ValueError) as e:
+                await websocket.send_json({"event": "error", "data": {"detail": str(e)}})
+                continue
+
+            try:
+                tokens, build_final = await _chat_stream(request)
+            except HTTPException as e:  # Misal session_id gak dikenal
+                await websocket.send_json({"event": "error", "data": {"detail": e.detail}})
+                continue
+            async for event, data in _collect_stream(tokens, build_final, "Tutor service error"):
+                await websocket.send_json({"event": event, "data": data})
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        # Client bisa aja udah putus duluan: gagal kirim/tutup gak usah dipeduliin
+        with contextlib.suppress(Exception):
+            await websocket.send_json({"event": "error", "data": {"detail": f"Tutor service error: {str(e)}"}})
+            await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+
+
+@router.get("/sessions/{session_id}", response_model=TutorSessionResponse)
+async def get_tutor_session(session_id: str):
+    """
+    Liat isi sesi tutor: running summary + pesan terbaru yang masih disimpen verbatim.
+    """
+    session = await tutor_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return TutorSessionResponse(**session.to_dict())
+
+
+@router.delete("/sessions/{session_id}")
+async def delete_tutor_session(session_id: str):
+    """
+    Hapus sesi tutor (mulai ngobrol dari nol).
+    """
+    if not await tutor_sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"deleted": session_id}
+
+
 @router.post("/hint", response_model=HintResponse)
-async def get_hint(request: HintRequest):
+async def get_hint(request: HintRequest, http_request: Request):
     """
     Get a hint for the current challenge.
     
@@ -115,13 +346,26 @@ async def get_hint(request: HintRequest):
     - **Level 1**: Subtle nudge in the right direction
     - **Level 2**: Explains the concept with a small example
     - **Level 3**: Detailed walkthrough (but doesn't give the answer)
+    
+    Challenge kurikulum cukup kirim `challenge_id`, deskripsinya diambil dari curriculum store.
+    
+    Dibatesin TUTOR_DEADLINE_SECONDS (504 kalau habis); client disconnect → call Groq-nya dibatalin.
     """
+    _check_hint_request(request)
     try:
-        hint = await get_contextual_hint(
-            challenge_description=request.challenge_description,
-            user_code=request.user_code,
-            tutor_persona=request.tutor_persona,
-            hint_level=request.hint_level,
+        hint = await cancel_on_disconnect(
+            http_request,
+            get_contextual_hint(
+                challenge_description=request.challenge_description,
+                user_code=request.user_code,
+                tutor_persona=request.tutor_persona,
+                hint_level=request.hint_level,
+                challenge_id=request.challenge_id,
+                language=request.language,
+                use_cache=request.use_cache,
+                deadline=Deadline(TUTOR_DEADLINE_SECONDS),
+            ),
+            "tutor.hint",
         )
         
         return HintResponse(
@@ -130,6 +374,10 @@ async def get_hint(request: HintRequest):
             persona=request.tutor_persona,
         )
         
+    except ClientDisconnected as e:
+        raise HTTPException(status_code=499, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"Hint timeout: {str(e)}")
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -137,6 +385,36 @@ async def get_hint(request: HintRequest):
         )
 
 
+@router.post("/hint/stream")
+async def get_hint_stream(request: HintRequest):
+    """
+    Versi streaming dari /hint (Server-Sent Events).
+    
+    Frame `done` berisi HintResponse lengkap + `timing`.
+    """
+    _check_hint_request(request)
+    tokens = stream_contextual_hint(
+        challenge_description=request.challenge_description,
+        user_code=request.user_code,
+        tutor_persona=request.tutor_persona,
+        hint_level=request.hint_level,
+        challenge_id=request.challenge_id,
+        language=request.language,
+        use_cache=request.use_cache,
+    )
+    build_final = lambda hint: HintResponse(
+        hint=hint,
+        hint_level=request.hint_level,
+        persona=request.tutor_persona,
+    )
+
+    async def events():
+        async for event, data in _collect_stream(tokens, build_final, "Hint service error"):
+            yield sse_event(event, data)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.get("/personas")
 async def get_personas():
     """
@@ -0,0 +1,486 @@
+# Data Academy - Achievement Rules Engine
+# `Achievement.criteria` (JSON bebas) di-compile sekali jadi predicate, lalu di-index per event
+# yang bisa ngubah hasilnya. Tiap event cuma ngecek rule yang kena, bukan semua achievement.
+#
+# Event:
+#   SUBMISSION_GRADED : submission selesai di-grade (challenge_id + skor)
+#   LEVEL_COMPLETED   : level jadi COMPLETED (dari progress engine)
+#   STREAK            : streak harian user berubah (diturunin dari SUBMISSION_GRADED)
+#
+# Criteria yang didukung:
+#   {"type": "complete_level", "levelId": "ANALYST-L1"}
+#   {"type": "complete_levels", "count": 3, "trackCode": "ANALYST"}     # trackCode opsional
+#   {"type": "score", "min": 90, "challengeId": "DA-L1-C01"}            # challengeId opsional
+#   {"type": "perfect_score", "challengeId": "..."}                     # = score min 100
+#   {"type": "submissions", "count": 10}
+#   {"type": "streak", "days": 7}
+#   {"type": "all" / "any", "rules": [...]}  # isinya cuma rule berbasis state (bukan score)
+#
+# Index:
+#   - keyed     : (event, key) → rule. complete_level per levelId, score per challengeId (+ wildcard)
+#   - threshold : counter (submissions / levels per track / streak) → threshold urut; bisect
+#                 buat nyari rule yang baru lewat threshold
+#   - composite : all/any di-index per "trigger" anak-anaknya: level tertentu selesai, atau
+#                 counter pas nyentuh nilai threshold-nya (counter naik 1-1 / reset ke 1, jadi
+#                 cukup lookup nilai persis). Composite cuma dicek pas salah satu anaknya berubah
+# Award idempotent: set achievement per user di memori + ON CONFLICT DO NOTHING di database.
+
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable, Optional
+
+from app.services.metrics import metrics
+from app.services.persistence import AchievementRecord, persistence, utcnow
+from app.services.progress import ProgressEngine, progress_engine
+
+
+SUBMISSION_GRADED = "SUBMISSION_GRADED"
+LEVEL_COMPLETED = "LEVEL_COMPLETED"
+STREAK = "STREAK"
+
+
+class CriteriaError(ValueError):
+    """Criteria achievement gak valid (type gak dikenal, field wajib kosong, dll)."""
+
+
+# ============================================
+# EVENT + STATE
+# ============================================
+
+@dataclass
+class AchievementEvent:
+    type: str
+    user_id: str
+    at: datetime
+    challenge_id: Optional[str] = None
+    score: Optional[int] = None
+    level_id: Optional[str] = None
+    track_code: Optional[str] = None
+
+
+class UserStats:
+    """State per user yang dibaca rule. __slots__ biar hemat memori di ratusan ribu user."""
+
+    __slots__ = ("submissions", "levels", "levels_by_track", "streak", "last_day", "awarded")
+
+    def __init__(self):
+        self.submissions = 0
+        self.levels: set[str] = set()
+        self.levels_by_track: dict[str, int] = {}
+        self.streak = 0
+        self.last_day: Optional[date] = None
+        self.awarded: set[str] = set()
+
+    def counter(self, name: str, scope: Optional[str] = None) -> int:
+        if name == "submissions":
+            return self.submissions
+        if name == "streak":
+            return self.streak
+        if scope is not None:
+            return self.levels_by_track.get(scope, 0)
+        return len(self.levels)
+
+    def touch_day(self, day: date) -> bool:
+        """Catet hari aktif. Return True kalau streak berubah."""
+        if self.last_day is None or day > self.last_day + timedelta(days=1):
+            self.streak, self.last_day = 1, day
+            return True
+        if day == self.last_day + timedelta(days=1):
+            self.streak, self.last_day = self.streak + 1, day
+            return True
+        return False  # Hari yang sama, atau event telat dari hari sebelumnya
+
+
+# ============================================
+# COMPILER
+# ============================================
+
+StatePredicate = Callable[[UserStats], bool]
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """
+    Hasil compile satu achievement.
+    `check(stats, event)` = predicate lengkap (dipake backfill); index nentuin kapan dia dicek.
+    """
+    achievement_id: str
+    name: str
+    events: frozenset[str]
+    check: Callable[[UserStats, Optional[AchievementEvent]], bool]
+    # ("keyed", event, key, predicate event) | ("threshold", counter, scope, nilai) | ("composite", trigger)
+    index: tuple
+
+
+def _required(criteria: dict, key: str, kind: type = str):
+    value = criteria.get(key)
+    if value is None or not isinstance(value, kind) or isinstance(value, bool):
+        raise CriteriaError(f"'{criteria.get('type')}' butuh field '{key}' ({kind.__name__})")
+    return value
+
+
+def _count(criteria: dict, key: str) -> int:
+    value = _required(criteria, key, int)
+    if value < 1:
+        raise CriteriaError(f"'{key}' minimal 1")
+    return value
+
+
+def _trigger(index: tuple) -> tuple:
+    """Key trigger composite buat satu anak: ("level", levelId) atau (counter, scope, nilai)."""
+    if index[0] == "keyed":
+        return ("level", index[2])
+    return index[1:]
+
+
+def _state_rule(criteria: dict) -> tuple[frozenset[str], StatePredicate, tuple]:
+    """Compile rule berbasis state. Return (event, predicate, index keyed/threshold/composite)."""
+    kind = criteria.get("type")
+    if kind == "complete_level":
+        level_id = _required(criteria, "levelId")
+        return frozenset({LEVEL_COMPLETED}), lambda stats: level_id in stats.levels, ("keyed", LEVEL_COMPLETED, level_id)
+    if kind == "complete_levels":
+        count = _count(criteria, "count")
+        track_code = criteria.get("trackCode")
+        if track_code is not None and not isinstance(track_code, str):
+            raise CriteriaError("'trackCode' harus string")
+        return (
+            frozenset({LEVEL_COMPLETED}),
+            lambda stats: stats.counter("levels", track_code) >= count,
+            ("threshold", "levels", track_code, count),
+        )
+    if kind == "submissions":
+        count = _count(criteria, "count")
+        return (
+            frozenset({SUBMISSION_GRADED}),
+            lambda stats: stats.submissions >= count,
+            ("threshold", "submissions", None, count),
+        )
+    if kind == "streak":
+        days = _count(criteria, "days")
+        return frozenset({STREAK}), lambda stats: stats.streak >= days, ("threshold", "streak", None, days)
+    if kind in ("all", "any"):
+        children = criteria.get("rules")
+        if not isinstance(children, list) or not children:
+            raise CriteriaError(f"'{kind}' butuh 'rules' (list, gak kosong)")
+        compiled = [_state_rule(_as_dict(child)) for child in children]
+        events = frozenset().union(*(events for events, _, _ in compiled))
+        predicates = tuple(predicate for _, predicate, _ in compiled)
+        # Composite bersarang: trigger-nya gabungan trigger semua daun
+        triggers = frozenset().union(*(
+            index[1] if index[0] == "composite" else {_trigger(index)} for _, _, index in compiled
+        ))
+        if kind == "all":
+            return events, lambda stats: all(predicate(stats) for predicate in predicates), ("composite", triggers)
+        return events, lambda stats: any(predicate(stats) for predicate in predicates), ("composite", triggers)
+    if kind in ("score", "perfect_score"):
+        raise CriteriaError(f"'{kind}' cuma bisa jadi rule paling luar (gak bisa di dalam all/any)")
+    raise CriteriaError(f"Tipe criteria gak dikenal: {kind!r}")
+
+
+def _as_dict(criteria) -> dict:
+    if not isinstance(criteria, dict):
+        raise CriteriaError("Criteria harus object JSON")
+    return criteria
+
+
+def compile_criteria(achievement_id: str, name: str, criteria) -> CompiledRule:
+    """Compile satu criteria JSON jadi CompiledRule. Raise CriteriaError kalau gak valid."""
+    criteria = _as_dict(criteria)
+    kind = criteria.get("type")
+    if kind in ("score", "perfect_score"):
+        minimum = 100 if kind == "perfect_score" else _required(criteria, "min", int)
+        challenge_id = criteria.get("challengeId")
+        if challenge_id is not None and not isinstance(challenge_id, str):
+            raise CriteriaError("'challengeId' harus string")
+
+        def matches(event: AchievementEvent) -> bool:
+            return event.score is not None and event.score >= minimum
+
+        def check(stats: UserStats, event: Optional[AchievementEvent]) -> bool:
+            return (
+                event is not None
+                and event.type == SUBMISSION_GRADED
+                and (challenge_id is None or event.challenge_id == challenge_id)
+                and matches(event)
+            )
+
+        return CompiledRule(
+            achievement_id, name, frozenset({SUBMISSION_GRADED}), check,
+            ("keyed", SUBMISSION_GRADED, challenge_id, matches),
+        )
+
+    events, predicate, index = _state_rule(criteria)
+    if index[0] == "keyed":
+        index = (*index, None)
+    return CompiledRule(achievement_id, name, events, lambda stats, event: predicate(stats), index)
+
+
+@dataclass
+class _RuleIndex:
+    """Snapshot rule yang udah di-compile + index-nya. Reload = snapshot baru."""
+    rules: dict[str, CompiledRule] = field(default_factory=dict)
+    # (event, key) → [(achievement_id, predicate event / None)]
+    keyed: dict[tuple[str, Optional[str]], list[tuple[str, Optional[Callable]]]] = field(default_factory=dict)
+    # (counter, scope) → (threshold urut naik, achievement_id sejajar)
+    thresholds: dict[tuple[str, Optional[str]], tuple[list[int], list[str]]] = field(default_factory=dict)
+    # trigger (("level", levelId) / (counter, scope, nilai)) → composite yang perlu dicek
+    composite: dict[tuple, list[CompiledRule]] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+
+
+def build_rule_index(definitions: Iterable[tuple]) -> _RuleIndex:
+    """Compile semua (id, name, criteria). Criteria invalid dicatet di `errors` dan di-skip."""
+    index = _RuleIndex()
+    pending_thresholds: dict[tuple[str, Optional[str]], list[tuple[int, str]]] = {}
+    for achievement_id, name, criteria in definitions:
+        if criteria is None:
+            continue  # Achievement manual (dikasih admin), gak ada rule otomatis
+        try:
+            rule = compile_criteria(achievement_id, name, criteria)
+        except CriteriaError as e:
+            index.errors[achievement_id] = str(e)
+            continue
+        index.rules[achievement_id] = rule
+        kind = rule.index[0]
+        if kind == "keyed":
+            _, event_type, key, predicate = rule.index
+            index.keyed.setdefault((event_type, key), []).append((achievement_id, predicate))
+        elif kind == "threshold":
+            _, counter, scope, value = rule.index
+            pending_thresholds.setdefault((counter, scope), []).append((value, achievement_id))
+        else:
+            for trigger in rule.index[1]:
+                index.composite.setdefault(trigger, []).append(rule)
+    for key, entries in pending_thresholds.items():
+        entries.sort()
+        index.thresholds[key] = ([value for value, _ in entries], [achievement_id for _, achievement_id in entries])
+    return index
+
+
+# ============================================
+# ENGINE
+# ============================================
+
+class AchievementEngine:
+    """
+    Evaluasi achievement per event. Dipake dari event loop aja (state per user gak di-lock).
+
+    `on_submission_graded` / `on_level_completed` balikin AchievementRecord yang baru didapet
+    (buat disimpen ke UserAchievement lewat persistence).
+    """
+
+    def __init__(self, progress: Optional[ProgressEngine] = None):
+        self._progress = progress
+        self._index = _RuleIndex()
+        self._users: dict[str, UserStats] = {}
+        self.events = 0
+        self.evaluations = 0
+        self.awards = 0
+        self.names: dict[str, str] = {}
+        self.last_backfill_ms = 0.0
+
+    async def startup(self) -> None:
+        """Load definisi dari tabel Achievement + seed state user dari database, lalu backfill."""
+        if not persistence.enabled:
+            return
+        definitions, awarded, activity = await persistence.load_achievements()
+        self.set_rules(definitions)
+        self.seed(awarded, activity)
+        for record in self.backfill():
+            await persistence.save_achievement(record)
+
+    def set_rules(self, definitions: Iterable[tuple]) -> dict:
+        """Ganti semua rule (id, name, criteria). Return ringkasan compile (jumlah rule + error)."""
+        definitions = list(definitions)
+        self._index = build_rule_index(definitions)
+        self.names = {achievement_id: name for achievement_id, name, _ in definitions}
+        if self._index.errors:
+            metrics.increment("achievements.invalid_criteria", len(self._index.errors))
+        return {"rules": len(self._index.rules), "errors": dict(self._index.errors)}
+
+    def seed(self, awarded: Iterable[tuple], activity: Iterable[tuple]) -> None:
+        """
+        Bangun state user dari database: achievement yang udah didapet, jumlah submission + streak
+        dari aktivitas harian (userId, tanggal, jumlah), dan level COMPLETED dari progress engine.
+        """
+        users: dict[str, UserStats] = {}
+        for user_id, achievement_id in awarded:
+            users.setdefault(user_id, UserStats()).awarded.add(achievement_id)
+        for user_id, day, count in sorted(activity, key=lambda row: (row[0], row[1])):
+            stats = users.setdefault(user_id, UserStats())
+            stats.submissions += count
+            stats.touch_day(day)
+        if self._progress is not None:
+            for user_id, level_id, track_code in self._progress.completed_levels():
+                stats = users.setdefault(user_id, UserStats())
+                stats.levels.add(level_id)
+                stats.levels_by_track[track_code] = stats.levels_by_track.get(track_code, 0) + 1
+        self._users = users
+
+    # ----------------------------------------
+    # Event
+    # ----------------------------------------
+
+    def on_submission_graded(
+        self, user_id: str, challenge_id: str, score: int, at: Optional[datetime] = None,
+    ) -> list[AchievementRecord]:
+        event = AchievementEvent(SUBMISSION_GRADED, user_id, at or utcnow(), challenge_id=challenge_id, score=score)
+        stats = self._stats(user_id)
+        stats.submissions += 1
+        awards = self._process(stats, event)
+        if stats.touch_day(event.at.date()):
+            awards += self._process(stats, AchievementEvent(STREAK, user_id, event.at))
+        return awards
+
+    def on_level_completed(
+        self, user_id: str, level_id: str, track_code: str, at: Optional[datetime] = None,
+    ) -> list[AchievementRecord]:
+        stats = self._stats(user_id)
+        if level_id in stats.levels:
+            return []
+        stats.levels.add(level_id)
+        stats.levels_by_track[track_code] = stats.levels_by_track.get(track_code, 0) + 1
+        event = AchievementEvent(LEVEL_COMPLETED, user_id, at or utcnow(), level_id=level_id, track_code=track_code)
+        return self._process(stats, event)
+
+    def _stats(self, user_id: str) -> UserStats:
+        stats = self._users.get(user_id)
+        if stats is None:
+            stats = self._users[user_id] = UserStats()
+        return stats
+
+    def _process(self, stats: UserStats, event: AchievementEvent) -> list[AchievementRecord]:
+        """Cek cuma rule yang di-index buat event ini."""
+        self.events += 1
+        index = self._index
+        awarded = stats.awarded
+        awards: list[AchievementRecord] = []
+
+        # Keyed: rule buat key persis (challenge / level) + wildcard
+        key = event.challenge_id if event.type == SUBMISSION_GRADED else event.level_id
+        for bucket in (index.keyed.get((event.type, key)), index.keyed.get((event.type, None)) if key else None):
+            if not bucket:
+                continue
+            for achievement_id, predicate in bucket:
+                self.evaluations += 1
+                if achievement_id not in awarded and (predicate is None or predicate(event)):
+                    awards.append(self._award(stats, event, achievement_id))
+
+        # Threshold + composite: counter (dan level) yang berubah di event ini
+        if event.type == SUBMISSION_GRADED:
+            triggers = (("submissions", None, stats.submissions),)
+        elif event.type == STREAK:
+            triggers = (("streak", None, stats.streak),)
+        elif event.type == LEVEL_COMPLETED:
+            triggers = (
+                ("levels", None, len(stats.levels)),
+                ("levels", event.track_code, stats.levels_by_track[event.track_code]),
+                ("level", event.level_id),
+            )
+        else:
+            triggers = ()
+        for trigger in triggers:
+            if len(trigger) == 3:
+                self._thresholds(stats, event, trigger[:2], trigger[2], awards)
+            for rule in index.composite.get(trigger, ()):
+                self.evaluations += 1
+                if rule.achievement_id not in awarded and rule.check(stats, event):
+                    awards.append(self._award(stats, event, rule.achievement_id))
+        return awards
+
+    def _thresholds(
+        self,
+        stats: UserStats,
+        event: AchievementEvent,
+        key: tuple[str, Optional[str]],
+        value: int,
+        awards: list[AchievementRecord],
+    ) -> None:
+        entry = self._index.thresholds.get(key)
+        if entry is None:
+            return
+        values, achievement_ids = entry
+        # Counter naik satu-satu, jadi threshold di bawahnya udah ke-award duluan: jalan mundur
+        # dari threshold tertinggi yang kelewat sampe ketemu yang udah didapet
+        position = bisect_right(values, value)
+        while position > 0:
+            position -= 1
+            achievement_id = achievement_ids[position]
+            self.evaluations += 1
+            if achievement_id in stats.awarded:
+                break
+            awards.append(self._award(stats, event, achievement_id))
+
+    def _award(self, stats: UserStats, event: AchievementEvent, achievement_id: str) -> AchievementRecord:
+        stats.awarded.add(achievement_id)
+        self.awards += 1
+        metrics.increment("achievements.awarded")
+        return AchievementRecord(user_id=event.user_id, achievement_id=achievement_id, earned_at=event.at)
+
+    # ----------------------------------------
+    # Backfill
+    # ----------------------------------------
+
+    def backfill(self, users: Optional[Iterable[str]] = None) -> list[AchievementRecord]:
+        """
+        Cek semua rule berbasis state ke semua user (abis seed / rule baru ditambah). O(user x rule),
+        cuma dipanggil pas startup dan reload. Rule score butuh event, jadi gak ikut di-backfill.
+        """
+        start = time.perf_counter()
+        now = utcnow()
+        rules = [rule for rule in self._index.rules.values() if rule.index[:2] != ("keyed", SUBMISSION_GRADED)]
+        awards = []
+        for user_id in (users if users is not None else list(self._users)):
+            stats = self._users.get(user_id)
+            if stats is None:
+                continue
+            event = AchievementEvent(STREAK, user_id, now)
+            for rule in rules:
+                if rule.achievement_id not in stats.awarded and rule.check(stats, None):
+                    awards.append(self._award(stats, event, rule.achievement_id))
+        self.last_backfill_ms = (time.perf_counter() - start) * 1000
+        return awards
+
+    # ----------------------------------------
+    # Read
+    # ----------------------------------------
+
+    def user_achievements(self, user_id: str) -> list[dict]:
+        stats = self._users.get(user_id)
+        if stats is None:
+            return []
+        return [
+            {"achievement_id": achievement_id, "name": self.names.get(achievement_id)}
+            for achievement_id in sorted(stats.awarded)
+        ]
+
+    def stats(self) -> dict:
+        index = self._index
+        return {
+            "rules": len(index.rules),
+            "invalid": len(index.errors),
+            "keyed_buckets": len(index.keyed),
+            "threshold_buckets": len(index.thresholds),
+            "composite_triggers": len(index.composite),
+            "users": len(self._users),
+            "events": self.events,
+            "evaluations": self.evaluations,
+            "awards": self.awards,
+            "last_backfill_ms": round(self.last_backfill_ms, 2),
+        }
+
+    def describe(self) -> dict:
+        """Rule per event type + criteria yang gagal di-compile (buat admin)."""
+        index = self._index
+        by_event: dict[str, list[str]] = {}
+        for rule in index.rules.values():
+            for event_type in rule.events:
+                by_event.setdefault(event_type, []).append(rule.achievement_id)
+        return {"by_event": by_event, "errors": dict(index.errors)}
+
+
+# Global instance (level COMPLETED di-seed dari progress engine)
+achievement_engine = AchievementEngine(progress_engine)
@@ -1,23 +1,51 @@
 # Data Academy - AI Tutor Service
 # Menggunakan Groq API untuk Rendy (Analyst) dan Abdul (Scientist)
 
+import hashlib
 import os
-from typing import Literal, Optional
+import time
+from typing import AsyncIterator, Literal, Optional
 from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import Runnable
 from pydantic import BaseModel
 
+from app.services.code_normalize import CodeLanguage, code_fingerprint, guess_language
+from app.services.context_packer import (
+    TUTOR_HISTORY_MESSAGE_MAX_TOKENS,
+    PackedContext,
+    fit_text,
+    pack_context,
+)
+from app.services.curriculum import curriculum
+from app.services.curriculum_search import curriculum_search
+from app.services.deadline import Deadline, DeadlineExceeded, within
+from app.services.llm_pool import get_pooled_llm
+from app.services.llm_scheduler import DEFAULT_COMPLETION_TOKENS, estimate_tokens, scheduler
+from app.services.metrics import metrics
+from app.services.model_router import RouteDecision, model_router
+from app.services.result_cache import ResultCache, make_cache_key
+from app.services.single_flight import SingleFlight
+from app.services.tutor_sessions import TUTOR_SESSION_SUMMARY_MAX_TOKENS, TutorSession, tutor_sessions
+
 
 # Type definitions
 TutorPersona = Literal["RENDY", "ABDUL"]
 
+# Track kurikulum yang diajarin tiap persona (buat retrieval materi)
+PERSONA_TRACKS = {"RENDY": "ANALYST", "ABDUL": "SCIENTIST"}
+
 
 class TutorResponse(BaseModel):
     """Response dari AI Tutor"""
     persona: str
     message: str
     suggestions: Optional[list[str]] = None
+    prompt_tokens: Optional[int] = None  # Ukuran prompt setelah packing (buat tracking latency)
+    session_id: Optional[str] = None
+    partial: bool = False  # Jawaban kepotong karena deadline request habis
 
 
 # ============================================
@@ -25,7 +53,22 @@ class TutorResponse(BaseModel):
 # ============================================
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_MODEL = "llama-3.1-70b-versatile"  # Model paling capable di Groq
+# Model per jenis request (chat, hint, ringkasan sesi) diatur model_router / config/model_routing.json
+
+# Hint cache (key: hash deskripsi challenge + level + persona + fingerprint code yang udah dinormalisasi)
+HINT_CACHE_MAX_ENTRIES = int(os.getenv("HINT_CACHE_MAX_ENTRIES", "4096"))
+HINT_CACHE_TTL_SECONDS = float(os.getenv("HINT_CACHE_TTL_SECONDS", "604800"))
+HINT_CACHE_SQLITE_PATH = os.getenv("HINT_CACHE_SQLITE_PATH") or None  # Kosong = memory aja
+
+hint_cache = ResultCache(
+    namespace="hints",
+    max_entries=HINT_CACHE_MAX_ENTRIES,
+    ttl_seconds=HINT_CACHE_TTL_SECONDS,
+    sqlite_path=HINT_CACHE_SQLITE_PATH,
+)
+
+# Hint identik yang lagi in-flight (satu kelas minta hint barengan) → satu LLM call aja
+hint_flights = SingleFlight("hint")
 
 
 # ============================================
@@ -165,13 +208,196 @@ Inget: Lo lagi training scientist, bukan script kiddies. Understanding > Memoriz
 # AI TUTOR SERVICE (GROQ)
 # ============================================
 
-def get_llm(model_name: str = GROQ_MODEL, temperature: float = 0.7) -> ChatGroq:
-    """Initialize Groq LLM dengan parameter yang ditentukan."""
-    return ChatGroq(
-        model=model_name,
-        temperature=temperature,
-        api_key=GROQ_API_KEY,
+CHAT_TEMPERATURE = 0.7
+HINT_TEMPERATURE = 0.5
+SUMMARY_TEMPERATURE = 0.2
+
+HINT_INSTRUCTIONS = {
+    1: "Kasih hint yang subtle banget - cuma arahin ke direction yang bener tanpa kasih jawaban.",
+    2: "Kasih hint yang moderate - jelasin konsep yang mungkin mereka miss, kasih contoh kecil.",
+    3: "Kasih hint yang detail - walk through approach-nya step by step, tapi biarin mereka nulis code sendiri.",
+}
+
+
+# ============================================
+# PROMPT TEMPLATES (DI-COMPILE SEKALI PAS IMPORT)
+# ============================================
+#
+# Layout semua prompt: persona prompt (gede, sama persis byte-per-byte) selalu jadi message
+# pertama, konten yang berubah per request masuk message setelahnya. Jadi prefix-nya bisa
+# di-cache di sisi provider, dan template gak perlu di-parse ulang tiap request.
+
+HINT_GUIDANCE = "Lo lagi bantuin murid yang stuck di coding challenge. Kasih guidance yang helpful tanpa langsung jawab problemnya."
+
+HINT_HUMAN_TEMPLATE = """
+CHALLENGE: {challenge}
+
+CODE MURID SAAT INI:
+```
+{code}
+```
+
+Kasih hint yang sesuai buat bantu murid maju.
+"""
+
+
+def _literal(text: str) -> str:
+    """Escape kurung kurawal biar teks dianggap literal sama ChatPromptTemplate."""
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def hint_system_prompt(tutor_persona: TutorPersona, hint_level: int) -> str:
+    """System prompt hint: persona di depan, instruksi level di belakang."""
+    return f"""{PERSONA_PROMPTS[tutor_persona]}
+
+INSTRUKSI HINT: {HINT_INSTRUCTIONS[hint_level]}
+
+{HINT_GUIDANCE}
+"""
+
+
+def _compile_chat_prompt(tutor_persona: TutorPersona) -> ChatPromptTemplate:
+    return ChatPromptTemplate.from_messages([
+        ("system", _literal(PERSONA_PROMPTS[tutor_persona])),
+        MessagesPlaceholder("context", optional=True),
+        MessagesPlaceholder("history", optional=True),
+        ("human", "{input}"),
+    ])
+
+
+def _compile_hint_prompt(tutor_persona: TutorPersona, hint_level: int) -> ChatPromptTemplate:
+    return ChatPromptTemplate.from_messages([
+        ("system", _literal(hint_system_prompt(tutor_persona, hint_level))),
+        ("human", HINT_HUMAN_TEMPLATE),
+    ])
+
+
+CHAT_PROMPTS: dict[str, ChatPromptTemplate] = {
+    persona: _compile_chat_prompt(persona) for persona in PERSONA_PROMPTS
+}
+HINT_PROMPTS: dict[tuple[str, int], ChatPromptTemplate] = {
+    (persona, level): _compile_hint_prompt(persona, level)
+    for persona in PERSONA_PROMPTS
+    for level in HINT_INSTRUCTIONS
+}
+
+
+def get_llm(model_name: str, temperature: float = CHAT_TEMPERATURE) -> ChatGroq:
+    """Ambil Groq LLM dari registry (client-nya di-share, gak dibikin ulang tiap request)."""
+    return get_pooled_llm(model_name, temperature).llm
+
+
+def pack_chat_prompt(
+    user_message: str,
+    context: Optional[str],
+    tutor_persona: TutorPersona,
+    chat_history: Optional[list[dict]],
+    session: Optional[TutorSession] = None,
+) -> PackedContext:
+    """
+    Muatin konteks + history terbaru ke budget token prompt (lihat context_packer).
+    Kalau ada sesi server-side, history + summary diambil dari sesi (chat_history diabaikan).
+    Materi kurikulum track persona yang relevan sama pesan murid ikut disisipin (BM25, lokal).
+    """
+    system_prompt = PERSONA_PROMPTS.get(tutor_persona, PERSONA_PROMPTS["RENDY"])
+    reference = curriculum_search.context_for(user_message, track_code=PERSONA_TRACKS.get(tutor_persona))
+    if session is not None:
+        return pack_context(
+            system_prompt, user_message, context, list(session.turns),
+            summary=session.summary or None, reference=reference,
+        )
+    return pack_context(system_prompt, user_message, context, chat_history, reference=reference)
+
+
+def _build_chat_inputs(packed: PackedContext, user_message: str) -> dict:
+    """
+    Isi variable prompt chat. Semua yang berubah per request masuk sini, urut dari
+    yang paling jarang berubah (konteks lesson, summary) ke yang paling sering (history, pesan baru).
+    """
+    
+    # Konteks lesson (udah dipotong sesuai budget) + ringkasan percakapan lama dari sesi,
+    # lalu materi kurikulum hasil retrieval (paling belakang: berubah tiap pesan)
+    sections = []
+    if packed.context:
+        sections.append(f"KONTEKS SAAT INI:\n{packed.context}")
+    if packed.summary:
+        sections.append(f"RINGKASAN PERCAKAPAN SEBELUMNYA:\n{packed.summary}")
+    if packed.reference:
+        sections.append(f"MATERI KURIKULUM TERKAIT (pake kalau relevan):\n{packed.reference}")
+    context_messages = [SystemMessage(content="\n\n".join(sections))] if sections else []
+    
+    # History jadi message beneran (bukan teks di system prompt): append-only antar giliran,
+    # jadi prefix prompt giliran sebelumnya tetep sama persis
+    history_messages = [
+        HumanMessage(content=msg["content"]) if msg["role"] == "user" else AIMessage(content=msg["content"])
+        for msg in packed.history
+    ]
+    
+    return {"context": context_messages, "history": history_messages, "input": user_message}
+
+
+def _build_chat_chain(
+    packed: PackedContext,
+    tutor_persona: TutorPersona,
+    user_message: str,
+) -> tuple[Runnable, dict, RouteDecision]:
+    """
+    Ambil prompt chat yang udah di-compile + susun inputs-nya (dipake versi biasa dan streaming).
+    Return (chain, inputs, model yang dipilih router).
+    """
+    decision = model_router.choose("tutor.chat")
+    prompt = CHAT_PROMPTS.get(tutor_persona, CHAT_PROMPTS["RENDY"])
+    chain = prompt | get_llm(decision.model, CHAT_TEMPERATURE) | StrOutputParser()
+    return chain, _build_chat_inputs(packed, user_message), decision
+
+
+def _record_prompt_size(packed: PackedContext) -> None:
+    metrics.increment("tutor.chat.requests")
+    metrics.increment("tutor.chat.prompt_tokens", packed.prompt_tokens)
+    metrics.increment("tutor.chat.dropped_turns", packed.dropped_turns)
+    if packed.context_truncated:
+        metrics.increment("tutor.chat.context_truncated")
+    if packed.reference:
+        metrics.increment("tutor.chat.with_reference")
+
+
+def _build_hint_chain(tutor_persona: TutorPersona, hint_level: int) -> tuple[Runnable, str, RouteDecision]:
+    """
+    Ambil prompt hint yang udah di-compile (dipake versi biasa dan streaming).
+    Hint level rendah ke model kecil, level tinggi langsung ke 70B (lihat config routing).
+    """
+    persona = tutor_persona if tutor_persona in PERSONA_PROMPTS else "RENDY"
+    level = hint_level if hint_level in HINT_INSTRUCTIONS else 1
+    decision = model_router.choose("tutor.hint", hint_level=level)
+    chain = HINT_PROMPTS[(persona, level)] | get_llm(decision.model, HINT_TEMPERATURE) | StrOutputParser()
+    return chain, hint_system_prompt(persona, level), decision
+
+
+async def _stream_chain(
+    chain: Runnable,
+    inputs: dict,
+    metric_name: str,
+    tokens: int,
+    model: str,
+) -> AsyncIterator[str]:
+    """
+    Stream token dari chain (lewat scheduler, lane interactive) sambil nyatet time-to-first-token.
+    
+    Metric yang dicatet: `{metric_name}.ttft` dan `{metric_name}.total` (ms).
+    """
+    start = time.perf_counter()
+    first_token = True
+    stream = scheduler.stream(
+        lambda: chain.astream(inputs), priority="interactive", tokens=tokens, name=metric_name, model=model
     )
+    async for token in stream:
+        if not token:
+            continue
+        if first_token:
+            metrics.observe(f"{metric_name}.ttft", (time.perf_counter() - start) * 1000)
+            first_token = False
+        yield token
+    metrics.observe(f"{metric_name}.total", (time.perf_counter() - start) * 1000)
 
 
 async def get_ai_response(
@@ -179,6 +405,9 @@ async def get_ai_response(
     context: Optional[str] = None,
     tutor_persona: TutorPersona = "RENDY",
     chat_history: Optional[list[dict]] = None,
+    packed: Optional[PackedContext] = None,
+    session: Optional[TutorSession] = None,
+    deadline: Optional[Deadline] = None,
 ) -> TutorResponse:
     """
     Dapetin response dari AI tutor berdasarkan persona yang dipilih.
@@ -188,102 +417,323 @@ async def get_ai_response(
         context: Konteks opsional (misalnya: lesson saat ini, deskripsi challenge)
         tutor_persona: 'RENDY' untuk Data Analyst atau 'ABDUL' untuk Data Scientist
         chat_history: List pesan sebelumnya untuk konteks
+        packed: Hasil pack_chat_prompt kalau udah dihitung duluan (context/history diabaikan)
+        session: Sesi server-side; history diambil dari sini dan jawaban dicatet ke sesi
+        deadline: Batas waktu request. Jawaban di-stream dari Groq, jadi kalau deadline habis
+            di tengah jalan yang udah kebentuk dibalikin (partial=True) dan sisanya di-cancel
     
     Returns:
-        TutorResponse dengan nama persona dan pesan AI
-    """
-    
-    # Ambil system prompt untuk persona yang dipilih
-    system_prompt = PERSONA_PROMPTS.get(tutor_persona, PERSONA_PROMPTS["RENDY"])
+        TutorResponse dengan nama persona, pesan AI, dan jumlah token prompt
     
-    # Build context section kalau ada
-    context_section = ""
-    if context:
-        context_section = f"\n\nKONTEKS SAAT INI:\n{context}"
+    Raises:
+        DeadlineExceeded: Deadline habis sebelum ada token yang dateng
+    """
     
-    # Build chat history section kalau ada
-    history_section = ""
-    if chat_history:
-        history_messages = "\n".join([
-            f"{'Murid' if msg['role'] == 'user' else 'Mentor'}: {msg['content']}"
-            for msg in chat_history[-5:]  # 5 pesan terakhir buat konteks
-        ])
-        history_section = f"\n\nPERCAKAPAN SEBELUMNYA:\n{history_messages}"
+    if packed is None:
+        packed = pack_chat_prompt(user_message, context, tutor_persona, chat_history, session)
+    _record_prompt_size(packed)
+    chain, inputs, decision = _build_chat_chain(packed, tutor_persona, user_message)
     
-    # Create the prompt template
-    full_system_prompt = f"{system_prompt}{context_section}{history_section}"
+    # Get response (lewat scheduler: rate limit + retry, lane interactive)
+    start = time.perf_counter()
+    parts: list[str] = []
     
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", full_system_prompt),
-        ("human", "{input}"),
-    ])
+    async def collect() -> None:
+        tokens = packed.prompt_tokens + DEFAULT_COMPLETION_TOKENS
+        async for token in _stream_chain(chain, inputs, "tutor.chat", tokens, decision.model):
+            parts.append(token)
     
-    # Create the chain
-    llm = get_llm()
-    chain = prompt | llm | StrOutputParser()
-    
-    # Get response
-    response = await chain.ainvoke({"input": user_message})
+    partial = False
+    try:
+        await within(deadline, collect(), "tutor.chat")
+    except DeadlineExceeded:
+        if not parts:
+            raise
+        partial = True
+    response = "".join(parts)
+    model_router.observe(decision, (time.perf_counter() - start) * 1000)
+    if session is not None:
+        await tutor_sessions.record_turn(session, user_message, response)
     
     return TutorResponse(
         persona=tutor_persona,
         message=response,
-        suggestions=None
+        suggestions=None,
+        prompt_tokens=packed.prompt_tokens,
+        session_id=session.session_id if session is not None else None,
+        partial=partial,
     )
 
 
+async def stream_ai_response(
+    user_message: str,
+    context: Optional[str] = None,
+    tutor_persona: TutorPersona = "RENDY",
+    chat_history: Optional[list[dict]] = None,
+    packed: Optional[PackedContext] = None,
+    session: Optional[TutorSession] = None,
+) -> AsyncIterator[str]:
+    """
+    Versi streaming dari get_ai_response: yield token satu-satu begitu dateng dari Groq.
+    
+    Args sama persis dengan get_ai_response. Jawaban baru dicatet ke sesi
+    kalau stream-nya selesai utuh.
+    
+    Yields:
+        Potongan teks (token) dari jawaban tutor
+    """
+    
+    if packed is None:
+        packed = pack_chat_prompt(user_message, context, tutor_persona, chat_history, session)
+    _record_prompt_size(packed)
+    chain, inputs, decision = _build_chat_chain(packed, tutor_persona, user_message)
+    tokens = packed.prompt_tokens + DEFAULT_COMPLETION_TOKENS
+    start = time.perf_counter()
+    parts: list[str] = []
+    async for token in _stream_chain(chain, inputs, "tutor.chat.stream", tokens, decision.model):
+        parts.append(token)
+        yield token
+    model_router.observe(decision, (time.perf_counter() - start) * 1000)
+    if session is not None:
+        await tutor_sessions.record_turn(session, user_message, "".join(parts))
+
+
 async def get_contextual_hint(
     challenge_description: str,
     user_code: str,
     tutor_persona: TutorPersona = "RENDY",
     hint_level: int = 1,
+    challenge_id: Optional[str] = None,
+    language: Optional[CodeLanguage] = None,
+    use_cache: bool = True,
+    deadline: Optional[Deadline] = None,
 ) -> str:
     """
     Dapetin hint buat challenge tanpa kasih jawaban langsung.
     
     Args:
-        challenge_description: Deskripsi challenge yang dikerjain
+        challenge_description: Deskripsi challenge yang dikerjain (diabaikan kalau challenge_id
+            ada di curriculum store)
         user_code: Code yang udah ditulis murid
         tutor_persona: Persona AI yang dipake
         hint_level: 1 (subtle), 2 (moderate), 3 (detailed)
+        challenge_id: Buat ambil deskripsi dari kurikulum + tag cache (invalidate per challenge);
+            kosong = pake deskripsi kiriman dan hash-nya
+        language: 'python' atau 'sql' buat normalisasi code; kosong = ditebak
+        use_cache: Pake hint sebelumnya kalau challenge, level, persona, dan code-nya sama
+        deadline: Batas waktu request (nunggu LLM dibatesin sisa waktunya)
     
     Returns:
         String hint sesuai level
+    
+    Raises:
+        DeadlineExceeded: Deadline habis sebelum hint-nya jadi
     """
     
-    hint_instructions = {
-        1: "Kasih hint yang subtle banget - cuma arahin ke direction yang bener tanpa kasih jawaban.",
-        2: "Kasih hint yang moderate - jelasin konsep yang mungkin mereka miss, kasih contoh kecil.",
-        3: "Kasih hint yang detail - walk through approach-nya step by step, tapi biarin mereka nulis code sendiri.",
-    }
+    challenge_description = resolve_hint_challenge(challenge_description, challenge_id)
+    
+    # Starter code / edit whitespace-komentar doang → hint yang sama, gak perlu panggil 70B lagi
+    cache_key = hint_cache_key(challenge_description, user_code, tutor_persona, hint_level, language)
+    if use_cache:
+        cached = hint_cache.get(cache_key)
+        if cached is not None:
+            return cached["hint"]
     
-    system_prompt = f"""{PERSONA_PROMPTS.get(tutor_persona, PERSONA_PROMPTS["RENDY"])}
+    async def generate() -> str:
+        chain, system_prompt, decision = _build_hint_chain(tutor_persona, hint_level)
+        inputs = {"challenge": challenge_description, "code": user_code}
+        start = time.perf_counter()
+        response = await scheduler.run(
+            lambda: chain.ainvoke(inputs),
+            priority="interactive",
+            tokens=estimate_tokens(system_prompt, challenge_description, user_code),
+            name="tutor.hint",
+            model=decision.model,
+        )
+        model_router.observe(decision, (time.perf_counter() - start) * 1000)
+        _store_hint(cache_key, response, tutor_persona, hint_level, challenge_description, challenge_id, start)
+        return response
+    
+    # Request yang identik dan lagi jalan barengan nunggu satu call yang sama
+    flight_key = hint_flight_key(cache_key, challenge_description, user_code, tutor_persona, hint_level, use_cache)
+    return await within(deadline, hint_flights.run(flight_key, generate), "tutor.hint")
 
-INSTRUKSI HINT: {hint_instructions.get(hint_level, hint_instructions[1])}
 
-Lo lagi bantuin murid yang stuck di coding challenge. Kasih guidance yang helpful tanpa langsung jawab problemnya.
-"""
+async def stream_contextual_hint(
+    challenge_description: str,
+    user_code: str,
+    tutor_persona: TutorPersona = "RENDY",
+    hint_level: int = 1,
+    challenge_id: Optional[str] = None,
+    language: Optional[CodeLanguage] = None,
+    use_cache: bool = True,
+) -> AsyncIterator[str]:
+    """
+    Versi streaming dari get_contextual_hint. Kalau kena cache, hint dikirim sekaligus.
+    
+    Yields:
+        Potongan teks (token) dari hint
+    """
+    
+    challenge_description = resolve_hint_challenge(challenge_description, challenge_id)
+    cache_key = hint_cache_key(challenge_description, user_code, tutor_persona, hint_level, language)
+    if use_cache:
+        cached = hint_cache.get(cache_key)
+        if cached is not None:
+            yield cached["hint"]
+            return
+    
+    # Kalau request non-streaming yang identik lagi jalan, tunggu hasilnya aja (dikirim sekaligus).
+    # Stream sendiri gak di-coalesce: fan-out token ke banyak client gak sebanding ribetnya.
+    flight_key = hint_flight_key(cache_key, challenge_description, user_code, tutor_persona, hint_level, use_cache)
+    if hint_flights.in_flight(flight_key):
+        yield await get_contextual_hint(
+            challenge_description, user_code, tutor_persona, hint_level, challenge_id, language, use_cache
+        )
+        return
+    
+    chain, system_prompt, decision = _build_hint_chain(tutor_persona, hint_level)
+    inputs = {"challenge": challenge_description, "code": user_code}
+    tokens = estimate_tokens(system_prompt, challenge_description, user_code)
+    start = time.perf_counter()
+    parts: list[str] = []
+    async for token in _stream_chain(chain, inputs, "tutor.hint.stream", tokens, decision.model):
+        parts.append(token)
+        yield token
+    model_router.observe(decision, (time.perf_counter() - start) * 1000)
+    _store_hint(
+        cache_key, "".join(parts), tutor_persona, hint_level, challenge_description, challenge_id, start
+    )
 
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
-        ("human", """
-CHALLENGE: {challenge}
 
-CODE MURID SAAT INI:
-```
-{code}
-```
+def resolve_hint_challenge(challenge_description: str, challenge_id: Optional[str] = None) -> str:
+    """Deskripsi challenge buat prompt hint: dari curriculum store kalau id-nya dikenal."""
+    context = curriculum.get_challenge(challenge_id)
+    return context.description if context is not None else challenge_description
 
-Kasih hint yang sesuai buat bantu murid maju.
-"""),
-    ])
+
+def hint_cache_tag(challenge_description: str, challenge_id: Optional[str] = None) -> str:
+    """Tag cache per challenge: challenge_id kalau ada, kalau gak hash deskripsinya."""
+    if challenge_id:
+        return challenge_id
+    digest = hashlib.sha256(challenge_description.strip().encode("utf-8")).hexdigest()
+    return f"desc:{digest[:16]}"
+
+
+def hint_cache_key(
+    challenge_description: str,
+    user_code: str,
+    tutor_persona: TutorPersona,
+    hint_level: int,
+    language: Optional[CodeLanguage] = None,
+) -> str:
+    """Key hint cache: (hash deskripsi, level, persona, fingerprint code yang udah dinormalisasi)."""
+    return make_cache_key(
+        "hint",
+        hashlib.sha256(challenge_description.strip().encode("utf-8")).hexdigest(),
+        hint_level,
+        tutor_persona,
+        code_fingerprint(user_code, language or guess_language(user_code)),
+    )
+
+
+def hint_flight_key(
+    cache_key: str,
+    challenge_description: str,
+    user_code: str,
+    tutor_persona: TutorPersona,
+    hint_level: int,
+    use_cache: bool,
+) -> str:
+    """
+    Key single-flight hint. Kalau pake cache, ikut granularitas cache (code dinormalisasi),
+    toh hasilnya bakal di-share lewat cache juga. use_cache=False = minta hint fresh,
+    jadi cuma digabung kalau input mentahnya persis sama.
+    """
+    if use_cache:
+        return make_cache_key("hint-flight", cache_key, model_router.models_for("tutor.hint"), HINT_TEMPERATURE)
+    return make_cache_key(
+        "hint-flight-raw",
+        challenge_description,
+        user_code,
+        tutor_persona,
+        hint_level,
+        model_router.models_for("tutor.hint"),
+        HINT_TEMPERATURE,
+    )
+
+
+def _store_hint(
+    cache_key: str,
+    hint: str,
+    tutor_persona: TutorPersona,
+    hint_level: int,
+    challenge_description: str,
+    challenge_id: Optional[str],
+    start: float,
+) -> None:
+    if not hint.strip():
+        return
+    hint_cache.set(
+        cache_key,
+        {"hint": hint, "hint_level": hint_level, "persona": tutor_persona},
+        latency_ms=(time.perf_counter() - start) * 1000,
+        tag=hint_cache_tag(challenge_description, challenge_id),
+    )
+
+
+# ============================================
+# SESSION SUMMARY (KOMPAKSI SESI)
+# ============================================
+
+SUMMARY_PROMPT = """Lo lagi ngerangkum sesi belajar antara murid dan mentor di Data Academy.
+Gabungin RINGKASAN LAMA sama PERCAKAPAN BARU jadi satu ringkasan singkat (maks {max_words} kata), isinya:
+- Topik dan konsep yang udah dibahas
+- Bagian yang murid masih bingung / salah
+- Code atau query penting (cukup intinya, jangan disalin utuh)
+Tulis dalam bahasa Indonesia, poin-poin, tanpa pembuka atau penutup."""
+
+SUMMARY_TEMPLATE = ChatPromptTemplate.from_messages([
+    ("system", SUMMARY_PROMPT),
+    ("human", "RINGKASAN LAMA:\n{summary}\n\nPERCAKAPAN BARU:\n{transcript}"),
+])
+
+
+async def summarize_conversation(previous_summary: str, turns: list[dict]) -> str:
+    """
+    Rangkum pesan lama sesi jadi running summary (dipanggil tutor_sessions di background).
     
-    llm = get_llm(temperature=0.5)
-    chain = prompt | llm | StrOutputParser()
+    Args:
+        previous_summary: Ringkasan sebelumnya ("" kalau belum ada)
+        turns: Pesan yang mau dirangkum, urut lama → baru
     
-    response = await chain.ainvoke({
-        "challenge": challenge_description,
-        "code": user_code,
-    })
+    Returns:
+        Ringkasan baru
+    """
+    transcript = "\n".join(
+        f"{'Murid' if msg['role'] == 'user' else 'Mentor'}: "
+        f"{fit_text(msg['content'], TUTOR_HISTORY_MESSAGE_MAX_TOKENS)}"
+        for msg in turns
+    )
+    decision = model_router.choose("tutor.summary")
+    chain = SUMMARY_TEMPLATE | get_llm(decision.model, SUMMARY_TEMPERATURE) | StrOutputParser()
+    inputs = {
+        "max_words": TUTOR_SESSION_SUMMARY_MAX_TOKENS // 2,
+        "summary": previous_summary or "(belum ada)",
+        "transcript": transcript,
+    }
     
-    return response
+    # Lane background: kompaksi gak boleh nyerobot slot chat yang lagi ditungguin murid
+    start = time.perf_counter()
+    summary = await scheduler.run(
+        lambda: chain.ainvoke(inputs),
+        priority="background",
+        tokens=estimate_tokens(
+            SUMMARY_PROMPT, previous_summary, transcript,
+            completion_tokens=TUTOR_SESSION_SUMMARY_MAX_TOKENS,
+        ),
+        name="tutor.summary",
+        model=decision.model,
+    )
+    model_router.observe(decision, (time.perf_counter() - start) * 1000)
+    return summary
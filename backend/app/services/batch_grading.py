@@ -0,0 +1,221 @@
+# Data Academy - Batch Grading Service
+# Regrade banyak submission sekaligus (misal satu cohort waktu rubric challenge berubah)
+#
+# - Code yang identik (setelah dinormalisasi) cuma di-grade sekali, hasilnya dibagi ke semua submission
+# - Jumlah LLM call paralel dibatesin semaphore, plus pacing requests/minute opsional
+# - Call-nya lewat llm_scheduler di lane background (retry 429/5xx + Retry-After diurus di sana),
+#   jadi regrade satu cohort gak bikin chat murid ngantri
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+from app.services.code_normalize import CodeLanguage, normalize_code
+from app.services.code_runner import ExecutionResult, run_python_tests
+from app.services.curriculum import curriculum
+from app.services.grading import GradingResult, grade_code_submission
+from app.services.metrics import metrics
+from app.services.result_cache import make_cache_key
+from app.services.sql_runner import run_sql_tests
+
+
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_GRADING_MAX_CONCURRENCY", "8"))
+
+
+# ============================================
+# PACING
+# ============================================
+
+class RateLimitGate:
+    """Pacing bareng buat semua worker satu batch: jarak minimum antar LLM call (None = gak di-pace)."""
+
+    def __init__(self, requests_per_minute: Optional[int] = None):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+        self.waits = 0
+        self.waited_s = 0.0
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            start_at = max(now, self._next_slot)
+            self._next_slot = start_at + self.interval
+        delay = start_at - now
+        if delay > 0:
+            self.waits += 1
+            self.waited_s += delay
+            await asyncio.sleep(delay)
+
+
+# ============================================
+# BATCH
+# ============================================
+
+@dataclass
+class BatchSubmission:
+    """Satu submission di dalam batch"""
+    submission_id: str
+    code_snippet: str
+
+
+@dataclass
+class _UniqueCode:
+    """Grup submission dengan code yang sama (setelah dinormalisasi)."""
+    code_snippet: str
+    submissions: list[BatchSubmission] = field(default_factory=list)
+
+
+@dataclass
+class BatchStats:
+    total: int = 0
+    unique: int = 0
+    graded: int = 0
+    failed: int = 0
+
+
+async def _grade_unique(
+    group: _UniqueCode,
+    challenge: dict,
+    language: CodeLanguage,
+    include_suggestions: bool,
+    use_cache: bool,
+    semaphore: asyncio.Semaphore,
+    gate: RateLimitGate,
+) -> tuple[GradingResult, Optional[ExecutionResult]]:
+    async with semaphore:
+        execution = None
+        test_cases = challenge.get("test_cases")
+        if test_cases:
+            runner = run_sql_tests if language == "sql" else run_python_tests
+            execution = await runner(group.code_snippet, test_cases)
+
+        await gate.acquire()
+        grading_result = await grade_code_submission(
+            code_snippet=group.code_snippet,
+            language=language,
+            include_suggestions=include_suggestions,
+            use_cache=use_cache,
+            execution=execution,
+            priority="background",
+            **challenge,
+        )
+        return grading_result, execution
+
+
+async def grade_batch(
+    submissions: list[BatchSubmission],
+    challenge_id: str,
+    language: CodeLanguage,
+    challenge_title: str = "Coding Challenge",
+    challenge_description: str = "",
+    expected_behavior: str = "",
+    test_cases: Optional[list[dict]] = None,
+    difficulty: int = 1,
+    passing_score: int = 70,
+    concurrency: int = 4,
+    requests_per_minute: Optional[int] = None,
+    include_suggestions: bool = False,
+    use_cache: bool = True,
+) -> AsyncIterator[dict]:
+    """
+    Grade banyak submission untuk satu challenge, hasil di-yield begitu selesai.
+
+    Args:
+        submissions: Daftar submission (submission_id + code)
+        challenge_id ... passing_score: Konteks challenge, sama kayak grade_code_submission
+        concurrency: Maksimal grading paralel (dipotong ke BATCH_GRADING_MAX_CONCURRENCY)
+        requests_per_minute: Pacing LLM call (None = secepatnya)
+        include_suggestions: Minta saran perbaikan di response grading
+        use_cache: Pake grading cache (matiin buat maksa regrade)
+
+    Yields:
+        {"type": "result", ...} per submission (urutan selesai, bukan urutan input),
+        {"type": "error", ...} kalau grading gagal, dan terakhir {"type": "summary", ...}
+        dengan throughput submissions/menit
+    """
+    start = time.perf_counter()
+    challenge = {
+        "challenge_id": challenge_id,
+        "challenge_title": challenge_title,
+        "challenge_description": challenge_description,
+        "expected_behavior": expected_behavior,
+        "test_cases": test_cases,
+        "difficulty": difficulty,
+        "passing_score": passing_score,
+    }
+    # Challenge kurikulum: test cases + rubric dari curriculum store (sama kayak grade_code_submission)
+    context = curriculum.get_challenge(challenge_id)
+    if context is not None:
+        challenge.update(context.grading_fields())
+
+    # Dedup: key sama kayak yang dipake grading cache (code dinormalisasi)
+    groups: dict[str, _UniqueCode] = {}
+    for submission in submissions:
+        key = make_cache_key(language, normalize_code(submission.code_snippet, language))
+        group = groups.setdefault(key, _UniqueCode(code_snippet=submission.code_snippet))
+        group.submissions.append(submission)
+
+    stats = BatchStats(total=len(submissions), unique=len(groups))
+    metrics.increment("batch_grading.submissions", stats.total)
+    metrics.increment("batch_grading.deduplicated", stats.total - stats.unique)
+
+    semaphore = asyncio.Semaphore(max(1, min(concurrency, BATCH_MAX_CONCURRENCY)))
+    gate = RateLimitGate(requests_per_minute)
+    tasks = {
+        asyncio.create_task(_grade_unique(
+            group, challenge, language, include_suggestions, use_cache, semaphore, gate,
+        )): group
+        for group in groups.values()
+    }
+
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                group = tasks[task]
+                error = task.exception()
+                if error is None:
+                    grading_result, execution = task.result()
+                for index, submission in enumerate(group.submissions):
+                    if error is not None:
+                        stats.failed += 1
+                        yield {
+                            "type": "error",
+                            "submission_id": submission.submission_id,
+                            "error": f"Grading service error: {str(error)}",
+                        }
+                        continue
+                    stats.graded += 1
+                    yield {
+                        "type": "result",
+                        "submission_id": submission.submission_id,
+                        "deduplicated": index > 0,
+                        **grading_result.model_dump(exclude_none=True),
+                        "execution": None if execution is None else {
+                            "passed": execution.passed,
+                            "total": execution.total,
+                            "error": execution.error,
+                        },
+                    }
+    finally:
+        # Client putus di tengah jalan → batalin grading yang belum jalan
+        for task in tasks:
+            task.cancel()
+
+    elapsed_s = time.perf_counter() - start
+    metrics.observe("batch_grading.total", elapsed_s * 1000)
+    yield {
+        "type": "summary",
+        "total": stats.total,
+        "unique": stats.unique,
+        "graded": stats.graded,
+        "failed": stats.failed,
+        "rate_limit_waits": gate.waits,
+        "elapsed_s": round(elapsed_s, 3),
+        "submissions_per_minute": round(stats.graded / elapsed_s * 60, 1) if elapsed_s > 0 else 0.0,
+    }
@@ -0,0 +1,83 @@
+# Data Academy - Code Normalization
+# Normalisasi code murid biar edit whitespace/komentar gak dianggap submission baru
+
+import ast
+import hashlib
+import re
+from typing import Literal
+
+
+CodeLanguage = Literal["python", "sql"]
+
+# Token SQL: string literal, quoted identifier, komentar, kata/angka, atau simbol
+_SQL_TOKEN_RE = re.compile(
+    r"""
+    (?P<string>'(?:[^']|'')*')
+    | (?P<quoted>"(?:[^"]|"")*")
+    | (?P<line_comment>--[^\n]*)
+    | (?P<block_comment>/\*.*?\*/)
+    | (?P<word>[A-Za-z_][A-Za-z0-9_$]*|\d+(?:\.\d+)?)
+    | (?P<space>\s+)
+    | (?P<symbol>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+
+def tokenize_sql(code: str) -> list[str]:
+    """
+    Pecah SQL jadi token tanpa komentar dan whitespace.
+    Keyword/identifier di-lowercase (SQL case-insensitive), string literal dibiarin apa adanya.
+    """
+    tokens = []
+    for match in _SQL_TOKEN_RE.finditer(code):
+        kind = match.lastgroup
+        if kind in ("space", "line_comment", "block_comment"):
+            continue
+        text = match.group()
+        tokens.append(text.lower() if kind == "word" else text)
+    return tokens
+
+
+def normalize_sql(code: str) -> str:
+    """SQL → token stream yang dipisah satu spasi, tanpa `;` di akhir."""
+    tokens = tokenize_sql(code)
+    while tokens and tokens[-1] == ";":
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def normalize_python(code: str) -> str:
+    """
+    Python → hasil ast.unparse (komentar, whitespace, dan gaya quote jadi seragam).
+    Kalau code-nya gak bisa di-parse, fallback ke strip whitespace per baris.
+    """
+    try:
+        return ast.unparse(ast.parse(code))
+    except (SyntaxError, ValueError):
+        lines = [line.rstrip() for line in code.strip().splitlines()]
+        return "\n".join(line for line in lines if line)
+
+
+def normalize_code(code: str, language: CodeLanguage) -> str:
+    """Normalisasi code sesuai bahasanya."""
+    if language == "sql":
+        return normalize_sql(code)
+    return normalize_python(code)
+
+
+_SQL_START_RE = re.compile(
+    r"^\s*(?:--[^\n]*\n\s*)*(select|with|insert|update|delete|create|alter|drop)\b", re.IGNORECASE
+)
+
+
+def guess_language(code: str) -> CodeLanguage:
+    """Tebak bahasa code kalau request gak nyebutin (SQL kalau diawali statement SQL)."""
+    if _SQL_START_RE.match(code):
+        return "sql"
+    return "python"
+
+
+def code_fingerprint(code: str, language: CodeLanguage) -> str:
+    """SHA-256 dari code yang udah dinormalisasi."""
+    return hashlib.sha256(normalize_code(code, language).encode("utf-8")).hexdigest()
@@ -0,0 +1,634 @@
+# Data Academy - Code Execution Service
+# Jalanin code Python murid terhadap test cases di pool worker yang udah "anget"
+#
+# Arsitektur:
+# - Tiap worker di pool (ProcessPoolExecutor, spawn) pre-import pandas/numpy sekali pas start.
+# - Tiap job, worker fork child baru (copy-on-write, import-nya udah ada) → code murid jalan
+#   di child itu dengan limit CPU/memory/file/proses via setrlimit, plus wall-clock timeout.
+# - Child ngirim hasil per test case lewat pipe (JSON per baris), jadi kalau timeout di tengah,
+#   test case yang udah selesai tetap kecatet. Parent baca pipe dengan batas total byte dan
+#   gak percaya isinya: baris rusak/kepotong/tipe aneh dianggap error sandbox, bukan 500.
+# - Child gak pernah liat expected: dia cuma ngirim nilai hasil (JSON polos), pass/fail
+#   dibandingin di proses server. Objek murid (misal __eq__ yang selalu True) gak ikut nyampe.
+#
+# Isolasi child sebelum code murid jalan:
+# - environment dikosongin, semua fd ditutup kecuali pipe hasil (stdio → /dev/null)
+# - kalau backend jalan sebagai root: turun ke EXECUTION_SANDBOX_UID (default nobody)
+# - audit hook: file cuma boleh dibaca (read-only) dari instalasi Python (library), network,
+#   bikin proses, ctypes, kill, hapus/rename file, dan introspeksi gc ditolak
+# - primitive tulis fd mentah (os.write dkk) dicabut, jadi pipe hasil cuma bisa ditulis wrapper
+#
+# Modul ini sengaja cuma pake stdlib (plus pydantic di sisi parent) biar worker cepet start.
+
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import resource
+import select
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field
+
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+EXECUTION_WORKERS = int(os.getenv("EXECUTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXECUTION_TIME_LIMIT_S = float(os.getenv("EXECUTION_TIME_LIMIT_S", "5"))
+EXECUTION_MEMORY_LIMIT_MB = int(os.getenv("EXECUTION_MEMORY_LIMIT_MB", "512"))
+EXECUTION_PRELOAD = [m for m in os.getenv("EXECUTION_PRELOAD", "numpy,pandas").split(",") if m]
+# Stdlib yang sering dipake di soal: di-import duluan di worker, soalnya child yang udah turun
+# ke user sandbox belum tentu bisa baca folder instalasi Python
+STDLIB_PRELOAD = (
+    "collections", "csv", "datetime", "decimal", "functools", "itertools", "json", "math",
+    "random", "re", "statistics", "string",
+)
+# User/group buat child kalau backend jalan sebagai root (65534 = nobody)
+EXECUTION_SANDBOX_UID = int(os.getenv("EXECUTION_SANDBOX_UID", "65534"))
+EXECUTION_SANDBOX_GID = int(os.getenv("EXECUTION_SANDBOX_GID", "65534"))
+
+# Batas panjang output yang dikirim balik (stdout, repr hasil)
+MAX_OUTPUT_CHARS = 10_000
+MAX_REPR_CHARS = 500
+# stdout yang ditampung child per case (buat dibandingin di soal stdin); sisanya dibuang
+MAX_CAPTURE_CHARS = 1_000_000
+# Batas satu pesan (satu baris JSON) dan total byte yang dibaca parent dari pipe hasil
+MAX_MESSAGE_BYTES = 2 * 1024 * 1024
+EXECUTION_MAX_RESULT_BYTES = int(os.getenv("EXECUTION_MAX_RESULT_BYTES", str(16 * 1024 * 1024)))
+
+# Key test case yang isinya jawaban: cuma dipegang proses server, gak dikirim ke worker/child
+EXPECTED_KEYS = ("expected", "expected_output", "expected_stdout")
+
+# Event audit yang selalu ditolak di child (network, proses baru, ctypes, ubah filesystem, gc)
+_BLOCKED_EVENTS = frozenset({
+    "socket.__new__", "socket.connect", "socket.bind", "socket.getaddrinfo", "socket.gethostbyname",
+    "socket.sendto", "subprocess.Popen", "os.system", "os.exec", "os.posix_spawn", "os.spawn",
+    "os.fork", "os.forkpty", "os.kill", "os.killpg", "pty.spawn",
+    "ctypes.dlopen", "ctypes.dlsym", "ctypes.cdata", "ctypes.call_function", "ctypes.addressof",
+    "os.remove", "os.rmdir", "os.rename", "os.mkdir", "os.chmod", "os.chown", "os.link",
+    "os.symlink", "os.truncate", "os.utime", "shutil.rmtree",
+    "gc.get_objects", "gc.get_referrers", "gc.get_referents",
+})
+# Modul yang gak boleh di-import baru di child (yang udah ke-load dicegat lewat event di atas)
+_BLOCKED_IMPORTS = frozenset({
+    "ctypes", "_ctypes", "_posixsubprocess", "socket", "_socket", "subprocess", "multiprocessing",
+    "pty", "mmap", "_winapi",
+})
+# Primitive tulis ke fd mentah: gak ada audit event-nya, jadi dicabut dari os/posix di child
+_RAW_WRITE_FUNCS = ("write", "writev", "pwrite", "pwritev", "sendfile", "splice", "copy_file_range")
+_WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_TRUNC | os.O_APPEND
+
+
+@dataclass
+class ExecutionLimits:
+    """Limit resource per eksekusi submission."""
+    time_limit_s: float = EXECUTION_TIME_LIMIT_S  # Wall-clock buat semua test case
+    memory_limit_mb: int = EXECUTION_MEMORY_LIMIT_MB  # Tambahan address space di atas baseline worker
+
+
+# ============================================
+# RESULT MODELS
+# ============================================
+
+class TestCaseResult(BaseModel):
+    """Hasil satu test case"""
+    index: int
+    passed: bool
+    expected: Optional[str] = None
+    actual: Optional[str] = None
+    error: Optional[str] = None
+    time_ms: float = 0.0
+    query_plan: Optional[list[str]] = None  # Cuma buat SQL (EXPLAIN QUERY PLAN)
+
+
+class ExecutionResult(BaseModel):
+    """Hasil eksekusi code murid terhadap semua test case"""
+    passed: int = 0
+    total: int = 0
+    cases: list[TestCaseResult] = Field(default_factory=list)
+    output: str = ""  # stdout gabungan (buat kolom Submission.executionOutput)
+    error: Optional[str] = None  # Error setup/compile/timeout (Submission.executionError)
+    execution_time_ms: int = 0  # Submission.executionTimeMs
+    timed_out: bool = False
+
+    @property
+    def pass_ratio(self) -> float:
+        return self.passed / self.total if self.total else 0.0
+
+    @property
+    def compile_error(self) -> bool:
+        return bool(self.error) and self.error.startswith("SyntaxError")
+
+
+# ============================================
+# WORKER SIDE (jalan di proses pool)
+# ============================================
+
+class _CappedOutput(io.StringIO):
+    """StringIO buat stdout murid: lewat MAX_CAPTURE_CHARS sisanya dibuang, memory child tetap kecil."""
+
+    def write(self, text: str) -> int:
+        room = MAX_CAPTURE_CHARS - self.tell()
+        super().write(text[:room] if room > 0 else text[:0])
+        return len(text)
+
+
+def _preload_modules(modules: list[str]) -> None:
+    """Initializer worker: import library berat sekali aja."""
+    for name in (*STDLIB_PRELOAD, *modules):
+        try:
+            __import__(name)
+        except ImportError:
+            pass
+
+
+def _plain(value: Any) -> Any:
+    """
+    Ubah hasil code murid jadi nilai polos (list/dict/angka/string) sebelum dikirim ke parent:
+    numpy array/scalar + pandas Series → tolist(), DataFrame → to_dict(). Jalan di child.
+    """
+    if isinstance(value, (str, bytes, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    return value  # Objek lain di-str() pas di-serialize, gak bakal sama dengan expected non-string
+
+
+def _short_repr(value: Any) -> str:
+    text = repr(value)
+    return text if len(text) <= MAX_REPR_CHARS else text[:MAX_REPR_CHARS] + "..."
+
+
+def _format_error(exc: BaseException) -> str:
+    if isinstance(exc, SyntaxError):
+        return f"SyntaxError: {exc.msg} (line {exc.lineno})"
+    message = str(exc)
+    return f"{type(exc).__name__}: {message}" if message else type(exc).__name__
+
+
+def _isolate(keep_fd: int) -> None:
+    """Putus child dari state server: environment, fd, cwd, dan uid (kalau root)."""
+    os.environ.clear()
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    os.closerange(3, keep_fd)
+    os.closerange(keep_fd + 1, os.sysconf("SC_OPEN_MAX"))
+    os.chdir("/")
+    if os.geteuid() == 0:
+        os.setgroups([])
+        os.setgid(EXECUTION_SANDBOX_GID)
+        os.setuid(EXECUTION_SANDBOX_UID)
+
+
+def _install_guard() -> None:
+    """
+    Pasang audit hook (gak bisa dicabut lagi dari Python): file cuma boleh dibaca dari instalasi
+    Python (buat import library), sisanya + event di _BLOCKED_EVENTS raise PermissionError.
+    """
+    roots = {sys.prefix, sys.base_prefix, sys.exec_prefix, sys.base_exec_prefix, "/usr/share/zoneinfo"}
+    readable = tuple(os.path.join(os.path.realpath(root), "") for root in roots)
+
+    def guard(event: str, args: tuple) -> None:
+        if event == "open":
+            path, mode, flags = args
+            if isinstance(path, int) or (mode and any(c in mode for c in "wax+")) or (flags or 0) & _WRITE_FLAGS:
+                raise PermissionError("Akses file ditolak di sandbox")
+            if not os.path.realpath(os.fsdecode(path)).startswith(readable):
+                raise PermissionError("Akses file ditolak di sandbox")
+        elif event in _BLOCKED_EVENTS or (event == "import" and args[0] in _BLOCKED_IMPORTS):
+            raise PermissionError(f"Operasi '{event}' ditolak di sandbox")
+
+    # _posixsubprocess.fork_exec gak punya audit event: cabut dari modul yang udah ke-load
+    for name in ("_posixsubprocess",):
+        module = sys.modules.pop(name, None)
+        if module is not None:
+            with contextlib.suppress(AttributeError):
+                delattr(module, "fork_exec")
+    # Sama buat os.write dkk: tanpa ini code murid bisa nulis langsung ke pipe hasil.
+    # Writer hasil (FileIO) nulis lewat C, gak lewat fungsi-fungsi ini.
+    for module in (os, sys.modules.get("posix")):
+        for name in _RAW_WRITE_FUNCS:
+            with contextlib.suppress(AttributeError):
+                delattr(module, name)
+    sys.addaudithook(guard)
+
+
+def _apply_limits(limits: ExecutionLimits) -> None:
+    """Pasang rlimit di child sebelum code murid jalan."""
+    cpu_seconds = max(1, math.ceil(limits.time_limit_s))
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+
+    # Address space = yang udah kepake (numpy/pandas ke-load) + limit buat murid
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+        memory = current + limits.memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    except (OSError, ValueError):
+        pass
+
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))  # Gak boleh nulis file
+    with contextlib.suppress(ValueError, OSError):
+        resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))  # Gak boleh fork lagi
+
+
+def _run_case(code_obj, namespace: Optional[dict], case: dict) -> tuple[dict, str]:
+    """
+    Jalanin satu test case (tanpa expected). Return (hasil, stdout): `value` = hasil dalam bentuk
+    polos buat dibandingin parent, `mapping` = versi to_dict() kalau hasilnya pandas Series.
+    """
+    stdout = _CappedOutput()
+    start = time.perf_counter()
+    result: dict[str, Any] = {}
+
+    try:
+        with contextlib.redirect_stdout(stdout):
+            if "stdin" in case:
+                # Program-style: jalanin ulang code dengan stdin, parent bandingin stdout-nya
+                sys.stdin = io.StringIO(str(case["stdin"]))
+                exec(code_obj, {"__name__": "__main__"})
+                actual = stdout.getvalue()
+            else:
+                if "function" in case:
+                    func = namespace[case["function"]]
+                    args = case.get("args", case.get("input", []))
+                    if not isinstance(args, (list, tuple)):
+                        args = [args]
+                    actual = func(*args, **case.get("kwargs", {}))
+                else:
+                    expression = case.get("expression") or case.get("call")
+                    if not expression:
+                        raise ValueError("Test case harus punya 'function', 'expression' atau 'stdin'")
+                    actual = eval(expression, namespace)
+            result.update(actual=_short_repr(actual), value=_plain(actual))
+            if hasattr(actual, "tolist") and hasattr(actual, "to_dict"):
+                result["mapping"] = actual.to_dict()
+    except BaseException as exc:  # noqa: BLE001 - code murid bisa raise apa aja (termasuk SystemExit)
+        result = {"error": _format_error(exc)}
+
+    result["time_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result, stdout.getvalue()
+
+
+def _child_main(write_fd: int, code: str, test_cases: list[dict], limits: ExecutionLimits) -> None:
+    """Entry point child hasil fork: kirim hasil per baris JSON ke parent lewat pipe."""
+    _isolate(write_fd)
+    out = os.fdopen(write_fd, "w", buffering=1)
+
+    def send(message: dict) -> None:
+        if message.get("stdout"):
+            message["stdout"] = message["stdout"][:MAX_OUTPUT_CHARS]
+        try:
+            line = json.dumps(message, default=str)
+        except (TypeError, ValueError, RecursionError):  # Misal list yang ngisi dirinya sendiri
+            line = None
+        if line is None or len(line) > MAX_MESSAGE_BYTES:
+            message.pop("mapping", None)
+            message.pop("value", None)
+            if line is not None and message["type"] == "case" and not message.get("error"):
+                message["error"] = "ValueError: hasil terlalu besar buat dikirim balik"
+            line = json.dumps(message, default=str)
+        out.write(line + "\n")
+
+    _apply_limits(limits)
+    _install_guard()
+
+    try:
+        code_obj = compile(code, "<submission>", "exec")
+    except SyntaxError as exc:
+        send({"type": "setup", "error": _format_error(exc)})
+        return
+
+    namespace = None
+    if any("stdin" not in case for case in test_cases):
+        namespace = {"__name__": "__submission__"}
+        stdout = _CappedOutput()
+        try:
+            with contextlib.redirect_stdout(stdout):
+                exec(code_obj, namespace)
+        except BaseException as exc:  # noqa: BLE001
+            send({"type": "setup", "error": _format_error(exc), "stdout": stdout.getvalue()})
+            return
+        send({"type": "setup", "stdout": stdout.getvalue()})
+
+    for index, case in enumerate(test_cases):
+        result, stdout = _run_case(code_obj, namespace, case)
+        send({"type": "case", "index": index, "stdout": stdout, **result})
+
+
+def execute_in_sandbox(code: str, test_cases: list[dict], limits: ExecutionLimits) -> dict:
+    """
+    Fork child, jalanin code murid di sana, kumpulin hasil dengan wall-clock timeout.
+    Dipanggil di proses worker pool; return dict yang bisa di-pickle. `test_cases` di sini
+    udah tanpa expected (lihat ExecutionPool.run).
+    """
+    read_fd, write_fd = os.pipe()
+    start = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:  # Child
+        os.close(read_fd)
+        try:
+            _child_main(write_fd, code, test_cases, limits)
+        finally:
+            os._exit(0)
+
+    os.close(write_fd)
+    deadline = start + limits.time_limit_s
+    buffer = bytearray()
+    timed_out = overflow = False
+    with os.fdopen(read_fd, "rb", buffering=0) as reader:
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                timed_out = True
+                break
+            ready, _, _ = select.select([reader], [], [], remaining)
+            if not ready:
+                continue
+            chunk = reader.read(65536)
+            if not chunk:
+                break
+            buffer += chunk
+            if len(buffer) > EXECUTION_MAX_RESULT_BYTES:
+                # Jangan nampung terus: bunuh child, pake baris yang udah lengkap aja
+                overflow = True
+                with contextlib.suppress(ProcessLookupError):
+                    os.kill(pid, signal.SIGKILL)
+                del buffer[buffer.rfind(b"\n", 0, EXECUTION_MAX_RESULT_BYTES) + 1:]
+                break
+
+    # Pipe bisa ketutup duluan padahal child masih jalan (misal code murid nutup fd lalu sleep):
+    # tunggu sampe deadline, lewat itu SIGKILL. waitpid gak pernah blocking.
+    status, killed = _reap(pid, deadline)
+    timed_out = timed_out or killed
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    messages, malformed = _parse_messages(bytes(buffer))
+    return {
+        "messages": messages,
+        "malformed": malformed,
+        "overflow": overflow,
+        "timed_out": timed_out,
+        "signal": os.WTERMSIG(status) if status is not None and os.WIFSIGNALED(status) else None,
+        "elapsed_ms": elapsed_ms,
+    }
+
+
+def _valid_message(message: Any) -> bool:
+    """Cek bentuk pesan dari child; isinya tetep dianggap gak terpercaya (nilai hasil murid)."""
+    if not isinstance(message, dict) or message.get("type") not in ("setup", "case"):
+        return False
+    if not isinstance(message.get("stdout", ""), str):
+        return False
+    if not isinstance(message.get("error") or "", str):
+        return False
+    if message["type"] == "setup":
+        return True
+    index = message.get("index")
+    time_ms = message.get("time_ms", 0.0)
+    return (
+        isinstance(index, int) and not isinstance(index, bool)
+        and isinstance(time_ms, (int, float)) and not isinstance(time_ms, bool)
+        and isinstance(message.get("actual") or "", str)
+    )
+
+
+def _parse_messages(data: bytes) -> tuple[list[dict], bool]:
+    """
+    Decode baris JSON dari pipe hasil. Baris yang rusak, kepotong (child mati di tengah nulis),
+    atau bentuknya aneh dibuang. Return (pesan valid, ada baris yang dibuang).
+    """
+    messages: list[dict] = []
+    malformed = False
+    for line in data.split(b"\n"):
+        if not line:
+            continue
+        try:
+            message = json.loads(line)
+        except (ValueError, RecursionError):
+            malformed = True
+            continue
+        if _valid_message(message):
+            messages.append(message)
+        else:
+            malformed = True
+    return messages, malformed
+
+
+def _reap(pid: int, deadline: float) -> tuple[Optional[int], bool]:
+    """Reap child tanpa blocking. Return (status / None kalau gak ke-reap, dibunuh karena deadline)."""
+    delay = 0.0005
+    while True:
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            return status, False
+        if time.perf_counter() >= deadline:
+            break
+        time.sleep(min(delay, max(0.0, deadline - time.perf_counter())))
+        delay = min(delay * 2, 0.01)
+
+    with contextlib.suppress(ProcessLookupError):
+        os.kill(pid, signal.SIGKILL)
+    for _ in range(200):  # SIGKILL biasanya beres dalam hitungan ms; maksimal ~1 detik
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            return status, True
+        time.sleep(0.005)
+    return None, True
+
+
+# ============================================
+# PARENT SIDE
+# ============================================
+
+def _values_equal(actual: Any, expected: Any) -> bool:
+    """Bandingin nilai polos hasil decode JSON dari child dengan expected, toleran buat float."""
+    if isinstance(expected, float) or isinstance(actual, float):
+        if isinstance(actual, bool) or not isinstance(actual, (int, float)):
+            return False
+        return math.isclose(float(actual), float(expected), rel_tol=1e-6, abs_tol=1e-9)
+    if isinstance(expected, list) and isinstance(actual, list):
+        return len(actual) == len(expected) and all(
+            _values_equal(a, e) for a, e in zip(actual, expected)
+        )
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        return actual.keys() == expected.keys() and all(
+            _values_equal(actual[k], expected[k]) for k in expected
+        )
+    return type(actual) is type(expected) and actual == expected
+
+
+def _expected(case: dict) -> Any:
+    if "stdin" in case:
+        return case.get("expected_stdout", case.get("expected", case.get("expected_output")))
+    return case.get("expected", case.get("expected_output"))
+
+
+def _grade_case(index: int, case: dict, message: dict) -> TestCaseResult:
+    """Tentuin pass/fail satu case di parent dari nilai polos yang dikirim child."""
+    expected = _expected(case)
+    error = message.get("error")
+    if error:
+        passed = False
+    elif "stdin" in case:
+        passed = str(message.get("value", "")).strip() == str(expected).strip()
+    elif expected is None:
+        passed = True
+    elif "value" not in message:
+        passed = False
+    else:
+        # Normalisasi expected lewat JSON juga (tuple → list, key int → string) biar sebanding
+        expected_plain = json.loads(json.dumps(expected, default=str))
+        actual = message["mapping"] if isinstance(expected_plain, dict) and "mapping" in message else message["value"]
+        passed = _values_equal(actual, expected_plain)
+    return TestCaseResult(
+        index=index,
+        passed=passed,
+        expected=None if expected is None else _short_repr(expected),
+        actual=message.get("actual"),
+        error=error,
+        time_ms=message.get("time_ms", 0.0),
+    )
+
+
+def _build_result(raw: dict, test_cases: list[dict], limits: ExecutionLimits) -> ExecutionResult:
+    """Ubah pesan mentah dari child jadi ExecutionResult."""
+    cases: dict[int, TestCaseResult] = {}
+    output_parts: list[str] = []
+    error = None
+
+    for message in raw["messages"]:
+        if message.get("stdout"):
+            output_parts.append(message["stdout"])
+        if message.get("type") == "setup" and message.get("error"):
+            error = message["error"]
+        elif message.get("type") == "case":
+            index = message.get("index")
+            if isinstance(index, int) and 0 <= index < len(test_cases) and index not in cases:
+                cases[index] = _grade_case(index, test_cases[index], message)
+
+    if raw.get("overflow"):
+        error = error or f"RuntimeError: output melebihi {EXECUTION_MAX_RESULT_BYTES // 1024} KB"
+    elif raw["timed_out"]:
+        error = error or f"TimeoutError: eksekusi melebihi {limits.time_limit_s:g} detik"
+    elif raw["signal"] is not None and len(cases) < len(test_cases):
+        name = signal.Signals(raw["signal"]).name
+        reason = "CPU time limit" if raw["signal"] == signal.SIGXCPU else "proses dihentikan"
+        error = error or f"RuntimeError: {reason} ({name})"
+    elif raw.get("malformed") and len(cases) < len(test_cases):
+        error = error or "RuntimeError: hasil dari sandbox rusak/tidak valid"
+
+    # Test case yang gak sempet jalan (setup error / timeout / crash) dianggap gagal
+    for index in range(len(test_cases)):
+        if index not in cases:
+            expected = _expected(test_cases[index])
+            cases[index] = TestCaseResult(
+                index=index,
+                passed=False,
+                expected=None if expected is None else _short_repr(expected),
+                error=error or "Test case tidak dijalankan",
+            )
+
+    ordered = [cases[i] for i in range(len(test_cases))]
+    output = "".join(output_parts)
+    return ExecutionResult(
+        passed=sum(1 for case in ordered if case.passed),
+        total=len(ordered),
+        cases=ordered,
+        output=output[:MAX_OUTPUT_CHARS],
+        error=error,
+        execution_time_ms=int(round(raw["elapsed_ms"])),
+        timed_out=raw["timed_out"],
+    )
+
+
+def _noop() -> int:
+    return os.getpid()
+
+
+class ExecutionPool:
+    """Pool proses worker yang udah pre-import library, dipake bareng semua request."""
+
+    def __init__(self, workers: int = EXECUTION_WORKERS, preload: Optional[list[str]] = None):
+        self.workers = workers
+        self.preload = EXECUTION_PRELOAD if preload is None else preload
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=get_context("spawn"),
+                initializer=_preload_modules,
+                initargs=(self.preload,),
+            )
+        return self._executor
+
+    async def startup(self) -> None:
+        """Spawn semua worker sekarang (bukan pas request pertama)."""
+        executor = self._ensure_executor()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(executor, _noop) for _ in range(self.workers)
+        ))
+
+    async def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def run(
+        self,
+        code: str,
+        test_cases: list[dict],
+        limits: Optional[ExecutionLimits] = None,
+    ) -> ExecutionResult:
+        """Jalanin code terhadap test cases, return hasil per case + timing (ms)."""
+        limits = limits or ExecutionLimits()
+        loop = asyncio.get_running_loop()
+        # Expected gak ikut dikirim: pass/fail diputusin di sini, bukan di proses yang jalanin code murid
+        public_cases = [{k: v for k, v in case.items() if k not in EXPECTED_KEYS} for case in test_cases]
+        raw = await loop.run_in_executor(
+            self._ensure_executor(), execute_in_sandbox, code, public_cases, limits
+        )
+        return _build_result(raw, test_cases, limits)
+
+
+# Pool global yang dipake router/grading
+execution_pool = ExecutionPool()
+
+
+async def run_python_tests(
+    code: str,
+    test_cases: list[dict],
+    limits: Optional[ExecutionLimits] = None,
+) -> ExecutionResult:
+    """
+    Jalanin code Python murid terhadap test cases.
+
+    Format test case yang didukung:
+        {"function": "avg", "args": [[1, 2, 3]], "expected": 2.0}
+        {"expression": "avg([4, 6])", "expected": 5}
+        {"stdin": "3\\n", "expected_stdout": "9"}
+
+    Returns:
+        ExecutionResult dengan pass/fail per case dan waktu eksekusi (ms)
+    """
+    return await execution_pool.run(code, test_cases, limits)
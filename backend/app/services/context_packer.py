@@ -0,0 +1,242 @@
+# Data Academy - Context Packer
+# Susun prompt chat tutor dalam budget token: persona + konteks + sebanyak mungkin history terbaru
+#
+# - Hitung token pake tiktoken (kalau ke-install) atau perkiraan regex; hasilnya di-cache per teks,
+#   jadi history yang sama gak dihitung ulang tiap giliran chat
+# - Code block / dump dataframe yang kepanjangan di-elide (head + tail, tengahnya di-skip)
+
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+
+try:
+    import tiktoken
+
+    # Tokenizer Llama 3 juga BPE ala tiktoken (vocab 128k), cl100k cukup deket buat budgeting
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken opsional (gak ke-install atau gak bisa download vocab)
+    _ENCODING = None
+
+
+TUTOR_PROMPT_TOKEN_BUDGET = int(os.getenv("TUTOR_PROMPT_TOKEN_BUDGET", "3000"))
+TUTOR_CONTEXT_MAX_TOKENS = int(os.getenv("TUTOR_CONTEXT_MAX_TOKENS", "1000"))
+TUTOR_HISTORY_MESSAGE_MAX_TOKENS = int(os.getenv("TUTOR_HISTORY_MESSAGE_MAX_TOKENS", "400"))
+CODE_BLOCK_MAX_TOKENS = int(os.getenv("TUTOR_CODE_BLOCK_MAX_TOKENS", "250"))
+
+# Overhead per message di chat template (role header, separator)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+# ============================================
+# TOKEN COUNTING
+# ============================================
+
+# Pre-tokenizer mirip tiktoken: huruf, angka (max 3 digit), simbol, whitespace
+_PIECE_RE = re.compile(r" ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|_+|\s+", re.UNICODE)
+
+
+def _approx_tokens(text: str) -> int:
+    count = 0
+    for match in _PIECE_RE.finditer(text):
+        piece = match.group()
+        if piece[-1].isalpha():
+            # Kata umum = 1 token, kata panjang/jarang kepecah tiap ~4 karakter
+            count += max(1, (len(piece.strip()) + 2) // 4)
+        elif piece.isspace():
+            count += 1
+        elif piece.strip().isdigit():
+            count += 1
+        else:
+            count += len(piece.strip()) or 1
+    return count
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    """Jumlah token teks (di-cache, teks yang sama gak dihitung ulang)."""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return _approx_tokens(text)
+
+
+# ============================================
+# ELISION
+# ============================================
+
+_CODE_BLOCK_RE = re.compile(r"```[^\n]*\n.*?(?:```|\Z)", re.DOTALL)
+
+
+def truncate_middle(text: str, max_tokens: int, unit: str = "baris") -> str:
+    """
+    Potong teks jadi <= max_tokens dengan nyimpen awal + akhir (paling informatif
+    buat code dan traceback), tengahnya diganti penanda.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    lines = text.split("\n")
+    if len(lines) >= 4:
+        head, tail = [], []
+        used = count_tokens(f"... ({len(lines)} {unit} di-skip) ...")
+        i, j = 0, len(lines) - 1
+        # Ambil baris gantian dari atas (2 bagian) dan bawah (1 bagian)
+        while i <= j:
+            take_head = len(head) < 2 * (len(tail) + 1)
+            line = lines[i] if take_head else lines[j]
+            cost = count_tokens(line) + 1
+            if used + cost > max_tokens:
+                break
+            used += cost
+            if take_head:
+                head.append(line)
+                i += 1
+            else:
+                tail.append(line)
+                j -= 1
+        skipped = j - i + 1
+        if head or tail:
+            result = "\n".join(head + [f"... ({skipped} {unit} di-skip) ..."] + tail[::-1])
+            # Token per baris dijumlahin gak persis sama dengan token hasil gabungan
+            if count_tokens(result) <= max_tokens:
+                return result
+
+    # Satu baris super panjang: cari jumlah karakter terbanyak yang masih muat (binary search,
+    # soalnya teks padat kayak hash/angka/simbol bisa jauh lebih dari 1 token per 4 karakter)
+    def cut(keep: int) -> str:
+        return f"{text[: keep * 2 // 3]} ... (di-skip) ... {text[len(text) - keep // 3:]}"
+
+    low, high = 0, min(len(text), max(16, max_tokens * 32))  # Batas atas longgar: >32 char/token jarang
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(cut(middle)) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    result = cut(low)
+    return result if count_tokens(result) <= max_tokens else ""
+
+
+def elide_code_blocks(text: str, max_block_tokens: int = CODE_BLOCK_MAX_TOKENS) -> str:
+    """Code block (```...```) yang lebih dari max_block_tokens dipotong tengahnya."""
+    if "```" not in text:
+        return text
+
+    def shrink(match: re.Match) -> str:
+        block = match.group()
+        if count_tokens(block) <= max_block_tokens:
+            return block
+        header, _, body = block.partition("\n")
+        closing = "```" if body.rstrip().endswith("```") else ""
+        body = body.rstrip()[: -3] if closing else body
+        return f"{header}\n{truncate_middle(body.rstrip(), max_block_tokens)}\n{closing}"
+
+    return _CODE_BLOCK_RE.sub(shrink, text)
+
+
+def fit_text(text: str, max_tokens: int) -> str:
+    """Elide code block dulu, kalau masih kegedean potong tengahnya."""
+    text = elide_code_blocks(text)
+    return truncate_middle(text, max_tokens)
+
+
+# ============================================
+# PACKING
+# ============================================
+
+@dataclass
+class PackedContext:
+    """Hasil packing: konteks + history yang muat di budget."""
+    context: Optional[str]
+    history: list[dict] = field(default_factory=list)
+    summary: Optional[str] = None
+    reference: Optional[str] = None
+    prompt_tokens: int = 0
+    dropped_turns: int = 0
+    context_truncated: bool = False
+
+
+def pack_context(
+    system_prompt: str,
+    user_message: str,
+    context: Optional[str] = None,
+    chat_history: Optional[list[dict]] = None,
+    budget: int = TUTOR_PROMPT_TOKEN_BUDGET,
+    context_max_tokens: int = TUTOR_CONTEXT_MAX_TOKENS,
+    message_max_tokens: int = TUTOR_HISTORY_MESSAGE_MAX_TOKENS,
+    summary: Optional[str] = None,
+    reference: Optional[str] = None,
+) -> PackedContext:
+    """
+    Muatin persona prompt + konteks + history terbaru ke dalam budget token.
+
+    Urutan prioritas: system prompt dan pesan murid selalu masuk, lalu konteks
+    (dipotong ke context_max_tokens), lalu materi kurikulum hasil retrieval, lalu summary sesi,
+    lalu history dari yang paling baru sampai budget habis.
+
+    Args:
+        system_prompt: Prompt persona (gak dipotong)
+        user_message: Pesan murid sekarang (gak dipotong)
+        context: Konteks lesson/challenge (opsional)
+        chat_history: [{"role": "user"|"assistant", "content": ...}], urut lama → baru
+        budget: Total token prompt yang diizinin
+        context_max_tokens: Batas token konteks
+        message_max_tokens: Batas token per pesan history
+        summary: Ringkasan percakapan lama dari sesi server-side (opsional)
+        reference: Snippet materi kurikulum yang relevan (udah dibatesin budget retrieval-nya sendiri)
+
+    Returns:
+        PackedContext dengan jumlah token prompt final
+    """
+    used = (
+        count_tokens(system_prompt)
+        + count_tokens(user_message)
+        + 2 * MESSAGE_OVERHEAD_TOKENS
+    )
+
+    packed_context = None
+    truncated = False
+    if context:
+        limit = max(0, min(context_max_tokens, budget - used))
+        packed_context = fit_text(context, limit) if limit else None
+        truncated = packed_context != context
+        if packed_context:
+            used += count_tokens(packed_context) + MESSAGE_OVERHEAD_TOKENS
+
+    packed_reference = None
+    if reference:
+        cost = count_tokens(reference) + MESSAGE_OVERHEAD_TOKENS
+        if used + cost <= budget:
+            packed_reference = reference
+            used += cost
+
+    packed_summary = None
+    if summary:
+        cost = count_tokens(summary) + MESSAGE_OVERHEAD_TOKENS
+        if used + cost <= budget:
+            packed_summary = summary
+            used += cost
+
+    history: list[dict] = []
+    turns = chat_history or []
+    for message in reversed(turns):
+        content = fit_text(str(message.get("content", "")), message_max_tokens)
+        cost = count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        if used + cost > budget:
+            break
+        used += cost
+        history.append({"role": message.get("role", "user"), "content": content})
+    history.reverse()
+
+    return PackedContext(
+        context=packed_context,
+        history=history,
+        summary=packed_summary,
+        reference=packed_reference,
+        prompt_tokens=used,
+        dropped_turns=len(turns) - len(history),
+        context_truncated=truncated,
+    )
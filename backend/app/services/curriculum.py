@@ -0,0 +1,416 @@
+# Data Academy - Curriculum Store
+# Konten kurikulum (content/curriculum/<track>/level-*.json) di-load sekali pas startup ke index
+# in-memory, jadi grading dan hint cukup dikirim `challenge_id`: judul, deskripsi, deliverables,
+# test cases, dan passing score diambil dari sini, bukan dari body request (yang bisa diakalin murid).
+#
+# - Tiap file divalidasi (pydantic); file invalid / id dobel di-skip, error-nya dicatet di stats
+# - Index disimpen sebagai snapshot immutable: lookup cuma baca dict, gak pake lock
+# - Hot reload: loop background ngecek (path, mtime, size) tiap CURRICULUM_RELOAD_INTERVAL_SECONDS;
+#   kalau ada yang berubah, index baru dibangun di thread lalu di-swap. File yang gak berubah
+#   gak di-parse ulang.
+
+import asyncio
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Literal, Optional
+
+from pydantic import BaseModel, Field, ValidationError, model_validator
+
+from app.services.metrics import metrics
+
+
+DEFAULT_CURRICULUM_DIR = Path(__file__).resolve().parents[3] / "content" / "curriculum"
+CURRICULUM_DIR = Path(os.getenv("CURRICULUM_DIR", str(DEFAULT_CURRICULUM_DIR)))
+# 0 = gak ada hot reload (cuma lewat POST /api/admin/curriculum/reload)
+CURRICULUM_RELOAD_INTERVAL_SECONDS = float(os.getenv("CURRICULUM_RELOAD_INTERVAL_SECONDS", "5"))
+
+LEVEL_FILE_GLOB = "*/level-*.json"
+MAX_DIFFICULTY = 5
+
+
+# ============================================
+# SCHEMA FILE KURIKULUM
+# ============================================
+
+class CaseStudy(BaseModel):
+    """Studi kasus satu modul (yang dikerjain dan di-grade)."""
+    title: str
+    scenario: str
+    dataset: Optional[str] = None
+    deliverables: list[str] = Field(default_factory=list)
+    minimum_passing_score: Optional[int] = Field(default=None, ge=0, le=100)
+    time_limit_minutes: Optional[int] = Field(default=None, ge=1)
+
+    class Config:
+        extra = "allow"
+
+
+class CurriculumModule(BaseModel):
+    """Satu modul level: lesson (DA-L1-M01) atau challenge akhir (DA-L1-C01)."""
+    id: str = Field(..., min_length=1)
+    sequence: int = Field(..., ge=1)
+    topic: str
+    type: Literal["lesson", "challenge"]
+    description: str = ""
+    duration_minutes: Optional[int] = None
+    key_concepts: list[str] = Field(default_factory=list)
+    case_study: Optional[CaseStudy] = None
+    grading_criteria: Optional[dict[str, int]] = None
+
+    # Opsional: belum ada di konten sekarang, tapi dipake grading kalau diisi
+    language: Optional[Literal["python", "sql"]] = None
+    difficulty: Optional[int] = Field(default=None, ge=1, le=MAX_DIFFICULTY)
+    test_cases: Optional[list[dict]] = None
+
+    class Config:
+        extra = "allow"
+
+
+class CurriculumLevel(BaseModel):
+    """Isi satu file level-*.json."""
+    track: str
+    track_code: str = Field(..., min_length=1)
+    mentor: Optional[str] = None
+    level: int = Field(..., ge=1)
+    title: str
+    subtitle: Optional[str] = None
+    description: str = ""
+    estimated_hours: Optional[float] = None
+    min_passing_score: int = Field(default=70, ge=0, le=100)
+    prerequisites: list[str] = Field(default_factory=list)
+    learning_outcomes: list[str] = Field(default_factory=list)
+    modules: list[CurriculumModule] = Field(..., min_length=1)
+
+    class Config:
+        extra = "allow"
+
+    @model_validator(mode="after")
+    def _check_modules(self) -> "CurriculumLevel":
+        ids = [module.id for module in self.modules]
+        if len(ids) != len(set(ids)):
+            raise ValueError("id modul dobel di level yang sama")
+        sequences = [module.sequence for module in self.modules]
+        if len(sequences) != len(set(sequences)):
+            raise ValueError("sequence modul dobel di level yang sama")
+        return self
+
+
+# ============================================
+# INDEX
+# ============================================
+
+@dataclass(frozen=True)
+class ChallengeContext:
+    """Konteks grading / hint satu modul, udah dirangkai dari file kurikulum."""
+    challenge_id: str
+    track_code: str
+    level: int
+    type: str
+    title: str
+    description: str
+    expected_behavior: str
+    test_cases: Optional[list[dict]]
+    difficulty: int
+    passing_score: int
+    language: Optional[str] = None
+    grading_criteria: Optional[dict[str, int]] = None
+
+    def grading_fields(self) -> dict:
+        """Argumen konteks buat grade_code_submission / grade_batch (nimpa kiriman client)."""
+        return {
+            "challenge_title": self.title,
+            "challenge_description": self.description,
+            "expected_behavior": self.expected_behavior,
+            "test_cases": self.test_cases,
+            "difficulty": self.difficulty,
+            "passing_score": self.passing_score,
+        }
+
+
+@dataclass(frozen=True)
+class LevelSummary:
+    """Ringkasan satu level buat lookup per track/level."""
+    track: str
+    track_code: str
+    level: int
+    title: str
+    min_passing_score: int
+    module_ids: tuple[str, ...]
+    challenge_ids: tuple[str, ...]
+    path: str
+
+
+@dataclass(frozen=True)
+class _ParsedFile:
+    """Hasil parse satu file + konteksnya (di-reuse selama mtime + size-nya gak berubah)."""
+    stamp: tuple[int, int]
+    level: CurriculumLevel
+    modules: tuple[CurriculumModule, ...]
+    contexts: tuple[ChallengeContext, ...]
+
+
+@dataclass
+class _CurriculumIndex:
+    """Snapshot index. Gak pernah diubah setelah dibangun; reload = bikin snapshot baru."""
+    modules: dict[str, CurriculumModule] = field(default_factory=dict)
+    contexts: dict[str, ChallengeContext] = field(default_factory=dict)
+    levels: dict[tuple[str, int], LevelSummary] = field(default_factory=dict)
+    parsed_levels: dict[tuple[str, int], CurriculumLevel] = field(default_factory=dict)
+    tracks: dict[str, tuple[LevelSummary, ...]] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+    loaded_at: float = 0.0
+    build_ms: float = 0.0
+
+
+def build_context(level: CurriculumLevel, module: CurriculumModule) -> ChallengeContext:
+    """Rangkai konteks grading dari satu modul: deskripsi + studi kasus, deliverables jadi expected behavior."""
+    case = module.case_study
+    description = [module.topic, module.description]
+    expected_behavior = ""
+    passing_score = level.min_passing_score
+    if case is not None:
+        description.append(f"Studi kasus - {case.title}:\n{case.scenario}")
+        if case.dataset:
+            description.append(f"Dataset: {case.dataset}")
+        expected_behavior = "\n".join(f"- {item}" for item in case.deliverables)
+        if case.minimum_passing_score is not None:
+            passing_score = case.minimum_passing_score
+    return ChallengeContext(
+        challenge_id=module.id,
+        track_code=level.track_code,
+        level=level.level,
+        type=module.type,
+        title=case.title if case is not None else module.topic,
+        description="\n\n".join(part for part in description if part),
+        expected_behavior=expected_behavior,
+        test_cases=module.test_cases,
+        # Belum ada difficulty per modul di konten → ikut nomor level (level 5+ = paling susah)
+        difficulty=module.difficulty or min(level.level, MAX_DIFFICULTY),
+        passing_score=passing_score,
+        language=module.language,
+        grading_criteria=module.grading_criteria,
+    )
+
+
+# ============================================
+# STORE
+# ============================================
+
+class CurriculumStore:
+    """
+    Index kurikulum in-memory: modul/challenge per id, level per (track_code, level).
+
+    Lookup (`get_challenge`, `get_module`, `get_level`) aman dipanggil dari event loop:
+    cuma baca snapshot yang lagi aktif. Load / reload jalan di thread (lewat `startup()` dan
+    loop hot reload) dan nge-swap snapshot setelah selesai.
+    """
+
+    def __init__(self, directory: Path = CURRICULUM_DIR, reload_interval: float = CURRICULUM_RELOAD_INTERVAL_SECONDS):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self._index = _CurriculumIndex()
+        self._files: dict[str, _ParsedFile] = {}
+        self._signature: Optional[tuple] = None
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[asyncio.Task] = None
+        self._listeners: list[Callable[["CurriculumStore"], None]] = []
+
+        self.reloads = 0
+        self.lookups = 0
+        self.misses = 0
+
+    # ----------------------------------------
+    # Lifecycle
+    # ----------------------------------------
+
+    async def startup(self) -> None:
+        """Load kurikulum (di thread) dan jalanin loop hot reload kalau interval-nya > 0."""
+        await asyncio.to_thread(self.load)
+        if self.reload_interval > 0 and self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch_loop())
+
+    async def shutdown(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+
+    async def _watch_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except OSError:
+                continue  # Folder lagi di-deploy ulang dll; coba lagi di putaran berikutnya
+
+    # ----------------------------------------
+    # Load
+    # ----------------------------------------
+
+    def _scan(self) -> tuple[tuple[str, int, int], ...]:
+        """Signature folder: (path, mtime_ns, size) semua file level, urut path."""
+        entries = []
+        for path in self.directory.glob(LEVEL_FILE_GLOB):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue  # Kehapus di tengah scan
+            entries.append((str(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(sorted(entries))
+
+    def load(self) -> dict:
+        """Baca ulang semua file (file yang gak berubah sejak load terakhir gak di-parse ulang)."""
+        with self._reload_lock:
+            self._rebuild(self._scan())
+        return self.stats()
+
+    def reload_if_changed(self) -> bool:
+        """Cek signature folder; rebuild index cuma kalau ada file yang berubah/nambah/kehapus."""
+        signature = self._scan()
+        if signature == self._signature:
+            return False
+        with self._reload_lock:
+            self._rebuild(signature)
+        return True
+
+    def _rebuild(self, signature: tuple[tuple[str, int, int], ...]) -> None:
+        start = time.perf_counter()
+        files: dict[str, _ParsedFile] = {}
+        errors: dict[str, str] = {}
+        for path, mtime_ns, size in signature:
+            stamp = (mtime_ns, size)
+            previous = self._files.get(path)
+            if previous is not None and previous.stamp == stamp:
+                files[path] = previous
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    level = CurriculumLevel.model_validate(json.load(f))
+            except (OSError, ValueError, ValidationError) as e:
+                errors[path] = str(e).splitlines()[0] if str(e) else type(e).__name__
+                if previous is not None:
+                    files[path] = previous  # File lagi diedit / rusak: versi valid terakhir tetep dipake
+                continue
+            modules = tuple(sorted(level.modules, key=lambda module: module.sequence))
+            files[path] = _ParsedFile(
+                stamp=stamp,
+                level=level,
+                modules=modules,
+                contexts=tuple(build_context(level, module) for module in modules),
+            )
+
+        index = self._build_index(files, errors)
+        index.build_ms = (time.perf_counter() - start) * 1000
+        # Swap atomic: request yang lagi lookup tetep pake snapshot lama sampe selesai
+        self._files, self._index, self._signature = files, index, signature
+        self.reloads += 1
+        metrics.observe("curriculum.reload", index.build_ms)
+        if errors:
+            metrics.increment("curriculum.reload_errors", len(errors))
+        for listener in self._listeners:
+            try:
+                listener(self)
+            except Exception:
+                # Index turunan (search dll) gagal dibangun ulang: versi lamanya tetep dipake
+                metrics.increment("curriculum.listener_errors")
+
+    def on_reload(self, listener: Callable[["CurriculumStore"], None]) -> None:
+        """
+        Daftarin callback yang dipanggil tiap index selesai di-(re)build, buat index turunan
+        (misal BM25 search). Jalan di thread reload, jadi boleh berat; gak pernah di event loop.
+        """
+        self._listeners.append(listener)
+
+    @staticmethod
+    def _build_index(files: dict[str, _ParsedFile], errors: dict[str, str]) -> _CurriculumIndex:
+        index = _CurriculumIndex(errors=errors, loaded_at=time.time())
+        tracks: dict[str, list[LevelSummary]] = {}
+        for path, parsed in files.items():
+            level = parsed.level
+            key = (level.track_code, level.level)
+            if key in index.levels:
+                errors[path] = f"Level {level.track_code} {level.level} dobel dengan {index.levels[key].path}"
+                continue
+            duplicate = next((module.id for module in level.modules if module.id in index.modules), None)
+            if duplicate is not None:
+                errors[path] = f"Modul {duplicate} udah ada di file lain"
+                continue
+            modules = parsed.modules
+            for module, context in zip(modules, parsed.contexts):
+                index.modules[module.id] = module
+                index.contexts[module.id] = context
+            summary = LevelSummary(
+                track=level.track,
+                track_code=level.track_code,
+                level=level.level,
+                title=level.title,
+                min_passing_score=level.min_passing_score,
+                module_ids=tuple(module.id for module in modules),
+                challenge_ids=tuple(module.id for module in modules if module.type == "challenge"),
+                path=path,
+            )
+            index.levels[key] = summary
+            index.parsed_levels[key] = level
+            tracks.setdefault(level.track_code, []).append(summary)
+        index.tracks = {
+            code: tuple(sorted(levels, key=lambda summary: summary.level))
+            for code, levels in tracks.items()
+        }
+        return index
+
+    # ----------------------------------------
+    # Lookup
+    # ----------------------------------------
+
+    def get_challenge(self, challenge_id: Optional[str]) -> Optional[ChallengeContext]:
+        """Konteks grading/hint per id modul (DA-L1-M01) atau challenge (DA-L1-C01). None kalau gak ada."""
+        if not challenge_id:
+            return None
+        self.lookups += 1
+        context = self._index.contexts.get(challenge_id)
+        if context is None:
+            self.misses += 1
+        return context
+
+    def get_module(self, module_id: str) -> Optional[CurriculumModule]:
+        return self._index.modules.get(module_id)
+
+    def get_level(self, track_code: str, level: int) -> Optional[LevelSummary]:
+        return self._index.levels.get((track_code, level))
+
+    def iter_levels(self) -> list[CurriculumLevel]:
+        """Isi lengkap semua level di snapshot aktif (urut track, level)."""
+        parsed = self._index.parsed_levels
+        return [parsed[key] for key in sorted(parsed)]
+
+    def levels_for(self, track_code: str) -> tuple[LevelSummary, ...]:
+        """Semua level satu track, urut nomor level."""
+        return self._index.tracks.get(track_code, ())
+
+    def track_codes(self) -> list[str]:
+        return sorted(self._index.tracks)
+
+    def stats(self) -> dict:
+        index = self._index
+        return {
+            "directory": str(self.directory),
+            "levels": len(index.levels),
+            "modules": len(index.modules),
+            "challenges": sum(len(summary.challenge_ids) for summary in index.levels.values()),
+            "tracks": {code: len(levels) for code, levels in index.tracks.items()},
+            "errors": dict(index.errors),
+            "reloads": self.reloads,
+            "last_build_ms": round(index.build_ms, 2),
+            "loaded_at": index.loaded_at,
+            "hot_reload_interval_s": self.reload_interval,
+            "lookups": self.lookups,
+            "misses": self.misses,
+        }
+
+
+# Global instance
+curriculum = CurriculumStore()
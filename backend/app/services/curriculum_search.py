@@ -0,0 +1,338 @@
+# Data Academy - Curriculum Search (BM25)
+# Retrieval lokal materi kurikulum buat chat tutor: tiap pesan murid dicariin potongan materi
+# yang relevan (konsep kunci, studi kasus, contoh code, learning outcomes) lalu disisipin ke
+# prompt, jadi Rendy/Abdul jawab pake materi yang beneran diajarin, bukan cuma `context` dari client.
+#
+# - Teks dipecah jadi snippet per modul (overview, studi kasus, contoh code) + learning outcomes per level
+# - Tokenizer Indonesia/Inggris: lowercase, buang aksen + stopword, stemming ringan (imbuhan me-/ber-/di-/-kan,
+#   plural/-ing Inggris). Sama persis buat dokumen dan query, jadi yang penting konsisten, bukan sempurna
+# - Postings disimpen CSR (offsets + doc_ids + bobot BM25 yang udah dihitung pas build) di array numpy;
+#   query = jumlahin slice bobot tiap term → argpartition top-k. Gak ada loop per dokumen di Python
+# - Dibangun ulang tiap curriculum store reload (di thread reload), snapshot-nya di-swap atomic
+
+import math
+import os
+import re
+import time
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+from app.services.context_packer import count_tokens
+from app.services.curriculum import CurriculumLevel, CurriculumStore, curriculum
+from app.services.metrics import metrics
+
+
+TUTOR_RETRIEVAL_TOP_K = int(os.getenv("TUTOR_RETRIEVAL_TOP_K", "3"))
+# Budget token materi kurikulum di prompt chat (0 = retrieval mati)
+TUTOR_RETRIEVAL_MAX_TOKENS = int(os.getenv("TUTOR_RETRIEVAL_MAX_TOKENS", "400"))
+# Skor BM25 minimum; pesan basa-basi ("makasih kak") gak perlu disisipin materi apa-apa
+TUTOR_RETRIEVAL_MIN_SCORE = float(os.getenv("TUTOR_RETRIEVAL_MIN_SCORE", "2.0"))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+# ============================================
+# TOKENIZER
+# ============================================
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset("""
+    a an and are as at be been but by can could do does for from had has have how i if in into is it its
+    me my no not of on or our should so than that the their then there these this to too us was we were
+    what when where which who why will with would you your
+    ada adalah agar aja akan aku apa apakah atau bagaimana bagi bahwa banget bisa buat dalam dan dari
+    deh di dong dengan gak ga gimana gitu harus ini itu jadi juga ka kak kalau kalo kamu kan karena ke
+    kenapa kok lagi mau mengapa nggak nih oleh pada para saja saya sama sih siapa sudah supaya tapi
+    tidak tolong tuh udah untuk ya yang
+""".split())
+
+# Urutan penting: prefix yang lebih panjang dicoba duluan
+_ID_PREFIXES = ("meng", "meny", "mem", "men", "me", "peng", "peny", "pem", "pen", "per", "ber", "ter", "di", "ke")
+_ID_SUFFIXES = ("nya", "lah", "kah", "kan", "an")
+_MIN_STEM = 4
+
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """Stemming ringan ID/EN; kata pendek (<= 5 huruf) dan angka dibiarin."""
+    if len(word) <= 5 or word.isdigit():
+        return word
+    # Inggris: plural / -ing / -ed
+    if word.endswith("ies") and len(word) - 3 >= _MIN_STEM:
+        return word[:-3] + "y"
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and not word.endswith("ss") and len(word) - len(suffix) >= _MIN_STEM:
+            word = word[: -len(suffix)]
+            break
+    # Indonesia: partikel/akhiran lalu awalan
+    for suffix in _ID_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= _MIN_STEM:
+            word = word[: -len(suffix)]
+            break
+    for prefix in _ID_PREFIXES:
+        if word.startswith(prefix) and len(word) - len(prefix) >= _MIN_STEM:
+            word = word[len(prefix):]
+            break
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """Teks → term buat index/query (lowercase, tanpa aksen, tanpa stopword, di-stem)."""
+    text = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode("ascii")
+    return [stem(word) for word in _WORD_RE.findall(text) if word not in _STOPWORDS]
+
+
+# ============================================
+# SNIPPET
+# ============================================
+
+@dataclass(frozen=True)
+class CurriculumSnippet:
+    """Satu potongan materi yang bisa disisipin ke prompt."""
+    snippet_id: str
+    track_code: str
+    level: int
+    kind: str  # overview | case_study | code_examples | outcomes
+    title: str
+    text: str
+    module_id: Optional[str] = None
+
+    def render(self) -> str:
+        return f"[{self.title}]\n{self.text}"
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    snippet: CurriculumSnippet
+    score: float
+
+
+def _join(items) -> str:
+    return "; ".join(str(item) for item in items if item)
+
+
+def snippets_for_level(level: CurriculumLevel) -> list[CurriculumSnippet]:
+    """Pecah satu level jadi snippet: overview + studi kasus + contoh code per modul, plus learning outcomes."""
+    snippets = []
+    base = {"track_code": level.track_code, "level": level.level}
+    for module in level.modules:
+        extra = module.model_extra or {}
+        overview = [module.description]
+        if module.key_concepts:
+            overview.append(f"Konsep kunci: {_join(module.key_concepts)}")
+        notation = extra.get("mathematical_notation")
+        if isinstance(notation, list) and notation:
+            overview.append(f"Notasi: {_join(notation)}")
+        if isinstance(extra.get("performance_note"), str):
+            overview.append(f"Catatan performa: {extra['performance_note']}")
+        snippets.append(CurriculumSnippet(
+            snippet_id=f"{module.id}:overview", kind="overview", module_id=module.id,
+            title=f"{module.id} {module.topic}", text="\n".join(overview), **base,
+        ))
+
+        case = module.case_study
+        if case is not None:
+            text = case.scenario
+            if case.deliverables:
+                text += f"\nDeliverables: {_join(case.deliverables)}"
+            snippets.append(CurriculumSnippet(
+                snippet_id=f"{module.id}:case_study", kind="case_study", module_id=module.id,
+                title=f"{module.id} Studi kasus: {case.title}", text=text, **base,
+            ))
+
+        examples = extra.get("code_examples")
+        if isinstance(examples, list) and examples:
+            lines = []
+            for example in examples:
+                if isinstance(example, dict):
+                    lines.append(
+                        f"Kurang bagus: {example.get('bad', '')}\nLebih bagus: {example.get('good', '')}\n"
+                        f"Kenapa: {example.get('explanation', '')}"
+                    )
+            if lines:
+                snippets.append(CurriculumSnippet(
+                    snippet_id=f"{module.id}:code_examples", kind="code_examples", module_id=module.id,
+                    title=f"{module.id} Contoh code: {module.topic}", text="\n\n".join(lines), **base,
+                ))
+
+    if level.learning_outcomes:
+        snippets.append(CurriculumSnippet(
+            snippet_id=f"{level.track_code}-L{level.level}:outcomes", kind="outcomes",
+            title=f"{level.track} Level {level.level} - {level.title}: learning outcomes",
+            text=_join(level.learning_outcomes), **base,
+        ))
+    return snippets
+
+
+# ============================================
+# INDEX
+# ============================================
+
+@dataclass
+class _SearchIndex:
+    """Snapshot index BM25 (immutable setelah dibangun)."""
+    snippets: list[CurriculumSnippet] = field(default_factory=list)
+    vocab: dict[str, int] = field(default_factory=dict)
+    offsets: np.ndarray = field(default_factory=lambda: np.zeros(1, dtype=np.int64))
+    doc_ids: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int32))
+    weights: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float32))
+    track_masks: dict[str, np.ndarray] = field(default_factory=dict)
+    build_ms: float = 0.0
+
+
+def build_index(snippets: list[CurriculumSnippet], k1: float = BM25_K1, b: float = BM25_B) -> _SearchIndex:
+    """Bangun postings CSR dengan bobot BM25 per (term, snippet) yang udah final."""
+    start = time.perf_counter()
+    term_freqs = [Counter(tokenize(f"{snippet.title}\n{snippet.text}")) for snippet in snippets]
+    lengths = np.array([sum(freqs.values()) for freqs in term_freqs], dtype=np.float32)
+    total = len(snippets)
+    avg_length = float(lengths.mean()) if total else 1.0
+
+    postings: dict[str, list[tuple[int, int]]] = {}
+    for doc, freqs in enumerate(term_freqs):
+        for term, freq in freqs.items():
+            postings.setdefault(term, []).append((doc, freq))
+
+    vocab: dict[str, int] = {}
+    offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+    doc_ids = np.empty(sum(len(docs) for docs in postings.values()), dtype=np.int32)
+    weights = np.empty(len(doc_ids), dtype=np.float32)
+    cursor = 0
+    for term_id, (term, docs) in enumerate(postings.items()):
+        vocab[term] = term_id
+        idf = math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+        ids = np.fromiter((doc for doc, _ in docs), dtype=np.int32, count=len(docs))
+        tf = np.fromiter((freq for _, freq in docs), dtype=np.float32, count=len(docs))
+        norm = k1 * (1 - b + b * lengths[ids] / avg_length)
+        doc_ids[cursor:cursor + len(docs)] = ids
+        weights[cursor:cursor + len(docs)] = idf * tf * (k1 + 1) / (tf + norm)
+        cursor += len(docs)
+        offsets[term_id + 1] = cursor
+
+    tracks = np.array([snippet.track_code for snippet in snippets], dtype=object)
+    track_masks = {
+        code: (tracks == code).astype(np.float32) for code in {snippet.track_code for snippet in snippets}
+    }
+    return _SearchIndex(
+        snippets=list(snippets),
+        vocab=vocab,
+        offsets=offsets,
+        doc_ids=doc_ids,
+        weights=weights,
+        track_masks=track_masks,
+        build_ms=(time.perf_counter() - start) * 1000,
+    )
+
+
+class CurriculumSearch:
+    """
+    BM25 search di atas curriculum store. Index dibangun ulang otomatis tiap store reload
+    (lewat `curriculum.on_reload`), query-nya baca snapshot aktif tanpa lock.
+    """
+
+    def __init__(self, store: Optional[CurriculumStore] = None):
+        self._index = _SearchIndex()
+        self.rebuilds = 0
+        self.queries = 0
+        self.hits = 0
+        if store is not None:
+            store.on_reload(self.rebuild)
+            if store.iter_levels():
+                self.rebuild(store)
+
+    def rebuild(self, store: CurriculumStore) -> None:
+        snippets = [snippet for level in store.iter_levels() for snippet in snippets_for_level(level)]
+        self._index = build_index(snippets)
+        self.rebuilds += 1
+        metrics.observe("curriculum_search.build", self._index.build_ms)
+
+    def search(
+        self,
+        query: str,
+        top_k: int = TUTOR_RETRIEVAL_TOP_K,
+        track_code: Optional[str] = None,
+        min_score: float = 0.0,
+    ) -> list[SearchHit]:
+        """
+        Snippet paling relevan buat `query`, urut skor BM25 tertinggi.
+
+        Args:
+            query: Pesan murid (bebas, Indonesia/Inggris)
+            top_k: Jumlah hit maksimal
+            track_code: Batasin ke satu track (ANALYST / SCIENTIST); None = semua
+            min_score: Hit dengan skor di bawah ini dibuang
+        """
+        index = self._index
+        self.queries += 1
+        term_ids = {index.vocab[term] for term in tokenize(query) if term in index.vocab}
+        if not term_ids or top_k <= 0:
+            return []
+        scores = np.zeros(len(index.snippets), dtype=np.float32)
+        for term_id in term_ids:
+            start, end = index.offsets[term_id], index.offsets[term_id + 1]
+            scores[index.doc_ids[start:end]] += index.weights[start:end]
+        if track_code is not None:
+            mask = index.track_masks.get(track_code)
+            if mask is None:
+                return []
+            scores *= mask
+        candidates = np.flatnonzero(scores > max(min_score, 0.0))
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        ordered = candidates[np.argsort(-scores[candidates], kind="stable")]
+        hits = [SearchHit(snippet=index.snippets[doc], score=float(scores[doc])) for doc in ordered]
+        self.hits += len(hits)
+        return hits
+
+    def context_for(
+        self,
+        query: str,
+        track_code: Optional[str] = None,
+        max_tokens: int = TUTOR_RETRIEVAL_MAX_TOKENS,
+        top_k: int = TUTOR_RETRIEVAL_TOP_K,
+        min_score: float = TUTOR_RETRIEVAL_MIN_SCORE,
+    ) -> Optional[str]:
+        """
+        Teks materi kurikulum buat disisipin ke prompt: snippet top-k yang muat di `max_tokens`
+        (snippet yang kegedean di-skip, yang skornya lebih rendah masih dicoba). None kalau gak ada.
+        """
+        if max_tokens <= 0:
+            return None
+        start = time.perf_counter()
+        parts: list[str] = []
+        used = 0
+        for hit in self.search(query, top_k=top_k, track_code=track_code, min_score=min_score):
+            text = hit.snippet.render()
+            cost = count_tokens(text) + 2
+            if used + cost > max_tokens:
+                continue
+            parts.append(text)
+            used += cost
+        metrics.observe("curriculum_search.query", (time.perf_counter() - start) * 1000)
+        if not parts:
+            return None
+        metrics.increment("curriculum_search.injected_snippets", len(parts))
+        return "\n\n".join(parts)
+
+    def stats(self) -> dict:
+        index = self._index
+        return {
+            "snippets": len(index.snippets),
+            "terms": len(index.vocab),
+            "postings": int(len(index.doc_ids)),
+            "last_build_ms": round(index.build_ms, 2),
+            "rebuilds": self.rebuilds,
+            "queries": self.queries,
+            "hits": self.hits,
+        }
+
+
+# Global instance (ikut rebuild tiap curriculum store reload)
+curriculum_search = CurriculumSearch(curriculum)
@@ -0,0 +1,84 @@
+# Data Academy - Request Deadline + Cancellation
+# Tiap request interaktif (submit code, chat, hint) punya batas waktu end-to-end.
+#
+# - Service ngecek sisa waktu sebelum kerja opsional (call suggestions, eskalasi ke 70B);
+#   kalau udah mepet, kerja itu di-skip dan response-nya ditandain `partial`
+# - Nunggu LLM dibatesin sisa deadline; kalau habis, call-nya di-cancel (ikut ngebatalin
+#   request ke Groq lewat scheduler / single-flight) → DeadlineExceeded (504 di router)
+# - Client disconnect → router cancel kerjaan request-nya → ClientDisconnected (499)
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Optional, TypeVar
+
+from app.services.metrics import metrics
+
+
+# Budget end-to-end per jenis request (detik)
+GRADE_DEADLINE_SECONDS = float(os.getenv("GRADE_DEADLINE_SECONDS", "45"))
+TUTOR_DEADLINE_SECONDS = float(os.getenv("TUTOR_DEADLINE_SECONDS", "30"))
+
+# Sisa waktu minimum biar kerja opsional masih dijalanin (kira-kira satu LLM call)
+DEADLINE_SUGGESTIONS_MIN_SECONDS = float(os.getenv("DEADLINE_SUGGESTIONS_MIN_SECONDS", "5"))
+DEADLINE_ESCALATION_MIN_SECONDS = float(os.getenv("DEADLINE_ESCALATION_MIN_SECONDS", "8"))
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """Deadline request habis sebelum kerja utamanya selesai."""
+
+
+class ClientDisconnected(Exception):
+    """Client nutup koneksi sebelum response siap; kerjaannya udah di-cancel."""
+
+
+class Deadline:
+    """Batas waktu satu request (monotonic clock)."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def allows(self, seconds: float) -> bool:
+        """Masih ada minimal `seconds` detik buat kerja tambahan?"""
+        return self.remaining() >= seconds
+
+
+async def within(deadline: Optional[Deadline], work: Awaitable[T], name: str) -> T:
+    """
+    Tunggu `work` maksimal sisa deadline. Deadline None = tunggu biasa.
+
+    Args:
+        deadline: Deadline request (None = gak dibatesin)
+        work: Coroutine yang ditunggu; di-cancel kalau deadline habis
+        name: Nama buat metric `deadline.exceeded.{name}`
+
+    Raises:
+        DeadlineExceeded: Deadline habis sebelum `work` selesai
+    """
+    if deadline is None:
+        return await work
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        if asyncio.iscoroutine(work):
+            work.close()
+        metrics.increment(f"deadline.exceeded.{name}")
+        raise DeadlineExceeded(f"Deadline {deadline.seconds:g}s habis sebelum {name} mulai")
+    try:
+        return await asyncio.wait_for(work, timeout=remaining)
+    except asyncio.TimeoutError as e:
+        if deadline.remaining() > 0:
+            raise  # Timeout dari dalem work (httpx dll), bukan deadline
+        metrics.increment(f"deadline.exceeded.{name}")
+        raise DeadlineExceeded(f"Deadline {deadline.seconds:g}s habis nunggu {name}") from e
+
+
+def record_skip(name: str, tokens: int) -> None:
+    """Catat kerja LLM opsional yang di-skip karena deadline mepet (plus perkiraan token yang kehemat)."""
+    metrics.increment(f"deadline.skipped.{name}")
+    metrics.increment("llm.tokens_saved", tokens)
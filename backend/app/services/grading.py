@@ -3,19 +3,55 @@
 
 import os
 import json
+import time
 from typing import Literal, Optional
 from langchain_groq import ChatGroq
+from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
+from langchain_core.output_parsers import StrOutputParser
 from pydantic import BaseModel, Field
 
+from app.services.code_normalize import normalize_code
+from app.services.code_runner import ExecutionResult
+from app.services.curriculum import curriculum
+from app.services.deadline import DEADLINE_ESCALATION_MIN_SECONDS, Deadline, record_skip, within
+from app.services.json_repair import JSONRepairError, StreamingJSONExtractor, parse_json_object
+from app.services.llm_pool import get_pooled_llm
+from app.services.llm_scheduler import LLMPriority, estimate_tokens, scheduler
+from app.services.metrics import metrics
+from app.services.model_router import model_router
+from app.services.result_cache import ResultCache, make_cache_key
+from app.services.similarity_index import similarity_index
+from app.services.single_flight import SingleFlight
+from app.services.static_analysis import StaticAnalysis, analyze_code
+
 
 # Type definitions
 CodeLanguage = Literal["python", "sql"]
 
-# Groq Configuration
+# Groq Configuration (model per route diatur model_router / config/model_routing.json)
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_MODEL = "llama-3.1-70b-versatile"
+
+# Grading cache (key: hash code yang udah dinormalisasi + konteks challenge)
+GRADING_CACHE_MAX_ENTRIES = int(os.getenv("GRADING_CACHE_MAX_ENTRIES", "2048"))
+GRADING_CACHE_TTL_SECONDS = float(os.getenv("GRADING_CACHE_TTL_SECONDS", "86400"))
+GRADING_CACHE_SQLITE_PATH = os.getenv("GRADING_CACHE_SQLITE_PATH") or None  # Kosong = memory aja
+
+# Efficiency + style dari analisis statis lokal; LLM cuma nilai correctness + business insight (0 = LLM semua)
+GRADING_STATIC_SCORING = os.getenv("GRADING_STATIC_SCORING", "1") != "0"
+
+# Output JSON yang kurang field wajib → minta model ngisi field itu aja, maksimal sekian kali
+GRADING_MAX_REASKS = int(os.getenv("GRADING_MAX_REASKS", "1"))
+
+grading_cache = ResultCache(
+    namespace="grading",
+    max_entries=GRADING_CACHE_MAX_ENTRIES,
+    ttl_seconds=GRADING_CACHE_TTL_SECONDS,
+    sqlite_path=GRADING_CACHE_SQLITE_PATH,
+)
+
+# Grading identik yang lagi in-flight → satu LLM call, hasilnya dibagi ke semua request
+grading_flights = SingleFlight("grading")
 
 
 class GradingCriteria(BaseModel):
@@ -26,6 +62,12 @@ class GradingCriteria(BaseModel):
     business_insight: int = Field(ge=0, le=20, description="Code menunjukkan pemahaman bisnis (0-20)")
 
 
+# Skor maksimal per kriteria (sama kayak batas `le` di GradingCriteria), buat clamp output LLM
+CRITERIA_MAX = {"correctness": 40, "efficiency": 25, "style": 15, "business_insight": 20}
+# Kriteria yang dinilai LLM kalau efficiency + style udah dari analisis statis
+STATIC_LLM_CRITERIA = ("correctness", "business_insight")
+
+
 class GradingResult(BaseModel):
     """Hasil grading lengkap dari AI"""
     score: int = Field(ge=0, le=100, description="Total skor 0-100")
@@ -34,12 +76,17 @@ class GradingResult(BaseModel):
     strengths: list[str] = Field(default_factory=list, description="Apa yang bagus dari code ini")
     improvements: list[str] = Field(default_factory=list, description="Area yang perlu diperbaiki")
     passed: bool = Field(description="Apakah submission lulus threshold minimum")
+    suggestions: Optional[list[str]] = Field(
+        default=None,
+        description="Saran perbaikan (cuma diisi di mode single-call)",
+    )
 
 
 # ============================================
 # GRADING PROMPTS (BAHASA INDONESIA)
 # ============================================
 
+# Catatan: kurung kurawal di-escape ({{ }}) karena prompt ini dipake sebagai ChatPromptTemplate
 GRADING_SYSTEM_PROMPT = """Kamu adalah code reviewer expert untuk platform edukasi Data Analytics dan Data Science.
 
 Tugasmu adalah mengevaluasi code submission murid berdasarkan 4 kriteria:
@@ -66,19 +113,20 @@ Tugasmu adalah mengevaluasi code submission murid berdasarkan 4 kriteria:
    - Apakah solusi ini berguna di dunia nyata?
 
 Kamu HARUS mengembalikan JSON object dengan struktur berikut:
-{
+{{
     "score": <total_skor_0_sampai_100>,
-    "criteria": {
+    "criteria": {{
         "correctness": <0-40>,
         "efficiency": <0-25>,
         "style": <0-15>,
         "business_insight": <0-20>
-    },
+    }},
     "feedback_text": "<feedback detail dalam bahasa Indonesia yang friendly/santai>",
     "strengths": ["<kelebihan1>", "<kelebihan2>"],
     "improvements": ["<saran_perbaikan1>", "<saran_perbaikan2>"],
-    "passed": <true kalau score >= passing_threshold>
-}
+    "passed": <true kalau score >= passing_threshold>,
+    "confidence": <0.0-1.0, seberapa yakin kamu sama penilaian ini>
+}}
 
 Berikan feedback yang encouraging tapi jujur. Pakai bahasa Indonesia yang santai dan friendly.
 Untuk pemula, fokus lebih ke correctness dan kasih resource untuk belajar lebih lanjut.
@@ -106,18 +154,108 @@ CODE YANG DISUBMIT MURID:
 Tolong evaluasi submission ini berdasarkan kriteria grading di atas.
 """
 
+# Tambahan instruksi buat mode single-call: saran perbaikan ikut di JSON yang sama
+SUGGESTIONS_INSTRUCTION = """
+Tambahin juga field "suggestions" di JSON yang sama: list 3-5 saran perbaikan yang
+spesifik dan actionable (boleh sertakan code snippet singkat), urut dari yang paling impactful.
+Format: "suggestions": ["<saran1>", "<saran2>", "<saran3>"]
+Kalau skor 90 ke atas, isi "suggestions" dengan list kosong.
+"""
+
+# Versi kalau efficiency + style udah dihitung analisis statis: rubric + output lebih pendek
+STATIC_GRADING_SYSTEM_PROMPT = """Kamu adalah code reviewer expert untuk platform edukasi Data Analytics dan Data Science.
+
+Efficiency dan style udah dinilai otomatis pakai analisis statis. Tugasmu cuma menilai 2 kriteria:
+
+1. CORRECTNESS / KEBENARAN (0-40 poin):
+   - Apakah code menghasilkan output yang benar?
+   - Apakah edge cases ditangani?
+   - Apakah logikanya masuk akal?
+
+2. BUSINESS INSIGHT / PEMAHAMAN BISNIS (0-20 poin):
+   - Apakah code menunjukkan pemahaman terhadap masalah bisnis?
+   - Apakah hasilnya meaningful dan actionable?
+
+Kamu HARUS mengembalikan JSON object dengan struktur berikut:
+{{
+    "criteria": {{
+        "correctness": <0-40>,
+        "business_insight": <0-20>
+    }},
+    "feedback_text": "<2-3 kalimat feedback dalam bahasa Indonesia yang friendly/santai>",
+    "strengths": ["<kelebihan>"],
+    "improvements": ["<saran_perbaikan>"],
+    "confidence": <0.0-1.0, seberapa yakin kamu sama penilaian ini>
+}}
+
+Berikan feedback yang encouraging tapi jujur, fokus ke kebenaran logika dan pemahaman bisnis.
+"""
+
+# Follow-up kalau output JSON-nya kurang field wajib (dikirim apa adanya, bukan template)
+GRADING_REASK_PROMPT = """JSON kamu belum lengkap. Field ini hilang atau nilainya gak valid: {fields}.
+Balas HANYA JSON object yang berisi field itu aja, dengan struktur yang sama kayak sebelumnya
+(skor kriteria tetap di dalam "criteria")."""
+
+SUGGESTIONS_SYSTEM_PROMPT = """Kamu adalah mentor coding yang helpful. Berdasarkan feedback grading,
+    kasih 3-5 saran perbaikan yang spesifik dan actionable.
+    Sertakan code snippet kalau membantu. Fokus ke improvement yang paling impactful dulu.
+    Pakai bahasa Indonesia yang santai dan friendly."""
+
+SUGGESTIONS_HUMAN_TEMPLATE = """
+CODE MURID ({language}):
+```{language}
+{code}
+```
+
+FEEDBACK GRADING:
+Skor: {score}/100
+Feedback: {feedback}
+Area yang perlu diperbaiki: {improvements}
+
+Kasih saran spesifik untuk improve code ini.
+"""
+
+
+# ============================================
+# PROMPT TEMPLATES (DI-COMPILE SEKALI PAS IMPORT)
+# ============================================
+#
+# GRADING_SYSTEM_PROMPT selalu jadi message pertama yang sama persis (prefix yang bisa di-cache
+# provider); semua isi challenge + code murid ada di message human setelahnya.
+
+GRADING_PROMPTS: dict[bool, ChatPromptTemplate] = {
+    include_suggestions: ChatPromptTemplate.from_messages([
+        ("system", GRADING_SYSTEM_PROMPT),
+        ("human", CHALLENGE_CONTEXT_TEMPLATE + (SUGGESTIONS_INSTRUCTION if include_suggestions else "")),
+    ])
+    for include_suggestions in (False, True)
+}
+
+STATIC_GRADING_PROMPTS: dict[bool, ChatPromptTemplate] = {
+    include_suggestions: ChatPromptTemplate.from_messages([
+        ("system", STATIC_GRADING_SYSTEM_PROMPT),
+        ("human", CHALLENGE_CONTEXT_TEMPLATE + (SUGGESTIONS_INSTRUCTION if include_suggestions else "")),
+    ])
+    for include_suggestions in (False, True)
+}
+
+SUGGESTIONS_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", SUGGESTIONS_SYSTEM_PROMPT),
+    ("human", SUGGESTIONS_HUMAN_TEMPLATE),
+])
+
 
 # ============================================
 # GRADING SERVICE
 # ============================================
 
-def get_grading_llm() -> ChatGroq:
-    """Initialize Groq LLM untuk grading dengan temperature rendah biar konsisten."""
-    return ChatGroq(
-        model=GROQ_MODEL,
-        temperature=0.2,  # Temperature rendah biar grading konsisten
-        api_key=GROQ_API_KEY,
-    )
+GRADING_TEMPERATURE = 0.2  # Temperature rendah biar grading konsisten
+SUGGESTION_TEMPERATURE = 0.5
+
+
+def get_grading_llm(model: str) -> ChatGroq:
+    """Ambil Groq LLM untuk grading dari registry (temperature rendah biar konsisten)."""
+    return get_pooled_llm(model, GRADING_TEMPERATURE).llm
 
 
 async def grade_code_submission(
@@ -130,13 +268,19 @@ async def grade_code_submission(
     test_cases: Optional[list[dict]] = None,
     difficulty: int = 1,
     passing_score: int = 70,
+    use_cache: bool = True,
+    include_suggestions: bool = False,
+    execution: Optional[ExecutionResult] = None,
+    priority: LLMPriority = "interactive",
+    deadline: Optional[Deadline] = None,
 ) -> GradingResult:
     """
     Grade code submission menggunakan AI.
     
     Args:
         code_snippet: Code yang disubmit murid
-        challenge_id: ID challenge yang di-grade
+        challenge_id: ID challenge yang di-grade. Kalau ada di curriculum store, konteks di bawah
+            (judul s/d passing_score) diambil dari kurikulum dan nilai kiriman caller diabaikan
         language: 'python' atau 'sql'
         challenge_title: Judul challenge
         challenge_description: Deskripsi lengkap requirement challenge
@@ -144,49 +288,408 @@ async def grade_code_submission(
         test_cases: List test cases dengan input dan expected output
         difficulty: Level kesulitan 1-5
         passing_score: Skor minimum untuk lulus (default 70)
+        use_cache: Pake hasil grading sebelumnya kalau code (setelah dinormalisasi) sama
+        include_suggestions: Minta saran perbaikan di response yang sama (satu LLM call aja)
+        execution: Hasil eksekusi test cases (dari code_runner). Kalau ada, skor correctness
+            dihitung dari pass ratio, bukan tebakan LLM; compile error langsung di-grade tanpa LLM.
+        priority: Lane scheduler LLM; 'background' buat batch/queue biar gak nyalip chat murid
+        deadline: Batas waktu request. Nunggu LLM dibatesin sisa waktunya, dan eskalasi ke model
+            besar di-skip kalau udah mepet (hasil model kecil dipake, gak di-cache)
     
     Returns:
         GradingResult dengan skor, breakdown kriteria, dan feedback
+        (plus `suggestions` kalau include_suggestions=True)
+    
+    Raises:
+        DeadlineExceeded: Deadline habis sebelum grading selesai
     """
     
-    # Format test cases untuk prompt
-    test_cases_str = "Tidak ada test cases spesifik."
-    if test_cases:
-        test_cases_str = json.dumps(test_cases, indent=2)
+    # Rubric challenge kurikulum gak boleh diatur dari body request
+    context = curriculum.get_challenge(challenge_id)
+    if context is not None:
+        challenge_title = context.title
+        challenge_description = context.description
+        expected_behavior = context.expected_behavior
+        test_cases = context.test_cases
+        difficulty = context.difficulty
+        passing_score = context.passing_score
     
-    # Create the prompt
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", GRADING_SYSTEM_PROMPT),
-        ("human", CHALLENGE_CONTEXT_TEMPLATE),
-    ])
+    # Cek cache dulu: resubmit dengan edit whitespace/komentar gak perlu LLM call lagi
+    cache_key = make_cache_key(
+        "grade",
+        challenge_id,
+        language,
+        normalize_code(code_snippet, language),
+        challenge_title,
+        challenge_description,
+        expected_behavior,
+        test_cases,
+        difficulty,
+        passing_score,
+        include_suggestions,
+        None if execution is None else [execution.passed, execution.total, execution.error],
+        GRADING_STATIC_SCORING,
+    )
+    if use_cache:
+        cached = grading_cache.get(cache_key)
+        if cached is not None:
+            return GradingResult(**cached)
+    
+    # Code yang gak bisa di-compile gak perlu dinilai LLM
+    if execution is not None and execution.compile_error:
+        return _compile_error_result(execution, passing_score, include_suggestions)
+    
+    # Efficiency + style dari analisis statis (mikrodetik); None kalau code Python gak bisa di-parse
+    static = analyze_code(code_snippet, language) if GRADING_STATIC_SCORING else None
+    if static is not None:
+        metrics.observe("grading.static_analysis", static.elapsed_ms)
+    
+    # Submission yang strukturnya hampir sama dengan yang udah pernah di-grade → pake hasilnya
+    similarity_context = make_cache_key(
+        "similar",
+        challenge_title,
+        challenge_description,
+        expected_behavior,
+        test_cases,
+        difficulty,
+        include_suggestions,
+        None if execution is None else [execution.passed, execution.total, execution.error],
+    )
+    if use_cache:
+        match = similarity_index.lookup(challenge_id, language, code_snippet, similarity_context)
+        if match is not None:
+            grading_result = _adapt_similar_result(match.result, passing_score, static)
+            grading_cache.set(cache_key, grading_result.model_dump(), tag=challenge_id)
+            return grading_result
+    
+    async def generate() -> GradingResult:
+        # Format test cases untuk prompt
+        test_cases_str = "Tidak ada test cases spesifik."
+        if test_cases:
+            test_cases_str = json.dumps(test_cases, indent=2)
+        if execution is not None:
+            test_cases_str += "\n\n" + format_execution_summary(execution, static_scoring=static is not None)
+        
+        inputs = {
+            "challenge_title": challenge_title,
+            "challenge_description": challenge_description,
+            "language": language,
+            "difficulty": difficulty,
+            "passing_score": passing_score,
+            "expected_behavior": expected_behavior or "Selesaikan challenge sesuai deskripsi.",
+            "test_cases": test_cases_str,
+            "student_code": code_snippet,
+        }
+        tokens = estimate_tokens(
+            GRADING_SYSTEM_PROMPT if static is None else STATIC_GRADING_SYSTEM_PROMPT,
+            CHALLENGE_CONTEXT_TEMPLATE,
+            challenge_description,
+            test_cases_str,
+            code_snippet,
+        )
+        
+        # Cascade: challenge gampang dinilai model kecil dulu, diulang di 70B kalau
+        # JSON-nya rusak, skornya mepet passing_score, atau model-nya gak yakin
+        start = time.perf_counter()
+        decision = model_router.choose("grading", difficulty=difficulty)
+        while True:
+            call_start = time.perf_counter()
+            try:
+                grading_result, confidence = await _grade_with_model(
+                    decision.model, inputs, tokens, priority, execution, passing_score, include_suggestions, static
+                )
+            except (JSONRepairError, KeyError, TypeError, ValueError):
+                model_router.observe(decision, (time.perf_counter() - call_start) * 1000)
+                reason = model_router.escalation_reason(decision, parse_error=True)
+                if reason is None:
+                    raise
+                decision = model_router.escalate(decision, reason)
+                continue
+            model_router.observe(decision, (time.perf_counter() - call_start) * 1000)
+            reason = model_router.escalation_reason(
+                decision, score=grading_result.score, passing_score=passing_score, confidence=confidence
+            )
+            if reason is None:
+                break
+            if deadline is not None and not deadline.allows(DEADLINE_ESCALATION_MIN_SECONDS):
+                # Deadline (request leader) mepet: mending hasil model kecil daripada timeout. Gak di-cache,
+                # biar submit berikutnya tetep dinilai ulang dengan eskalasi normal.
+                record_skip("grading.escalation", tokens)
+                return grading_result
+            decision = model_router.escalate(decision, reason)
+        
+        grading_cache.set(
+            cache_key,
+            grading_result.model_dump(),
+            latency_ms=(time.perf_counter() - start) * 1000,
+            tag=challenge_id,
+        )
+        similarity_index.add(challenge_id, language, code_snippet, similarity_context, grading_result.model_dump())
+        return grading_result
+    
+    # Submission identik yang lagi di-grade barengan (satu kelas submit bareng) → satu LLM call
+    flight_key = make_cache_key(
+        "grade-flight",
+        # use_cache=False = minta grading fresh, jadi cuma digabung kalau code mentahnya persis sama
+        cache_key if use_cache else make_cache_key(cache_key, code_snippet),
+        model_router.models_for("grading"),
+        GRADING_TEMPERATURE,
+    )
+    # Deadline cuma ngebatesin nunggu request ini; call-nya baru di-cancel kalau semua yang nunggu pergi
+    return await within(deadline, grading_flights.run(flight_key, generate), "grading")
+
+
+async def _grade_with_model(
+    model: str,
+    inputs: dict,
+    tokens: int,
+    priority: LLMPriority,
+    execution: Optional[ExecutionResult],
+    passing_score: int,
+    include_suggestions: bool,
+    static: Optional[StaticAnalysis] = None,
+) -> tuple[GradingResult, Optional[float]]:
+    """
+    Satu LLM call grading di model tertentu + rapihin hasilnya.
+    Kalau ada `static`, LLM cuma nilai correctness + business insight; efficiency dan style
+    diambil dari analisis statis.
+    Output di-stream dan di-parse sambil jalan (StreamingJSONExtractor): code fence, trailing
+    comma, JSON kepotong dll di-repair; kalau masih ada field wajib yang hilang, model ditanya
+    ulang cuma buat field itu (GRADING_MAX_REASKS).
+    Return (GradingResult, confidence yang dilaporin model atau None).
+    Output yang gak bisa di-repair / tetep gak lengkap → exception (dipake buat eskalasi).
+    """
+    prompt = (GRADING_PROMPTS if static is None else STATIC_GRADING_PROMPTS)[include_suggestions]
+    llm = get_grading_llm(model)
+    chain = prompt | llm | StrOutputParser()
+    
+    # Lewat scheduler: rate limit + retry 429/5xx (sebelum chunk pertama)
+    extractor = StreamingJSONExtractor()
+    parse_ms = 0.0
+    async for chunk in scheduler.stream(
+        lambda: chain.astream(inputs), priority=priority, tokens=tokens, name="grading", model=model
+    ):
+        if extractor.done:
+            continue  # Sisa teks setelah object ketutup (penutup code fence, prosa)
+        parse_start = time.perf_counter()
+        extractor.feed(chunk)
+        parse_ms += (time.perf_counter() - parse_start) * 1000
+    parsed = extractor.finish()
+    metrics.observe("grading.parse", parse_ms)
     
-    # Create the chain dengan JSON output parser
-    llm = get_grading_llm()
-    parser = JsonOutputParser(pydantic_object=GradingResult)
-    chain = prompt | llm | parser
-    
-    # Get grading result
-    result = await chain.ainvoke({
-        "challenge_title": challenge_title,
-        "challenge_description": challenge_description,
-        "language": language,
-        "difficulty": difficulty,
-        "passing_score": passing_score,
-        "expected_behavior": expected_behavior or "Selesaikan challenge sesuai deskripsi.",
-        "test_cases": test_cases_str,
-        "student_code": code_snippet,
-    })
+    data = parsed.value
+    repairs = list(parsed.repairs)
+    result, missing = _normalize_grading_output(data, static is not None, repairs)
+    for _ in range(GRADING_MAX_REASKS):
+        if not missing:
+            break
+        metrics.increment("grading.reask")
+        messages = prompt.format_messages(**inputs) + [
+            AIMessage(content=json.dumps(data, ensure_ascii=False)),
+            HumanMessage(content=GRADING_REASK_PROMPT.format(fields=", ".join(missing))),
+        ]
+        reply = await scheduler.run(
+            lambda: llm.ainvoke(messages), priority=priority, tokens=tokens, name="grading.reask", model=model
+        )
+        data = _merge_grading_patch(data, parse_json_object(reply.content).value)
+        result, missing = _normalize_grading_output(data, static is not None, repairs)
+    for repair in dict.fromkeys(repairs):
+        metrics.increment(f"grading.repair.{repair}")
+    if missing:
+        raise JSONRepairError(f"Output grading kurang field: {', '.join(missing)}")
+    
+    confidence = result.pop("confidence")
+    
+    # Correctness dari hasil eksekusi beneran, bukan tebakan LLM
+    if execution is not None and execution.total:
+        result["criteria"]["correctness"] = round(40 * execution.pass_ratio)
+        result["score"] = sum(result["criteria"].values())
+    
+    # Static scoring dipasang setelah correctness final (skornya diskalain ke correctness)
+    if static is not None:
+        _apply_static_scores(result, static)
     
     # Pastikan passed dihitung dengan benar
     result["passed"] = result["score"] >= passing_score
+    if include_suggestions:
+        result["suggestions"] = result["suggestions"][:5]
+    else:
+        result.pop("suggestions", None)
     
-    return GradingResult(**result)
+    return GradingResult(**result), confidence
+
+
+def _normalize_grading_output(data: dict, static_scoring: bool, repairs: list[str]) -> tuple[dict, list[str]]:
+    """
+    Validasi + rapihin output JSON grading sebelum jadi GradingResult.
+    Angka string / float dibulatin, skor kriteria di-clamp ke range-nya, list yang salah tipe
+    jadi list biasa, dan `score` selalu dihitung dari criteria (dicatat kalau beda sama yang
+    dilaporin model). Repair yang kepake ditambahin ke `repairs`.
+    
+    Returns:
+        (result, field wajib yang hilang / gak bisa dipake)
+    """
+    names = STATIC_LLM_CRITERIA if static_scoring else tuple(CRITERIA_MAX)
+    raw_criteria = data.get("criteria") if isinstance(data.get("criteria"), dict) else {}
+    criteria: dict[str, int] = {}
+    missing: list[str] = []
+    for name in names:
+        # Model kecil kadang naro skor kriteria langsung di root object
+        value = _as_int(raw_criteria.get(name, data.get(name)))
+        if value is None:
+            missing.append(f"criteria.{name}")
+            continue
+        clamped = min(max(value, 0), CRITERIA_MAX[name])
+        if clamped != value:
+            repairs.append("criteria_clamped")
+        criteria[name] = clamped
+    
+    feedback = data.get("feedback_text")
+    if not isinstance(feedback, str) or not feedback.strip():
+        missing.append("feedback_text")
+    
+    result = {
+        "score": sum(criteria.values()),
+        "criteria": criteria,
+        "feedback_text": feedback.strip() if isinstance(feedback, str) else "",
+        "strengths": _as_str_list(data.get("strengths")),
+        "improvements": _as_str_list(data.get("improvements")),
+        "suggestions": _as_str_list(data.get("suggestions")),
+        "confidence": _as_confidence(data.get("confidence")),
+    }
+    if not static_scoring and not missing and _as_int(data.get("score")) != result["score"]:
+        repairs.append("score_recomputed")
+    return result, missing
+
+
+def _merge_grading_patch(data: dict, patch: dict) -> dict:
+    """Gabungin jawaban re-ask (cuma field yang kurang) ke output sebelumnya."""
+    merged = {**data, **{key: value for key, value in patch.items() if key != "criteria"}}
+    criteria = dict(data["criteria"]) if isinstance(data.get("criteria"), dict) else {}
+    if isinstance(patch.get("criteria"), dict):
+        criteria.update(patch["criteria"])
+    merged["criteria"] = criteria
+    return merged
+
+
+def _as_int(value) -> Optional[int]:
+    """Skor dari LLM → int. Terima 35, 35.0, "35", "35/40"; selain itu None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return round(value)
+    if isinstance(value, str):
+        try:
+            return round(float(value.split("/")[0].strip()))
+        except ValueError:
+            return None
+    return None
+
+
+def _as_str_list(value) -> list[str]:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        return []
+    return [str(item).strip() for item in value if item is not None and str(item).strip()]
+
+
+def _as_confidence(value) -> Optional[float]:
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        return min(max(float(value), 0.0), 1.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _apply_static_scores(result: dict, static: StaticAnalysis) -> None:
+    """
+    Isi efficiency + style dari analisis statis (diskalain ke correctness), skor total dihitung
+    ulang, temuannya masuk improvements.
+    """
+    criteria = result["criteria"]
+    efficiency, style = static.scaled(criteria["correctness"], CRITERIA_MAX["correctness"])
+    result["criteria"] = {
+        "correctness": criteria["correctness"],
+        "efficiency": efficiency,
+        "style": style,
+        "business_insight": criteria["business_insight"],
+    }
+    result["score"] = sum(result["criteria"].values())
+    improvements = list(result.get("improvements") or [])
+    result["improvements"] = improvements + [item for item in static.improvements() if item not in improvements]
+
+
+def _adapt_similar_result(
+    result: dict,
+    passing_score: int,
+    static: Optional[StaticAnalysis] = None,
+) -> GradingResult:
+    """
+    Hasil grading submission mirip, disesuaiin ke request ini. Konteks challenge dan hasil
+    eksekusi test case-nya udah pasti sama (bagian dari key), jadi cukup hitung ulang
+    skor total dan status lulus sesuai passing_score. Efficiency + style diambil dari
+    analisis statis code INI (murah, dan bisa beda walau strukturnya mirip).
+    """
+    adapted = json.loads(json.dumps(result))
+    if static is not None:
+        adapted["criteria"]["efficiency"], adapted["criteria"]["style"] = static.scaled(
+            adapted["criteria"]["correctness"], CRITERIA_MAX["correctness"],
+        )
+    adapted["score"] = sum(adapted["criteria"].values())
+    adapted["passed"] = adapted["score"] >= passing_score
+    return GradingResult(**adapted)
+
+
+def format_execution_summary(execution: ExecutionResult, static_scoring: bool = False) -> str:
+    """
+    Ringkasan hasil eksekusi test cases buat dimasukin ke prompt grading.
+    `static_scoring` = efficiency + style udah dari analisis statis (LLM tinggal business insight).
+    """
+    lines = [
+        "HASIL EKSEKUSI TEST CASES (dijalankan beneran di sandbox):",
+        f"- Lulus: {execution.passed}/{execution.total} (waktu total {execution.execution_time_ms} ms)",
+    ]
+    if execution.error:
+        lines.append(f"- Error: {execution.error}")
+    for case in execution.cases:
+        if not case.passed:
+            detail = case.error or f"expected {case.expected}, dapet {case.actual}"
+            lines.append(f"- Case #{case.index + 1} GAGAL: {detail}")
+        if case.query_plan:
+            lines.append(f"- Query plan case #{case.index + 1} ({case.time_ms} ms): {'; '.join(case.query_plan)}")
+    focus = "business insight" if static_scoring else "efficiency, style, dan business insight"
+    lines.append(f"Skor correctness dihitung otomatis dari hasil ini; fokus penilaianmu ke {focus}.")
+    return "\n".join(lines)
+
+
+def _compile_error_result(
+    execution: ExecutionResult,
+    passing_score: int,
+    include_suggestions: bool,
+) -> GradingResult:
+    """GradingResult deterministik buat code yang gak bisa di-compile."""
+    return GradingResult(
+        score=0,
+        criteria=GradingCriteria(correctness=0, efficiency=0, style=0, business_insight=0),
+        feedback_text=(
+            f"Code-nya belum bisa jalan nih: {execution.error}. "
+            "Benerin dulu syntax-nya, terus submit lagi ya!"
+        ),
+        strengths=[],
+        improvements=["Perbaiki syntax error supaya code bisa dijalankan"],
+        passed=0 >= passing_score,
+        suggestions=[f"Cek lagi bagian ini: {execution.error}"] if include_suggestions else None,
+    )
 
 
 async def get_improvement_suggestions(
     code_snippet: str,
     language: CodeLanguage,
     grading_result: GradingResult,
+    use_cache: bool = True,
+    deadline: Optional[Deadline] = None,
 ) -> list[str]:
     """
     Dapetin saran perbaikan spesifik setelah grading.
@@ -195,46 +698,62 @@ async def get_improvement_suggestions(
         code_snippet: Code murid
         language: Bahasa pemrograman
         grading_result: Hasil grading dari grade_code_submission
+        use_cache: Pake saran sebelumnya kalau code dan hasil grading-nya sama
+        deadline: Batas waktu request (nunggu LLM dibatesin sisa waktunya)
     
     Returns:
         List saran perbaikan yang spesifik dan actionable
-    """
     
-    system_prompt = """Kamu adalah mentor coding yang helpful. Berdasarkan feedback grading,
-    kasih 3-5 saran perbaikan yang spesifik dan actionable.
-    Sertakan code snippet kalau membantu. Fokus ke improvement yang paling impactful dulu.
-    Pakai bahasa Indonesia yang santai dan friendly."""
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
-        ("human", """
-CODE MURID ({language}):
-```{language}
-{code}
-```
-
-FEEDBACK GRADING:
-Skor: {score}/100
-Feedback: {feedback}
-Area yang perlu diperbaiki: {improvements}
-
-Kasih saran spesifik untuk improve code ini.
-"""),
-    ])
-    
-    llm = ChatGroq(model=GROQ_MODEL, temperature=0.5, api_key=GROQ_API_KEY)
-    chain = prompt | llm | StrOutputParser()
+    Raises:
+        DeadlineExceeded: Deadline habis sebelum saran-nya jadi
+    """
     
-    response = await chain.ainvoke({
-        "language": language,
-        "code": code_snippet,
-        "score": grading_result.score,
-        "feedback": grading_result.feedback_text,
-        "improvements": ", ".join(grading_result.improvements),
-    })
+    cache_key = make_cache_key(
+        "suggestions",
+        language,
+        normalize_code(code_snippet, language),
+        grading_result.model_dump(),
+    )
+    if use_cache:
+        cached = grading_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
     
-    # Parse response jadi list suggestions
-    suggestions = response.split("\n")
-    suggestions = [s.strip() for s in suggestions if s.strip() and not s.strip().startswith("#")]
+    async def generate() -> list[str]:
+        decision = model_router.choose("suggestions")
+        chain = SUGGESTIONS_PROMPT | get_pooled_llm(decision.model, SUGGESTION_TEMPERATURE).llm | StrOutputParser()
+        inputs = {
+            "language": language,
+            "code": code_snippet,
+            "score": grading_result.score,
+            "feedback": grading_result.feedback_text,
+            "improvements": ", ".join(grading_result.improvements),
+        }
+        
+        # Suggestions bukan jalur kritis → lane background
+        start = time.perf_counter()
+        response = await scheduler.run(
+            lambda: chain.ainvoke(inputs),
+            priority="background",
+            tokens=estimate_tokens(SUGGESTIONS_SYSTEM_PROMPT, code_snippet, grading_result.feedback_text),
+            name="suggestions",
+            model=decision.model,
+        )
+        model_router.observe(decision, (time.perf_counter() - start) * 1000)
+        
+        # Parse response jadi list suggestions
+        suggestions = response.split("\n")
+        suggestions = [s.strip() for s in suggestions if s.strip() and not s.strip().startswith("#")]
+        
+        suggestions = suggestions[:5]  # Return top 5 suggestions
+        grading_cache.set(cache_key, suggestions, latency_ms=(time.perf_counter() - start) * 1000)
+        return suggestions
     
-    return suggestions[:5]  # Return top 5 suggestions
+    # Submit-code barengan dengan code + hasil grading sama → saran dari satu LLM call
+    flight_key = make_cache_key(
+        "suggestions-flight",
+        cache_key if use_cache else make_cache_key(cache_key, code_snippet),
+        model_router.models_for("suggestions"),
+        SUGGESTION_TEMPERATURE,
+    )
+    return list(await within(deadline, grading_flights.run(flight_key, generate), "suggestions"))
@@ -0,0 +1,272 @@
+# Data Academy - Streaming JSON Extractor + Repair
+# Output JSON dari LLM (terutama model 8B) sering "hampir bener": dibungkus code fence / prosa,
+# ada trailing comma, True/False ala Python, newline mentah di dalam string, atau kepotong
+# di tengah karena max token. JsonOutputParser langsung gagal buat semua kasus itu, padahal
+# isinya masih bisa dipake.
+#
+# Extractor ini di-feed potongan teks (chunk streaming atau teks utuh), nge-scan sekali jalan
+# sambil nyimpen state (di dalam string / escape / stack bracket), dan langsung nulis versi
+# yang udah dibenerin. Pas stream selesai:
+#   - object top-level udah ketutup → json.loads hasil scan
+#   - kepotong → dipotong ke titik aman terakhir (value terakhir yang utuh), bracket ditutup
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+# Karakter yang perlu perhatian di dalam string; sisanya bisa di-copy sekaligus
+_STRING_SPECIAL = re.compile(r'["\\\x00-\x1f]')
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class JSONRepairError(ValueError):
+    """Output gak bisa dijadiin JSON object walau udah di-repair."""
+
+
+@dataclass
+class ParsedJSON:
+    """Hasil extract: object-nya, repair yang dipake, dan apakah object-nya ketutup normal."""
+    value: dict
+    repairs: list[str] = field(default_factory=list)
+    complete: bool = True
+
+
+class _Frame:
+    """Satu level object/array yang lagi kebuka. `expect`: key, colon, value, atau comma."""
+    __slots__ = ("kind", "expect")
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.expect = "key" if kind == "{" else "value"
+
+
+class StreamingJSONExtractor:
+    """
+    Extract + repair object JSON pertama dari teks yang dateng bertahap.
+
+    Pakai:
+        extractor = StreamingJSONExtractor()
+        for chunk in stream:
+            if extractor.feed(chunk):
+                break  # object top-level udah ketutup
+        parsed = extractor.finish()
+    """
+
+    def __init__(self):
+        self._out: list[str] = []
+        self._stack: list[_Frame] = []
+        self._started = False
+        self.done = False
+        self._in_string = False
+        self._string_is_key = False
+        self._escape = False
+        self._token: list[str] = []
+        self._pending_comma = False
+        # Titik aman terakhir: (panjang output, penutup bracket) setelah value yang utuh
+        self._safe: Optional[tuple[int, str]] = None
+        self._repairs: dict[str, None] = {}
+
+    # ----------------------------------------
+    # Feed
+    # ----------------------------------------
+
+    def feed(self, chunk: str) -> bool:
+        """Proses satu potong teks. Return True kalau object top-level udah ketutup."""
+        i, n = 0, len(chunk)
+        while i < n and not self.done:
+            if not self._started:
+                # Skip prosa / code fence sebelum object
+                start = chunk.find("{", i)
+                if start < 0:
+                    return False
+                self._started = True
+                self._open("{")
+                i = start + 1
+                continue
+            if self._in_string:
+                i = self._feed_string(chunk, i)
+                continue
+            self._feed_char(chunk[i])
+            i += 1
+        return self.done
+
+    def _feed_string(self, chunk: str, i: int) -> int:
+        if self._escape:
+            self._out.append(chunk[i])
+            self._escape = False
+            return i + 1
+        match = _STRING_SPECIAL.search(chunk, i)
+        if match is None:
+            self._out.append(chunk[i:])
+            return len(chunk)
+        j = match.start()
+        if j > i:
+            self._out.append(chunk[i:j])
+        char = chunk[j]
+        if char == '"':
+            self._out.append(char)
+            self._in_string = False
+            if self._string_is_key:
+                self._stack[-1].expect = "colon"
+            else:
+                self._value_done()
+        elif char == "\\":
+            self._out.append(char)
+            self._escape = True
+        else:
+            # Newline / tab mentah di dalam string: JSON gak ngebolehin
+            self._out.append(_CONTROL_ESCAPES.get(char, ""))
+            self._repair("control_char")
+        return j + 1
+
+    def _feed_char(self, char: str) -> None:
+        if char in " \t\r\n":
+            self._end_token()
+        elif char == '"':
+            self._end_token()
+            self._flush_comma()
+            frame = self._stack[-1]
+            self._string_is_key = frame.kind == "{" and frame.expect == "key"
+            self._in_string = True
+            self._out.append(char)
+        elif char == ":":
+            self._end_token()
+            self._out.append(char)
+            self._stack[-1].expect = "value"
+        elif char == ",":
+            self._end_token()
+            if self._pending_comma:
+                self._repair("double_comma")
+            self._pending_comma = True
+        elif char in "{[":
+            self._end_token()
+            self._flush_comma()
+            self._open(char)
+        elif char in "}]":
+            self._end_token()
+            self._close(char)
+        else:
+            if not self._token:
+                self._flush_comma()
+            self._token.append(char)
+
+    # ----------------------------------------
+    # State helper
+    # ----------------------------------------
+
+    def _open(self, kind: str) -> None:
+        self._out.append(kind)
+        self._stack.append(_Frame(kind))
+        self._safe = (len(self._out), self._closers())
+
+    def _close(self, char: str) -> None:
+        if self._pending_comma:
+            self._pending_comma = False
+            self._repair("trailing_comma")
+        frame = self._stack.pop()
+        closer = _CLOSERS[frame.kind]
+        if char != closer:
+            self._repair("bracket_mismatch")
+        self._out.append(closer)
+        if self._stack:
+            self._value_done()
+        else:
+            self.done = True
+
+    def _end_token(self) -> None:
+        if not self._token:
+            return
+        token = "".join(self._token)
+        self._token.clear()
+        frame = self._stack[-1]
+        if frame.kind == "{" and frame.expect == "key":
+            # Key tanpa kutip (score: 80)
+            self._out.append(json.dumps(token))
+            frame.expect = "colon"
+            self._repair("unquoted_key")
+            return
+        if token in _PYTHON_LITERALS:
+            token = _PYTHON_LITERALS[token]
+            self._repair("python_literal")
+        self._out.append(token)
+        self._value_done()
+
+    def _flush_comma(self) -> None:
+        """Dipanggil sebelum value/key baru: tulis koma yang ditahan (atau yang lupa ditulis model)."""
+        frame = self._stack[-1]
+        if not self._pending_comma and frame.expect != "comma":
+            return
+        if not self._pending_comma:
+            self._repair("missing_comma")
+        self._out.append(",")
+        self._pending_comma = False
+        frame.expect = "key" if frame.kind == "{" else "value"
+
+    def _value_done(self) -> None:
+        self._stack[-1].expect = "comma"
+        self._safe = (len(self._out), self._closers())
+
+    def _closers(self) -> str:
+        return "".join(_CLOSERS[frame.kind] for frame in reversed(self._stack))
+
+    def _repair(self, name: str) -> None:
+        self._repairs[name] = None
+
+    # ----------------------------------------
+    # Finish
+    # ----------------------------------------
+
+    def finish(self) -> ParsedJSON:
+        """
+        Tutup stream dan parse hasilnya.
+        Object kepotong dipotong ke value utuh terakhir (string value yang kepotong tetep dipake).
+
+        Raises:
+            JSONRepairError: Gak ada object JSON, atau hasil repair tetep invalid
+        """
+        if not self._started:
+            raise JSONRepairError("Output gak berisi object JSON")
+        if self.done:
+            text = "".join(self._out)
+        else:
+            self._repair("truncated")
+            if self._in_string and not self._string_is_key:
+                # Value string kepotong: tutup aja, isinya masih berguna (feedback_text dll)
+                if self._escape:
+                    self._out.pop()
+                text = "".join(self._out) + '"' + self._closers()
+            else:
+                length, closers = self._safe
+                text = "".join(self._out[:length]) + closers
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise JSONRepairError(f"JSON invalid setelah repair: {e}") from e
+        if not isinstance(value, dict):
+            raise JSONRepairError("Output JSON bukan object")
+        if not value and not self.done:
+            raise JSONRepairError("Output JSON kepotong sebelum ada field yang utuh")
+        return ParsedJSON(value=value, repairs=list(self._repairs), complete=self.done)
+
+
+def parse_json_object(text: str) -> ParsedJSON:
+    """
+    Extract + repair object JSON dari teks utuh (bukan streaming).
+    Jalur cepet: teksnya udah JSON valid → langsung json.loads.
+    """
+    stripped = text.strip()
+    if stripped.startswith("{"):
+        try:
+            value = json.loads(stripped)
+        except json.JSONDecodeError:
+            pass
+        else:
+            if isinstance(value, dict):
+                return ParsedJSON(value=value)
+    extractor = StreamingJSONExtractor()
+    extractor.feed(text)
+    return extractor.finish()
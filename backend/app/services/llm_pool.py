@@ -0,0 +1,148 @@
+# Data Academy - LLM Client Pool
+# Registry ChatGroq yang long-lived, dibikin sekali pas startup dan dipake ulang tiap request
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+from langchain_groq import ChatGroq
+
+from app.services.llm_scheduler import scheduler
+
+
+# ============================================
+# POOL CONFIGURATION
+# ============================================
+
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+
+# Connection pool HTTP yang di-share semua client (satu host: api.groq.com)
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "100"))
+GROQ_MAX_KEEPALIVE = int(os.getenv("GROQ_MAX_KEEPALIVE", "20"))
+GROQ_KEEPALIVE_EXPIRY = float(os.getenv("GROQ_KEEPALIVE_EXPIRY", "60"))
+GROQ_REQUEST_TIMEOUT = float(os.getenv("GROQ_REQUEST_TIMEOUT", "60"))
+
+
+def _request_model(request: httpx.Request) -> Optional[str]:
+    """Nama model dari body JSON request chat completion (None kalau bukan/gak kebaca)."""
+    try:
+        body = json.loads(request.content)
+    except (httpx.RequestNotRead, ValueError):
+        return None
+    model = body.get("model") if isinstance(body, dict) else None
+    return model if isinstance(model, str) else None
+
+
+def _observe_response(response: httpx.Response) -> None:
+    # Header x-ratelimit-* Groq dipake scheduler buat nyesuain token bucket model yang dipanggil
+    scheduler.observe_headers(response.headers, _request_model(response.request))
+
+
+async def _observe_async_response(response: httpx.Response) -> None:
+    scheduler.observe_headers(response.headers, _request_model(response.request))
+
+
+@dataclass
+class PooledLLM:
+    """Satu entry di registry. Concurrency + retry diatur llm_scheduler, bukan di sini."""
+    model: str
+    temperature: float
+    llm: ChatGroq
+
+
+class LLMClientRegistry:
+    """
+    Registry ChatGroq yang di-key pake (model, temperature).
+
+    Semua client pake httpx client yang sama, jadi koneksi keep-alive ke Groq
+    dipake ulang antar request, gak bikin TLS handshake baru tiap kali.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = GROQ_API_KEY,
+        max_connections: int = GROQ_MAX_CONNECTIONS,
+        max_keepalive: int = GROQ_MAX_KEEPALIVE,
+        keepalive_expiry: float = GROQ_KEEPALIVE_EXPIRY,
+        request_timeout: float = GROQ_REQUEST_TIMEOUT,
+    ):
+        self.api_key = api_key
+        self.request_timeout = request_timeout
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._entries: dict[tuple[str, float], PooledLLM] = {}
+        self._http_client: Optional[httpx.Client] = None
+        self._http_async_client: Optional[httpx.AsyncClient] = None
+
+    def _ensure_http_clients(self) -> None:
+        if self._http_async_client is None or self._http_async_client.is_closed:
+            self._http_async_client = httpx.AsyncClient(
+                limits=self._limits,
+                timeout=self.request_timeout,
+                event_hooks={"response": [_observe_async_response]},
+            )
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.Client(
+                limits=self._limits,
+                timeout=self.request_timeout,
+                event_hooks={"response": [_observe_response]},
+            )
+
+    def get(self, model: str, temperature: float) -> PooledLLM:
+        """Ambil client buat (model, temperature), bikin baru kalau belum ada."""
+        key = (model, float(temperature))
+        entry = self._entries.get(key)
+        if entry is None:
+            self._ensure_http_clients()
+            llm = ChatGroq(
+                model=model,
+                temperature=temperature,
+                api_key=self.api_key,
+                timeout=self.request_timeout,
+                max_retries=0,  # Retry diatur llm_scheduler (backoff + Retry-After + priority)
+                http_client=self._http_client,
+                http_async_client=self._http_async_client,
+            )
+            entry = PooledLLM(model=model, temperature=float(temperature), llm=llm)
+            self._entries[key] = entry
+        return entry
+
+    async def startup(self, warm_keys: Optional[list[tuple[str, float]]] = None) -> None:
+        """Siapin connection pool dan pre-build client yang sering dipake."""
+        self._ensure_http_clients()
+        if not self.api_key:
+            # Tanpa API key ChatGroq gak bisa dibikin; biarin error muncul per request
+            return
+        for model, temperature in warm_keys or []:
+            self.get(model, temperature)
+
+    async def shutdown(self) -> None:
+        """Tutup semua koneksi dan kosongin registry."""
+        self._entries.clear()
+        if self._http_async_client is not None:
+            await self._http_async_client.aclose()
+            self._http_async_client = None
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+
+    def stats(self) -> dict:
+        """Client yang udah dibikin + status scheduler (queue depth, in-flight, rate limit)."""
+        return {
+            "clients": [f"{model}@{temperature}" for model, temperature in self._entries],
+            "scheduler": scheduler.stats(),
+        }
+
+
+# Registry global yang dipake semua service
+registry = LLMClientRegistry()
+
+
+def get_pooled_llm(model: str, temperature: float) -> PooledLLM:
+    """Shortcut ke registry global."""
+    return registry.get(model, temperature)
@@ -0,0 +1,454 @@
+# Data Academy - LLM Call Scheduler
+# Semua call ke Groq lewat sini: rate limit (requests + tokens per menit), retry 429/5xx, dan priority lane
+#
+# - Token bucket RPM/TPM per model (limit Groq emang per model); limit TPM juga dipelajarin dari
+#   header x-ratelimit-* response Groq model yang bersangkutan
+# - 429/5xx/connection error di-retry dengan backoff + jitter, Retry-After dihormatin
+#   (429 bikin semua lane model itu pause bareng, biar gak nambah-nambahin 429)
+# - Lane "interactive" (chat, hint, submit langsung) selalu didahuluin dari "background"
+#   (batch, queue, suggestions); background juga dibatesin porsi slot in-flight-nya
+
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Literal, Mapping, Optional, TypeVar
+
+import httpx
+
+from app.services.metrics import metrics
+
+
+LLMPriority = Literal["interactive", "background"]
+_LANE_ORDER = {"interactive": 0, "background": 1}
+
+# Limit awal tiap model. 0 = gak dibatesin (TPM tetep bisa kepelajari dari header Groq)
+GROQ_RPM_LIMIT = int(os.getenv("GROQ_RPM_LIMIT", "0"))
+GROQ_TPM_LIMIT = int(os.getenv("GROQ_TPM_LIMIT", "0"))
+GROQ_MAX_IN_FLIGHT = int(os.getenv("GROQ_MAX_IN_FLIGHT", "32"))
+GROQ_BACKGROUND_MAX_SHARE = float(os.getenv("GROQ_BACKGROUND_MAX_SHARE", "0.75"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "3"))
+GROQ_BACKOFF_BASE_S = float(os.getenv("GROQ_BACKOFF_BASE_S", "0.5"))
+GROQ_BACKOFF_MAX_S = float(os.getenv("GROQ_BACKOFF_MAX_S", "30"))
+
+# Perkiraan kasar buat token bucket: ~4 karakter per token + jatah output
+CHARS_PER_TOKEN = 4
+DEFAULT_COMPLETION_TOKENS = 512
+
+# Key bucket buat call yang gak nyebut model
+DEFAULT_MODEL_KEY = "default"
+
+T = TypeVar("T")
+
+
+def estimate_tokens(*texts: str, completion_tokens: int = DEFAULT_COMPLETION_TOKENS) -> int:
+    """Perkiraan total token satu call (prompt + output) buat token bucket."""
+    return sum(len(text or "") for text in texts) // CHARS_PER_TOKEN + completion_tokens
+
+
+# ============================================
+# ERROR CLASSIFICATION
+# ============================================
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """True kalau exception dari Groq/httpx itu 429 (rate limit)."""
+    return _status_code(exc) == 429 or "rate limit" in str(exc).lower()
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """429, 5xx, timeout, dan connection error layak di-retry; 4xx lain enggak."""
+    status = _status_code(exc)
+    if status is not None:
+        return status == 429 or status >= 500
+    if isinstance(exc, (httpx.TransportError, asyncio.TimeoutError)):
+        return True
+    # Exception SDK groq (APIConnectionError / APITimeoutError) gak punya status_code
+    return type(exc).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Baca header Retry-After dari response error (kalau ada)."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+_DURATION_RE = re.compile(r"(?P<value>\d+(?:\.\d+)?)(?P<unit>ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_reset_duration(value: str) -> Optional[float]:
+    """Header x-ratelimit-reset-* Groq formatnya kayak '2m59.56s' / '7.66s' / '120ms'."""
+    matches = list(_DURATION_RE.finditer(value or ""))
+    if not matches:
+        return None
+    return sum(float(m.group("value")) * _DURATION_UNITS[m.group("unit")] for m in matches)
+
+
+# ============================================
+# TOKEN BUCKET
+# ============================================
+
+class TokenBucket:
+    """Bucket dengan kapasitas `per_minute`, diisi ulang kontinu. per_minute <= 0 = gak dibatesin."""
+
+    def __init__(self, per_minute: float = 0):
+        self.per_minute = per_minute
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.per_minute > 0
+
+    def _refill(self, now: float) -> None:
+        if self.enabled:
+            rate = self.per_minute / 60.0
+            self.level = min(self.per_minute, self.level + (now - self._updated) * rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Detik yang harus ditunggu sampai `amount` tersedia (0 = bisa sekarang)."""
+        if not self.enabled:
+            return 0.0
+        self._refill(now)
+        # Call yang lebih gede dari kapasitas tetep boleh jalan pas bucket penuh
+        amount = min(amount, self.per_minute)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / (self.per_minute / 60.0)
+
+    def take(self, amount: float, now: float) -> None:
+        if self.enabled:
+            self._refill(now)
+            self.level -= min(amount, self.per_minute)
+
+    def configure(self, per_minute: float) -> None:
+        if per_minute == self.per_minute:
+            return
+        if not self.enabled:
+            self.level = float(per_minute)
+        self.per_minute = per_minute
+        self.level = min(self.level, per_minute)
+
+    def sync_remaining(self, remaining: float, now: float) -> None:
+        """Samain level sama sisa kuota yang dilaporin server (gak pernah naikin)."""
+        if self.enabled:
+            self._refill(now)
+            self.level = min(self.level, remaining)
+
+
+class ModelLimits:
+    """Bucket RPM/TPM + pause satu model."""
+
+    def __init__(self, rpm_limit: float, tpm_limit: float):
+        self.requests = TokenBucket(rpm_limit)
+        self.tokens = TokenBucket(tpm_limit)
+        self.paused_until = 0.0
+
+    def wait_time(self, tokens: int, now: float) -> float:
+        return max(self.paused_until - now, self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+
+    def take(self, tokens: int, now: float) -> None:
+        self.requests.take(1, now)
+        self.tokens.take(tokens, now)
+
+    def pause(self, until: float) -> None:
+        self.paused_until = max(self.paused_until, until)
+
+    def stats(self, now: float) -> dict:
+        return {
+            "rpm_limit": self.requests.per_minute,
+            "tpm_limit": self.tokens.per_minute,
+            "tokens_available": round(self.tokens.level, 1) if self.tokens.enabled else None,
+            "paused_for_s": round(max(0.0, self.paused_until - now), 2),
+        }
+
+
+# ============================================
+# SCHEDULER
+# ============================================
+
+class LLMScheduler:
+    """
+    Antrian prioritas buat semua call LLM.
+
+    Waiter disimpen di heap (lane, urutan datang); dispatch jalan tiap ada slot lepas,
+    waiter baru, atau bucket selesai refill. Rate limit dicek per model: model yang lagi
+    ketahan gak nahan waiter model lain di belakangnya. Call tanpa model (`model=None`)
+    masuk bucket bersama `DEFAULT_MODEL_KEY`.
+    """
+
+    def __init__(
+        self,
+        rpm_limit: int = GROQ_RPM_LIMIT,
+        tpm_limit: int = GROQ_TPM_LIMIT,
+        max_in_flight: int = GROQ_MAX_IN_FLIGHT,
+        background_max_share: float = GROQ_BACKGROUND_MAX_SHARE,
+        max_retries: int = GROQ_MAX_RETRIES,
+        backoff_base_s: float = GROQ_BACKOFF_BASE_S,
+        backoff_max_s: float = GROQ_BACKOFF_MAX_S,
+    ):
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.max_in_flight = max_in_flight
+        self.background_max_in_flight = max(1, int(max_in_flight * background_max_share))
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+
+        self._heap: list[tuple[int, int, str, str, int, asyncio.Future]] = []
+        self._models: dict[str, ModelLimits] = {}
+        self._seq = itertools.count()
+        self._in_flight = {lane: 0 for lane in _LANE_ORDER}
+        self._waiting = {lane: 0 for lane in _LANE_ORDER}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    # ----------------------------------------
+    # Slot
+    # ----------------------------------------
+
+    def limits_for(self, model: Optional[str]) -> ModelLimits:
+        """Bucket rate limit buat `model` (dibikin pas pertama dipake, mulai dari limit env)."""
+        key = model or DEFAULT_MODEL_KEY
+        limits = self._models.get(key)
+        if limits is None:
+            limits = self._models[key] = ModelLimits(self.rpm_limit, self.tpm_limit)
+        return limits
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        now = time.monotonic()
+        delay = 0.0
+        # Waiter yang model-nya lagi ketahan disisihin dulu, biar urutan per model tetep FIFO
+        deferred = []
+        blocked: set[str] = set()
+        while self._heap:
+            _, _, lane, model, tokens, future = self._heap[0]
+            if future.done():
+                # Waiter-nya udah cancel (client putus)
+                heapq.heappop(self._heap)
+                continue
+            if sum(self._in_flight.values()) >= self.max_in_flight:
+                break
+            if lane == "background" and self._in_flight[lane] >= self.background_max_in_flight:
+                break
+
+            limits = self.limits_for(model)
+            wait = 0.0 if model in blocked else limits.wait_time(tokens, now)
+            if model in blocked or wait > 0:
+                blocked.add(model)
+                deferred.append(heapq.heappop(self._heap))
+                if wait > 0:
+                    delay = wait if delay == 0 else min(delay, wait)
+                continue
+
+            heapq.heappop(self._heap)
+            limits.take(tokens, now)
+            self._in_flight[lane] += 1
+            future.set_result(None)
+
+        for entry in deferred:
+            heapq.heappush(self._heap, entry)
+        if delay > 0:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(delay, self._dispatch)
+
+    def _wake(self) -> None:
+        # Dispatch ulang sekarang (timer lama dibatalin biar gak dobel)
+        if self._timer is not None:
+            self._timer.cancel()
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: LLMPriority = "interactive",
+        tokens: int = 0,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[None]:
+        """Tunggu giliran sesuai lane + rate limit model, tahan satu slot in-flight selama blok jalan."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        entry = (_LANE_ORDER[priority], next(self._seq), priority, model or DEFAULT_MODEL_KEY, tokens, future)
+        heapq.heappush(self._heap, entry)
+        self._waiting[priority] += 1
+        start = time.perf_counter()
+        try:
+            self._wake()
+            await future
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # Udah kebagian slot pas di-cancel → balikin
+                self._in_flight[priority] -= 1
+                self._wake()
+            future.cancel()
+            raise
+        finally:
+            self._waiting[priority] -= 1
+        metrics.observe(f"llm_scheduler.wait.{priority}", (time.perf_counter() - start) * 1000)
+
+        try:
+            yield
+        finally:
+            self._in_flight[priority] -= 1
+            self._wake()
+
+    # ----------------------------------------
+    # Retry
+    # ----------------------------------------
+
+    def _backoff(self, exc: BaseException, attempt: int, model: Optional[str]) -> float:
+        delay = retry_after_seconds(exc)
+        if delay is None:
+            # Full jitter: random di antara 0 dan batas exponential
+            delay = random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt))
+        if is_rate_limited(exc):
+            metrics.increment("llm_scheduler.rate_limited")
+            self.limits_for(model).pause(time.monotonic() + delay)
+        return delay
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[T]],
+        priority: LLMPriority = "interactive",
+        tokens: int = 0,
+        name: str = "llm",
+        model: Optional[str] = None,
+    ) -> T:
+        """
+        Jalanin `call` (satu request LLM) lewat scheduler, retry kalau error-nya retryable.
+
+        Args:
+            call: Factory coroutine, dipanggil ulang tiap attempt
+            priority: 'interactive' atau 'background'
+            tokens: Perkiraan token (prompt + output) buat token bucket
+            name: Nama buat metric `llm_scheduler.calls.{name}`
+            model: Model Groq yang dipanggil (rate limit-nya per model)
+        """
+        attempt = 0
+        started = False
+        try:
+            while True:
+                async with self.slot(priority, tokens, model):
+                    started = True
+                    try:
+                        result = await call()
+                        metrics.increment(f"llm_scheduler.calls.{name}")
+                        return result
+                    except Exception as e:
+                        if not is_retryable(e) or attempt >= self.max_retries:
+                            metrics.increment("llm_scheduler.errors")
+                            raise
+                        delay = self._backoff(e, attempt, model)
+                started = False
+                metrics.increment("llm_scheduler.retries")
+                attempt += 1
+                await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self._record_cancel(name, tokens, started)
+            raise
+
+    async def stream(
+        self,
+        make_stream: Callable[[], AsyncIterator[T]],
+        priority: LLMPriority = "interactive",
+        tokens: int = 0,
+        name: str = "llm",
+        model: Optional[str] = None,
+    ) -> AsyncIterator[T]:
+        """Versi streaming dari `run`: retry cuma kalau error sebelum chunk pertama keluar."""
+        attempt = 0
+        started = False
+        try:
+            while True:
+                emitted = False
+                async with self.slot(priority, tokens, model):
+                    started = True
+                    try:
+                        async for chunk in make_stream():
+                            emitted = True
+                            yield chunk
+                        metrics.increment(f"llm_scheduler.calls.{name}")
+                        return
+                    except Exception as e:
+                        if emitted or not is_retryable(e) or attempt >= self.max_retries:
+                            metrics.increment("llm_scheduler.errors")
+                            raise
+                        delay = self._backoff(e, attempt, model)
+                started = False
+                metrics.increment("llm_scheduler.retries")
+                attempt += 1
+                await asyncio.sleep(delay)
+        except (asyncio.CancelledError, GeneratorExit):
+            # GeneratorExit = consumer berhenti di tengah stream (client SSE putus)
+            self._record_cancel(name, tokens, started)
+            raise
+
+    def _record_cancel(self, name: str, tokens: int, started: bool) -> None:
+        """
+        Call yang di-cancel (client disconnect / deadline / single-flight ditinggal).
+        Yang belum sempet dikirim ke Groq (masih antri / nunggu backoff) ngehemat seluruh perkiraan tokennya.
+        """
+        metrics.increment(f"llm_scheduler.cancelled.{name}")
+        if started:
+            metrics.increment("llm_scheduler.cancelled_in_flight")
+        else:
+            metrics.increment("llm.tokens_saved", tokens)
+
+    # ----------------------------------------
+    # Adaptive limit dari header Groq
+    # ----------------------------------------
+
+    def observe_headers(self, headers: Mapping[str, str], model: Optional[str] = None) -> None:
+        """
+        Dipanggil tiap response Groq (httpx event hook), `model` diambil dari body request-nya.
+
+        x-ratelimit-*-tokens = TPM; x-ratelimit-*-requests = requests per hari di Groq,
+        jadi yang itu cuma dipake buat pause kalau kuotanya udah abis.
+        """
+        now = time.monotonic()
+        limit_tokens = headers.get("x-ratelimit-limit-tokens")
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        if limit_tokens is None and remaining_tokens is None and remaining_requests is None:
+            return
+        limits = self.limits_for(model)
+        try:
+            if limit_tokens is not None:
+                limits.tokens.configure(float(limit_tokens))
+            if remaining_tokens is not None:
+                limits.tokens.sync_remaining(float(remaining_tokens), now)
+            if remaining_requests is not None and float(remaining_requests) <= 0:
+                reset = parse_reset_duration(headers.get("x-ratelimit-reset-requests", ""))
+                if reset:
+                    limits.pause(now + reset)
+        except ValueError:
+            return
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "queue_depth": dict(self._waiting),
+            "in_flight": dict(self._in_flight),
+            "max_in_flight": self.max_in_flight,
+            "background_max_in_flight": self.background_max_in_flight,
+            "models": {model: limits.stats(now) for model, limits in self._models.items()},
+        }
+
+# Scheduler global yang dipake semua service
+scheduler = LLMScheduler()
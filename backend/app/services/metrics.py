@@ -0,0 +1,70 @@
+# Data Academy - In-Process Metrics
+# Counter dan latency tracker ringan buat instrumentasi service (tanpa dependency eksternal)
+
+import threading
+from collections import defaultdict, deque
+
+
+# Jumlah sample terakhir yang disimpen per latency metric
+DEFAULT_WINDOW = 1000
+
+
+class LatencyTracker:
+    """Rolling window sample latency (ms) dengan percentile on-demand."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self._samples: deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self._samples.append(value_ms)
+        self.count += 1
+        self.total_ms += value_ms
+
+    def percentile(self, pct: float) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 2),
+            "p95_ms": round(self.percentile(95), 2),
+            "p99_ms": round(self.percentile(99), 2),
+        }
+
+
+class MetricsRegistry:
+    """Kumpulan counter + latency tracker yang di-key pake nama metric."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = defaultdict(float)
+        self._latencies: dict[str, LatencyTracker] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, value_ms: float) -> None:
+        with self._lock:
+            tracker = self._latencies.get(name)
+            if tracker is None:
+                tracker = self._latencies[name] = LatencyTracker()
+            tracker.observe(value_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "latencies": {name: t.snapshot() for name, t in self._latencies.items()},
+            }
+
+
+# Registry global yang dipake semua service
+metrics = MetricsRegistry()
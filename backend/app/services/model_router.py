@@ -0,0 +1,236 @@
+# Data Academy - Model Routing (Cascade)
+# Request yang gampang (hint level 1, challenge gampang, saran perbaikan) dikirim ke model kecil
+# yang cepet dulu; eskalasi ke 70B kalau aturannya kena. Aturan dibaca dari config JSON
+# (MODEL_ROUTING_CONFIG), bukan konstanta di tiap service.
+#
+# Aturan sebelum call (langsung ke model besar):
+#   - min_hint_level: hint level >= ini
+#   - min_difficulty: difficulty challenge >= ini
+# Aturan setelah call model kecil (ulang pake model besar):
+#   - on_parse_error: output JSON gak bisa di-parse
+#   - score_band: skor dalam ±N poin dari passing_score (keputusan lulus/gak paling rawan)
+#   - min_confidence: confidence yang dilaporin model di bawah ini
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from app.services.metrics import LatencyTracker, metrics
+
+
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parents[2] / "config" / "model_routing.json"
+MODEL_ROUTING_CONFIG = Path(os.getenv("MODEL_ROUTING_CONFIG", str(DEFAULT_CONFIG_PATH)))
+
+# Dipake kalau file config gak ada: semua lewat 70B (perilaku lama), ringkasan sesi pake 8B
+DEFAULT_ROUTING = {
+    "models": {"small": "llama-3.1-8b-instant", "large": "llama-3.1-70b-versatile"},
+    "routes": {
+        "tutor.summary": {"model": "small"},
+    },
+    "default_model": "large",
+}
+
+
+@dataclass(frozen=True)
+class RouteConfig:
+    """Aturan routing satu jenis request (tutor.hint, grading, ...)."""
+    model: str
+    escalate_to: Optional[str] = None
+    min_hint_level: Optional[int] = None
+    min_difficulty: Optional[int] = None
+    on_parse_error: bool = False
+    score_band: Optional[int] = None
+    min_confidence: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    """Model yang dipilih buat satu call."""
+    route: str
+    tier: str
+    model: str
+    escalated: bool = False
+    reason: str = "default"
+
+
+@dataclass
+class _RouteStats:
+    requests: int = 0
+    calls: dict[str, int] = field(default_factory=dict)
+    escalations: dict[str, int] = field(default_factory=dict)
+    latencies: dict[str, LatencyTracker] = field(default_factory=dict)
+
+
+class ModelRouter:
+    """
+    Pilih model per route dan putusin kapan eskalasi.
+
+    Alurnya: `choose()` sebelum call, `observe()` tiap call selesai, `escalation_reason()`
+    setelah call model kecil; kalau ada alasan, ulang pake `escalate()`.
+    """
+
+    def __init__(self, config_path: Path = MODEL_ROUTING_CONFIG):
+        self.config_path = config_path
+        self.models: dict[str, str] = {}
+        self.routes: dict[str, RouteConfig] = {}
+        self.default_tier = "large"
+        self._stats: dict[str, _RouteStats] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    # ----------------------------------------
+    # Config
+    # ----------------------------------------
+
+    def load(self) -> None:
+        """
+        Baca (ulang) file config. Kalau file-nya gak ada, pake DEFAULT_ROUTING.
+        Config invalid → ValueError, config lama tetep dipake.
+        """
+        if self.config_path.is_file():
+            with open(self.config_path, encoding="utf-8") as f:
+                raw = json.load(f)
+        else:
+            raw = DEFAULT_ROUTING
+        models, routes, default_tier = self._parse(raw)
+        with self._lock:
+            self.models, self.routes, self.default_tier = models, routes, default_tier
+
+    @staticmethod
+    def _parse(raw: dict) -> tuple[dict[str, str], dict[str, RouteConfig], str]:
+        models = {str(tier): str(name) for tier, name in (raw.get("models") or {}).items()}
+        default_tier = raw.get("default_model", "large")
+        if default_tier not in models:
+            raise ValueError(f"default_model '{default_tier}' gak ada di models")
+        routes = {}
+        for name, rule in (raw.get("routes") or {}).items():
+            try:
+                route = RouteConfig(**rule)
+            except TypeError as e:
+                raise ValueError(f"Route '{name}' invalid: {e}") from e
+            for tier in (route.model, route.escalate_to):
+                if tier is not None and tier not in models:
+                    raise ValueError(f"Route '{name}' pake model '{tier}' yang gak ada di models")
+            routes[name] = route
+        return models, routes, default_tier
+
+    def route(self, name: str) -> RouteConfig:
+        return self.routes.get(name) or RouteConfig(model=self.default_tier)
+
+    def models_for(self, name: str) -> list[str]:
+        """Semua model yang mungkin dipake satu route (buat warm-up pool client)."""
+        route = self.route(name)
+        tiers = [route.model] + ([route.escalate_to] if route.escalate_to else [])
+        return list(dict.fromkeys(self.models[tier] for tier in tiers))
+
+    # ----------------------------------------
+    # Routing
+    # ----------------------------------------
+
+    def choose(self, name: str, hint_level: Optional[int] = None, difficulty: Optional[int] = None) -> RouteDecision:
+        """
+        Pilih model awal buat satu request.
+
+        Args:
+            name: Nama route (tutor.chat, tutor.hint, tutor.summary, grading, suggestions)
+            hint_level: Level hint yang diminta (route hint)
+            difficulty: Level kesulitan challenge 1-5 (route grading)
+
+        Returns:
+            RouteDecision; `reason` ngejelasin kenapa langsung ke model besar
+        """
+        route = self.route(name)
+        self._stats_for(name).requests += 1
+        if route.escalate_to:
+            if route.min_hint_level is not None and hint_level is not None and hint_level >= route.min_hint_level:
+                return self._decision(name, route.escalate_to, escalated=False, reason="hint_level")
+            if route.min_difficulty is not None and difficulty is not None and difficulty >= route.min_difficulty:
+                return self._decision(name, route.escalate_to, escalated=False, reason="difficulty")
+        return self._decision(name, route.model, escalated=False, reason="default")
+
+    def escalation_reason(
+        self,
+        decision: RouteDecision,
+        parse_error: bool = False,
+        score: Optional[float] = None,
+        passing_score: Optional[int] = None,
+        confidence: Optional[float] = None,
+    ) -> Optional[str]:
+        """
+        Cek hasil call: perlu diulang pake model besar gak? Return alasan atau None.
+        Cuma berlaku kalau call-nya belum di model tujuan eskalasi.
+        """
+        route = self.route(decision.route)
+        if not route.escalate_to or decision.tier == route.escalate_to:
+            return None
+        if parse_error:
+            return "parse_error" if route.on_parse_error else None
+        if (
+            route.score_band is not None
+            and score is not None
+            and passing_score is not None
+            and abs(score - passing_score) <= route.score_band
+        ):
+            return "score_band"
+        if route.min_confidence is not None and confidence is not None and confidence < route.min_confidence:
+            return "low_confidence"
+        return None
+
+    def escalate(self, decision: RouteDecision, reason: str) -> RouteDecision:
+        """Keputusan baru: ulang call yang sama di model tujuan eskalasi."""
+        route = self.route(decision.route)
+        stats = self._stats_for(decision.route)
+        with self._lock:
+            stats.escalations[reason] = stats.escalations.get(reason, 0) + 1
+        metrics.increment(f"routing.{decision.route}.escalated.{reason}")
+        return self._decision(decision.route, route.escalate_to or decision.tier, escalated=True, reason=reason)
+
+    def observe(self, decision: RouteDecision, latency_ms: float) -> None:
+        """Catat satu call (per route + tier model) buat metric latency dan eskalasi."""
+        stats = self._stats_for(decision.route)
+        with self._lock:
+            stats.calls[decision.tier] = stats.calls.get(decision.tier, 0) + 1
+            tracker = stats.latencies.get(decision.tier)
+            if tracker is None:
+                tracker = stats.latencies[decision.tier] = LatencyTracker()
+            tracker.observe(latency_ms)
+        metrics.observe(f"routing.{decision.route}.{decision.tier}", latency_ms)
+
+    # ----------------------------------------
+    # Internal
+    # ----------------------------------------
+
+    def _decision(self, name: str, tier: str, escalated: bool, reason: str) -> RouteDecision:
+        return RouteDecision(route=name, tier=tier, model=self.models[tier], escalated=escalated, reason=reason)
+
+    def _stats_for(self, name: str) -> _RouteStats:
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = _RouteStats()
+            return stats
+
+    def stats(self) -> dict:
+        with self._lock:
+            routes = {}
+            for name, stats in self._stats.items():
+                escalated = sum(stats.escalations.values())
+                routes[name] = {
+                    "requests": stats.requests,
+                    "calls": dict(stats.calls),
+                    "escalations": dict(stats.escalations),
+                    "escalation_rate": round(escalated / stats.requests, 4) if stats.requests else 0.0,
+                    "latency": {tier: tracker.snapshot() for tier, tracker in stats.latencies.items()},
+                }
+            return {
+                "config": str(self.config_path),
+                "models": dict(self.models),
+                "routes": routes,
+            }
+
+
+# Router global yang dipake semua service LLM
+model_router = ModelRouter()
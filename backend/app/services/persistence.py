@@ -0,0 +1,1047 @@
+# Data Academy - Persistence (Submission + UserProgress + UserAchievement)
+# Hasil grading, progress, dan achievement murid disimpen ke tabel Prisma `Submission`, `UserProgress`,
+# dan `UserAchievement`,
+# tapi gak di jalur request: record masuk buffer in-memory (write-behind), lalu satu task flusher
+# nulis per batch (COPY / multi-row INSERT) tiap PERSISTENCE_FLUSH_INTERVAL_MS atau begitu
+# buffer-nya nyampe PERSISTENCE_BATCH_SIZE.
+#
+# - Backend pluggable (PERSISTENCE_BACKEND):
+#     none     : default, gak nyimpen apa-apa (perilaku lama)
+#     sqlite   : stand-in lokal buat dev/test, tabelnya dibikin otomatis mirip schema Prisma
+#     postgres : DATABASE_URL via asyncpg, pool di-size sesuai jumlah worker grading
+# - Backpressure: buffer dibatesin PERSISTENCE_BUFFER_MAX. Kalau penuh (database lambat/mati),
+#   request baru yang mau disimpen ditolak di depan (503) sebelum sempet grading, dan `save_*`
+#   nunggu ada slot (maksimal PERSISTENCE_ENQUEUE_TIMEOUT_S)
+# - Flush gagal karena koneksi → batch tetep di buffer, dicoba lagi pake backoff.
+#   Gagal karena datanya (FK, dll) → batch diulang per row, row yang rusak dibuang + dicatet
+# - Id kurikulum (DA-L1-C01, ANALYST-L1) diterjemahin ke id cuid tabel Challenge / Level lewat
+#   CatalogIds sebelum masuk buffer (FK Submission.challengeId / UserProgress.levelId), dan balik
+#   lagi pas baca. Backend tanpa tabel katalog (sqlite) pake id kurikulum apa adanya
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from app.services.metrics import metrics
+from app.services.submission_queue import DATABASE_URL, SUBMISSION_WORKERS
+
+
+PERSISTENCE_BACKEND = os.getenv("PERSISTENCE_BACKEND", "none")
+PERSISTENCE_SQLITE_PATH = os.getenv("PERSISTENCE_SQLITE_PATH", "data_academy.db")
+# Worker grading + 1 flusher + 1 buat query kecil (readiness, nomor attempt)
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", str(SUBMISSION_WORKERS + 2)))
+
+PERSISTENCE_BUFFER_MAX = int(os.getenv("PERSISTENCE_BUFFER_MAX", "10000"))
+PERSISTENCE_BATCH_SIZE = int(os.getenv("PERSISTENCE_BATCH_SIZE", "500"))
+PERSISTENCE_FLUSH_INTERVAL_MS = float(os.getenv("PERSISTENCE_FLUSH_INTERVAL_MS", "200"))
+PERSISTENCE_ENQUEUE_TIMEOUT_S = float(os.getenv("PERSISTENCE_ENQUEUE_TIMEOUT_S", "5"))
+PERSISTENCE_SHUTDOWN_TIMEOUT_S = float(os.getenv("PERSISTENCE_SHUTDOWN_TIMEOUT_S", "10"))
+
+FLUSH_BACKOFF_MAX_S = 5.0
+ATTEMPT_CACHE_MAX = 100_000
+
+
+# ============================================
+# RECORDS
+# ============================================
+
+def new_id() -> str:
+    """Id row (128 bit acak, hex). os.urandom langsung jauh lebih murah dari bikin object UUID."""
+    return os.urandom(16).hex()
+
+
+def utcnow() -> datetime:
+    """Timestamp buat kolom DateTime Prisma (timestamp(3) tanpa timezone, isinya UTC)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass
+class SubmissionRecord:
+    """Satu row tabel Submission."""
+    user_id: str
+    challenge_id: str
+    code: str
+    language: str  # Enum ChallengeType: PYTHON / SQL
+    status: str  # Enum SubmissionStatus
+    score: Optional[int] = None
+    score_breakdown: Optional[dict] = None
+    ai_feedback: Optional[str] = None
+    ai_suggestions: Optional[list] = None
+    execution_output: Optional[str] = None
+    execution_error: Optional[str] = None
+    execution_time_ms: Optional[int] = None
+    attempt_number: int = 1
+    submitted_at: datetime = field(default_factory=utcnow)
+    graded_at: Optional[datetime] = None
+    id: str = field(default_factory=new_id)
+
+    def row(self) -> tuple:
+        return (
+            self.id,
+            self.user_id,
+            self.challenge_id,
+            self.code,
+            self.language,
+            self.status,
+            self.score,
+            json.dumps(self.score_breakdown) if self.score_breakdown is not None else None,
+            self.ai_feedback,
+            json.dumps(self.ai_suggestions, ensure_ascii=False) if self.ai_suggestions is not None else None,
+            self.execution_output,
+            self.execution_error,
+            self.execution_time_ms,
+            self.attempt_number,
+            self.submitted_at,
+            self.graded_at,
+        )
+
+
+@dataclass
+class ProgressRecord:
+    """Snapshot progress satu user di satu level (row UserProgress, di-upsert per userId + levelId)."""
+    user_id: str
+    level_id: str
+    status: str  # Enum ProgressStatus: LOCKED / UNLOCKED / IN_PROGRESS / COMPLETED
+    current_score: int = 0
+    completed_modules: int = 0
+    completed_challenges: int = 0
+    unlocked_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    updated_at: datetime = field(default_factory=utcnow)
+    id: str = field(default_factory=new_id)
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return self.user_id, self.level_id
+
+    def row(self) -> tuple:
+        return (
+            self.id,
+            self.user_id,
+            self.level_id,
+            self.status,
+            self.current_score,
+            self.completed_modules,
+            self.completed_challenges,
+            self.unlocked_at,
+            self.started_at,
+            self.completed_at,
+            self.updated_at,
+        )
+
+
+@dataclass
+class AchievementRecord:
+    """Satu row UserAchievement. (userId, achievementId) unik, insert dobel di-skip."""
+    user_id: str
+    achievement_id: str
+    earned_at: datetime = field(default_factory=utcnow)
+    id: str = field(default_factory=new_id)
+
+    def row(self) -> tuple:
+        return self.id, self.user_id, self.achievement_id, self.earned_at
+
+
+@dataclass(frozen=True)
+class CatalogIds:
+    """Id kurikulum → id row Level / Challenge di database (plus kebalikannya)."""
+    levels: dict[str, str]
+    challenges: dict[str, str]
+
+    @property
+    def level_keys(self) -> dict[str, str]:
+        return {db_id: key for key, db_id in self.levels.items()}
+
+    @property
+    def challenge_keys(self) -> dict[str, str]:
+        return {db_id: key for key, db_id in self.challenges.items()}
+
+
+SUBMISSION_COLUMNS = (
+    "id", "userId", "challengeId", "code", "language", "status", "score", "scoreBreakdown",
+    "aiFeedback", "aiSuggestions", "executionOutput", "executionError", "executionTimeMs",
+    "attemptNumber", "submittedAt", "gradedAt",
+)
+PROGRESS_COLUMNS = (
+    "id", "userId", "levelId", "status", "currentScore", "completedModules", "completedChallenges",
+    "unlockedAt", "startedAt", "completedAt", "updatedAt",
+)
+ACHIEVEMENT_COLUMNS = ("id", "userId", "achievementId", "earnedAt")
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _quoted(columns: tuple[str, ...]) -> str:
+    return ", ".join(f'"{column}"' for column in columns)
+
+
+# Upsert UserProgress: status + angka ikut snapshot terbaru, timestamp "pertama kali" gak ditimpa.
+# completedModules diupdate frontend (modul lesson), backend cuma boleh naikin
+_PROGRESS_CONFLICT = """
+    ON CONFLICT ("userId", "levelId") DO UPDATE SET
+        "status" = EXCLUDED."status",
+        "currentScore" = EXCLUDED."currentScore",
+        "completedModules" = CASE WHEN EXCLUDED."completedModules" > "UserProgress"."completedModules"
+            THEN EXCLUDED."completedModules" ELSE "UserProgress"."completedModules" END,
+        "completedChallenges" = EXCLUDED."completedChallenges",
+        "unlockedAt" = COALESCE("UserProgress"."unlockedAt", EXCLUDED."unlockedAt"),
+        "startedAt" = COALESCE("UserProgress"."startedAt", EXCLUDED."startedAt"),
+        "completedAt" = COALESCE("UserProgress"."completedAt", EXCLUDED."completedAt"),
+        "updatedAt" = EXCLUDED."updatedAt"
+"""
+
+
+class PersistenceBackpressure(Exception):
+    """Buffer write-behind penuh (database gak ngejar), request yang mau disimpen harus ditolak dulu."""
+
+
+# ============================================
+# BACKENDS
+# ============================================
+
+class PersistenceBackend(ABC):
+    """Interface storage. Method tulis nerima satu batch; gagal = exception, batch-nya gak dianggap masuk."""
+
+    pool_size = 1
+
+    async def open(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    async def insert_submissions(self, records: list[SubmissionRecord]) -> None:
+        """Insert batch (satu statement / COPY)."""
+
+    @abstractmethod
+    async def insert_submission(self, record: SubmissionRecord) -> None:
+        """Insert satu row, id dobel di-skip (dipake pas isolasi batch yang gagal)."""
+
+    @abstractmethod
+    async def upsert_progress(self, records: list[ProgressRecord]) -> None:
+        """Upsert batch UserProgress (key userId + levelId unik di dalam batch)."""
+
+    @abstractmethod
+    async def count_submissions(self, user_id: str, challenge_id: str) -> int:
+        """Jumlah submission user di satu challenge (buat attemptNumber)."""
+
+    @abstractmethod
+    async def best_scores(self) -> list[tuple]:
+        """
+        Agregat submission COMPLETED per (user, challenge) buat rebuild progress:
+        (userId, challengeId, skor terbaik, gradedAt pertama, gradedAt terakhir).
+        """
+
+    @abstractmethod
+    async def insert_achievements(self, records: list[AchievementRecord]) -> None:
+        """Insert batch UserAchievement; (userId, achievementId) yang udah ada di-skip (idempotent)."""
+
+    @abstractmethod
+    async def achievements(self) -> list[tuple]:
+        """Semua definisi achievement: (id, name, criteria dict / None)."""
+
+    @abstractmethod
+    async def user_achievements(self) -> list[tuple]:
+        """Achievement yang udah didapet: (userId, achievementId)."""
+
+    @abstractmethod
+    async def activity_days(self) -> list[tuple]:
+        """Jumlah submission COMPLETED per user per hari (UTC): (userId, date, count)."""
+
+    async def catalog_rows(self) -> Optional[tuple[list[tuple], list[tuple]]]:
+        """
+        Isi tabel katalog buat nerjemahin id kurikulum:
+        level (Track.path, Level.sequenceOrder, Level.id) dan
+        challenge (Track.path, Level.sequenceOrder, Challenge.sequenceOrder, Challenge.slug, Challenge.id).
+        None = backend gak punya tabel Level/Challenge, id kurikulum dipake langsung.
+        """
+        return None
+
+    @abstractmethod
+    async def ping(self) -> None:
+        """Cek koneksi (raise kalau database gak bisa dihubungin)."""
+
+    @abstractmethod
+    def is_transient(self, error: Exception) -> bool:
+        """True = masalah koneksi/lock (batch dicoba lagi), False = masalah data (isolasi per row)."""
+
+
+class SQLitePersistence(PersistenceBackend):
+    """Stand-in SQLite (WAL), tabel mirip schema Prisma. Query jalan di thread biar gak nge-block event loop."""
+
+    def __init__(self, path: str = PERSISTENCE_SQLITE_PATH):
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    async def open(self) -> None:
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS "Submission" (
+                "id" TEXT PRIMARY KEY,
+                "userId" TEXT NOT NULL,
+                "challengeId" TEXT NOT NULL,
+                "code" TEXT NOT NULL,
+                "language" TEXT NOT NULL DEFAULT 'PYTHON',
+                "status" TEXT NOT NULL DEFAULT 'PENDING',
+                "score" INTEGER,
+                "scoreBreakdown" TEXT,
+                "aiFeedback" TEXT,
+                "aiSuggestions" TEXT,
+                "executionOutput" TEXT,
+                "executionError" TEXT,
+                "executionTimeMs" INTEGER,
+                "attemptNumber" INTEGER NOT NULL DEFAULT 1,
+                "submittedAt" TEXT NOT NULL,
+                "gradedAt" TEXT
+            );
+            CREATE INDEX IF NOT EXISTS "Submission_userId_idx" ON "Submission" ("userId");
+            CREATE INDEX IF NOT EXISTS "Submission_challengeId_idx" ON "Submission" ("challengeId");
+            CREATE TABLE IF NOT EXISTS "UserProgress" (
+                "id" TEXT PRIMARY KEY,
+                "userId" TEXT NOT NULL,
+                "levelId" TEXT NOT NULL,
+                "status" TEXT NOT NULL DEFAULT 'LOCKED',
+                "currentScore" INTEGER NOT NULL DEFAULT 0,
+                "completedModules" INTEGER NOT NULL DEFAULT 0,
+                "completedChallenges" INTEGER NOT NULL DEFAULT 0,
+                "unlockedAt" TEXT,
+                "startedAt" TEXT,
+                "completedAt" TEXT,
+                "createdAt" TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                "updatedAt" TEXT NOT NULL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS "UserProgress_userId_levelId_key" ON "UserProgress" ("userId", "levelId");
+            CREATE TABLE IF NOT EXISTS "Achievement" (
+                "id" TEXT PRIMARY KEY,
+                "name" TEXT NOT NULL UNIQUE,
+                "description" TEXT,
+                "iconUrl" TEXT,
+                "points" INTEGER NOT NULL DEFAULT 0,
+                "criteria" TEXT,
+                "createdAt" TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE IF NOT EXISTS "UserAchievement" (
+                "id" TEXT PRIMARY KEY,
+                "userId" TEXT NOT NULL,
+                "achievementId" TEXT NOT NULL,
+                "earnedAt" TEXT NOT NULL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS "UserAchievement_userId_achievementId_key"
+                ON "UserAchievement" ("userId", "achievementId");
+            """
+        )
+
+    async def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    async def _run(self, sql: str, rows: list[tuple], many: bool = True):
+        def run():
+            with self._lock:
+                if not many:
+                    return self._db.execute(sql, rows[0]).fetchone()
+                # Satu transaksi per batch: semua row masuk atau gak sama sekali
+                self._db.execute("BEGIN")
+                try:
+                    self._db.executemany(sql, rows)
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+                self._db.execute("COMMIT")
+        return await asyncio.to_thread(run)
+
+    @staticmethod
+    def _sqlite_row(row: tuple) -> tuple:
+        return tuple(value.isoformat(sep=" ") if isinstance(value, datetime) else value for value in row)
+
+    async def insert_submissions(self, records: list[SubmissionRecord]) -> None:
+        placeholders = ", ".join("?" for _ in SUBMISSION_COLUMNS)
+        await self._run(
+            f'INSERT INTO "Submission" ({_quoted(SUBMISSION_COLUMNS)}) VALUES ({placeholders})',
+            [self._sqlite_row(record.row()) for record in records],
+        )
+
+    async def insert_submission(self, record: SubmissionRecord) -> None:
+        placeholders = ", ".join("?" for _ in SUBMISSION_COLUMNS)
+        await self._run(
+            f'INSERT INTO "Submission" ({_quoted(SUBMISSION_COLUMNS)}) VALUES ({placeholders}) ON CONFLICT ("id") DO NOTHING',
+            [self._sqlite_row(record.row())],
+        )
+
+    async def upsert_progress(self, records: list[ProgressRecord]) -> None:
+        placeholders = ", ".join("?" for _ in PROGRESS_COLUMNS)
+        await self._run(
+            f'INSERT INTO "UserProgress" ({_quoted(PROGRESS_COLUMNS)}) VALUES ({placeholders}) {_PROGRESS_CONFLICT}',
+            [self._sqlite_row(record.row()) for record in records],
+        )
+
+    async def count_submissions(self, user_id: str, challenge_id: str) -> int:
+        row = await self._run(
+            'SELECT COUNT(*) FROM "Submission" WHERE "userId" = ? AND "challengeId" = ?',
+            [(user_id, challenge_id)],
+            many=False,
+        )
+        return row[0]
+
+    async def best_scores(self) -> list[tuple]:
+        def run():
+            with self._lock:
+                rows = self._db.execute(
+                    """
+                    SELECT "userId", "challengeId", MAX("score"), MIN("gradedAt"), MAX("gradedAt")
+                    FROM "Submission" WHERE "status" = 'COMPLETED' AND "score" IS NOT NULL
+                    GROUP BY "userId", "challengeId"
+                    """
+                ).fetchall()
+            return [
+                (user, challenge, score, _parse_time(first), _parse_time(last))
+                for user, challenge, score, first, last in rows
+            ]
+        return await asyncio.to_thread(run)
+
+    async def insert_achievements(self, records: list[AchievementRecord]) -> None:
+        await self._run(
+            f'INSERT INTO "UserAchievement" ({_quoted(ACHIEVEMENT_COLUMNS)}) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT ("userId", "achievementId") DO NOTHING',
+            [self._sqlite_row(record.row()) for record in records],
+        )
+
+    async def _fetch(self, sql: str) -> list[tuple]:
+        def run():
+            with self._lock:
+                return self._db.execute(sql).fetchall()
+        return await asyncio.to_thread(run)
+
+    async def achievements(self) -> list[tuple]:
+        rows = await self._fetch('SELECT "id", "name", "criteria" FROM "Achievement"')
+        return [(id_, name, json.loads(criteria) if criteria else None) for id_, name, criteria in rows]
+
+    async def user_achievements(self) -> list[tuple]:
+        return await self._fetch('SELECT "userId", "achievementId" FROM "UserAchievement"')
+
+    async def activity_days(self) -> list[tuple]:
+        rows = await self._fetch(
+            """
+            SELECT "userId", DATE("gradedAt"), COUNT(*) FROM "Submission"
+            WHERE "status" = 'COMPLETED' AND "gradedAt" IS NOT NULL
+            GROUP BY "userId", DATE("gradedAt")
+            """
+        )
+        return [(user, date.fromisoformat(day), count) for user, day, count in rows]
+
+    async def ping(self) -> None:
+        if self._db is None:
+            raise ConnectionError("Database SQLite belum dibuka")
+        await self._run("SELECT 1", [()], many=False)
+
+    def is_transient(self, error: Exception) -> bool:
+        return isinstance(error, (sqlite3.OperationalError, OSError))
+
+
+class PostgresPersistence(PersistenceBackend):
+    """
+    Tabel Prisma di Postgres (asyncpg pool). Submission masuk lewat COPY (binary), UserProgress
+    lewat satu INSERT ... SELECT FROM unnest(...) ON CONFLICT per batch.
+    Tabel + enum-nya dibikin Prisma migrate, di sini gak bikin schema.
+    """
+
+    def __init__(self, dsn: Optional[str] = DATABASE_URL, pool_size: int = DATABASE_POOL_SIZE):
+        if not dsn:
+            raise ValueError("DATABASE_URL wajib diisi buat PERSISTENCE_BACKEND=postgres")
+        self.dsn = dsn
+        self.pool_size = pool_size
+        self._pool = None
+
+    async def open(self) -> None:
+        import asyncpg
+
+        self._pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=self.pool_size)
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def insert_submissions(self, records: list[SubmissionRecord]) -> None:
+        async with self._pool.acquire() as conn:
+            await conn.copy_records_to_table(
+                "Submission", records=[record.row() for record in records], columns=list(SUBMISSION_COLUMNS)
+            )
+
+    async def insert_submission(self, record: SubmissionRecord) -> None:
+        casts = {"language": '::"ChallengeType"', "status": '::"SubmissionStatus"', "scoreBreakdown": "::jsonb",
+                 "aiSuggestions": "::jsonb"}
+        placeholders = ", ".join(
+            f"${i}{casts.get(column, '')}" for i, column in enumerate(SUBMISSION_COLUMNS, start=1)
+        )
+        await self._pool.execute(
+            f"""
+            INSERT INTO "Submission" ({_quoted(SUBMISSION_COLUMNS)})
+            VALUES ({placeholders})
+            ON CONFLICT ("id") DO NOTHING
+            """,
+            *record.row(),
+        )
+
+    async def upsert_progress(self, records: list[ProgressRecord]) -> None:
+        columns = list(zip(*(record.row() for record in records)))
+        await self._pool.execute(
+            f"""
+            INSERT INTO "UserProgress" ({_quoted(PROGRESS_COLUMNS)})
+            SELECT id, user_id, level_id, status::"ProgressStatus", current_score, completed_modules,
+                   completed_challenges, unlocked_at, started_at, completed_at, updated_at
+            FROM unnest(
+                $1::text[], $2::text[], $3::text[], $4::text[], $5::int[], $6::int[], $7::int[],
+                $8::timestamp[], $9::timestamp[], $10::timestamp[], $11::timestamp[]
+            ) AS t(id, user_id, level_id, status, current_score, completed_modules,
+                   completed_challenges, unlocked_at, started_at, completed_at, updated_at)
+            {_PROGRESS_CONFLICT}
+            """,
+            *(list(column) for column in columns),
+        )
+
+    async def count_submissions(self, user_id: str, challenge_id: str) -> int:
+        return await self._pool.fetchval(
+            'SELECT COUNT(*) FROM "Submission" WHERE "userId" = $1 AND "challengeId" = $2', user_id, challenge_id
+        )
+
+    async def best_scores(self) -> list[tuple]:
+        rows = await self._pool.fetch(
+            """
+            SELECT "userId", "challengeId", MAX("score"), MIN("gradedAt"), MAX("gradedAt")
+            FROM "Submission" WHERE "status" = 'COMPLETED' AND "score" IS NOT NULL
+            GROUP BY "userId", "challengeId"
+            """
+        )
+        return [tuple(row) for row in rows]
+
+    async def insert_achievements(self, records: list[AchievementRecord]) -> None:
+        columns = list(zip(*(record.row() for record in records)))
+        await self._pool.execute(
+            f"""
+            INSERT INTO "UserAchievement" ({_quoted(ACHIEVEMENT_COLUMNS)})
+            SELECT * FROM unnest($1::text[], $2::text[], $3::text[], $4::timestamp[])
+            ON CONFLICT ("userId", "achievementId") DO NOTHING
+            """,
+            *(list(column) for column in columns),
+        )
+
+    async def achievements(self) -> list[tuple]:
+        rows = await self._pool.fetch('SELECT "id", "name", "criteria"::text FROM "Achievement"')
+        return [(row[0], row[1], json.loads(row[2]) if row[2] else None) for row in rows]
+
+    async def user_achievements(self) -> list[tuple]:
+        rows = await self._pool.fetch('SELECT "userId", "achievementId" FROM "UserAchievement"')
+        return [tuple(row) for row in rows]
+
+    async def activity_days(self) -> list[tuple]:
+        rows = await self._pool.fetch(
+            """
+            SELECT "userId", "gradedAt"::date, COUNT(*) FROM "Submission"
+            WHERE "status" = 'COMPLETED' AND "gradedAt" IS NOT NULL
+            GROUP BY "userId", "gradedAt"::date
+            """
+        )
+        return [tuple(row) for row in rows]
+
+    async def catalog_rows(self) -> Optional[tuple[list[tuple], list[tuple]]]:
+        levels = await self._pool.fetch(
+            """
+            SELECT t."path"::text, l."sequenceOrder", l."id"
+            FROM "Level" l JOIN "Track" t ON t."id" = l."trackId"
+            """
+        )
+        challenges = await self._pool.fetch(
+            """
+            SELECT t."path"::text, l."sequenceOrder", c."sequenceOrder", c."slug", c."id"
+            FROM "Challenge" c
+            JOIN "Level" l ON l."id" = c."levelId"
+            JOIN "Track" t ON t."id" = l."trackId"
+            """
+        )
+        return [tuple(row) for row in levels], [tuple(row) for row in challenges]
+
+    async def ping(self) -> None:
+        if self._pool is None:
+            raise ConnectionError("Pool Postgres belum dibuka")
+        await self._pool.fetchval("SELECT 1")
+
+    def is_transient(self, error: Exception) -> bool:
+        import asyncpg
+
+        return isinstance(
+            error,
+            (
+                OSError,
+                asyncio.TimeoutError,
+                asyncpg.exceptions.PostgresConnectionError,
+                asyncpg.exceptions.InterfaceError,
+                asyncpg.exceptions.TooManyConnectionsError,
+                asyncpg.exceptions.CannotConnectNowError,
+            ),
+        )
+
+
+def create_persistence_backend(backend: str = PERSISTENCE_BACKEND) -> Optional[PersistenceBackend]:
+    """Bikin backend sesuai PERSISTENCE_BACKEND (none / sqlite / postgres). None = persistence mati."""
+    if backend == "none":
+        return None
+    if backend == "sqlite":
+        return SQLitePersistence()
+    if backend == "postgres":
+        return PostgresPersistence()
+    raise ValueError(f"PERSISTENCE_BACKEND gak dikenal: {backend}")
+
+
+# ============================================
+# WRITE-BEHIND MANAGER
+# ============================================
+
+class PersistenceManager:
+    """
+    Buffer write-behind + flusher buat Submission, UserProgress, dan UserAchievement.
+
+    `save_submission` / `save_progress` / `save_achievement` cuma naruh record di buffer (mikrodetik); flusher yang
+    nulis ke database per batch. Update progress dengan key (userId, levelId) yang sama di-coalesce:
+    cuma snapshot terakhir yang ditulis.
+
+    Record masuk pake id kurikulum; kalau katalog udah dipasang (`set_catalog`), id-nya diganti
+    id row Level/Challenge. Yang gak ketemu di katalog gak di-buffer (pasti ditolak FK).
+    """
+
+    def __init__(
+        self,
+        backend: Optional[PersistenceBackend] = None,
+        buffer_max: int = PERSISTENCE_BUFFER_MAX,
+        batch_size: int = PERSISTENCE_BATCH_SIZE,
+        flush_interval_ms: float = PERSISTENCE_FLUSH_INTERVAL_MS,
+        enqueue_timeout_s: float = PERSISTENCE_ENQUEUE_TIMEOUT_S,
+        shutdown_timeout_s: float = PERSISTENCE_SHUTDOWN_TIMEOUT_S,
+    ):
+        self.backend = backend
+        self.buffer_max = buffer_max
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_ms / 1000
+        self.enqueue_timeout_s = enqueue_timeout_s
+        self.shutdown_timeout_s = shutdown_timeout_s
+        self._submissions: list[SubmissionRecord] = []
+        self._progress: dict[tuple[str, str], ProgressRecord] = {}
+        self._achievements: list[AchievementRecord] = []
+        self._attempts: OrderedDict[tuple[str, str], int] = OrderedDict()
+        self._flusher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Condition] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._backoff_s = 0.0
+        self._catalog: Optional[CatalogIds] = None
+        self._level_keys: dict[str, str] = {}
+        self._challenge_keys: dict[str, str] = {}
+        self.last_error: Optional[str] = None
+
+        self.flushed_submissions = 0
+        self.flushed_progress = 0
+        self.flushed_achievements = 0
+        self.batches = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.unresolved = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    @property
+    def buffered(self) -> int:
+        return len(self._submissions) + len(self._progress) + len(self._achievements)
+
+    async def startup(self) -> None:
+        """Buka koneksi database dan jalanin flusher."""
+        if self._flusher is not None:
+            return
+        if self.backend is None:
+            self.backend = create_persistence_backend()
+        if self.backend is None:
+            return
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Condition()
+        self._flush_lock = asyncio.Lock()
+        await self.backend.open()
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def shutdown(self) -> None:
+        """Stop flusher, tulis sisa buffer (dibatesin shutdown_timeout_s), tutup koneksi."""
+        if self._flusher is None:
+            return
+        self._flusher.cancel()
+        await asyncio.gather(self._flusher, return_exceptions=True)
+        self._flusher = None
+        try:
+            await asyncio.wait_for(self._drain(), timeout=self.shutdown_timeout_s)
+        except Exception:
+            pass  # Sisa buffer dicatet di bawah
+        if self.buffered:
+            metrics.increment("persistence.lost_on_shutdown", self.buffered)
+        await self.backend.close()
+
+    # ----------------------------------------
+    # Katalog id
+    # ----------------------------------------
+
+    async def catalog_rows(self) -> Optional[tuple[list[tuple], list[tuple]]]:
+        """Isi tabel Level/Challenge (lihat PersistenceBackend.catalog_rows). None kalau gak ada."""
+        if not self.enabled:
+            return None
+        return await self.backend.catalog_rows()
+
+    def set_catalog(self, catalog: Optional[CatalogIds]) -> None:
+        """Pasang mapping id kurikulum → id database (None = id kurikulum dipake langsung)."""
+        self._catalog = catalog
+        self._level_keys = catalog.level_keys if catalog is not None else {}
+        self._challenge_keys = catalog.challenge_keys if catalog is not None else {}
+
+    def _db_id(self, kind: str, key: str) -> Optional[str]:
+        if self._catalog is None:
+            return key
+        mapping, known = (
+            (self._catalog.levels, self._level_keys) if kind == "level"
+            else (self._catalog.challenges, self._challenge_keys)
+        )
+        # Client yang udah kirim id database langsung juga diterima
+        return mapping.get(key) or (key if key in known else None)
+
+    def _unresolved(self, kind: str) -> None:
+        self.unresolved += 1
+        metrics.increment(f"persistence.unresolved.{kind}")
+
+    def _curriculum_criteria(self, criteria):
+        """levelId / challengeId di criteria Achievement yang nunjuk id database → id kurikulum."""
+        if isinstance(criteria, list):
+            return [self._curriculum_criteria(item) for item in criteria]
+        if not isinstance(criteria, dict):
+            return criteria
+        translated = {key: self._curriculum_criteria(value) for key, value in criteria.items()}
+        if isinstance(translated.get("levelId"), str):
+            translated["levelId"] = self._level_keys.get(translated["levelId"], translated["levelId"])
+        if isinstance(translated.get("challengeId"), str):
+            translated["challengeId"] = self._challenge_keys.get(translated["challengeId"], translated["challengeId"])
+        return translated
+
+    # ----------------------------------------
+    # Public API
+    # ----------------------------------------
+
+    def check_capacity(self) -> None:
+        """
+        Admission check sebelum kerja yang hasilnya mau disimpen (grading).
+        Raise PersistenceBackpressure kalau buffer udah penuh.
+        """
+        if self.enabled and self.buffered >= self.buffer_max:
+            self.rejected += 1
+            metrics.increment("persistence.rejected")
+            raise PersistenceBackpressure(
+                f"Buffer database penuh ({self.buffered} record belum ketulis), coba lagi sebentar"
+            )
+
+    async def next_attempt(self, user_id: str, challenge_id: str) -> int:
+        """
+        attemptNumber buat submission berikutnya. Dihitung dari database sekali per (user, challenge)
+        lalu di-cache (dua proses yang nerima submission user yang sama barengan bisa dapet nomor sama).
+        """
+        key = (user_id, challenge_id)
+        cached = self._attempts.get(key)
+        if cached is None:
+            try:
+                db_challenge_id = self._db_id("challenge", challenge_id) or challenge_id
+                count = await self.backend.count_submissions(user_id, db_challenge_id)
+            except Exception:
+                count = 0  # Database lagi bermasalah: nomor attempt gak sepenting nyimpen hasilnya
+            # Request lain buat key yang sama bisa nyelesaiin count duluan
+            cached = max(self._attempts.get(key, 0), count)
+        self._attempts[key] = cached + 1
+        self._attempts.move_to_end(key)
+        if len(self._attempts) > ATTEMPT_CACHE_MAX:
+            self._attempts.popitem(last=False)
+        return cached + 1
+
+    async def save_submission(self, record: SubmissionRecord) -> None:
+        """Taruh submission di buffer (nunggu slot kalau penuh). No-op kalau persistence mati."""
+        if not self.enabled:
+            return
+        challenge_id = self._db_id("challenge", record.challenge_id)
+        if challenge_id is None:
+            self._unresolved("submission")
+            return
+        if challenge_id != record.challenge_id:
+            record = replace(record, challenge_id=challenge_id)
+        await self._wait_for_space()
+        self._submissions.append(record)
+        self._after_put()
+
+    async def save_progress(self, record: ProgressRecord) -> None:
+        """Taruh snapshot progress di buffer; snapshot lama buat user + level yang sama ditimpa."""
+        if not self.enabled:
+            return
+        level_id = self._db_id("level", record.level_id)
+        if level_id is None:
+            self._unresolved("progress")
+            return
+        if level_id != record.level_id:
+            record = replace(record, level_id=level_id)
+        if record.key not in self._progress:
+            await self._wait_for_space()
+        previous = self._progress.get(record.key)
+        if previous is not None:
+            # Sama kayak upsert di database: timestamp "pertama kali" dari snapshot lama dipertahanin
+            record.id = previous.id
+            record.unlocked_at = previous.unlocked_at or record.unlocked_at
+            record.started_at = previous.started_at or record.started_at
+            record.completed_at = previous.completed_at or record.completed_at
+            metrics.increment("persistence.progress_coalesced")
+        self._progress[record.key] = record
+        self._after_put()
+
+    async def save_achievement(self, record: AchievementRecord) -> None:
+        """Taruh achievement yang baru didapet di buffer."""
+        if not self.enabled:
+            return
+        await self._wait_for_space()
+        self._achievements.append(record)
+        self._after_put()
+
+    async def ping(self) -> Optional[str]:
+        """Status database buat readiness: 'connected', 'unreachable: ...', atau None kalau persistence mati."""
+        if not self.enabled:
+            return None
+        try:
+            await asyncio.wait_for(self.backend.ping(), timeout=2)
+        except Exception as e:
+            return f"unreachable: {type(e).__name__}: {e}"
+        return "connected"
+
+    async def best_scores(self) -> list[tuple]:
+        """Skor terbaik per (user, challenge) dari tabel Submission (buat rebuild progress)."""
+        if not self.enabled:
+            return []
+        await self.flush()  # Submission yang masih di buffer ikut kehitung
+        rows = await self.backend.best_scores()
+        if not self._challenge_keys:
+            return rows
+        return [(user_id, self._challenge_keys.get(challenge_id, challenge_id), *rest) for user_id, challenge_id, *rest in rows]
+
+    async def load_achievements(self) -> tuple[list[tuple], list[tuple], list[tuple]]:
+        """Definisi achievement, achievement yang udah didapet, dan aktivitas harian (buat seed rules engine)."""
+        if not self.enabled:
+            return [], [], []
+        await self.flush()
+        definitions = [
+            (achievement_id, name, self._curriculum_criteria(criteria))
+            for achievement_id, name, criteria in await self.backend.achievements()
+        ]
+        return (
+            definitions,
+            await self.backend.user_achievements(),
+            await self.backend.activity_days(),
+        )
+
+    async def flush(self) -> None:
+        """Tulis semua yang ada di buffer sekarang juga (admin / benchmark / shutdown)."""
+        if self.enabled:
+            await self._drain()
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "pool_size": self.backend.pool_size if self.backend is not None else 0,
+            "running": self._flusher is not None,
+            "buffered_submissions": len(self._submissions),
+            "buffered_progress": len(self._progress),
+            "buffered_achievements": len(self._achievements),
+            "buffer_max": self.buffer_max,
+            "flushed_submissions": self.flushed_submissions,
+            "flushed_progress": self.flushed_progress,
+            "flushed_achievements": self.flushed_achievements,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "unresolved": self.unresolved,
+            "catalog": (
+                {"levels": len(self._catalog.levels), "challenges": len(self._catalog.challenges)}
+                if self._catalog is not None else None
+            ),
+            "last_error": self.last_error,
+        }
+
+    # ----------------------------------------
+    # Buffer
+    # ----------------------------------------
+
+    async def _wait_for_space(self) -> None:
+        if self.buffered < self.buffer_max:
+            return
+        metrics.increment("persistence.backpressure_waits")
+        async with self._space:
+            try:
+                await asyncio.wait_for(
+                    self._space.wait_for(lambda: self.buffered < self.buffer_max),
+                    timeout=self.enqueue_timeout_s,
+                )
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                metrics.increment("persistence.rejected")
+                raise PersistenceBackpressure(
+                    f"Buffer database masih penuh setelah {self.enqueue_timeout_s:g}s"
+                ) from None
+
+    def _after_put(self) -> None:
+        if self.buffered >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _notify_space(self) -> None:
+        async with self._space:
+            self._space.notify_all()
+
+    # ----------------------------------------
+    # Flusher
+    # ----------------------------------------
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_s + self._backoff_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self._flush_once()
+            except Exception as e:
+                # Database mati / lock: record tetep di buffer, backoff eksponensial
+                self.last_error = f"{type(e).__name__}: {e}"
+                metrics.increment("persistence.flush_errors")
+                self._backoff_s = min(FLUSH_BACKOFF_MAX_S, max(self.flush_interval_s, self._backoff_s * 2))
+                continue
+            self._backoff_s = 0.0
+
+    async def _drain(self) -> None:
+        while self.buffered:
+            await self._flush_once()
+
+    async def _flush_once(self) -> None:
+        """Tulis satu batch submission + semua progress + satu batch achievement. Exception = error transient."""
+        # flush() manual bisa barengan sama flusher; batch yang sama jangan ketulis dua kali
+        async with self._flush_lock:
+            await self._flush_batch()
+
+    async def _flush_batch(self) -> None:
+        batch = self._submissions[: self.batch_size]
+        if batch:
+            start = time.perf_counter()
+            written = await self._write(batch, self.backend.insert_submissions, self._isolate_submissions)
+            del self._submissions[: len(batch)]
+            self.flushed_submissions += written
+            self._record_batch("submissions", len(batch), start)
+
+        if self._progress:
+            progress, self._progress = self._progress, {}
+            start = time.perf_counter()
+            try:
+                records = list(progress.values())
+                written = 0
+                for offset in range(0, len(records), self.batch_size):
+                    chunk = records[offset: offset + self.batch_size]
+                    written += await self._write(chunk, self.backend.upsert_progress, self._isolate_progress)
+            except BaseException:
+                # Balikin ke buffer; snapshot yang masuk selama flush lebih baru, jadi menang
+                for key, record in progress.items():
+                    self._progress.setdefault(key, record)
+                raise
+            self.flushed_progress += written
+            self._record_batch("progress", len(records), start)
+
+        batch = self._achievements[: self.batch_size]
+        if batch:
+            start = time.perf_counter()
+            written = await self._write(batch, self.backend.insert_achievements, self._isolate_achievements)
+            del self._achievements[: len(batch)]
+            self.flushed_achievements += written
+            self._record_batch("achievements", len(batch), start)
+
+        await self._notify_space()
+
+    async def _write(self, records: list, write_batch, isolate) -> int:
+        try:
+            await write_batch(records)
+        except Exception as e:
+            if self.backend.is_transient(e):
+                raise
+            self.last_error = f"{type(e).__name__}: {e}"
+            return await isolate(records)
+        return len(records)
+
+    async def _isolate_submissions(self, records: list[SubmissionRecord]) -> int:
+        """Batch ditolak karena datanya: ulang per row, row yang rusak (FK dll) dibuang."""
+        written = 0
+        for record in records:
+            try:
+                await self.backend.insert_submission(record)
+                written += 1
+            except Exception as e:
+                if self.backend.is_transient(e):
+                    raise
+                self._drop("submission", e)
+        return written
+
+    async def _isolate_progress(self, records: list[ProgressRecord]) -> int:
+        written = 0
+        for record in records:
+            try:
+                await self.backend.upsert_progress([record])
+                written += 1
+            except Exception as e:
+                if self.backend.is_transient(e):
+                    raise
+                self._drop("progress", e)
+        return written
+
+    async def _isolate_achievements(self, records: list[AchievementRecord]) -> int:
+        written = 0
+        for record in records:
+            try:
+                await self.backend.insert_achievements([record])
+                written += 1
+            except Exception as e:
+                if self.backend.is_transient(e):
+                    raise
+                self._drop("achievement", e)
+        return written
+
+    def _drop(self, kind: str, error: Exception) -> None:
+        self.dropped += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        metrics.increment(f"persistence.dropped.{kind}")
+
+    def _record_batch(self, kind: str, size: int, start: float) -> None:
+        self.batches += 1
+        metrics.observe(f"persistence.flush.{kind}", (time.perf_counter() - start) * 1000)
+        metrics.increment(f"persistence.flushed.{kind}", size)
+
+
+# Manager global (backend-nya dibikin pas startup sesuai env)
+persistence = PersistenceManager()
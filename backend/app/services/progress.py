@@ -0,0 +1,528 @@
+# Data Academy - Progress Engine (UserProgress + level unlock)
+# Agregat progress per user per level di-update incremental tiap ada hasil grading, jadi halaman
+# progress gak perlu ngitung ulang dari semua row Submission.
+#
+# - Per (user, level): skor terbaik per challenge, jumlah skor terbaik (buat currentScore),
+#   jumlah challenge yang lulus, status + timestamp. Satu event grading = O(1)
+# - currentScore = rata-rata skor terbaik semua challenge di level (yang belum dikerjain = 0)
+# - Level COMPLETED kalau semua challenge-nya lulus (passing score per challenge) dan currentScore
+#   >= Level.minPassingScore. Level berikutnya di track yang sama langsung UNLOCKED
+# - Level pertama tiap track kebuka dari awal. Skor di level yang masih LOCKED tetep dicatet,
+#   begitu levelnya ke-unlock langsung dievaluasi (bisa langsung COMPLETED, berantai)
+# - Struktur level + challenge dari curriculum store. Di dalem engine level_id = "<TRACK_CODE>-L<nomor>"
+#   dan challenge_id = id modul kurikulum; id row Level / Challenge (cuid) beda, jadi pas nulis ke
+#   database diterjemahin persistence lewat katalog (`catalog_from_rows`): Level dicocokin pake
+#   Track.path + sequenceOrder, Challenge pake slug = id modul atau sequenceOrder = sequence modul
+# - Rebuild bulk dari agregat Submission (GROUP BY di database) buat cold start / backfill
+
+import gc
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+from app.services.curriculum import CurriculumStore, curriculum
+from app.services.metrics import metrics
+from app.services.persistence import CatalogIds, ProgressRecord, persistence, utcnow
+
+
+LOCKED = "LOCKED"
+UNLOCKED = "UNLOCKED"
+IN_PROGRESS = "IN_PROGRESS"
+COMPLETED = "COMPLETED"
+
+
+def level_id_for(track_code: str, level: int) -> str:
+    """Key level kurikulum (track + nomor level). Bukan Level.id di database, lihat `catalog_from_rows`."""
+    return f"{track_code}-L{level}"
+
+
+# ============================================
+# LEVEL PLAN
+# ============================================
+
+@dataclass(frozen=True)
+class LevelPlan:
+    """Struktur satu level yang kepake buat ngitung progress (diturunin dari kurikulum)."""
+    level_id: str
+    track_code: str
+    sequence: int
+    min_passing_score: int
+    challenge_ids: tuple[str, ...]
+    next_level_id: Optional[str] = None
+    previous_level_id: Optional[str] = None
+
+    @property
+    def first(self) -> bool:
+        return self.previous_level_id is None
+
+
+@dataclass(frozen=True)
+class _Plans:
+    """Snapshot plan. Reload kurikulum = snapshot baru (diganti atomik, gak pernah diubah)."""
+    levels: dict[str, LevelPlan]
+    # challenge_id → (plan level, passing score challenge)
+    challenges: dict[str, tuple[LevelPlan, int]]
+    version: int
+    # Semua level urut (track, nomor level) buat halaman progress
+    ordered: tuple[LevelPlan, ...] = ()
+
+
+def build_plans(levels: Iterable[LevelPlan], passing_scores: Optional[dict[str, int]] = None, version: int = 0) -> _Plans:
+    """
+    Rangkai plan dari daftar level (urutan bebas): sambungin level sebelum/sesudahnya per track.
+    `passing_scores` = passing score per challenge; default-nya minPassingScore level.
+    """
+    passing_scores = passing_scores or {}
+    by_track: dict[str, list[LevelPlan]] = {}
+    for plan in levels:
+        by_track.setdefault(plan.track_code, []).append(plan)
+
+    plans: dict[str, LevelPlan] = {}
+    challenges: dict[str, tuple[LevelPlan, int]] = {}
+    for track_levels in by_track.values():
+        track_levels.sort(key=lambda plan: plan.sequence)
+        for position, plan in enumerate(track_levels):
+            plan = LevelPlan(
+                level_id=plan.level_id,
+                track_code=plan.track_code,
+                sequence=plan.sequence,
+                min_passing_score=plan.min_passing_score,
+                challenge_ids=plan.challenge_ids,
+                previous_level_id=track_levels[position - 1].level_id if position > 0 else None,
+                next_level_id=track_levels[position + 1].level_id if position + 1 < len(track_levels) else None,
+            )
+            plans[plan.level_id] = plan
+            for challenge_id in plan.challenge_ids:
+                challenges[challenge_id] = (plan, passing_scores.get(challenge_id, plan.min_passing_score))
+    ordered = tuple(sorted(plans.values(), key=lambda plan: (plan.track_code, plan.sequence)))
+    return _Plans(levels=plans, challenges=challenges, version=version, ordered=ordered)
+
+
+def plans_from_curriculum(store: CurriculumStore, version: int = 0) -> _Plans:
+    levels = []
+    passing_scores = {}
+    for track_code in store.track_codes():
+        for summary in store.levels_for(track_code):
+            levels.append(LevelPlan(
+                level_id=level_id_for(summary.track_code, summary.level),
+                track_code=summary.track_code,
+                sequence=summary.level,
+                min_passing_score=summary.min_passing_score,
+                challenge_ids=summary.challenge_ids,
+            ))
+            for challenge_id in summary.challenge_ids:
+                passing_scores[challenge_id] = store.get_challenge(challenge_id).passing_score
+    return build_plans(levels, passing_scores, version)
+
+
+def catalog_from_rows(store: CurriculumStore, level_rows: list[tuple], challenge_rows: list[tuple]) -> CatalogIds:
+    """
+    Cocokin level/challenge kurikulum ke row tabel Level/Challenge (format row: PersistenceBackend.catalog_rows).
+    Yang gak ada row-nya gak masuk katalog (progress/submission-nya gak ditulis).
+    """
+    db_levels = {(path, sequence): db_id for path, sequence, db_id in level_rows}
+    by_slug = {}
+    by_sequence = {}
+    for path, level, sequence, slug, db_id in challenge_rows:
+        by_slug[(path, level, (slug or "").lower())] = db_id
+        by_sequence[(path, level, sequence)] = db_id
+
+    levels = {}
+    challenges = {}
+    for track_code in store.track_codes():
+        for summary in store.levels_for(track_code):
+            db_id = db_levels.get((track_code, summary.level))
+            if db_id is not None:
+                levels[level_id_for(track_code, summary.level)] = db_id
+            for challenge_id in summary.challenge_ids:
+                module = store.get_module(challenge_id)
+                db_id = by_slug.get((track_code, summary.level, challenge_id.lower()))
+                if db_id is None and module is not None:
+                    db_id = by_sequence.get((track_code, summary.level, module.sequence))
+                if db_id is not None:
+                    challenges[challenge_id] = db_id
+    return CatalogIds(levels=levels, challenges=challenges)
+
+
+# ============================================
+# AGGREGATES
+# ============================================
+
+class LevelAggregate:
+    """State progress satu user di satu level. __slots__ biar muat jutaan di memori."""
+
+    __slots__ = (
+        "best", "score_sum", "passed", "status", "unlocked_at", "started_at", "completed_at", "version",
+    )
+
+    def __init__(self, status: str, version: int, unlocked_at: Optional[datetime] = None):
+        self.best: dict[str, int] = {}
+        self.score_sum = 0
+        self.passed = 0
+        self.status = status
+        self.unlocked_at = unlocked_at
+        self.started_at: Optional[datetime] = None
+        self.completed_at: Optional[datetime] = None
+        self.version = version
+
+    def current_score(self, plan: LevelPlan) -> int:
+        total = len(plan.challenge_ids)
+        return round(self.score_sum / total) if total else 0
+
+
+@dataclass
+class ProgressUpdate:
+    """Hasil satu event: snapshot level yang berubah + transisi yang kejadian (STARTED/COMPLETED/UNLOCKED)."""
+    record: ProgressRecord
+    transitions: list[str] = field(default_factory=list)
+    track_code: str = ""
+
+
+# ============================================
+# ENGINE
+# ============================================
+
+class ProgressEngine:
+    """
+    Agregat progress in-memory: users → level_id → LevelAggregate.
+
+    `record_grade` dipanggil tiap submission selesai di-grade dan balikin level yang berubah
+    (buat di-upsert ke UserProgress lewat persistence). Dipake dari event loop aja;
+    listener reload kurikulum cuma ganti referensi snapshot plan (plus katalog id di persistence).
+    """
+
+    def __init__(self, store: Optional[CurriculumStore] = None):
+        self._plans = _Plans(levels={}, challenges={}, version=0)
+        self._users: dict[str, dict[str, LevelAggregate]] = {}
+        self.events = 0
+        self.unknown = 0
+        self.completions = 0
+        self.last_rebuild_ms = 0.0
+        self.rebuilt_aggregates = 0
+        self._store = store
+        self._catalog_rows: Optional[tuple[list[tuple], list[tuple]]] = None
+        if store is not None:
+            store.on_reload(self._on_curriculum_reload)
+
+    def _on_curriculum_reload(self, store: CurriculumStore) -> None:
+        self.set_plans(plans_from_curriculum(store, version=self._plans.version + 1))
+        if self._catalog_rows is not None:
+            persistence.set_catalog(catalog_from_rows(store, *self._catalog_rows))
+
+    def set_plans(self, plans: _Plans) -> None:
+        """Ganti struktur level. Agregat lama dihitung ulang pas disentuh lagi (versi plan beda)."""
+        self._plans = plans
+
+    async def startup(self) -> None:
+        """Bangun plan dari kurikulum (kalau belum) lalu rebuild agregat dari tabel Submission."""
+        if self._store is not None and not self._plans.levels:
+            self.set_plans(plans_from_curriculum(self._store, version=self._plans.version + 1))
+        if persistence.enabled:
+            # Katalog dulu: best_scores() balikin challengeId database yang perlu diterjemahin balik
+            self._catalog_rows = await persistence.catalog_rows()
+            if self._catalog_rows is not None and self._store is not None:
+                persistence.set_catalog(catalog_from_rows(self._store, *self._catalog_rows))
+            self.rebuild(await persistence.best_scores(), emit=False)
+
+    # ----------------------------------------
+    # Event incremental
+    # ----------------------------------------
+
+    def record_grade(
+        self,
+        user_id: str,
+        challenge_id: str,
+        score: int,
+        graded_at: Optional[datetime] = None,
+    ) -> list[ProgressUpdate]:
+        """
+        Proses satu hasil grading. Return level yang berubah (kosong kalau skornya gak ngubah apa-apa
+        atau challenge-nya gak ada di kurikulum).
+        """
+        plans = self._plans
+        entry = plans.challenges.get(challenge_id)
+        if entry is None:
+            self.unknown += 1
+            return []
+        self.events += 1
+        plan, passing_score = entry
+        now = graded_at or utcnow()
+        levels = self._users.setdefault(user_id, {})
+        aggregate = self._aggregate(levels, plan, plans, now)
+        transitions = []
+
+        previous = aggregate.best.get(challenge_id)
+        if previous is None or score > previous:
+            aggregate.best[challenge_id] = score
+            aggregate.score_sum += score - (previous or 0)
+            if score >= passing_score and (previous is None or previous < passing_score):
+                aggregate.passed += 1
+        elif aggregate.status != UNLOCKED:
+            # Skor gak naik dan status gak bakal berubah: gak ada yang perlu ditulis
+            return []
+
+        if aggregate.status == UNLOCKED:
+            aggregate.status = IN_PROGRESS
+            aggregate.started_at = now
+            transitions.append("STARTED")
+        elif aggregate.started_at is None:
+            aggregate.started_at = now
+
+        updates = [ProgressUpdate(self._record(user_id, plan, aggregate, now), transitions, plan.track_code)]
+        self._complete_chain(user_id, levels, plan, aggregate, plans, now, updates)
+        return updates
+
+    def _aggregate(self, levels: dict[str, LevelAggregate], plan: LevelPlan, plans: _Plans, now: datetime) -> LevelAggregate:
+        aggregate = levels.get(plan.level_id)
+        if aggregate is None:
+            unlocked = plan.first or self._status(levels, plan.previous_level_id) == COMPLETED
+            aggregate = LevelAggregate(
+                status=UNLOCKED if unlocked else LOCKED,
+                version=plans.version,
+                unlocked_at=now if unlocked else None,
+            )
+            levels[plan.level_id] = aggregate
+        elif aggregate.version != plans.version:
+            self._recompute(aggregate, plan, plans)
+        return aggregate
+
+    @staticmethod
+    def _status(levels: dict[str, LevelAggregate], level_id: Optional[str]) -> Optional[str]:
+        aggregate = levels.get(level_id) if level_id else None
+        return aggregate.status if aggregate is not None else None
+
+    @staticmethod
+    def _recompute(aggregate: LevelAggregate, plan: LevelPlan, plans: _Plans) -> None:
+        """Challenge di level berubah (reload kurikulum): hitung ulang sum + lulus dari skor terbaik."""
+        challenge_ids = set(plan.challenge_ids)
+        aggregate.best = {cid: score for cid, score in aggregate.best.items() if cid in challenge_ids}
+        aggregate.score_sum = sum(aggregate.best.get(cid, 0) for cid in plan.challenge_ids)
+        aggregate.passed = sum(
+            1 for cid in plan.challenge_ids
+            if cid in aggregate.best and aggregate.best[cid] >= plans.challenges[cid][1]
+        )
+        aggregate.version = plans.version
+
+    def _complete_chain(
+        self,
+        user_id: str,
+        levels: dict[str, LevelAggregate],
+        plan: LevelPlan,
+        aggregate: LevelAggregate,
+        plans: _Plans,
+        now: datetime,
+        updates: list[ProgressUpdate],
+    ) -> None:
+        """Cek level ini selesai; kalau iya, unlock level berikutnya (yang bisa ikut selesai juga)."""
+        while aggregate.status == IN_PROGRESS and self._is_complete(aggregate, plan):
+            aggregate.status = COMPLETED
+            aggregate.completed_at = now
+            self.completions += 1
+            metrics.increment("progress.level_completed")
+            updates[-1].record = self._record(user_id, plan, aggregate, now)
+            updates[-1].transitions.append("COMPLETED")
+
+            next_plan = plans.levels.get(plan.next_level_id) if plan.next_level_id else None
+            if next_plan is None:
+                return
+            next_aggregate = levels.get(next_plan.level_id)
+            if next_aggregate is None:
+                next_aggregate = LevelAggregate(status=UNLOCKED, version=plans.version, unlocked_at=now)
+                levels[next_plan.level_id] = next_aggregate
+                updates.append(ProgressUpdate(
+                    self._record(user_id, next_plan, next_aggregate, now), ["UNLOCKED"], next_plan.track_code,
+                ))
+                return
+            if next_aggregate.version != plans.version:
+                self._recompute(next_aggregate, next_plan, plans)
+            if next_aggregate.status != LOCKED:
+                return
+            next_aggregate.unlocked_at = now
+            transitions = ["UNLOCKED"]
+            if next_aggregate.best:
+                # Udah pernah ngerjain challenge level ini waktu masih LOCKED
+                next_aggregate.status = IN_PROGRESS
+                next_aggregate.started_at = next_aggregate.started_at or now
+                transitions.append("STARTED")
+            else:
+                next_aggregate.status = UNLOCKED
+            updates.append(ProgressUpdate(
+                self._record(user_id, next_plan, next_aggregate, now), transitions, next_plan.track_code,
+            ))
+            plan, aggregate = next_plan, next_aggregate
+
+    @staticmethod
+    def _is_complete(aggregate: LevelAggregate, plan: LevelPlan) -> bool:
+        total = len(plan.challenge_ids)
+        return total > 0 and aggregate.passed == total and aggregate.current_score(plan) >= plan.min_passing_score
+
+    @staticmethod
+    def _record(user_id: str, plan: LevelPlan, aggregate: LevelAggregate, now: datetime) -> ProgressRecord:
+        return ProgressRecord(
+            user_id=user_id,
+            level_id=plan.level_id,
+            status=aggregate.status,
+            current_score=aggregate.current_score(plan),
+            completed_challenges=aggregate.passed,
+            unlocked_at=aggregate.unlocked_at,
+            started_at=aggregate.started_at,
+            completed_at=aggregate.completed_at,
+            updated_at=now,
+        )
+
+    # ----------------------------------------
+    # Rebuild bulk
+    # ----------------------------------------
+
+    def rebuild(
+        self,
+        rows: Iterable[tuple],
+        users: Optional[set[str]] = None,
+        emit: bool = True,
+    ) -> list[ProgressRecord]:
+        """
+        Bangun ulang agregat dari row (userId, challengeId, skor, gradedAt pertama, gradedAt terakhir)
+        — hasil GROUP BY di `best_scores()`, tapi row mentah per submission juga boleh (diambil max-nya).
+        `users` = cuma rebuild user ini (backfill sebagian); None = semua.
+        Return snapshot semua level yang punya state buat di-upsert (backfill); `emit=False` = gak usah.
+        """
+        # Rebuild bikin ratusan ribu object tanpa cycle; GC generasional cuma bakal nyapu
+        # jutaan row input berkali-kali (bikin rebuild ~1.5x lebih lambat)
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._rebuild(rows, users, emit)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _rebuild(self, rows: Iterable[tuple], users: Optional[set[str]], emit: bool) -> list[ProgressRecord]:
+        start = time.perf_counter()
+        plans = self._plans
+        challenges = plans.challenges
+        rebuilt: dict[str, dict[str, LevelAggregate]] = {}
+
+        for user_id, challenge_id, score, first_at, last_at in rows:
+            entry = challenges.get(challenge_id)
+            if entry is None or score is None or (users is not None and user_id not in users):
+                continue
+            plan, passing_score = entry
+            levels = rebuilt.get(user_id)
+            if levels is None:
+                levels = rebuilt[user_id] = {}
+            aggregate = levels.get(plan.level_id)
+            if aggregate is None:
+                aggregate = levels[plan.level_id] = LevelAggregate(status=LOCKED, version=plans.version)
+            previous = aggregate.best.get(challenge_id)
+            if previous is None or score > previous:
+                aggregate.best[challenge_id] = score
+                aggregate.score_sum += score - (previous or 0)
+                if score >= passing_score and (previous is None or previous < passing_score):
+                    aggregate.passed += 1
+            # started_at / completed_at sementara nampung gradedAt pertama / terakhir di level ini
+            if first_at is not None and (aggregate.started_at is None or first_at < aggregate.started_at):
+                aggregate.started_at = first_at
+            if last_at is not None and (aggregate.completed_at is None or last_at > aggregate.completed_at):
+                aggregate.completed_at = last_at
+
+        # Status: jalan per track dari level pertama; level sesudah level yang belum selesai tetep LOCKED
+        now = utcnow()
+        records = []
+        first_levels = {plan.track_code: plan for plan in plans.levels.values() if plan.first}
+        for user_id, levels in rebuilt.items():
+            for track_code in {plans.levels[level_id].track_code for level_id in levels}:
+                plan = first_levels[track_code]
+                unlocked = True
+                while plan is not None:
+                    aggregate = levels.get(plan.level_id)
+                    if aggregate is None:
+                        if unlocked and emit:
+                            # Level kebuka tapi belum dikerjain: disimpen ke database aja, gak di memori
+                            records.append(self._record(user_id, plan, LevelAggregate(UNLOCKED, plans.version, now), now))
+                        unlocked = False
+                        plan = plans.levels.get(plan.next_level_id) if plan.next_level_id else None
+                        continue
+                    last_at, aggregate.completed_at = aggregate.completed_at, None
+                    if unlocked:
+                        aggregate.unlocked_at = aggregate.started_at or now
+                        aggregate.status = IN_PROGRESS
+                        if self._is_complete(aggregate, plan):
+                            aggregate.status = COMPLETED
+                            aggregate.completed_at = last_at or now
+                    if emit:
+                        records.append(self._record(user_id, plan, aggregate, now))
+                    unlocked = aggregate.status == COMPLETED
+                    plan = plans.levels.get(plan.next_level_id) if plan.next_level_id else None
+
+        if users is None:
+            self._users = rebuilt
+        else:
+            for user_id in users:
+                self._users.pop(user_id, None)
+            self._users.update(rebuilt)
+        self.rebuilt_aggregates = sum(len(levels) for levels in rebuilt.values())
+        self.last_rebuild_ms = (time.perf_counter() - start) * 1000
+        metrics.observe("progress.rebuild", self.last_rebuild_ms)
+        return records
+
+    # ----------------------------------------
+    # Read
+    # ----------------------------------------
+
+    def user_progress(self, user_id: str) -> list[dict]:
+        """Progress semua level (urut track + nomor level) buat satu user, termasuk yang belum disentuh."""
+        plans = self._plans
+        levels = self._users.get(user_id, {})
+        result = []
+        for plan in plans.ordered:
+            aggregate = levels.get(plan.level_id)
+            if aggregate is not None and aggregate.version != plans.version:
+                self._recompute(aggregate, plan, plans)
+            if aggregate is None:
+                unlocked = plan.first or self._status(levels, plan.previous_level_id) == COMPLETED
+                status, score, passed, best = (UNLOCKED if unlocked else LOCKED), 0, 0, {}
+            else:
+                status, score, passed, best = (
+                    aggregate.status, aggregate.current_score(plan), aggregate.passed, aggregate.best,
+                )
+            result.append({
+                "level_id": plan.level_id,
+                "track_code": plan.track_code,
+                "level": plan.sequence,
+                "status": status,
+                "current_score": score,
+                "min_passing_score": plan.min_passing_score,
+                "completed_challenges": passed,
+                "total_challenges": len(plan.challenge_ids),
+                "best_scores": {cid: best[cid] for cid in plan.challenge_ids if cid in best},
+                "unlocked_at": aggregate.unlocked_at if aggregate is not None else None,
+                "started_at": aggregate.started_at if aggregate is not None else None,
+                "completed_at": aggregate.completed_at if aggregate is not None else None,
+            })
+        return result
+
+    def completed_levels(self) -> Iterator[tuple[str, str, str]]:
+        """Semua level yang udah COMPLETED: (user_id, level_id, track_code). Buat seed achievement."""
+        levels = self._plans.levels
+        for user_id, aggregates in self._users.items():
+            for level_id, aggregate in aggregates.items():
+                plan = levels.get(level_id)
+                if aggregate.status == COMPLETED and plan is not None:
+                    yield user_id, level_id, plan.track_code
+
+    def stats(self) -> dict:
+        return {
+            "levels": len(self._plans.levels),
+            "challenges": len(self._plans.challenges),
+            "users": len(self._users),
+            "aggregates": sum(len(levels) for levels in self._users.values()),
+            "events": self.events,
+            "unknown_challenges": self.unknown,
+            "completions": self.completions,
+            "last_rebuild_ms": round(self.last_rebuild_ms, 2),
+        }
+
+
+# Global instance (plan ikut reload kurikulum)
+progress_engine = ProgressEngine(curriculum)
@@ -0,0 +1,367 @@
+# Data Academy - Quick Syntax Check Service
+# Syntax check + lint ringan buat editor (dipanggil hampir tiap keystroke, jadi harus < 5 ms)
+#
+# Tiga lapis biar cepet:
+# 1. Result cache per hash code (ketik → undo → ketik lagi gak parse ulang). Cuma hasil parse
+#    full yang masuk cache, hasil incremental gak.
+# 2. Incremental parse per dokumen: statement top-level yang ada di prefix yang gak berubah
+#    dipake ulang dari parse sukses terakhir, cuma sisa code dari statement terakhir yang di-parse.
+#    Titik potongnya selalu awal statement yang barisnya gak berubah, jadi error di sisa code =
+#    error di code full.
+# 3. SQL dicek lewat EXPLAIN di SQLite in-memory (gak ada query yang beneran jalan)
+
+import ast
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.services.code_normalize import CodeLanguage, tokenize_sql
+
+QUICK_CHECK_CACHE_SIZE = 4096
+QUICK_CHECK_MAX_DOCUMENTS = 1024
+
+
+# ============================================
+# RESULT MODELS
+# ============================================
+
+class CodeIssue(BaseModel):
+    """Satu error/temuan lint dengan posisi (1-based)"""
+    line: int
+    column: int
+    message: str
+    code: Optional[str] = None  # Kode rule lint, misal "bare-except"
+
+
+class QuickCheckResult(BaseModel):
+    """Hasil quick check"""
+    valid: bool
+    message: str
+    language: CodeLanguage
+    errors: list[CodeIssue] = Field(default_factory=list)
+    lint: list[CodeIssue] = Field(default_factory=list)
+    cached: bool = False
+    incremental: bool = False
+    elapsed_ms: float = 0.0
+
+
+# ============================================
+# PYTHON
+# ============================================
+
+@dataclass
+class _ParsedDocument:
+    """Parse sukses terakhir dari satu dokumen editor."""
+    code: str
+    body: list[ast.stmt]
+    spans: list[tuple[int, int]] = field(default_factory=list)  # (start_line, end_line) per statement
+
+
+def _statement_spans(body: list[ast.stmt]) -> list[tuple[int, int]]:
+    spans = []
+    for node in body:
+        decorators = getattr(node, "decorator_list", None) or []
+        start = min([node.lineno] + [d.lineno for d in decorators])
+        spans.append((start, node.end_lineno or node.lineno))
+    return spans
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    limit = min(len(a), len(b))
+    index = 0
+    # Bandingin per blok dulu biar cepet, baru per karakter
+    step = 256
+    while index + step <= limit and a[index:index + step] == b[index:index + step]:
+        index += step
+    while index < limit and a[index] == b[index]:
+        index += 1
+    return index
+
+
+def _reusable_prefix(previous: _ParsedDocument, code: str) -> tuple[list[ast.stmt], int]:
+    """
+    Cari statement dari parse sebelumnya yang aman dipake ulang.
+
+    Parse ulang mulai dari statement ke-k terakhir yang baris pertamanya ada SEBELUM baris
+    tempat code mulai beda (baris itu sendiri bisa aja udah jadi `else:` / baris ke-indent yang
+    nyambung ke statement sebelumnya). Statement sebelum k selesai sebelum k mulai, dan awal k
+    gak berubah, jadi mereka gak bisa disambung sama editan baru.
+
+    Return (node yang dipake ulang, baris mulai buat parse sisanya).
+    """
+    divergence = _common_prefix_length(previous.code, code)
+    divergence_line = previous.code.count("\n", 0, divergence) + 1
+    spans = previous.spans
+
+    cut = 0
+    for k in range(1, len(spans)):
+        start, _ = spans[k]
+        if start >= divergence_line:
+            break
+        if spans[k - 1][1] < start:
+            cut = k
+    if cut == 0:
+        return [], 1
+    return previous.body[:cut], spans[cut][0]
+
+
+def python_lint(tree: ast.Module) -> list[CodeIssue]:
+    """Lint ringan: rule yang murah dan jarang false positive (dipake juga sama static_analysis)."""
+    issues: list[CodeIssue] = []
+    imported: dict[str, ast.AST] = {}
+    used: set[str] = set()
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ExceptHandler) and node.type is None:
+            issues.append(CodeIssue(
+                line=node.lineno, column=node.col_offset + 1, code="bare-except",
+                message="Hindari `except:` kosong, tangkap exception yang spesifik",
+            ))
+        elif isinstance(node, ast.Compare):
+            for op, right in zip(node.ops, node.comparators):
+                if isinstance(op, (ast.Eq, ast.NotEq)) and isinstance(right, ast.Constant) and right.value is None:
+                    issues.append(CodeIssue(
+                        line=node.lineno, column=node.col_offset + 1, code="compare-to-none",
+                        message="Pakai `is None` / `is not None` buat bandingin dengan None",
+                    ))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            for default in node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+                if isinstance(default, (ast.List, ast.Dict, ast.Set)):
+                    issues.append(CodeIssue(
+                        line=default.lineno, column=default.col_offset + 1, code="mutable-default",
+                        message=f"Default argument mutable di `{node.name}`, pakai None lalu isi di dalam fungsi",
+                    ))
+        elif isinstance(node, ast.ImportFrom) and any(alias.name == "*" for alias in node.names):
+            issues.append(CodeIssue(
+                line=node.lineno, column=node.col_offset + 1, code="wildcard-import",
+                message="Hindari `import *`, import nama yang dipake aja",
+            ))
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name != "*":
+                    imported[(alias.asname or alias.name).split(".")[0]] = node
+        elif isinstance(node, ast.Name):
+            used.add(node.id)
+        elif isinstance(node, ast.Attribute):
+            root = node
+            while isinstance(root, ast.Attribute):
+                root = root.value
+            if isinstance(root, ast.Name):
+                used.add(root.id)
+
+    for name, node in imported.items():
+        if name not in used:
+            issues.append(CodeIssue(
+                line=node.lineno, column=node.col_offset + 1, code="unused-import",
+                message=f"`{name}` di-import tapi gak dipake",
+            ))
+    issues.sort(key=lambda issue: (issue.line, issue.column))
+    return issues
+
+
+def _syntax_issue(exc: SyntaxError) -> CodeIssue:
+    return CodeIssue(
+        line=exc.lineno or 1,
+        column=exc.offset or 1,
+        message=exc.msg,
+        code="syntax-error",
+    )
+
+
+# ============================================
+# SQL
+# ============================================
+
+_SQL_NEAR_RE = re.compile(r'near "(?P<token>[^"]*)"')
+_SQL_SYNTAX_MARKERS = ("syntax error", "incomplete input", "unrecognized token")
+
+
+def _sql_position(code: str, token: str) -> tuple[int, int]:
+    """Perkirain posisi token yang disebut di pesan error SQLite."""
+    index = code.find(token) if token else -1
+    if index < 0:
+        index = len(code.rstrip())
+    line = code.count("\n", 0, index) + 1
+    column = index - (code.rfind("\n", 0, index) + 1) + 1
+    return line, column
+
+
+def _sql_lint(code: str) -> list[CodeIssue]:
+    tokens = tokenize_sql(code)
+    issues = []
+    for i, token in enumerate(tokens):
+        if token == "select" and i + 1 < len(tokens) and tokens[i + 1] == "*":
+            line, column = _sql_position(code, "*")
+            issues.append(CodeIssue(
+                line=line, column=column, code="select-star",
+                message="Hindari SELECT *, sebutin kolom yang dibutuhin aja",
+            ))
+    if tokens and tokens[0] in ("update", "delete") and "where" not in tokens:
+        issues.append(CodeIssue(
+            line=1, column=1, code="missing-where",
+            message=f"{tokens[0].upper()} tanpa WHERE bakal kena ke semua baris",
+        ))
+    return issues
+
+
+# ============================================
+# CHECKER
+# ============================================
+
+class QuickChecker:
+    """Quick check dengan result cache + state incremental per dokumen."""
+
+    def __init__(
+        self,
+        cache_size: int = QUICK_CHECK_CACHE_SIZE,
+        max_documents: int = QUICK_CHECK_MAX_DOCUMENTS,
+    ):
+        self.cache_size = cache_size
+        self.max_documents = max_documents
+        self._results: OrderedDict[str, QuickCheckResult] = OrderedDict()
+        self._documents: OrderedDict[str, _ParsedDocument] = OrderedDict()
+        self._lock = threading.Lock()
+        self._sql_conn = sqlite3.connect(":memory:", check_same_thread=False)
+
+    def check(
+        self,
+        code: str,
+        language: CodeLanguage = "python",
+        document_id: Optional[str] = None,
+        lint: bool = True,
+    ) -> QuickCheckResult:
+        """
+        Cek syntax (dan lint) code.
+
+        Args:
+            code: Code dari editor
+            language: 'python' atau 'sql'
+            document_id: ID dokumen editor; kalau diisi, parse sukses terakhir dipake ulang
+            lint: Jalanin lint ringan juga
+
+        Returns:
+            QuickCheckResult dengan error (line/column) dan temuan lint
+        """
+        start = time.perf_counter()
+        key = hashlib.blake2b(f"{language}:{int(lint)}:{code}".encode(), digest_size=16).hexdigest()
+
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+        if cached is not None:
+            result = cached.model_copy(update={"cached": True})
+        elif language == "sql":
+            result = self._check_sql(code, lint)
+        else:
+            result = self._check_python(code, document_id, lint)
+
+        if cached is None and not result.incremental:
+            with self._lock:
+                self._results[key] = result
+                while len(self._results) > self.cache_size:
+                    self._results.popitem(last=False)
+
+        result.elapsed_ms = round((time.perf_counter() - start) * 1000, 3)
+        return result
+
+    def _check_python(self, code: str, document_id: Optional[str], lint: bool) -> QuickCheckResult:
+        previous = None
+        if document_id is not None:
+            with self._lock:
+                previous = self._documents.get(document_id)
+
+        reused: list[ast.stmt] = []
+        start_line = 1
+        if previous is not None:
+            reused, start_line = _reusable_prefix(previous, code)
+
+        remainder = code
+        if start_line > 1:
+            # Potong di awal baris start_line, prefix-nya diganti baris kosong biar
+            # line number (termasuk yang ada di pesan error) tetep sama kayak parse full
+            offset = 0
+            for _ in range(start_line - 1):
+                offset = code.index("\n", offset) + 1
+            remainder = "\n" * (start_line - 1) + code[offset:]
+
+        try:
+            tree = ast.parse(remainder)
+        except (SyntaxError, ValueError) as exc:
+            if not isinstance(exc, SyntaxError):
+                exc = SyntaxError(str(exc))
+            issue = _syntax_issue(exc)
+            return QuickCheckResult(
+                valid=False,
+                message=f"Syntax error di baris {issue.line}: {issue.message}",
+                language="python",
+                errors=[issue],
+                incremental=bool(reused),
+            )
+
+        body = reused + tree.body
+
+        if document_id is not None:
+            document = _ParsedDocument(code=code, body=body, spans=_statement_spans(body))
+            with self._lock:
+                self._documents[document_id] = document
+                self._documents.move_to_end(document_id)
+                while len(self._documents) > self.max_documents:
+                    self._documents.popitem(last=False)
+
+        return QuickCheckResult(
+            valid=True,
+            message="Syntax check passed",
+            language="python",
+            lint=python_lint(ast.Module(body=body, type_ignores=[])) if lint else [],
+            incremental=bool(reused),
+        )
+
+    def _check_sql(self, code: str, lint: bool) -> QuickCheckResult:
+        statement = code.strip().rstrip(";").strip()
+        if not statement:
+            return QuickCheckResult(valid=True, message="Query kosong", language="sql")
+
+        error = None
+        with self._lock:
+            try:
+                self._sql_conn.execute("EXPLAIN " + statement)
+            except (sqlite3.Warning, sqlite3.Error) as exc:
+                message = str(exc)
+                # "no such table/column" = syntax-nya bener, cuma schema-nya gak ada di DB kosong ini
+                if "one statement" in message:
+                    error = "Cuma boleh satu statement per query"
+                elif any(marker in message for marker in _SQL_SYNTAX_MARKERS):
+                    error = message
+
+        if error is None:
+            return QuickCheckResult(
+                valid=True,
+                message="Syntax check passed",
+                language="sql",
+                lint=_sql_lint(code) if lint else [],
+            )
+
+        match = _SQL_NEAR_RE.search(error)
+        line, column = _sql_position(code, match.group("token") if match else "")
+        return QuickCheckResult(
+            valid=False,
+            message=f"Syntax error di baris {line}: {error}",
+            language="sql",
+            errors=[CodeIssue(line=line, column=column, message=error, code="syntax-error")],
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"cached_results": len(self._results), "documents": len(self._documents)}
+
+
+# Checker global yang dipake router
+quick_checker = QuickChecker()
@@ -0,0 +1,251 @@
+# Data Academy - Result Cache
+# Cache LRU + TTL di memory, dengan tier SQLite opsional yang bisa di-share antar uvicorn worker
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Hash stabil dari beberapa komponen key (harus JSON-serializable)."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    """Satu entry cache di memory."""
+    value: Any
+    expires_at: float
+    latency_ms: float = 0.0  # Latency LLM yang dihemat tiap kali entry ini kena hit
+    tag: Optional[str] = None  # Buat invalidation per grup (misal per challenge_id)
+    hits: int = 0
+    created_at: float = 0.0
+
+
+class ResultCache:
+    """
+    Cache hasil LLM dengan eviction LRU + TTL.
+
+    Tier memory selalu aktif; kalau `sqlite_path` diisi, entry juga ditulis ke
+    SQLite (WAL mode) jadi worker lain bisa ikut pake. Value harus JSON-serializable.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = 2048,
+        ttl_seconds: float = 86400,
+        sqlite_path: Optional[str] = None,
+    ):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+        self.hits = 0
+        self.sqlite_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_latency_ms = 0.0
+
+        if sqlite_path:
+            self._open_sqlite(sqlite_path)
+
+    # ----------------------------------------
+    # SQLite tier
+    # ----------------------------------------
+
+    def _open_sqlite(self, path: str) -> None:
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS result_cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                latency_ms REAL NOT NULL,
+                tag TEXT,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_result_cache_tag ON result_cache (namespace, tag)"
+        )
+
+    def _sqlite_get(self, key: str) -> Optional[CacheEntry]:
+        if self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, latency_ms, tag, expires_at FROM result_cache "
+                "WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (self.namespace, key, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+        value, latency_ms, tag, expires_at = row
+        return CacheEntry(
+            value=json.loads(value),
+            expires_at=expires_at,
+            latency_ms=latency_ms,
+            tag=tag,
+            created_at=time.time(),
+        )
+
+    def _sqlite_set(self, key: str, entry: CacheEntry) -> None:
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO result_cache "
+                "(namespace, key, value, latency_ms, tag, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    self.namespace,
+                    key,
+                    json.dumps(entry.value, ensure_ascii=False),
+                    entry.latency_ms,
+                    entry.tag,
+                    entry.expires_at,
+                ),
+            )
+
+    # ----------------------------------------
+    # Public API
+    # ----------------------------------------
+
+    def get(self, key: str) -> Optional[Any]:
+        """Ambil value dari cache (memory dulu, lalu SQLite). None kalau miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.hits += 1
+                self.hits += 1
+                self.saved_latency_ms += entry.latency_ms
+                return entry.value
+
+        entry = self._sqlite_get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            entry.hits = 1
+            self.hits += 1
+            self.sqlite_hits += 1
+            self.saved_latency_ms += entry.latency_ms
+            self._store(key, entry)
+        return entry.value
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        latency_ms: float = 0.0,
+        tag: Optional[str] = None,
+    ) -> None:
+        """Simpen value. `latency_ms` = biaya LLM buat bikin value ini."""
+        now = time.time()
+        entry = CacheEntry(
+            value=value,
+            expires_at=now + self.ttl_seconds,
+            latency_ms=latency_ms,
+            tag=tag,
+            created_at=now,
+        )
+        with self._lock:
+            self._store(key, entry)
+        self._sqlite_set(key, entry)
+
+    def _store(self, key: str, entry: CacheEntry) -> None:
+        # Dipanggil dengan self._lock dipegang
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: str) -> bool:
+        """Hapus satu entry. True kalau ada yang kehapus."""
+        with self._lock:
+            removed = self._entries.pop(key, None) is not None
+        if self._db is not None:
+            with self._db_lock:
+                cursor = self._db.execute(
+                    "DELETE FROM result_cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                )
+            removed = removed or cursor.rowcount > 0
+        return removed
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Hapus semua entry dengan tag tertentu. Return jumlah entry memory yang kehapus."""
+        with self._lock:
+            keys = [k for k, e in self._entries.items() if e.tag == tag]
+            for k in keys:
+                del self._entries[k]
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute(
+                    "DELETE FROM result_cache WHERE namespace = ? AND tag = ?",
+                    (self.namespace, tag),
+                )
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM result_cache WHERE namespace = ?", (self.namespace,))
+
+    def entries(self, tag: Optional[str] = None, include_value: bool = False) -> list[dict]:
+        """Daftar entry di memory (buat inspeksi admin), yang paling baru dipake duluan."""
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    "key": key,
+                    "tag": entry.tag,
+                    "hits": entry.hits,
+                    "latency_ms": round(entry.latency_ms, 2),
+                    "age_seconds": round(now - entry.created_at, 1),
+                    "ttl_remaining_seconds": round(entry.expires_at - now, 1),
+                    **({"value": entry.value} if include_value else {}),
+                }
+                for key, entry in reversed(self._entries.items())
+                if (tag is None or entry.tag == tag) and entry.expires_at > now
+            ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "namespace": self.namespace,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "sqlite_enabled": self._db is not None,
+                "hits": self.hits,
+                "sqlite_hits": self.sqlite_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "saved_latency_ms": round(self.saved_latency_ms, 2),
+            }
@@ -0,0 +1,386 @@
+# Data Academy - Near-Duplicate Submission Index
+# MinHash + LSH banding per challenge: submission yang strukturnya hampir sama
+# (beda nama variabel, konstanta, urutan kolom dikit) bisa pake ulang hasil grading sebelumnya
+#
+# - Code dinormalisasi dulu (code_normalize), nama variabel lokal Python diganti v0, v1, ...
+# - Signature MinHash dihitung vectorized pake numpy, disimpen per (challenge_id, language)
+# - LSH banding buat nyari kandidat, lalu estimasi Jaccard ke semua kandidat sekaligus
+# - Bisa ditambah incremental dan disimpen ke disk (SIMILARITY_INDEX_DIR)
+
+import ast
+import asyncio
+import builtins
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from app.services.code_normalize import CodeLanguage, normalize_code, tokenize_sql
+from app.services.metrics import metrics
+
+
+GRADING_SIMILARITY_THRESHOLD = float(os.getenv("GRADING_SIMILARITY_THRESHOLD", "0.9"))
+SIMILARITY_INDEX_DIR = os.getenv("SIMILARITY_INDEX_DIR", "")
+SIMILARITY_MAX_PER_CHALLENGE = int(os.getenv("SIMILARITY_MAX_PER_CHALLENGE", "100000"))
+
+NUM_PERM = 64
+LSH_BANDS = 8  # 8 band x 8 row → kandidat mulai kejaring di similarity ~0.77
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_SIZE = 4
+BUCKET_SCAN_LIMIT = 512  # Bucket super rame (solusi template) cukup dicek entry terbarunya
+SIMILARITY_SAVE_INTERVAL_S = 300
+
+# Parameter hash permutasi (multiply-shift 64-bit); seed tetap biar signature konsisten antar restart
+_rng = np.random.default_rng(20240501)
+_PERM_A = _rng.integers(1, 2**63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+
+
+# ============================================
+# TOKEN & SHINGLE
+# ============================================
+
+_PY_TOKEN_RE = re.compile(r"[A-Za-z_]\w*|\d+(?:\.\d+)?|'[^']*'|\"[^\"]*\"|==|!=|<=|>=|\*\*|//|\S")
+_PY_KEEP_NAMES = set(dir(builtins)) | {"self", "cls"}
+
+
+class _RenameLocals(ast.NodeTransformer):
+    """Ganti nama variabel/argumen lokal jadi v0, v1, ... sesuai urutan muncul."""
+
+    def __init__(self):
+        self.names: dict[str, str] = {}
+        self.imported: set[str] = set()
+
+    def _canonical(self, name: str) -> str:
+        if name in _PY_KEEP_NAMES or name in self.imported:
+            return name
+        return self.names.setdefault(name, f"v{len(self.names)}")
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.imported.add(alias.asname or alias.name.split(".")[0])
+        return node
+
+    def visit_ImportFrom(self, node):
+        for alias in node.names:
+            self.imported.add(alias.asname or alias.name)
+        return node
+
+    def visit_Name(self, node):
+        node.id = self._canonical(node.id)
+        return node
+
+    def visit_arg(self, node):
+        node.arg = self._canonical(node.arg)
+        return node
+
+
+def structural_tokens(code: str, language: CodeLanguage) -> list[str]:
+    """Token code yang udah dinormalisasi; buat Python nama lokal dibikin seragam."""
+    if language == "sql":
+        tokens = tokenize_sql(code)
+        while tokens and tokens[-1] == ";":
+            tokens.pop()
+        return tokens
+    try:
+        tree = _RenameLocals().visit(ast.parse(code))
+        normalized = ast.unparse(tree)
+    except (SyntaxError, ValueError, RecursionError):
+        normalized = normalize_code(code, language)
+    return _PY_TOKEN_RE.findall(normalized)
+
+
+def _shingle_hashes(tokens: list[str]) -> np.ndarray:
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = {" ".join(tokens)}
+    else:
+        shingles = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+
+
+def minhash_signature(code: str, language: CodeLanguage) -> np.ndarray:
+    """Signature MinHash (NUM_PERM x uint32) dari shingle token code."""
+    hashes = _shingle_hashes(structural_tokens(code, language))
+    # (shingle, permutasi): a*h + b mod 2^64, ambil 32 bit atas
+    permuted = (hashes[:, None] * _PERM_A[None, :] + _PERM_B[None, :]) >> np.uint64(32)
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+# ============================================
+# INDEX PER CHALLENGE
+# ============================================
+
+@dataclass
+class SimilarMatch:
+    """Submission lama yang paling mirip."""
+    similarity: float
+    result: dict
+    context_key: str
+
+
+class _ChallengeIndex:
+    """Signature + hasil grading buat satu (challenge_id, language)."""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self.signatures = np.empty((64, NUM_PERM), dtype=np.uint32)
+        self.context_ids = np.empty(64, dtype=np.int32)
+        self.size = 0
+        self.results: list[dict] = []
+        self.contexts: dict[str, int] = {}
+        self.buckets: list[dict[bytes, list[int]]] = [{} for _ in range(LSH_BANDS)]
+        self.exact: set[bytes] = set()  # Signature + konteks yang udah ada (gak perlu disimpen dobel)
+
+    def _grow(self) -> None:
+        capacity = self.signatures.shape[0] * 2
+        signatures = np.empty((capacity, NUM_PERM), dtype=np.uint32)
+        signatures[: self.size] = self.signatures[: self.size]
+        context_ids = np.empty(capacity, dtype=np.int32)
+        context_ids[: self.size] = self.context_ids[: self.size]
+        self.signatures, self.context_ids = signatures, context_ids
+
+    def _bucket(self, row: int, signature: np.ndarray) -> None:
+        self.exact.add(signature.tobytes() + self.context_ids[row].tobytes())
+        for band in range(LSH_BANDS):
+            key = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()
+            self.buckets[band].setdefault(key, []).append(row)
+
+    def add(self, signature: np.ndarray, context_key: str, result: dict) -> bool:
+        context_id = np.int32(self.contexts.setdefault(context_key, len(self.contexts)))
+        if signature.tobytes() + context_id.tobytes() in self.exact:
+            return False
+        if self.size == self.signatures.shape[0]:
+            self._grow()
+        row = self.size
+        self.signatures[row] = signature
+        self.context_ids[row] = context_id
+        self.results.append(result)
+        self.size += 1
+        self._bucket(row, signature)
+        return True
+
+    def query(self, signature: np.ndarray, context_key: str) -> Optional[tuple[int, float]]:
+        context_id = self.contexts.get(context_key)
+        if context_id is None:
+            return None
+        hits = []
+        for band in range(LSH_BANDS):
+            bucket = self.buckets[band].get(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes())
+            if bucket:
+                hits.append(bucket[-BUCKET_SCAN_LIMIT:])
+        if not hits:
+            return None
+        rows = np.unique(np.concatenate([np.asarray(bucket, dtype=np.int64) for bucket in hits]))
+        rows = rows[self.context_ids[rows] == context_id]
+        if rows.size == 0:
+            return None
+        # Estimasi Jaccard = porsi posisi signature yang sama
+        similarity = (self.signatures[rows] == signature).mean(axis=1)
+        best = int(similarity.argmax())
+        return int(rows[best]), float(similarity[best])
+
+    # ----------------------------------------
+    # Persistence
+    # ----------------------------------------
+
+    @staticmethod
+    def path(directory: str, namespace: str) -> str:
+        """Path file (tanpa ekstensi) index di disk."""
+        return os.path.join(directory, hashlib.sha1(namespace.encode("utf-8")).hexdigest())
+
+    def save(self, directory: str) -> None:
+        base = self.path(directory, self.namespace)
+        np.savez(
+            base + ".tmp.npz",
+            signatures=self.signatures[: self.size],
+            context_ids=self.context_ids[: self.size],
+        )
+        with open(base + ".tmp.json", "w", encoding="utf-8") as f:
+            json.dump(
+                {"namespace": self.namespace, "contexts": self.contexts, "results": self.results},
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(base + ".tmp.npz", base + ".npz")
+        os.replace(base + ".tmp.json", base + ".json")
+
+    @classmethod
+    def load(cls, base: str) -> "_ChallengeIndex":
+        with open(base + ".json", encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = np.load(base + ".npz")
+        index = cls(meta["namespace"])
+        index.signatures = np.ascontiguousarray(arrays["signatures"], dtype=np.uint32)
+        index.context_ids = np.ascontiguousarray(arrays["context_ids"], dtype=np.int32)
+        index.size = index.signatures.shape[0]
+        if index.size == 0:
+            index.signatures = np.empty((64, NUM_PERM), dtype=np.uint32)
+            index.context_ids = np.empty(64, dtype=np.int32)
+        index.contexts = meta["contexts"]
+        index.results = meta["results"]
+        for row in range(index.size):
+            index._bucket(row, index.signatures[row])
+        return index
+
+
+class SimilarityIndex:
+    """
+    Index near-duplicate submission per (challenge_id, language).
+
+    `lookup` balikin submission lama paling mirip (similarity >= threshold) dengan
+    konteks grading yang sama; `add` masukin hasil grading baru (incremental).
+    """
+
+    def __init__(
+        self,
+        threshold: float = GRADING_SIMILARITY_THRESHOLD,
+        directory: Optional[str] = SIMILARITY_INDEX_DIR or None,
+        max_per_challenge: int = SIMILARITY_MAX_PER_CHALLENGE,
+    ):
+        self.threshold = threshold
+        self.directory = directory
+        self.max_per_challenge = max_per_challenge
+        self._indexes: dict[str, _ChallengeIndex] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._autosave: Optional[asyncio.Task] = None
+
+        self.lookups = 0
+        self.matches = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold < 1.0
+
+    async def startup(self) -> None:
+        """Load index dari disk dan jalanin autosave berkala (kalau SIMILARITY_INDEX_DIR diset)."""
+        if not self.directory:
+            return
+        await asyncio.to_thread(self.load)
+        if self._autosave is None:
+            self._autosave = asyncio.create_task(self._autosave_loop())
+
+    async def shutdown(self) -> None:
+        if self._autosave is not None:
+            self._autosave.cancel()
+            await asyncio.gather(self._autosave, return_exceptions=True)
+            self._autosave = None
+        await asyncio.to_thread(self.save)
+
+    async def _autosave_loop(self) -> None:
+        while True:
+            await asyncio.sleep(SIMILARITY_SAVE_INTERVAL_S)
+            try:
+                await asyncio.to_thread(self.save)
+            except OSError:
+                continue
+
+    @staticmethod
+    def _namespace(challenge_id: str, language: CodeLanguage) -> str:
+        return f"{challenge_id}:{language}"
+
+    def lookup(
+        self,
+        challenge_id: str,
+        language: CodeLanguage,
+        code: str,
+        context_key: str,
+    ) -> Optional[SimilarMatch]:
+        """Cari submission lama yang mirip. None kalau gak ada yang lewat threshold."""
+        if not self.enabled:
+            return None
+        index = self._indexes.get(self._namespace(challenge_id, language))
+        if index is None:
+            return None
+        signature = minhash_signature(code, language)
+        with self._lock:
+            self.lookups += 1
+            found = index.query(signature, context_key)
+            if found is None or found[1] < self.threshold:
+                return None
+            row, similarity = found
+            self.matches += 1
+            result = index.results[row]
+        metrics.increment("similarity_index.matches")
+        return SimilarMatch(similarity=similarity, result=result, context_key=context_key)
+
+    def add(
+        self,
+        challenge_id: str,
+        language: CodeLanguage,
+        code: str,
+        context_key: str,
+        result: dict,
+    ) -> bool:
+        """Tambahin submission yang udah di-grade. False kalau index challenge-nya udah penuh."""
+        if not self.enabled:
+            return False
+        signature = minhash_signature(code, language)
+        namespace = self._namespace(challenge_id, language)
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is None:
+                index = self._indexes[namespace] = _ChallengeIndex(namespace)
+            if index.size >= self.max_per_challenge or not index.add(signature, context_key, result):
+                return False
+            self._dirty = True
+        return True
+
+    def invalidate(self, challenge_id: str) -> int:
+        """Hapus index semua bahasa buat satu challenge. Return jumlah submission yang kebuang."""
+        prefix = f"{challenge_id}:"
+        with self._lock:
+            namespaces = [ns for ns in self._indexes if ns.startswith(prefix)]
+            removed = sum(self._indexes.pop(ns).size for ns in namespaces)
+            if self.directory:
+                for ns in namespaces:
+                    base = _ChallengeIndex.path(self.directory, ns)
+                    for ext in (".npz", ".json"):
+                        if os.path.exists(base + ext):
+                            os.remove(base + ext)
+        return removed
+
+    def save(self) -> None:
+        """Simpen semua index ke SIMILARITY_INDEX_DIR (kalau diset dan ada perubahan)."""
+        if not self.directory or not self._dirty:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            for index in self._indexes.values():
+                index.save(self.directory)
+            self._dirty = False
+
+    def load(self) -> None:
+        """Load semua index dari SIMILARITY_INDEX_DIR."""
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        with self._lock:
+            for name in os.listdir(self.directory):
+                if name.endswith(".json") and not name.endswith(".tmp.json"):
+                    index = _ChallengeIndex.load(os.path.join(self.directory, name[:-5]))
+                    self._indexes[index.namespace] = index
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "challenges": len(self._indexes),
+                "submissions": sum(index.size for index in self._indexes.values()),
+                "lookups": self.lookups,
+                "matches": self.matches,
+                "match_rate": round(self.matches / self.lookups, 4) if self.lookups else 0.0,
+                "persistent": bool(self.directory),
+            }
+
+
+# Index global (di-load pas startup, disimpen pas shutdown)
+similarity_index = SimilarityIndex()
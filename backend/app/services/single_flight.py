@@ -0,0 +1,118 @@
+# Data Academy - Single-Flight Request Coalescing
+# Request identik yang dateng barengan (satu kelas pencet hint/submit di detik yang sama)
+# cukup satu LLM call: request pertama jadi leader, sisanya nunggu hasil leader
+#
+# - Key = hash kanonik input prompt + parameter model (make_cache_key)
+# - Call-nya jalan di task terpisah, bukan di task request leader, jadi kalau client
+#   leader disconnect, follower tetep dapet hasil
+# - Call baru di-cancel kalau SEMUA yang nunggu udah pergi (gak ada yang butuh hasilnya)
+
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from app.services.metrics import metrics
+
+
+LLM_SINGLE_FLIGHT = os.getenv("LLM_SINGLE_FLIGHT", "1") != "0"  # 0 = matiin coalescing
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Flight:
+    """Satu call yang lagi jalan plus jumlah request yang nungguin."""
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class SingleFlight:
+    """
+    Coalescing call async identik yang lagi in-flight.
+
+    Gak nyimpen hasil setelah call selesai (itu tugas ResultCache); cuma nyatuin
+    request yang overlap waktunya.
+    """
+
+    def __init__(self, name: str, enabled: bool = LLM_SINGLE_FLIGHT):
+        self.name = name
+        self.enabled = enabled
+        self._flights: dict[str, _Flight] = {}
+
+        self.leaders = 0
+        self.collapsed = 0
+        self.detached = 0  # Waiter yang pergi duluan (client disconnect / timeout)
+        self.abandoned = 0  # Call yang di-cancel karena udah gak ada yang nunggu
+
+    def in_flight(self, key: str) -> bool:
+        flight = self._flights.get(key)
+        return flight is not None and not flight.task.done()
+
+    async def run(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Jalanin `call()` atau ikut nunggu call identik yang udah jalan.
+
+        Args:
+            key: Hash kanonik input + parameter model
+            call: Factory coroutine; cuma dipanggil kalau belum ada flight buat key ini
+
+        Returns:
+            Hasil call (sama persis buat leader dan semua follower)
+        """
+        if not self.enabled:
+            return await call()
+        flight = self._join(key)
+        if flight is None:
+            flight = self._start(key, call)
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done():
+                # Yang di-cancel request ini, bukan call-nya
+                self.detached += 1
+                metrics.increment(f"single_flight.{self.name}.detached")
+            raise
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                self._forget(key, flight)
+                self.abandoned += 1
+                metrics.increment(f"single_flight.{self.name}.abandoned")
+
+    # ----------------------------------------
+    # Internal
+    # ----------------------------------------
+
+    def _join(self, key: str) -> Optional[_Flight]:
+        flight = self._flights.get(key)
+        if flight is None or flight.task.cancelled():
+            return None
+        self.collapsed += 1
+        metrics.increment(f"single_flight.{self.name}.collapsed")
+        return flight
+
+    def _start(self, key: str, call: Callable[[], Awaitable[T]]) -> _Flight:
+        flight = _Flight(task=asyncio.ensure_future(call()))
+        self._flights[key] = flight
+        flight.task.add_done_callback(lambda _task: self._forget(key, flight))
+        self.leaders += 1
+        metrics.increment(f"single_flight.{self.name}.leaders")
+        return flight
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> dict:
+        total = self.leaders + self.collapsed
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "collapsed": self.collapsed,
+            "collapse_rate": round(self.collapsed / total, 4) if total else 0.0,
+            "detached": self.detached,
+            "abandoned": self.abandoned,
+        }
@@ -0,0 +1,504 @@
+# Data Academy - SQL Execution Service
+# Jalanin query SQL murid di SQLite in-memory yang di-clone dari fixture database yang udah di-cache
+#
+# Fixture dibangun SEKALI per dataset (CREATE + INSERT), lalu tiap run cukup di-clone pake
+# backup API SQLite (copy halaman memory, jauh lebih murah daripada re-insert semua row).
+# Hasil query murid dibandingin sama hasil reference solution (yang juga di-cache).
+#
+# Fixture inline + query bisa dateng dari body request, jadi semua koneksi dipasangin authorizer:
+# setup fixture cuma boleh DDL/DML ke database main (ATTACH / VACUUM INTO / PRAGMA ditolak),
+# query murid + reference cuma boleh SELECT. Build fixture dan query sama-sama dibatesin waktu
+# (progress handler) + ukuran (panjang string/blob/SQL, jumlah halaman, heap SQLite), dan build
+# jalan di luar lock cache (single-flight per fixture). Endpoint publik cuma boleh fixture bernama.
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Optional, Union
+
+from app.services.code_normalize import tokenize_sql
+from app.services.code_runner import ExecutionResult, TestCaseResult
+
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+DEFAULT_FIXTURES_DIR = Path(__file__).resolve().parents[3] / "content" / "fixtures"
+SQL_FIXTURES_DIR = Path(os.getenv("SQL_FIXTURES_DIR", str(DEFAULT_FIXTURES_DIR)))
+SQL_TIME_LIMIT_MS = float(os.getenv("SQL_TIME_LIMIT_MS", "2000"))
+SQL_MAX_ROWS = 10_000
+# Batas cache (LRU): fixture master (1 database in-memory per fixture) dan hasil reference query
+SQL_FIXTURE_CACHE_MAX = int(os.getenv("SQL_FIXTURE_CACHE_MAX", "64"))
+SQL_REFERENCE_CACHE_MAX = int(os.getenv("SQL_REFERENCE_CACHE_MAX", "1024"))
+# Batas build fixture: waktu, ukuran setup_sql, jumlah row `tables`, dan ukuran database
+SQL_FIXTURE_BUILD_TIME_LIMIT_MS = float(os.getenv("SQL_FIXTURE_BUILD_TIME_LIMIT_MS", "5000"))
+SQL_FIXTURE_MAX_SETUP_BYTES = int(os.getenv("SQL_FIXTURE_MAX_SETUP_BYTES", str(256 * 1024)))
+SQL_FIXTURE_MAX_ROWS = int(os.getenv("SQL_FIXTURE_MAX_ROWS", "50000"))
+SQL_FIXTURE_MAX_PAGES = int(os.getenv("SQL_FIXTURE_MAX_PAGES", "16384"))  # x 4 KB = 64 MB
+# Batas per koneksi: panjang string/blob hasil ekspresi dan panjang teks SQL
+SQL_MAX_VALUE_BYTES = int(os.getenv("SQL_MAX_VALUE_BYTES", str(1024 * 1024)))
+SQL_MAX_QUERY_BYTES = int(os.getenv("SQL_MAX_QUERY_BYTES", str(64 * 1024)))
+# Heap SQLite (satu proses, semua koneksi): query murid yang rakus memory gagal, API-nya gak ikut bengkak
+SQL_HEAP_LIMIT_MB = int(os.getenv("SQL_HEAP_LIMIT_MB", "512"))
+# Seberapa sering progress handler ngecek deadline (jumlah instruksi VM SQLite)
+PROGRESS_CHECK_OPS = 100
+
+# Nama fixture file: cuma huruf/angka/underscore/dash (gak bisa keluar dari fixtures_dir)
+FIXTURE_NAME_PATTERN = re.compile(r"^[\w-]+$")
+
+FixtureSpec = Union[str, dict]
+
+
+class SqlExecutionError(Exception):
+    """Fixture gak ketemu atau gak valid."""
+
+
+# ============================================
+# AUTHORIZER
+# ============================================
+
+# Action yang boleh pas bangun fixture (semua harus ke database "main")
+_SETUP_ACTIONS = frozenset({
+    sqlite3.SQLITE_CREATE_TABLE, sqlite3.SQLITE_CREATE_INDEX, sqlite3.SQLITE_CREATE_VIEW,
+    sqlite3.SQLITE_CREATE_TRIGGER, sqlite3.SQLITE_ALTER_TABLE, sqlite3.SQLITE_DROP_TABLE,
+    sqlite3.SQLITE_DROP_INDEX, sqlite3.SQLITE_DROP_VIEW, sqlite3.SQLITE_DROP_TRIGGER,
+    sqlite3.SQLITE_INSERT, sqlite3.SQLITE_UPDATE, sqlite3.SQLITE_DELETE, sqlite3.SQLITE_ANALYZE,
+    sqlite3.SQLITE_REINDEX,
+    sqlite3.SQLITE_READ, sqlite3.SQLITE_SELECT, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE,
+    sqlite3.SQLITE_TRANSACTION, sqlite3.SQLITE_SAVEPOINT,
+})
+# Query murid / reference: read-only
+_QUERY_ACTIONS = frozenset({
+    sqlite3.SQLITE_READ, sqlite3.SQLITE_SELECT, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE,
+})
+
+
+def _authorizer(allowed: frozenset[int]):
+    def authorize(action: int, arg1, arg2, database: Optional[str], trigger: Optional[str]) -> int:
+        if action not in allowed or database not in (None, "main"):
+            return sqlite3.SQLITE_DENY
+        return sqlite3.SQLITE_OK
+    return authorize
+
+
+_setup_authorizer = _authorizer(_SETUP_ACTIONS)
+_query_authorizer = _authorizer(_QUERY_ACTIONS)
+
+
+def _limit_connection(conn: sqlite3.Connection, max_sql_bytes: int) -> None:
+    """Batas ukuran per koneksi (fixture build + clone query)."""
+    conn.setlimit(sqlite3.SQLITE_LIMIT_LENGTH, SQL_MAX_VALUE_BYTES)
+    conn.setlimit(sqlite3.SQLITE_LIMIT_SQL_LENGTH, max_sql_bytes)
+
+
+class _deadline:
+    """Context manager: interrupt statement SQLite yang jalan lewat `time_limit_ms`."""
+
+    def __init__(self, conn: sqlite3.Connection, time_limit_ms: float, what: str):
+        self.conn = conn
+        self.time_limit_ms = time_limit_ms
+        self.what = what
+
+    def __enter__(self) -> "_deadline":
+        deadline = time.perf_counter() + self.time_limit_ms / 1000
+        self.conn.set_progress_handler(lambda: 1 if time.perf_counter() > deadline else 0, PROGRESS_CHECK_OPS)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.conn.set_progress_handler(None, 0)
+        if isinstance(exc, sqlite3.OperationalError) and "interrupted" in str(exc):
+            raise TimeoutError(f"{self.what} melebihi {self.time_limit_ms:g} ms") from exc
+        return False
+
+
+def _set_heap_limit(limit_mb: int) -> None:
+    if limit_mb <= 0:
+        return
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute(f"PRAGMA hard_heap_limit = {limit_mb * 1024 * 1024}")
+    finally:
+        conn.close()
+
+
+# ============================================
+# FIXTURE CACHE
+# ============================================
+
+def _build_fixture_db(spec: dict, time_limit_ms: float = SQL_FIXTURE_BUILD_TIME_LIMIT_MS) -> sqlite3.Connection:
+    """
+    Bangun database in-memory dari spec fixture.
+
+    Format spec:
+        {"setup_sql": "CREATE TABLE ...; INSERT ...;"}
+        atau
+        {"tables": {"orders": {"columns": ["id INTEGER PRIMARY KEY", "total REAL"],
+                               "rows": [[1, 10.5], [2, 99.0]]}},
+         "indexes": ["CREATE INDEX idx_orders_total ON orders(total)"]}
+    """
+    setup_sql = spec.get("setup_sql") or ""
+    if len(setup_sql.encode()) > SQL_FIXTURE_MAX_SETUP_BYTES:
+        raise SqlExecutionError(f"setup_sql fixture lebih dari {SQL_FIXTURE_MAX_SETUP_BYTES} byte")
+    tables = spec.get("tables") or {}
+    if sum(len(definition.get("rows") or []) for definition in tables.values()) > SQL_FIXTURE_MAX_ROWS:
+        raise SqlExecutionError(f"Fixture lebih dari {SQL_FIXTURE_MAX_ROWS} row")
+
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    try:
+        _limit_connection(conn, SQL_FIXTURE_MAX_SETUP_BYTES)
+        conn.execute(f"PRAGMA max_page_count = {SQL_FIXTURE_MAX_PAGES}")
+        conn.set_authorizer(_setup_authorizer)
+        with _deadline(conn, time_limit_ms, "build fixture"):
+            if setup_sql:
+                conn.executescript(setup_sql)
+            for table, definition in tables.items():
+                columns = definition["columns"]
+                conn.execute(f'CREATE TABLE "{table}" ({", ".join(columns)})')
+                rows = definition.get("rows") or []
+                if rows:
+                    placeholders = ", ".join("?" for _ in columns)
+                    conn.executemany(f'INSERT INTO "{table}" VALUES ({placeholders})', rows)
+            for statement in spec.get("indexes") or []:
+                conn.execute(statement)
+            conn.commit()
+    except BaseException:
+        conn.close()
+        raise
+    return conn
+
+
+class FixtureCache:
+    """
+    Cache database fixture (master) + hasil reference query per fixture, dua-duanya LRU.
+
+    `_lock` cuma dipegang buat operasi singkat (lookup, backup clone). Build fixture jalan
+    di luar lock; request lain buat fixture yang sama nunggu build yang lagi jalan (single-flight).
+    """
+
+    def __init__(
+        self,
+        fixtures_dir: Path = SQL_FIXTURES_DIR,
+        max_fixtures: int = SQL_FIXTURE_CACHE_MAX,
+        max_references: int = SQL_REFERENCE_CACHE_MAX,
+    ):
+        self.fixtures_dir = fixtures_dir
+        self.max_fixtures = max_fixtures
+        self.max_references = max_references
+        self._masters: OrderedDict[str, sqlite3.Connection] = OrderedDict()
+        self._reference_results: OrderedDict[tuple[str, str], tuple[list[str], list[tuple]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._building: dict[str, Future] = {}
+        self.builds = 0
+        self.clones = 0
+        self.evictions = 0
+
+    def _resolve(self, fixture: FixtureSpec, allow_inline: bool = True) -> tuple[str, Optional[Path]]:
+        """
+        Return (cache key, path file). Fixture bisa nama file di fixtures_dir atau spec inline.
+        Key file fixture ikut mtime, jadi kalau file-nya diedit, fixture dibangun ulang.
+        """
+        if isinstance(fixture, dict):
+            if not allow_inline:
+                raise SqlExecutionError("Fixture inline cuma boleh dari kurikulum, pake nama fixture")
+            payload = json.dumps(fixture, sort_keys=True)
+            return "inline:" + hashlib.sha256(payload.encode()).hexdigest(), None
+        if not isinstance(fixture, str) or not FIXTURE_NAME_PATTERN.match(fixture):
+            raise SqlExecutionError(f"Nama fixture tidak valid: {fixture!r}")
+        path = self.fixtures_dir / f"{fixture}.json"
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            raise SqlExecutionError(f"Fixture '{fixture}' tidak ditemukan") from None
+        return f"file:{fixture}:{mtime}", path
+
+    def _master(self, key: str, path: Optional[Path], fixture: FixtureSpec) -> None:
+        """Pastiin master fixture `key` ada di cache (bangun di luar lock kalau belum ada)."""
+        while True:
+            with self._lock:
+                if key in self._masters:
+                    return
+                pending = self._building.get(key)
+                if pending is None:
+                    pending = self._building[key] = Future()
+                    owner = True
+                else:
+                    owner = False
+            if not owner:
+                # Build yang sama lagi jalan di thread lain: tunggu, lalu cek cache lagi
+                pending.result()
+                continue
+            try:
+                master = self._build(path, fixture)
+            except BaseException as exc:
+                with self._lock:
+                    del self._building[key]
+                pending.set_exception(exc)
+                raise
+            with self._lock:
+                del self._building[key]
+                self._masters[key] = master
+                self.builds += 1
+                while len(self._masters) > self.max_fixtures:
+                    _, evicted = self._masters.popitem(last=False)
+                    evicted.close()
+                    self.evictions += 1
+            pending.set_result(None)
+            return
+
+    @staticmethod
+    def _build(path: Optional[Path], fixture: FixtureSpec) -> sqlite3.Connection:
+        try:
+            spec = fixture if path is None else json.loads(path.read_text(encoding="utf-8"))
+            return _build_fixture_db(spec)
+        except TimeoutError as exc:
+            raise SqlExecutionError(str(exc)) from exc
+        except (sqlite3.Error, MemoryError, ValueError, KeyError, TypeError, AttributeError) as exc:
+            raise SqlExecutionError(f"Fixture tidak valid: {exc}") from exc
+
+    def clone(self, fixture: FixtureSpec, allow_inline: bool = True) -> tuple[str, sqlite3.Connection]:
+        """Clone fixture ke koneksi in-memory baru (murah, via backup API)."""
+        key, path = self._resolve(fixture, allow_inline)
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        try:
+            while True:
+                self._master(key, path, fixture)
+                with self._lock:
+                    # Backup di dalam lock: master gak bisa ke-evict (ditutup) di tengah jalan
+                    master = self._masters.get(key)
+                    if master is None:
+                        continue  # Ke-evict barusan, bangun lagi
+                    self._masters.move_to_end(key)
+                    master.backup(conn)
+                    self.clones += 1
+                break
+            _limit_connection(conn, SQL_MAX_QUERY_BYTES)
+            conn.execute("PRAGMA query_only = ON")
+            conn.set_authorizer(_query_authorizer)
+        except BaseException:
+            conn.close()
+            raise
+        return key, conn
+
+    def reference_result(
+        self,
+        fixture: FixtureSpec,
+        reference_sql: str,
+        time_limit_ms: float,
+        allow_inline: bool = True,
+    ) -> tuple[list[str], list[tuple]]:
+        """Hasil reference solution (di-cache per fixture + query)."""
+        fixture_key, _ = self._resolve(fixture, allow_inline)
+        cache_key = (fixture_key, " ".join(tokenize_sql(reference_sql)))
+        with self._lock:
+            cached = self._reference_results.get(cache_key)
+            if cached is not None:
+                self._reference_results.move_to_end(cache_key)
+                return cached
+        _, conn = self.clone(fixture, allow_inline)
+        try:
+            columns, rows, _ = _run_query(conn, reference_sql, time_limit_ms)
+        except (sqlite3.Error, MemoryError, TimeoutError) as exc:
+            raise SqlExecutionError(f"Reference query gagal dijalankan: {exc}") from exc
+        finally:
+            conn.close()
+        with self._lock:
+            self._reference_results[cache_key] = (columns, rows)
+            while len(self._reference_results) > self.max_references:
+                self._reference_results.popitem(last=False)
+        return columns, rows
+
+    def stats(self) -> dict:
+        return {
+            "fixtures_cached": len(self._masters),
+            "reference_results_cached": len(self._reference_results),
+            "builds": self.builds,
+            "clones": self.clones,
+            "evictions": self.evictions,
+        }
+
+
+# ============================================
+# QUERY EXECUTION
+# ============================================
+
+def _run_query(
+    conn: sqlite3.Connection,
+    sql: str,
+    time_limit_ms: float,
+) -> tuple[list[str], list[tuple], float]:
+    """Jalanin satu statement dengan time limit. Return (columns, rows, waktu ms)."""
+    start = time.perf_counter()
+    with _deadline(conn, time_limit_ms, "query"):
+        cursor = conn.execute(sql.strip().rstrip(";"))
+        rows = cursor.fetchmany(SQL_MAX_ROWS + 1)
+        columns = [d[0] for d in cursor.description or []]
+    return columns, rows, (time.perf_counter() - start) * 1000
+
+
+def _query_plan(conn: sqlite3.Connection, sql: str) -> list[str]:
+    try:
+        return [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql.strip().rstrip(";"))]
+    except sqlite3.Error:
+        return []
+
+
+def _normalize_row(row: tuple) -> tuple:
+    return tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+
+
+def _is_ordered(sql: str) -> bool:
+    tokens = tokenize_sql(sql)
+    return any(a == "order" and b == "by" for a, b in zip(tokens, tokens[1:]))
+
+
+def compare_result_sets(
+    actual: list[tuple],
+    expected: list[tuple],
+    ordered: bool,
+) -> Optional[str]:
+    """Bandingin dua result set. Return None kalau sama, atau alasan bedanya."""
+    if len(actual) > SQL_MAX_ROWS:
+        return f"Hasil lebih dari {SQL_MAX_ROWS} baris"
+    actual_rows = [_normalize_row(r) for r in actual]
+    expected_rows = [_normalize_row(r) for r in expected]
+    if actual_rows and expected_rows and len(actual_rows[0]) != len(expected_rows[0]):
+        return f"Jumlah kolom beda: {len(actual_rows[0])} vs expected {len(expected_rows[0])}"
+    if len(actual_rows) != len(expected_rows):
+        return f"Jumlah baris beda: {len(actual_rows)} vs expected {len(expected_rows)}"
+    if not ordered:
+        actual_rows = sorted(actual_rows, key=repr)
+        expected_rows = sorted(expected_rows, key=repr)
+    for index, (a, e) in enumerate(zip(actual_rows, expected_rows)):
+        if a != e:
+            return f"Baris {index + 1} beda: {a!r} vs expected {e!r}"
+    return None
+
+
+def _run_case(
+    fixtures: FixtureCache,
+    student_sql: str,
+    case: dict,
+    index: int,
+    time_limit_ms: float,
+    allow_inline: bool = True,
+) -> TestCaseResult:
+    """Jalanin query murid buat satu test case (satu fixture)."""
+    fixture = case.get("fixture")
+    if fixture is None:
+        raise SqlExecutionError("Test case SQL harus punya 'fixture'")
+
+    if "expected_rows" in case:
+        expected_rows = [tuple(row) for row in case["expected_rows"]]
+        ordered = bool(case.get("ordered", False))
+    else:
+        reference_sql = case.get("reference_sql") or case.get("solution_sql")
+        if not reference_sql:
+            raise SqlExecutionError("Test case SQL harus punya 'reference_sql' atau 'expected_rows'")
+        _, expected_rows = fixtures.reference_result(fixture, reference_sql, time_limit_ms, allow_inline)
+        ordered = case.get("ordered", _is_ordered(reference_sql))
+
+    _, conn = fixtures.clone(fixture, allow_inline)
+    start = time.perf_counter()
+    try:
+        columns, rows, elapsed_ms = _run_query(conn, student_sql, time_limit_ms)
+        plan = _query_plan(conn, student_sql)
+        mismatch = compare_result_sets(rows, expected_rows, ordered)
+        result = TestCaseResult(
+            index=index,
+            passed=mismatch is None,
+            expected=f"{len(expected_rows)} baris",
+            actual=f"{len(rows)} baris ({', '.join(columns)})",
+            error=mismatch,
+            time_ms=round(elapsed_ms, 3),
+            query_plan=plan,
+        )
+    except (sqlite3.Error, MemoryError, TimeoutError) as exc:
+        result = TestCaseResult(
+            index=index,
+            passed=False,
+            expected=f"{len(expected_rows)} baris",
+            error=f"{type(exc).__name__}: {exc}",
+            time_ms=round((time.perf_counter() - start) * 1000, 3),
+        )
+    finally:
+        conn.close()
+    return result
+
+
+def execute_sql_tests(
+    student_sql: str,
+    test_cases: list[dict],
+    time_limit_ms: float = SQL_TIME_LIMIT_MS,
+    fixtures: Optional[FixtureCache] = None,
+    allow_inline: bool = True,
+) -> ExecutionResult:
+    """Versi sync: jalanin query murid terhadap semua test case SQL."""
+    fixtures = fixtures or fixture_cache
+    start = time.perf_counter()
+
+    if not student_sql.strip():
+        return ExecutionResult(total=len(test_cases), error="SyntaxError: query kosong")
+    if not sqlite3.complete_statement(student_sql.strip().rstrip(";") + ";"):
+        error = "SyntaxError: query belum lengkap"
+        return ExecutionResult(
+            total=len(test_cases),
+            cases=[TestCaseResult(index=i, passed=False, error=error) for i in range(len(test_cases))],
+            error=error,
+        )
+
+    cases = []
+    error = None
+    for index, case in enumerate(test_cases):
+        try:
+            result = _run_case(fixtures, student_sql, case, index, time_limit_ms, allow_inline)
+        except SqlExecutionError as exc:
+            result = TestCaseResult(index=index, passed=False, error=f"FixtureError: {exc}")
+        if result.error and "syntax error" in result.error:
+            error = f"SyntaxError: {result.error.split(': ', 1)[-1]}"
+        cases.append(result)
+
+    return ExecutionResult(
+        passed=sum(1 for c in cases if c.passed),
+        total=len(cases),
+        cases=cases,
+        error=error,
+        execution_time_ms=int(round((time.perf_counter() - start) * 1000)),
+        timed_out=any(c.error and c.error.startswith("TimeoutError") for c in cases),
+    )
+
+
+# Cache global yang dipake router/grading
+fixture_cache = FixtureCache()
+_set_heap_limit(SQL_HEAP_LIMIT_MB)
+
+
+async def run_sql_tests(
+    student_sql: str,
+    test_cases: list[dict],
+    time_limit_ms: float = SQL_TIME_LIMIT_MS,
+    allow_inline: bool = True,
+) -> ExecutionResult:
+    """
+    Jalanin query SQL murid terhadap fixture database (di thread, biar event loop gak ke-block).
+    `allow_inline=False` buat test case yang dateng dari body request publik: cuma fixture bernama.
+
+    Format test case:
+        {"fixture": "ecommerce_basic", "reference_sql": "SELECT ..."}
+        {"fixture": "ecommerce_basic", "expected_rows": [[1, "Budi"]], "ordered": false}
+        {"fixture": {"tables": {...}}, "reference_sql": "..."}   # fixture inline
+
+    Returns:
+        ExecutionResult dengan pass/fail, waktu (ms) dan query plan per case
+    """
+    return await asyncio.to_thread(
+        execute_sql_tests, student_sql, test_cases, time_limit_ms, allow_inline=allow_inline
+    )
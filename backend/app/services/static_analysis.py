@@ -0,0 +1,544 @@
+# Data Academy - Static Analysis Pre-Scorer
+# Skor efficiency (0-25) dan style (0-15) dihitung lokal dari AST Python / token SQL dalam
+# hitungan mikrodetik, jadi LLM grading cukup nilai correctness + business insight
+#
+# - Python: anti-pattern pandas (iterrows, append/concat di loop, .loc per baris, loop bersarang),
+#   lint dari quick_check, plus metric kompleksitas/keterbacaan (cyclomatic, nesting, panjang fungsi)
+# - SQL: SELECT *, correlated subquery, cross join / join tanpa filter, fungsi di kolom WHERE,
+#   konsistensi huruf keyword, aggregate tanpa alias
+# - Tiap rule punya penalti per kejadian dan batas maksimum, skor = maks - total penalti
+# - Skor mentah ini mulai dari penuh, jadi waktu grading diskalain ke correctness (`scaled`):
+#   code yang gak nyelesaiin soal (`pass`, `SELECT 1`) gak dapet poin efficiency/style gratis
+
+import ast
+import re
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from app.services.code_normalize import CodeLanguage, tokenize_sql
+from app.services.quick_check import python_lint
+
+
+EFFICIENCY_MAX = 25
+STYLE_MAX = 15
+
+MAX_LINE_LENGTH = 100
+MAX_COMPLEXITY = 10  # Cyclomatic complexity per fungsi
+MAX_NESTING = 4
+MAX_FUNCTION_LINES = 50
+SHORT_NAMES_OK = {"i", "j", "k", "n", "x", "y", "_", "e", "f"}
+
+
+# ============================================
+# RULES
+# ============================================
+
+Criterion = Literal["efficiency", "style"]
+
+
+@dataclass(frozen=True)
+class Rule:
+    """Satu anti-pattern: kriteria yang kena, penalti per kejadian, batas penalti total."""
+    criterion: Criterion
+    penalty: int
+    cap: int
+    message: str
+
+
+RULES: dict[str, Rule] = {
+    # Python - efficiency
+    "iterrows": Rule("efficiency", 6, 10, "`iterrows()` lambat banget, pakai operasi vectorized (kolom langsung, groupby, merge)"),
+    "itertuples": Rule("efficiency", 3, 6, "Loop `itertuples()` per baris, cek apa bisa diganti operasi vectorized"),
+    "apply-axis1": Rule("efficiency", 3, 6, "`apply(axis=1)` jalan per baris, coba operasi antar kolom yang vectorized"),
+    "nested-loop": Rule("efficiency", 4, 8, "Loop bersarang (O(n²)), coba pakai dict/set lookup, merge, atau groupby"),
+    "frame-append-in-loop": Rule(
+        "efficiency", 6, 6,
+        "DataFrame di-append/concat di dalam loop (di-copy ulang tiap iterasi), kumpulin di list lalu concat sekali",
+    ),
+    "loc-in-loop": Rule("efficiency", 4, 8, "`.loc/.iloc/.at` per baris di dalam loop, pakai operasi satu kolom sekaligus"),
+    "append-in-loop": Rule("efficiency", 1, 2, "Loop yang isinya cuma `.append(...)` bisa diganti list comprehension"),
+    # Python - style
+    "range-len": Rule("style", 1, 2, "`range(len(x))`: iterasi langsung ke elemennya atau pakai enumerate"),
+    "short-name": Rule("style", 1, 3, "Nama `{name}` kurang deskriptif"),
+    "naming": Rule("style", 1, 2, "Nama `{name}` sebaiknya snake_case"),
+    "long-line": Rule("style", 1, 2, "Baris lebih dari {limit} karakter, pecah biar gampang dibaca"),
+    "complexity": Rule("style", 2, 4, "Fungsi `{name}` terlalu kompleks (cyclomatic {value}), pecah jadi fungsi kecil"),
+    "deep-nesting": Rule("style", 2, 2, "Nesting sampai {value} level, pakai early return / pecah fungsi"),
+    "long-function": Rule("style", 1, 2, "Fungsi `{name}` panjangnya {value} baris, pecah jadi beberapa fungsi"),
+    "bare-except": Rule("style", 2, 2, "Hindari `except:` kosong, tangkap exception yang spesifik"),
+    "compare-to-none": Rule("style", 1, 2, "Pakai `is None` / `is not None` buat bandingin dengan None"),
+    "mutable-default": Rule("style", 2, 2, "Default argument mutable, pakai None lalu isi di dalam fungsi"),
+    "wildcard-import": Rule("style", 2, 2, "Hindari `import *`, import nama yang dipake aja"),
+    "unused-import": Rule("style", 1, 2, "Ada import yang gak dipake"),
+    # SQL - efficiency
+    "select-star": Rule("efficiency", 3, 3, "Hindari SELECT *, ambil kolom yang dibutuhin aja"),
+    "correlated-subquery": Rule(
+        "efficiency", 6, 8, "Subquery korelasi (jalan ulang per baris), ganti pakai JOIN + GROUP BY atau window function",
+    ),
+    "cartesian-join": Rule("efficiency", 8, 8, "Join tanpa kondisi = cross join, semua kombinasi baris ikut diproses"),
+    "join-without-filter": Rule("efficiency", 3, 3, "Beberapa JOIN tanpa WHERE/LIMIT, semua baris tabel besar ikut di-join"),
+    "non-sargable": Rule("efficiency", 2, 4, "Fungsi `{name}()` di kolom dalam WHERE bikin index gak kepake"),
+    # SQL - style
+    "implicit-join": Rule("style", 2, 2, "Pakai JOIN ... ON eksplisit, jangan FROM a, b"),
+    "keyword-case": Rule("style", 1, 1, "Huruf keyword SQL campur (SELECT vs select), pilih satu gaya"),
+    "unaliased-aggregate": Rule("style", 1, 2, "Kasih alias (AS ...) buat kolom hasil `{name}()`"),
+}
+
+
+# ============================================
+# RESULT MODELS
+# ============================================
+
+class StaticFinding(BaseModel):
+    """Satu temuan analisis statis"""
+    line: int
+    code: str
+    criterion: Criterion
+    message: str
+    penalty: int
+
+
+class StaticAnalysis(BaseModel):
+    """Skor efficiency + style dari analisis statis"""
+    language: CodeLanguage
+    efficiency: int = Field(ge=0, le=EFFICIENCY_MAX)
+    style: int = Field(ge=0, le=STYLE_MAX)
+    findings: list[StaticFinding] = Field(default_factory=list)
+    metrics: dict[str, float] = Field(default_factory=dict)
+    elapsed_ms: float = 0.0
+
+    def scaled(self, correctness: int, correctness_max: int) -> tuple[int, int]:
+        """(efficiency, style) dikali rasio correctness: 0 kalau code-nya gak bener sama sekali."""
+        ratio = min(max(correctness / correctness_max, 0.0), 1.0) if correctness_max else 0.0
+        return round(self.efficiency * ratio), round(self.style * ratio)
+
+    def improvements(self, limit: int = 3) -> list[str]:
+        """Pesan temuan dengan penalti terbesar (satu per rule) buat ditambahin ke feedback."""
+        seen: set[str] = set()
+        messages = []
+        for finding in sorted(self.findings, key=lambda f: -f.penalty):
+            if finding.code not in seen:
+                seen.add(finding.code)
+                messages.append(finding.message)
+        return messages[:limit]
+
+
+class _Findings:
+    """Kumpulin temuan + hitung penalti dengan batas per rule."""
+
+    def __init__(self):
+        self.items: list[StaticFinding] = []
+        self._spent: dict[str, int] = {}
+
+    def add(self, code: str, line: int, **details) -> None:
+        rule = RULES[code]
+        spent = self._spent.get(code, 0)
+        penalty = min(rule.penalty, rule.cap - spent)
+        if penalty <= 0:
+            return  # Udah mentok batas rule ini
+        self._spent[code] = spent + penalty
+        self.items.append(StaticFinding(
+            line=line, code=code, criterion=rule.criterion, message=rule.message.format(**details), penalty=penalty,
+        ))
+
+    def score(self, criterion: Criterion, maximum: int) -> int:
+        return max(0, maximum - sum(f.penalty for f in self.items if f.criterion == criterion))
+
+
+def _long_lines(code: str, findings: _Findings) -> None:
+    for number, line in enumerate(code.splitlines(), start=1):
+        if len(line) > MAX_LINE_LENGTH:
+            findings.add("long-line", number, limit=MAX_LINE_LENGTH)
+
+
+# ============================================
+# PYTHON
+# ============================================
+
+_SNAKE_CASE_RE = re.compile(r"^_{0,2}[a-z][a-z0-9_]*$")
+_ROW_ACCESSORS = {"loc", "iloc", "at", "iat"}
+_BRANCH_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.IfExp, ast.ExceptHandler)
+
+
+def _call_attr(node: ast.AST) -> Optional[str]:
+    """Nama method kalau node-nya `<sesuatu>.method(...)`."""
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+        return node.func.attr
+    return None
+
+
+def _complexity(function: ast.AST) -> int:
+    complexity = 1
+    for node in ast.walk(function):
+        if isinstance(node, _BRANCH_NODES):
+            complexity += 1
+        elif isinstance(node, ast.BoolOp):
+            complexity += len(node.values) - 1
+        elif isinstance(node, ast.comprehension):
+            complexity += 1 + len(node.ifs)
+    return complexity
+
+
+class _PythonAnalyzer(ast.NodeVisitor):
+    """Satu kali jalan di AST: deteksi anti-pattern + kumpulin metric."""
+
+    def __init__(self, findings: _Findings):
+        self.findings = findings
+        self.loop_depth = 0
+        self.nesting = 0
+        self.max_nesting = 0
+        self.max_complexity = 0
+        self.functions = 0
+        self.loops = 0
+        self.names: set[str] = set()
+        self._flagged_short: set[str] = set()
+
+    def _loop(self, node: ast.AST) -> None:
+        self.loops += 1
+        if self.loop_depth >= 1:
+            self.findings.add("nested-loop", node.lineno)
+        iterator = getattr(node, "iter", None)
+        method = _call_attr(iterator) if iterator is not None else None
+        if method in ("iterrows", "itertuples"):
+            self.findings.add(method, node.lineno)
+        if (
+            isinstance(iterator, ast.Call)
+            and isinstance(iterator.func, ast.Name)
+            and iterator.func.id == "range"
+            and len(iterator.args) == 1
+            and isinstance(iterator.args[0], ast.Call)
+            and isinstance(iterator.args[0].func, ast.Name)
+            and iterator.args[0].func.id == "len"
+        ):
+            self.findings.add("range-len", node.lineno)
+        body = node.body
+        if len(body) == 1 and isinstance(body[0], ast.Expr) and _call_attr(body[0].value) == "append":
+            self.findings.add("append-in-loop", node.lineno)
+        if self.loop_depth == 0:
+            self._scan_loop_body(node)  # Loop terluar udah nyakup loop di dalemnya
+
+        self.loop_depth += 1
+        self._nested(node)
+        self.loop_depth -= 1
+
+    def _scan_loop_body(self, loop: ast.AST) -> None:
+        """Append/concat DataFrame dan akses .loc per baris di body loop (sekali per loop terluar)."""
+        frame_append = row_access = False
+        for statement in loop.body:
+            for node in ast.walk(statement):
+                if isinstance(node, ast.Assign) and _call_attr(node.value) == "append":
+                    frame_append = True  # df = df.append(...) → cuma DataFrame yang return object baru
+                elif _call_attr(node) == "concat":
+                    frame_append = True
+                elif isinstance(node, ast.Attribute) and node.attr in _ROW_ACCESSORS:
+                    row_access = True
+        if frame_append:
+            self.findings.add("frame-append-in-loop", loop.lineno)
+        if row_access:
+            self.findings.add("loc-in-loop", loop.lineno)
+
+    def _nested(self, node: ast.AST) -> None:
+        self.nesting += 1
+        self.max_nesting = max(self.max_nesting, self.nesting)
+        self.generic_visit(node)
+        self.nesting -= 1
+
+    def visit_For(self, node: ast.For) -> None:
+        self._loop(node)
+
+    visit_AsyncFor = visit_For
+
+    def visit_While(self, node: ast.While) -> None:
+        self._loop(node)
+
+    def visit_If(self, node: ast.If) -> None:
+        self._nested(node)
+
+    visit_With = visit_AsyncWith = visit_Try = visit_If
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self.functions += 1
+        if not _SNAKE_CASE_RE.match(node.name):
+            self.findings.add("naming", node.lineno, name=node.name)
+        complexity = _complexity(node)
+        self.max_complexity = max(self.max_complexity, complexity)
+        if complexity > MAX_COMPLEXITY:
+            self.findings.add("complexity", node.lineno, name=node.name, value=complexity)
+        length = (node.end_lineno or node.lineno) - node.lineno + 1
+        if length > MAX_FUNCTION_LINES:
+            self.findings.add("long-function", node.lineno, name=node.name, value=length)
+        for arg in node.args.args + node.args.kwonlyargs:
+            self._name(arg.arg, arg.lineno)
+        # Nesting dihitung per fungsi
+        outer = self.nesting
+        self.nesting = 0
+        self.generic_visit(node)
+        self.nesting = outer
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Call(self, node: ast.Call) -> None:
+        if _call_attr(node) == "apply":
+            for keyword in node.keywords:
+                if keyword.arg == "axis" and isinstance(keyword.value, ast.Constant) and keyword.value.value in (1, "columns"):
+                    self.findings.add("apply-axis1", node.lineno)
+        self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Store):
+            self._name(node.id, node.lineno)
+
+    def _name(self, name: str, line: int) -> None:
+        self.names.add(name)
+        if len(name) == 1 and name not in SHORT_NAMES_OK and name not in self._flagged_short:
+            self._flagged_short.add(name)
+            self.findings.add("short-name", line, name=name)
+
+
+def _analyze_python(code: str) -> Optional[tuple[_Findings, dict[str, float]]]:
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+    findings = _Findings()
+    analyzer = _PythonAnalyzer(findings)
+    analyzer.visit(tree)
+    for issue in python_lint(tree):
+        if issue.code in RULES:
+            findings.add(issue.code, issue.line)
+    _long_lines(code, findings)
+
+    lines = code.splitlines()
+    code_lines = [line for line in lines if line.strip()]
+    comments = sum(1 for line in code_lines if line.lstrip().startswith("#"))
+    metrics = {
+        "lines": len(code_lines),
+        "functions": analyzer.functions,
+        "loops": analyzer.loops,
+        "max_complexity": analyzer.max_complexity or _complexity(tree),
+        "max_nesting": analyzer.max_nesting,
+        "avg_name_length": round(sum(map(len, analyzer.names)) / len(analyzer.names), 2) if analyzer.names else 0.0,
+        "comment_ratio": round(comments / len(code_lines), 3) if code_lines else 0.0,
+    }
+    if analyzer.max_nesting > MAX_NESTING:
+        findings.add("deep-nesting", 1, value=analyzer.max_nesting)
+    return findings, metrics
+
+
+# ============================================
+# SQL
+# ============================================
+
+_SQL_KEYWORDS = {
+    "select", "from", "where", "join", "inner", "left", "right", "full", "outer", "cross", "on", "using",
+    "group", "order", "by", "having", "limit", "offset", "union", "all", "as", "and", "or", "not", "in",
+    "exists", "case", "when", "then", "else", "end", "distinct", "with", "natural", "is", "null", "like",
+    "between", "asc", "desc", "over", "partition",
+}
+_SQL_CASE_RE = re.compile(r"\b(select|from|where|join|group|order|by|having|limit|and|or|on|as)\b", re.IGNORECASE)
+_SQL_AGGREGATES = {"sum", "avg", "count", "min", "max", "total", "group_concat"}
+_SQL_NON_SARGABLE = {"lower", "upper", "date", "datetime", "strftime", "substr", "substring", "trim", "cast", "year", "month", "coalesce", "round"}
+_SQL_CLAUSES = {"select", "from", "where", "group", "order", "having", "limit", "on", "union"}
+
+
+def _sql_line(code: str, word: str, occurrence: int = 0) -> int:
+    """Baris kemunculan ke-`occurrence` sebuah kata di code (case-insensitive), default 1."""
+    matches = list(re.finditer(rf"(?<![\w.]){re.escape(word)}\b", code, re.IGNORECASE))
+    if not matches:
+        return 1
+    match = matches[min(occurrence, len(matches) - 1)]
+    return code.count("\n", 0, match.start()) + 1
+
+
+@dataclass
+class _SqlScope:
+    """Satu SELECT (query utama atau subquery)."""
+    depth: int
+    parent: Optional[int]
+    clause: str = "select"
+    defined: set[str] = field(default_factory=set)
+    referenced: set[str] = field(default_factory=set)
+    joins: int = 0
+    join_conditions: int = 0
+    comma_tables: int = 0
+    has_where: bool = False
+    has_limit: bool = False
+    has_group: bool = False
+
+
+def _analyze_sql(code: str) -> tuple[_Findings, dict[str, float]]:
+    findings = _Findings()
+    tokens = tokenize_sql(code)
+    scopes: list[_SqlScope] = []
+    stack: list[int] = []  # Index scope yang lagi kebuka
+    depth = 0
+    expect_table = False
+    pending_alias = False  # Abis nama tabel / derived table: kata berikutnya bisa alias
+    occurrences: dict[str, int] = {}
+
+    def current() -> Optional[_SqlScope]:
+        return scopes[stack[-1]] if stack else None
+
+    for i, token in enumerate(tokens):
+        occurrence = occurrences.get(token, 0)
+        occurrences[token] = occurrence + 1
+        scope = current()
+
+        if token == "(":
+            depth += 1
+            expect_table = pending_alias = False
+            continue
+        if token == ")":
+            depth -= 1
+            closed = False
+            while stack and scopes[stack[-1]].depth > depth:
+                stack.pop()
+                closed = True
+            scope = current()
+            # `FROM (SELECT ...) alias`
+            pending_alias = closed and scope is not None and scope.clause == "from"
+            continue
+
+        if token == "select":
+            if scope is not None and scope.depth == depth:
+                stack.pop()  # UNION: SELECT baru di level yang sama
+            scopes.append(_SqlScope(depth=depth, parent=stack[-1] if stack else None))
+            stack.append(len(scopes) - 1)
+            scope = current()
+            following = tokens[i + 2] if i + 2 < len(tokens) and tokens[i + 1] == "distinct" else tokens[i + 1] if i + 1 < len(tokens) else ""
+            if following == "*":
+                findings.add("select-star", _sql_line(code, "select", occurrence))
+            continue
+        if scope is None:
+            continue
+
+        if token in _SQL_CLAUSES:
+            scope.clause = token
+            scope.has_where |= token == "where"
+            scope.has_limit |= token == "limit"
+            scope.has_group |= token == "group"
+        if token in ("from", "join"):
+            scope.clause = "from"
+            expect_table = True
+            pending_alias = False
+            if token == "join":
+                scope.joins += 1
+            continue
+        if token in ("on", "using"):
+            scope.join_conditions += 1
+            expect_table = pending_alias = False
+            continue
+        if token == "," and scope.clause == "from" and depth == scope.depth:
+            scope.comma_tables += 1
+            expect_table = True
+            pending_alias = False
+            continue
+
+        is_word = token[:1].isalpha() or token[:1] == "_"
+        if expect_table and is_word and token not in _SQL_KEYWORDS:
+            scope.defined.add(token)
+            expect_table = False
+            pending_alias = True
+            continue
+        if pending_alias and is_word:
+            if token == "as":
+                continue
+            if token not in _SQL_KEYWORDS:
+                scope.defined.add(token)
+            pending_alias = False
+            continue
+        pending_alias = False
+
+        next_token = tokens[i + 1] if i + 1 < len(tokens) else ""
+        if is_word and next_token == ".":
+            scope.referenced.add(token)
+        elif is_word and next_token == "(":
+            if scope.clause == "where" and token in _SQL_NON_SARGABLE:
+                findings.add("non-sargable", _sql_line(code, token, occurrence), name=token)
+            if scope.clause == "select" and token in _SQL_AGGREGATES and not _sql_aliased(tokens, i + 1):
+                findings.add("unaliased-aggregate", _sql_line(code, token, occurrence), name=token)
+
+    for index, scope in enumerate(scopes):
+        if scope.parent is not None:
+            outer = set()
+            parent = scope.parent
+            while parent is not None:
+                outer |= scopes[parent].defined
+                parent = scopes[parent].parent
+            if any(name not in scope.defined and name in outer for name in scope.referenced):
+                findings.add("correlated-subquery", _sql_line(code, "select", index))
+        if scope.comma_tables:
+            findings.add("implicit-join", _sql_line(code, "from", index))
+        cross = scope.comma_tables + max(0, scope.joins - scope.join_conditions)
+        if cross and not scope.has_where:
+            findings.add("cartesian-join", _sql_line(code, "from", index))
+        elif scope.joins >= 2 and not (scope.has_where or scope.has_limit or scope.has_group):
+            findings.add("join-without-filter", _sql_line(code, "join"))
+
+    cases = {match.group().isupper() for match in _SQL_CASE_RE.finditer(code)}
+    if len(cases) > 1:
+        findings.add("keyword-case", 1)
+    _long_lines(code, findings)
+
+    metrics = {
+        "tokens": len(tokens),
+        "selects": len(scopes),
+        "subqueries": max(0, len(scopes) - 1),
+        "joins": sum(scope.joins for scope in scopes),
+        "lines": len([line for line in code.splitlines() if line.strip()]),
+    }
+    return findings, metrics
+
+
+def _sql_aliased(tokens: list[str], open_index: int) -> bool:
+    """Setelah `(` di index ini ketutup, ada alias (AS x / x) gak?"""
+    depth = 0
+    for index in range(open_index, len(tokens)):
+        if tokens[index] == "(":
+            depth += 1
+        elif tokens[index] == ")":
+            depth -= 1
+            if depth == 0:
+                following = tokens[index + 1] if index + 1 < len(tokens) else ""
+                return following == "as" or (following[:1].isalpha() and following not in _SQL_KEYWORDS)
+    return False
+
+
+# ============================================
+# ENTRY POINT
+# ============================================
+
+@lru_cache(maxsize=2048)
+def analyze_code(code: str, language: CodeLanguage) -> Optional[StaticAnalysis]:
+    """
+    Hitung skor efficiency dan style dari analisis statis.
+
+    Args:
+        code: Code murid
+        language: 'python' atau 'sql'
+
+    Returns:
+        StaticAnalysis, atau None kalau code Python-nya gak bisa di-parse
+        (grading balik ke penilaian LLM penuh)
+    """
+    start = time.perf_counter()
+    if language == "sql":
+        findings, metrics = _analyze_sql(code)
+    else:
+        analyzed = _analyze_python(code)
+        if analyzed is None:
+            return None
+        findings, metrics = analyzed
+    findings.items.sort(key=lambda f: (f.line, f.code))
+    return StaticAnalysis(
+        language=language,
+        efficiency=findings.score("efficiency", EFFICIENCY_MAX),
+        style=findings.score("style", STYLE_MAX),
+        findings=findings.items,
+        metrics=metrics,
+        elapsed_ms=round((time.perf_counter() - start) * 1000, 3),
+    )
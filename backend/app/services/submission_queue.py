@@ -0,0 +1,631 @@
+# Data Academy - Submission Job Queue
+# Grading async: submit langsung dapet job_id, grading jalan di worker pool in-process
+#
+# Lifecycle job ngikutin SubmissionStatus di Prisma: PENDING → GRADING → COMPLETED / FAILED.
+# Queue-nya pluggable (SUBMISSION_QUEUE_BACKEND):
+# - memory   : default, cepet, tapi job ilang kalau proses restart
+# - sqlite   : file lokal, bisa di-share antar uvicorn worker di satu mesin
+# - postgres : tabel di DATABASE_URL (asyncpg), buat multi-instance
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from enum import Enum
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from pydantic import BaseModel
+
+from app.services.metrics import metrics
+
+
+SUBMISSION_QUEUE_BACKEND = os.getenv("SUBMISSION_QUEUE_BACKEND", "memory")
+SUBMISSION_QUEUE_SQLITE_PATH = os.getenv("SUBMISSION_QUEUE_SQLITE_PATH", "submission_jobs.db")
+SUBMISSION_WORKERS = int(os.getenv("SUBMISSION_WORKERS", "4"))
+SUBMISSION_MAX_ATTEMPTS = int(os.getenv("SUBMISSION_MAX_ATTEMPTS", "2"))
+SUBMISSION_QUEUE_MAX_PENDING = int(os.getenv("SUBMISSION_QUEUE_MAX_PENDING", "10000"))
+SUBMISSION_JOB_TIMEOUT_S = float(os.getenv("SUBMISSION_JOB_TIMEOUT_S", "300"))
+SUBMISSION_JOB_TTL_SECONDS = float(os.getenv("SUBMISSION_JOB_TTL_SECONDS", "86400"))
+SUBMISSION_POLL_INTERVAL_S = 0.5
+SUBMISSION_CLAIM_BACKOFF_MAX_S = float(os.getenv("SUBMISSION_CLAIM_BACKOFF_MAX_S", "30"))
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# MODELS
+# ============================================
+
+class SubmissionStatus(str, Enum):
+    """Sama kayak enum SubmissionStatus di prisma/schema.prisma"""
+    PENDING = "PENDING"
+    GRADING = "GRADING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
+TERMINAL_STATUSES = (SubmissionStatus.COMPLETED, SubmissionStatus.FAILED)
+
+
+class SubmissionJob(BaseModel):
+    """Satu job grading di queue"""
+    job_id: str
+    status: SubmissionStatus = SubmissionStatus.PENDING
+    payload: dict
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: float
+    started_at: Optional[float] = None
+    completed_at: Optional[float] = None
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+
+class QueueFullError(Exception):
+    """Queue udah penuh (kebanyakan job PENDING), request harus ditolak dulu."""
+
+
+# ============================================
+# QUEUE BACKENDS
+# ============================================
+
+class JobQueue(ABC):
+    """Interface storage job. `claim` harus atomic: satu job PENDING cuma diambil satu worker."""
+
+    async def open(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    async def put(self, job: SubmissionJob) -> None:
+        ...
+
+    @abstractmethod
+    async def claim(self) -> Optional[SubmissionJob]:
+        """Ambil job PENDING paling lama, ubah jadi GRADING (attempts + 1)."""
+
+    @abstractmethod
+    async def save(self, job: SubmissionJob) -> None:
+        ...
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[SubmissionJob]:
+        ...
+
+    @abstractmethod
+    async def counts(self) -> dict[str, int]:
+        """Jumlah job per status."""
+
+    @abstractmethod
+    async def requeue_stale(self, started_before: float) -> int:
+        """Job GRADING yang kelamaan (worker-nya mati) dibalikin ke PENDING."""
+
+    @abstractmethod
+    async def purge(self, completed_before: float) -> int:
+        """Hapus job terminal yang udah lama selesai."""
+
+
+class InMemoryJobQueue(JobQueue):
+    """Queue di memory proses ini. Semua method dipanggil dari event loop yang sama."""
+
+    def __init__(self):
+        self._jobs: dict[str, SubmissionJob] = {}
+        self._pending: deque[str] = deque()
+
+    async def put(self, job: SubmissionJob) -> None:
+        self._jobs[job.job_id] = job.model_copy()
+        self._pending.append(job.job_id)
+
+    async def claim(self) -> Optional[SubmissionJob]:
+        while self._pending:
+            job = self._jobs.get(self._pending.popleft())
+            if job is None or job.status != SubmissionStatus.PENDING:
+                continue
+            job.status = SubmissionStatus.GRADING
+            job.started_at = time.time()
+            job.attempts += 1
+            return job.model_copy()
+        return None
+
+    async def save(self, job: SubmissionJob) -> None:
+        self._jobs[job.job_id] = job.model_copy()
+        if job.status == SubmissionStatus.PENDING:
+            self._pending.append(job.job_id)
+
+    async def get(self, job_id: str) -> Optional[SubmissionJob]:
+        job = self._jobs.get(job_id)
+        return job.model_copy() if job is not None else None
+
+    async def counts(self) -> dict[str, int]:
+        counts = {status.value: 0 for status in SubmissionStatus}
+        for job in self._jobs.values():
+            counts[job.status.value] += 1
+        return counts
+
+    async def requeue_stale(self, started_before: float) -> int:
+        stale = [
+            job for job in self._jobs.values()
+            if job.status == SubmissionStatus.GRADING and (job.started_at or 0) < started_before
+        ]
+        for job in stale:
+            job.status = SubmissionStatus.PENDING
+            self._pending.append(job.job_id)
+        return len(stale)
+
+    async def purge(self, completed_before: float) -> int:
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.is_terminal and (job.completed_at or 0) < completed_before
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        return len(expired)
+
+
+_JOB_COLUMNS = "job_id, status, payload, result, error, attempts, created_at, started_at, completed_at"
+
+
+def _job_from_row(row) -> SubmissionJob:
+    job_id, status, payload, result, error, attempts, created_at, started_at, completed_at = row
+    return SubmissionJob(
+        job_id=job_id,
+        status=SubmissionStatus(status),
+        payload=json.loads(payload),
+        result=json.loads(result) if result else None,
+        error=error,
+        attempts=attempts,
+        created_at=created_at,
+        started_at=started_at,
+        completed_at=completed_at,
+    )
+
+
+def _job_params(job: SubmissionJob) -> tuple:
+    return (
+        job.job_id,
+        job.status.value,
+        json.dumps(job.payload, ensure_ascii=False),
+        json.dumps(job.result, ensure_ascii=False) if job.result is not None else None,
+        job.error,
+        job.attempts,
+        job.created_at,
+        job.started_at,
+        job.completed_at,
+    )
+
+
+class SQLiteJobQueue(JobQueue):
+    """Queue di file SQLite (WAL), query-nya jalan di thread biar gak nge-block event loop."""
+
+    def __init__(self, path: str = SUBMISSION_QUEUE_SQLITE_PATH):
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    async def open(self) -> None:
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS submission_jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                completed_at REAL
+            )
+            """
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_submission_jobs_status ON submission_jobs (status, created_at)"
+        )
+
+    async def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    async def _run(self, sql: str, params: tuple = (), fetch: str = "none") -> Any:
+        def run():
+            with self._lock:
+                cursor = self._db.execute(sql, params)
+                if fetch == "one":
+                    return cursor.fetchone()
+                if fetch == "all":
+                    return cursor.fetchall()
+                return cursor.rowcount
+        return await asyncio.to_thread(run)
+
+    async def put(self, job: SubmissionJob) -> None:
+        await self._run(
+            f"INSERT INTO submission_jobs ({_JOB_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            _job_params(job),
+        )
+
+    async def claim(self) -> Optional[SubmissionJob]:
+        row = await self._run(
+            f"""
+            UPDATE submission_jobs
+            SET status = 'GRADING', started_at = ?, attempts = attempts + 1
+            WHERE job_id = (
+                SELECT job_id FROM submission_jobs
+                WHERE status = 'PENDING' ORDER BY created_at LIMIT 1
+            )
+            RETURNING {_JOB_COLUMNS}
+            """,
+            (time.time(),),
+            fetch="one",
+        )
+        return _job_from_row(row) if row else None
+
+    async def save(self, job: SubmissionJob) -> None:
+        await self._run(
+            f"INSERT OR REPLACE INTO submission_jobs ({_JOB_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            _job_params(job),
+        )
+
+    async def get(self, job_id: str) -> Optional[SubmissionJob]:
+        row = await self._run(
+            f"SELECT {_JOB_COLUMNS} FROM submission_jobs WHERE job_id = ?", (job_id,), fetch="one"
+        )
+        return _job_from_row(row) if row else None
+
+    async def counts(self) -> dict[str, int]:
+        rows = await self._run(
+            "SELECT status, COUNT(*) FROM submission_jobs GROUP BY status", fetch="all"
+        )
+        counts = {status.value: 0 for status in SubmissionStatus}
+        counts.update(dict(rows))
+        return counts
+
+    async def requeue_stale(self, started_before: float) -> int:
+        return await self._run(
+            "UPDATE submission_jobs SET status = 'PENDING' WHERE status = 'GRADING' AND started_at < ?",
+            (started_before,),
+        )
+
+    async def purge(self, completed_before: float) -> int:
+        return await self._run(
+            "DELETE FROM submission_jobs WHERE status IN ('COMPLETED', 'FAILED') AND completed_at < ?",
+            (completed_before,),
+        )
+
+
+class PostgresJobQueue(JobQueue):
+    """Queue di Postgres (asyncpg). Claim pake FOR UPDATE SKIP LOCKED biar aman multi-instance."""
+
+    def __init__(self, dsn: Optional[str] = DATABASE_URL):
+        if not dsn:
+            raise ValueError("DATABASE_URL wajib diisi buat SUBMISSION_QUEUE_BACKEND=postgres")
+        self.dsn = dsn
+        self._pool = None
+
+    async def open(self) -> None:
+        import asyncpg
+
+        self._pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=5)
+        await self._pool.execute(
+            """
+            CREATE TABLE IF NOT EXISTS submission_jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at DOUBLE PRECISION NOT NULL,
+                started_at DOUBLE PRECISION,
+                completed_at DOUBLE PRECISION
+            )
+            """
+        )
+        await self._pool.execute(
+            "CREATE INDEX IF NOT EXISTS idx_submission_jobs_status ON submission_jobs (status, created_at)"
+        )
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def put(self, job: SubmissionJob) -> None:
+        await self._pool.execute(
+            f"INSERT INTO submission_jobs ({_JOB_COLUMNS}) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)",
+            *_job_params(job),
+        )
+
+    async def claim(self) -> Optional[SubmissionJob]:
+        row = await self._pool.fetchrow(
+            f"""
+            UPDATE submission_jobs
+            SET status = 'GRADING', started_at = $1, attempts = attempts + 1
+            WHERE job_id = (
+                SELECT job_id FROM submission_jobs
+                WHERE status = 'PENDING' ORDER BY created_at LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING {_JOB_COLUMNS}
+            """,
+            time.time(),
+        )
+        return _job_from_row(tuple(row)) if row else None
+
+    async def save(self, job: SubmissionJob) -> None:
+        await self._pool.execute(
+            f"""
+            INSERT INTO submission_jobs ({_JOB_COLUMNS}) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+            ON CONFLICT (job_id) DO UPDATE SET
+                status = EXCLUDED.status, result = EXCLUDED.result, error = EXCLUDED.error,
+                attempts = EXCLUDED.attempts, started_at = EXCLUDED.started_at,
+                completed_at = EXCLUDED.completed_at
+            """,
+            *_job_params(job),
+        )
+
+    async def get(self, job_id: str) -> Optional[SubmissionJob]:
+        row = await self._pool.fetchrow(
+            f"SELECT {_JOB_COLUMNS} FROM submission_jobs WHERE job_id = $1", job_id
+        )
+        return _job_from_row(tuple(row)) if row else None
+
+    async def counts(self) -> dict[str, int]:
+        rows = await self._pool.fetch("SELECT status, COUNT(*) FROM submission_jobs GROUP BY status")
+        counts = {status.value: 0 for status in SubmissionStatus}
+        counts.update({row[0]: row[1] for row in rows})
+        return counts
+
+    async def requeue_stale(self, started_before: float) -> int:
+        result = await self._pool.execute(
+            "UPDATE submission_jobs SET status = 'PENDING' WHERE status = 'GRADING' AND started_at < $1",
+            started_before,
+        )
+        return int(result.split()[-1])
+
+    async def purge(self, completed_before: float) -> int:
+        result = await self._pool.execute(
+            "DELETE FROM submission_jobs WHERE status IN ('COMPLETED', 'FAILED') AND completed_at < $1",
+            completed_before,
+        )
+        return int(result.split()[-1])
+
+
+def create_job_queue(backend: str = SUBMISSION_QUEUE_BACKEND) -> JobQueue:
+    """Bikin queue sesuai SUBMISSION_QUEUE_BACKEND (memory / sqlite / postgres)."""
+    if backend == "sqlite":
+        return SQLiteJobQueue()
+    if backend == "postgres":
+        return PostgresJobQueue()
+    if backend == "memory":
+        return InMemoryJobQueue()
+    raise ValueError(f"SUBMISSION_QUEUE_BACKEND gak dikenal: {backend}")
+
+
+# ============================================
+# WORKER POOL
+# ============================================
+
+JobHandler = Callable[[dict], Awaitable[dict]]
+# (payload, error) -> None, dipanggil sekali pas job akhirnya FAILED
+FailureHandler = Callable[[dict, str], Awaitable[None]]
+
+
+class SubmissionJobManager:
+    """
+    Enqueue job + worker pool asyncio yang nge-proses job dari queue.
+
+    Handler dipasang pas startup (dari router grading), nerima payload request
+    dan balikin hasil grading sebagai dict. `on_failed` (opsional) dipanggil kalau
+    job udah FAILED permanen, buat nyatet kegagalannya (row Submission FAILED).
+    """
+
+    def __init__(
+        self,
+        queue: Optional[JobQueue] = None,
+        workers: int = SUBMISSION_WORKERS,
+        max_attempts: int = SUBMISSION_MAX_ATTEMPTS,
+        max_pending: int = SUBMISSION_QUEUE_MAX_PENDING,
+        job_timeout_s: float = SUBMISSION_JOB_TIMEOUT_S,
+        job_ttl_seconds: float = SUBMISSION_JOB_TTL_SECONDS,
+        poll_interval_s: float = SUBMISSION_POLL_INTERVAL_S,
+    ):
+        self.queue = queue
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.max_pending = max_pending
+        self.job_timeout_s = job_timeout_s
+        self.job_ttl_seconds = job_ttl_seconds
+        self.poll_interval_s = poll_interval_s
+        self._handler: Optional[JobHandler] = None
+        self._on_failed: Optional[FailureHandler] = None
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._changed: Optional[asyncio.Condition] = None
+        self._pending_estimate = 0
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    async def startup(self, handler: JobHandler, on_failed: Optional[FailureHandler] = None) -> None:
+        """Buka queue, balikin job yang nyangkut, lalu jalanin worker."""
+        if self.started:
+            return
+        if self.queue is None:
+            self.queue = create_job_queue()
+        self._handler = handler
+        self._on_failed = on_failed
+        self._wakeup = asyncio.Event()
+        self._changed = asyncio.Condition()
+        await self.queue.open()
+        await self.queue.requeue_stale(time.time() - self.job_timeout_s)
+        self._pending_estimate = (await self.queue.counts())[SubmissionStatus.PENDING.value]
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._housekeeping()))
+
+    async def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.queue is not None:
+            await self.queue.close()
+
+    # ----------------------------------------
+    # Public API
+    # ----------------------------------------
+
+    async def enqueue(self, payload: dict) -> SubmissionJob:
+        """Masukin job baru (status PENDING). Raise QueueFullError kalau antrian udah penuh."""
+        if self._pending_estimate >= self.max_pending:
+            # Estimasi bisa basi kalau ada worker di proses lain, cek ke storage dulu
+            self._pending_estimate = (await self.queue.counts())[SubmissionStatus.PENDING.value]
+            if self._pending_estimate >= self.max_pending:
+                metrics.increment("submission_queue.rejected")
+                raise QueueFullError(f"Antrian grading penuh ({self._pending_estimate} job pending)")
+
+        job = SubmissionJob(job_id=uuid.uuid4().hex, payload=payload, created_at=time.time())
+        await self.queue.put(job)
+        self._pending_estimate += 1
+        metrics.increment("submission_queue.enqueued")
+        self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[SubmissionJob]:
+        return await self.queue.get(job_id)
+
+    async def watch(self, job_id: str) -> AsyncIterator[SubmissionJob]:
+        """Yield job tiap kali status-nya berubah, berhenti setelah COMPLETED/FAILED."""
+        last_status = None
+        while True:
+            job = await self.queue.get(job_id)
+            if job is None:
+                return
+            if job.status != last_status:
+                last_status = job.status
+                yield job
+            if job.is_terminal:
+                return
+            # Worker di proses ini langsung notify; worker di proses lain ketauan dari polling
+            async with self._changed:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=self.poll_interval_s)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def stats(self) -> dict:
+        counts = await self.queue.counts() if self.queue is not None else {}
+        return {
+            "backend": type(self.queue).__name__ if self.queue is not None else None,
+            "workers": self.workers,
+            "running": self.started,
+            "jobs": counts,
+        }
+
+    # ----------------------------------------
+    # Worker
+    # ----------------------------------------
+
+    async def _notify(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def _worker(self) -> None:
+        backoff = self.poll_interval_s
+        while True:
+            try:
+                job = await self.queue.claim()
+            except Exception:
+                # Storage queue lagi gangguan (DB putus, file kekunci): worker jangan sampe mati
+                metrics.increment("submission_queue.claim_errors")
+                logger.exception("Claim job submission gagal, coba lagi %.1fs lagi", backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, max(self.poll_interval_s, SUBMISSION_CLAIM_BACKOFF_MAX_S))
+                continue
+            backoff = self.poll_interval_s
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval_s)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._pending_estimate = max(0, self._pending_estimate - 1)
+            metrics.observe("submission_queue.wait", (job.started_at - job.created_at) * 1000)
+            await self._notify()
+            try:
+                await self._process(job)
+            except Exception:
+                # Biasanya save hasil yang gagal; job-nya nanti diambil lagi lewat requeue_stale
+                metrics.increment("submission_queue.process_errors")
+                logger.exception("Job submission %s gagal disimpen", job.job_id)
+            await self._notify()
+
+    async def _process(self, job: SubmissionJob) -> None:
+        start = time.perf_counter()
+        try:
+            job.result = await asyncio.wait_for(self._handler(job.payload), timeout=self.job_timeout_s)
+            job.status = SubmissionStatus.COMPLETED
+            job.error = None
+            job.completed_at = time.time()
+            metrics.increment("submission_queue.completed")
+        except asyncio.CancelledError:
+            # Server shutdown di tengah grading → balikin ke PENDING biar diambil lagi nanti
+            job.status = SubmissionStatus.PENDING
+            await asyncio.shield(self.queue.save(job))
+            raise
+        except Exception as e:
+            job.error = f"Grading service error: {str(e)}"
+            if job.attempts < self.max_attempts:
+                job.status = SubmissionStatus.PENDING
+                self._pending_estimate += 1
+                metrics.increment("submission_queue.retried")
+            else:
+                job.status = SubmissionStatus.FAILED
+                job.completed_at = time.time()
+                metrics.increment("submission_queue.failed")
+        metrics.observe("submission_queue.grading", (time.perf_counter() - start) * 1000)
+        await self.queue.save(job)
+        if job.status == SubmissionStatus.FAILED and self._on_failed is not None:
+            try:
+                await self._on_failed(job.payload, job.error)
+            except Exception:
+                metrics.increment("submission_queue.failure_hook_errors")
+                logger.exception("Nyatet job submission %s yang FAILED gagal", job.job_id)
+
+    async def _housekeeping(self) -> None:
+        while True:
+            await asyncio.sleep(60)
+            now = time.time()
+            try:
+                # Kasih jeda di atas job_timeout_s: job yang masih jalan di sini udah pasti kena timeout duluan
+                requeued = await self.queue.requeue_stale(now - self.job_timeout_s - 60)
+                await self.queue.purge(now - self.job_ttl_seconds)
+            except Exception:
+                continue
+            if requeued:
+                self._pending_estimate += requeued
+                self._wakeup.set()
+
+
+# Manager global (queue-nya dibikin pas startup sesuai env)
+submission_jobs = SubmissionJobManager()
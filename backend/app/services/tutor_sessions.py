@@ -0,0 +1,512 @@
+# Data Academy - Tutor Sessions
+# Sesi chat tutor disimpen di server, jadi client cukup kirim session_id (gak perlu kirim ulang chat_history)
+#
+# - session_id selalu dibikin server (secrets.token_urlsafe) pas sesi dibuka, gak bisa dipilih/ditebak
+#   client; id kiriman client yang gak dikenal ditolak, bukan dibikinin sesi baru
+# - Memory: LRU per session_id, dibatesin jumlah sesi + jumlah pesan per sesi; sesi idle di-evict
+# - SQLite (opsional, TUTOR_SESSION_SQLITE_PATH): sumber kebenaran kalau dipasang. Tiap row punya
+#   `version`; memory cuma cache yang dicek ulang ke SQLite tiap dibaca, dan write pake
+#   compare-and-set di version, jadi beberapa worker gak saling nimpa turn
+# - Kompaksi: pesan lama dirangkum jadi running summary sama model murah, jalan di background
+#   (bukan di jalur request), jadi prompt tiap request tetep kecil dan awalnya stabil
+
+import asyncio
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from app.services.context_packer import count_tokens, fit_text
+from app.services.metrics import metrics
+
+
+TUTOR_SESSION_MAX_SESSIONS = int(os.getenv("TUTOR_SESSION_MAX_SESSIONS", "2000"))
+TUTOR_SESSION_IDLE_SECONDS = float(os.getenv("TUTOR_SESSION_IDLE_SECONDS", "1800"))
+TUTOR_SESSION_SQLITE_PATH = os.getenv("TUTOR_SESSION_SQLITE_PATH", "")
+TUTOR_SESSION_RETENTION_SECONDS = float(os.getenv("TUTOR_SESSION_RETENTION_SECONDS", "604800"))
+TUTOR_SESSION_COMPACT_AFTER_MESSAGES = int(os.getenv("TUTOR_SESSION_COMPACT_AFTER_MESSAGES", "12"))
+TUTOR_SESSION_COMPACT_AFTER_TOKENS = int(os.getenv("TUTOR_SESSION_COMPACT_AFTER_TOKENS", "2000"))
+TUTOR_SESSION_KEEP_MESSAGES = int(os.getenv("TUTOR_SESSION_KEEP_MESSAGES", "6"))
+TUTOR_SESSION_MAX_MESSAGES = int(os.getenv("TUTOR_SESSION_MAX_MESSAGES", "40"))
+TUTOR_SESSION_SUMMARY_MAX_TOKENS = int(os.getenv("TUTOR_SESSION_SUMMARY_MAX_TOKENS", "400"))
+TUTOR_SESSION_SWEEP_INTERVAL_S = 60
+TUTOR_SESSION_WRITE_ATTEMPTS = 3
+TUTOR_SESSION_ID_BYTES = 32
+
+# (summary lama, pesan yang mau dirangkum) -> summary baru
+Summarizer = Callable[[str, list[dict]], Awaitable[str]]
+
+
+@dataclass
+class TutorSession:
+    """Satu sesi chat: running summary + pesan terbaru yang masih verbatim."""
+    session_id: str
+    persona: str
+    summary: str = ""
+    turns: list[dict] = field(default_factory=list)
+    summarized_messages: int = 0
+    created_at: float = 0.0
+    last_active: float = 0.0
+    # Version row di SQLite (0 = belum pernah ke-persist)
+    version: int = 0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False, compare=False)
+    adoptions: int = field(default=0, repr=False, compare=False)
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.turns and not self.summary
+
+    def to_dict(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "persona": self.persona,
+            "summary": self.summary,
+            "turns": self.turns,
+            "summarized_messages": self.summarized_messages,
+            "created_at": self.created_at,
+            "last_active": self.last_active,
+        }
+
+
+class TutorSessionStore:
+    """
+    Store sesi tutor: LRU di memory, tier SQLite opsional (WAL, write-through).
+
+    Tanpa SQLite sesi cuma hidup di satu proses. Dengan SQLite, row-nya yang menang:
+    `get` ngecek version ke SQLite, write gagal kalau version-nya udah dimajuin worker
+    lain, lalu sesi di-refresh dan mutasinya diulang di atas state terbaru.
+
+    Summarizer dipasang pas startup (dari ai_tutor). Tanpa summarizer, pesan lama
+    cuma dibuang begitu lewat batas TUTOR_SESSION_MAX_MESSAGES.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = TUTOR_SESSION_MAX_SESSIONS,
+        idle_seconds: float = TUTOR_SESSION_IDLE_SECONDS,
+        sqlite_path: Optional[str] = TUTOR_SESSION_SQLITE_PATH or None,
+        retention_seconds: float = TUTOR_SESSION_RETENTION_SECONDS,
+        compact_after_messages: int = TUTOR_SESSION_COMPACT_AFTER_MESSAGES,
+        compact_after_tokens: int = TUTOR_SESSION_COMPACT_AFTER_TOKENS,
+        keep_messages: int = TUTOR_SESSION_KEEP_MESSAGES,
+        max_messages: int = TUTOR_SESSION_MAX_MESSAGES,
+        summary_max_tokens: int = TUTOR_SESSION_SUMMARY_MAX_TOKENS,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.sqlite_path = sqlite_path
+        self.retention_seconds = retention_seconds
+        self.compact_after_messages = compact_after_messages
+        self.compact_after_tokens = compact_after_tokens
+        self.keep_messages = keep_messages
+        self.max_messages = max(max_messages, keep_messages + 2)
+        self.summary_max_tokens = summary_max_tokens
+        self._sessions: OrderedDict[str, TutorSession] = OrderedDict()
+        self._summarizer: Optional[Summarizer] = None
+        self._compactions: dict[str, asyncio.Task] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+        self.evictions = 0
+        self.write_conflicts = 0
+        self.compactions = 0
+        self.compaction_failures = 0
+        self.dropped_messages = 0
+
+    async def startup(self, summarizer: Optional[Summarizer] = None) -> None:
+        """Pasang summarizer, buka SQLite (kalau diset), dan jalanin sweeper sesi idle."""
+        self._summarizer = summarizer
+        if self.sqlite_path and self._db is None:
+            self._open_sqlite(self.sqlite_path)
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def shutdown(self) -> None:
+        tasks = list(self._compactions.values())
+        if self._sweeper is not None:
+            tasks.append(self._sweeper)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._compactions.clear()
+        self._sweeper = None
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    # ----------------------------------------
+    # SQLite tier
+    # ----------------------------------------
+
+    def _open_sqlite(self, path: str) -> None:
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tutor_sessions (
+                session_id TEXT PRIMARY KEY,
+                persona TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                turns TEXT NOT NULL,
+                summarized_messages INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_active REAL NOT NULL,
+                version INTEGER NOT NULL DEFAULT 1
+            )
+            """
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(tutor_sessions)")}
+        if "version" not in columns:
+            # DB lama: row yang udah ada dianggap version 1
+            self._db.execute("ALTER TABLE tutor_sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tutor_sessions_active ON tutor_sessions (last_active)"
+        )
+
+    def _load(self, session_id: str) -> Optional[TutorSession]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT persona, summary, turns, summarized_messages, created_at, last_active, version "
+                "FROM tutor_sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        persona, summary, turns, summarized, created_at, last_active, version = row
+        return TutorSession(
+            session_id=session_id,
+            persona=persona,
+            summary=summary,
+            turns=json.loads(turns),
+            summarized_messages=summarized,
+            created_at=created_at,
+            last_active=last_active,
+            version=version,
+        )
+
+    def _load_version(self, session_id: str) -> Optional[int]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT version FROM tutor_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def _write(self, row: tuple, expected_version: int) -> bool:
+        """Compare-and-set: True kalau row-nya masih di `expected_version` (0 = belum ada)."""
+        with self._db_lock:
+            if expected_version == 0:
+                cursor = self._db.execute(
+                    "INSERT OR IGNORE INTO tutor_sessions "
+                    "(persona, summary, turns, summarized_messages, created_at, last_active, session_id, version) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, 1)",
+                    row,
+                )
+            else:
+                cursor = self._db.execute(
+                    "UPDATE tutor_sessions SET persona = ?, summary = ?, turns = ?, summarized_messages = ?, "
+                    "created_at = ?, last_active = ?, version = version + 1 "
+                    "WHERE session_id = ? AND version = ?",
+                    (*row, expected_version),
+                )
+        return cursor.rowcount == 1
+
+    def _delete_row(self, session_id: str) -> bool:
+        with self._db_lock:
+            cursor = self._db.execute("DELETE FROM tutor_sessions WHERE session_id = ?", (session_id,))
+        return cursor.rowcount > 0
+
+    @staticmethod
+    def _row(session: TutorSession) -> tuple:
+        # Di-serialize di event loop, biar thread SQLite gak baca sesi yang lagi dimutasi
+        return (
+            session.persona,
+            session.summary,
+            json.dumps(session.turns, ensure_ascii=False),
+            session.summarized_messages,
+            session.created_at,
+            session.last_active,
+            session.session_id,
+        )
+
+    @staticmethod
+    def _adopt(session: TutorSession, fresh: TutorSession) -> None:
+        """Timpa isi sesi di memory pake row terbaru (objeknya tetep sama, lock-nya juga)."""
+        session.persona = fresh.persona
+        session.summary = fresh.summary
+        session.turns = fresh.turns
+        session.summarized_messages = fresh.summarized_messages
+        session.created_at = fresh.created_at
+        session.last_active = fresh.last_active
+        session.version = fresh.version
+        session.adoptions += 1
+
+    async def _save(
+        self,
+        session: TutorSession,
+        reapply: Optional[Callable[[TutorSession], None]],
+    ) -> bool:
+        """
+        Tulis sesi ke SQLite (dipanggil sambil pegang `session.lock`). Kalau worker lain
+        udah nulis duluan: ambil row terbaru, lalu `reapply` mutasinya di atas row itu dan
+        coba lagi. `reapply=None` berarti mutasinya dibuang aja (dipake kompaksi).
+        """
+        if self._db is None:
+            return True
+        for _ in range(TUTOR_SESSION_WRITE_ATTEMPTS):
+            expected = session.version
+            if await asyncio.to_thread(self._write, self._row(session), expected):
+                session.version = expected + 1
+                return True
+            self.write_conflicts += 1
+            metrics.increment("tutor_sessions.write_conflicts")
+            fresh = await asyncio.to_thread(self._load, session.session_id)
+            if fresh is None:
+                # Dihapus worker lain di tengah jalan
+                if reapply is None:
+                    self._forget(session.session_id)
+                    return False
+                session.version = 0
+            else:
+                self._adopt(session, fresh)
+                if reapply is None:
+                    return False
+            reapply(session)
+        return False
+
+    # ----------------------------------------
+    # Public API
+    # ----------------------------------------
+
+    async def get(self, session_id: str) -> Optional[TutorSession]:
+        """Ambil sesi. Dengan SQLite, versi di memory dicek ulang dulu ke row-nya. None kalau gak ada."""
+        session = self._sessions.get(session_id)
+        if self._db is None:
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+            return session
+
+        if session is None:
+            fresh = await asyncio.to_thread(self._load, session_id)
+            if fresh is None:
+                return None
+            # Request lain bisa udah nge-load sesi yang sama selama nunggu
+            session = self._sessions.get(session_id)
+            if session is None:
+                self._store(fresh)
+                return fresh
+            async with session.lock:
+                if fresh.version > session.version:
+                    self._adopt(session, fresh)
+            self._sessions.move_to_end(session_id)
+            return session
+
+        async with session.lock:
+            version = await asyncio.to_thread(self._load_version, session_id)
+            if version is None:
+                if session.version > 0:
+                    # Dihapus worker lain
+                    self._forget(session_id)
+                    return None
+            elif version != session.version:
+                fresh = await asyncio.to_thread(self._load, session_id)
+                if fresh is None:
+                    self._forget(session_id)
+                    return None
+                self._adopt(session, fresh)
+        if session_id in self._sessions:
+            self._sessions.move_to_end(session_id)
+        return session
+
+    async def open(
+        self,
+        session_id: Optional[str],
+        persona: str,
+        seed_history: Optional[list[dict]] = None,
+    ) -> Optional[TutorSession]:
+        """
+        Ambil sesi yang udah ada, atau bikin baru (id random dari server) kalau session_id None.
+        Return None kalau session_id-nya gak dikenal. Sesi baru boleh di-seed dari chat_history
+        client (client lama yang masih kirim history penuh tetep jalan).
+        """
+        if session_id is not None:
+            session = await self.get(session_id)
+            if session is None:
+                return None
+        else:
+            now = time.time()
+            session = TutorSession(
+                session_id=secrets.token_urlsafe(TUTOR_SESSION_ID_BYTES),
+                persona=persona,
+                created_at=now,
+                last_active=now,
+            )
+            self._store(session)
+            metrics.increment("tutor_sessions.created")
+        if session.is_empty and seed_history:
+            session.turns = [
+                {"role": message["role"], "content": message["content"]} for message in seed_history
+            ]
+            self._enforce_cap(session)
+        session.persona = persona
+        return session
+
+    async def record_turn(self, session: TutorSession, user_message: str, reply: str) -> None:
+        """Tambahin satu tanya-jawab ke sesi, lalu jadwalin kompaksi kalau udah kepanjangan."""
+        def apply(target: TutorSession) -> None:
+            target.turns.append({"role": "user", "content": user_message})
+            target.turns.append({"role": "assistant", "content": reply})
+            target.last_active = time.time()
+            self._enforce_cap(target)
+
+        async with session.lock:
+            apply(session)
+            if session.session_id not in self._sessions:
+                self._store(session)
+            else:
+                self._sessions.move_to_end(session.session_id)
+            await self._save(session, apply)
+        self._maybe_compact(session)
+
+    async def delete(self, session_id: str) -> bool:
+        """Hapus sesi dari memory dan SQLite. True kalau ada yang kehapus."""
+        removed = self._forget(session_id)
+        if self._db is not None:
+            removed = await asyncio.to_thread(self._delete_row, session_id) or removed
+        return removed
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "persistent": self._db is not None,
+            "compacting": len(self._compactions),
+            "compactions": self.compactions,
+            "compaction_failures": self.compaction_failures,
+            "evictions": self.evictions,
+            "write_conflicts": self.write_conflicts,
+            "dropped_messages": self.dropped_messages,
+        }
+
+    # ----------------------------------------
+    # Memory caps
+    # ----------------------------------------
+
+    def _store(self, session: TutorSession) -> None:
+        self._sessions[session.session_id] = session
+        self._sessions.move_to_end(session.session_id)
+        while len(self._sessions) > self.max_sessions:
+            # Sesi yang ke-evict udah ada di SQLite (write-through), jadi aman dibuang dari memory
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+            metrics.increment("tutor_sessions.evicted")
+
+    def _forget(self, session_id: str) -> bool:
+        """Buang sesi dari memory (plus kompaksinya kalau lagi jalan)."""
+        task = self._compactions.pop(session_id, None)
+        if task is not None:
+            task.cancel()
+        return self._sessions.pop(session_id, None) is not None
+
+    def _enforce_cap(self, session: TutorSession) -> None:
+        # Batas keras kalau kompaksi ketinggalan/gagal terus: buang pesan paling lama
+        overflow = len(session.turns) - self.max_messages
+        if overflow > 0:
+            del session.turns[:overflow]
+            self.dropped_messages += overflow
+            metrics.increment("tutor_sessions.dropped_messages", overflow)
+
+    def _evict_idle(self) -> int:
+        cutoff = time.time() - self.idle_seconds
+        idle = [
+            session_id for session_id, session in self._sessions.items()
+            if session.last_active < cutoff and session_id not in self._compactions
+        ]
+        for session_id in idle:
+            del self._sessions[session_id]
+        self.evictions += len(idle)
+        if idle:
+            metrics.increment("tutor_sessions.evicted", len(idle))
+        return len(idle)
+
+    def _purge_persisted(self) -> None:
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "DELETE FROM tutor_sessions WHERE last_active < ?",
+                (time.time() - self.retention_seconds,),
+            )
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(TUTOR_SESSION_SWEEP_INTERVAL_S)
+            self._evict_idle()
+            try:
+                await asyncio.to_thread(self._purge_persisted)
+            except sqlite3.Error:
+                continue
+
+    # ----------------------------------------
+    # Kompaksi
+    # ----------------------------------------
+
+    def _needs_compaction(self, session: TutorSession) -> bool:
+        if len(session.turns) <= self.keep_messages:
+            return False
+        if len(session.turns) > self.compact_after_messages:
+            return True
+        return sum(count_tokens(m["content"]) for m in session.turns) > self.compact_after_tokens
+
+    def _maybe_compact(self, session: TutorSession) -> None:
+        if self._summarizer is None or session.session_id in self._compactions:
+            return
+        if not self._needs_compaction(session):
+            return
+        task = asyncio.create_task(self._compact(session))
+        self._compactions[session.session_id] = task
+        task.add_done_callback(lambda _: self._compactions.pop(session.session_id, None))
+
+    async def _compact(self, session: TutorSession) -> None:
+        """Rangkum semua pesan kecuali `keep_messages` terakhir ke summary sesi."""
+        batch = session.turns[: len(session.turns) - self.keep_messages]
+        adoptions = session.adoptions
+        start = time.perf_counter()
+        try:
+            summary = await self._summarizer(session.summary, batch)
+        except Exception:
+            self.compaction_failures += 1
+            metrics.increment("tutor_sessions.compaction_failures")
+            return
+        metrics.observe("tutor_sessions.compaction", (time.perf_counter() - start) * 1000)
+
+        async with session.lock:
+            if session.adoptions != adoptions:
+                # Worker lain udah nulis sesi ini duluan: batch-nya udah gak nyambung sama turns sekarang
+                self.compaction_failures += 1
+                metrics.increment("tutor_sessions.compaction_failures")
+                return
+            # Selama nunggu summarizer, pesan baru bisa masuk dan pesan lama bisa kebuang sama cap;
+            # buang cuma pesan dari batch yang masih ada
+            compacted = {id(message) for message in batch}
+            session.turns = [m for m in session.turns if id(m) not in compacted]
+            session.summary = fit_text(summary.strip(), self.summary_max_tokens)
+            session.summarized_messages += len(batch)
+            if not await self._save(session, None):
+                # Kalah balapan sama worker lain: sesi udah di-refresh, kompaksi nyusul di turn berikutnya
+                self.compaction_failures += 1
+                metrics.increment("tutor_sessions.compaction_failures")
+                return
+        self.compactions += 1
+        metrics.increment("tutor_sessions.compactions")
+
+
+# Store global (summarizer dipasang pas startup)
+tutor_sessions = TutorSessionStore()
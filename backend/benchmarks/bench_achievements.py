@@ -0,0 +1,195 @@
+# Data Academy - Benchmark achievement rules engine
+# Ribuan achievement sintetis (campuran complete_level, complete_levels per track, score per
+# challenge, submissions, streak, composite all/any) di kurikulum sintetis bench_progress.
+# Event grading dialirin lewat progress engine (biar ada LEVEL_COMPLETED beneran), lalu ke:
+#   - "indexed": AchievementEngine (cuma rule yang di-index buat event itu yang dicek)
+#   - "naive"  : scan semua rule tiap event (kayak loop `for achievement in achievements`)
+# Plus cek konsistensi: achievement per user dari dua cara harus sama, dan backfill dari
+# state akhir ngasih hasil yang sama buat rule berbasis state (selain streak).
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_achievements --rules 1000 5000 10000 --events 200000
+
+import argparse
+import json
+import random
+import time
+from datetime import timedelta
+
+from benchmarks.bench_progress import synthetic_events, synthetic_plans
+from benchmarks.common import report
+
+
+def synthetic_rules(count: int, plans, seed: int = 7) -> list[tuple]:
+    """(id, name, criteria) campuran semua tipe criteria."""
+    rng = random.Random(seed)
+    level_ids = sorted(plans.levels)
+    challenge_ids = sorted(plans.challenges)
+    track_codes = sorted({plan.track_code for plan in plans.levels.values()})
+
+    def state_rule() -> dict:
+        kind = rng.choice(("complete_level", "complete_levels", "submissions", "streak"))
+        if kind == "complete_level":
+            return {"type": kind, "levelId": rng.choice(level_ids)}
+        if kind == "complete_levels":
+            return {"type": kind, "count": rng.randint(1, 15), "trackCode": rng.choice(track_codes + [None])}
+        if kind == "submissions":
+            return {"type": kind, "count": rng.randint(1, 200)}
+        return {"type": kind, "days": rng.randint(2, 10)}
+
+    rules = []
+    for index in range(count):
+        roll = rng.random()
+        if roll < 0.4:
+            criteria = {"type": "score", "min": rng.randint(60, 100), "challengeId": rng.choice(challenge_ids)}
+        elif roll < 0.45:
+            criteria = {"type": "perfect_score"}
+        elif roll < 0.9:
+            criteria = state_rule()
+        else:
+            criteria = {"type": rng.choice(("all", "any")), "rules": [state_rule() for _ in range(rng.randint(2, 3))]}
+        criteria = {key: value for key, value in criteria.items() if value is not None}
+        rules.append((f"ach-{index:05d}", f"Achievement {index}", criteria))
+    return rules
+
+
+def naive_engine_class():
+    from app.services.achievements import AchievementEngine
+
+    class NaiveEngine(AchievementEngine):
+        """Baseline: tiap event ngecek semua rule, tanpa index."""
+
+        def _process(self, stats, event):
+            self.events += 1
+            awards = []
+            for rule in self._index.rules.values():
+                self.evaluations += 1
+                if rule.achievement_id not in stats.awarded and rule.check(stats, event):
+                    awards.append(self._award(stats, event, rule.achievement_id))
+            return awards
+
+    return NaiveEngine
+
+
+def grading_stream(events: list[tuple], plans) -> list[tuple]:
+    """Event grading + level yang jadi COMPLETED di event itu (dari progress engine)."""
+    from app.services.progress import ProgressEngine
+
+    progress = ProgressEngine()
+    progress.set_plans(plans)
+    # Event aslinya 1 detik sekali: direnggangin jadi beberapa minggu biar streak harian kepake
+    stream = []
+    for index, (user_id, challenge_id, score, graded_at) in enumerate(events):
+        graded_at = graded_at + timedelta(seconds=index * 20)
+        completed = [
+            (update.record.level_id, update.track_code)
+            for update in progress.record_grade(user_id, challenge_id, score, graded_at)
+            if "COMPLETED" in update.transitions
+        ]
+        stream.append((user_id, challenge_id, score, graded_at, completed))
+    return stream
+
+
+def run(engine, stream: list[tuple], sample_every: int) -> tuple[float, list[float], int]:
+    on_graded = engine.on_submission_graded
+    on_completed = engine.on_level_completed
+    latencies = []
+    awards = 0
+    start = time.perf_counter()
+    for index, (user_id, challenge_id, score, graded_at, completed) in enumerate(stream):
+        sampled = index % sample_every == 0
+        if sampled:
+            began = time.perf_counter_ns()
+        awards += len(on_graded(user_id, challenge_id, score, graded_at))
+        for level_id, track_code in completed:
+            awards += len(on_completed(user_id, level_id, track_code, graded_at))
+        if sampled:
+            latencies.append((time.perf_counter_ns() - began) / 1000)
+    return time.perf_counter() - start, latencies, awards
+
+
+def awarded(engine) -> dict:
+    return {user_id: set(stats.awarded) for user_id, stats in engine._users.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rules", type=int, nargs="+", default=[1_000, 5_000, 10_000])
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--naive-events", type=int, default=10_000, help="Baseline naive cuma di prefix ini")
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--tracks", type=int, default=2)
+    parser.add_argument("--levels", type=int, default=20)
+    parser.add_argument("--challenges", type=int, default=5, help="Challenge per level")
+    args = parser.parse_args()
+
+    from app.services.achievements import AchievementEngine
+
+    NaiveEngine = naive_engine_class()
+    plans = synthetic_plans(args.tracks, args.levels, args.challenges)
+    start = time.perf_counter()
+    stream = grading_stream(synthetic_events(args.events, args.users, plans), plans)
+    completions = sum(len(item[4]) for item in stream)
+    print(
+        f"levels={len(plans.levels)} challenges={len(plans.challenges)} users={args.users} "
+        f"events={len(stream)} level completions={completions} (generate {time.perf_counter() - start:.1f}s)"
+    )
+    prefix = stream[:args.naive_events]
+
+    for count in args.rules:
+        definitions = synthetic_rules(count, plans)
+        print(f"\nrules={count}")
+
+        engine = AchievementEngine()
+        start = time.perf_counter()
+        summary = engine.set_rules(definitions)
+        print(f"  compile {(time.perf_counter() - start) * 1000:8.1f}ms  rules={summary['rules']} errors={len(summary['errors'])}")
+
+        elapsed, latencies, awards = run(engine, stream, max(1, len(stream) // 50_000))
+        stats = engine.stats()
+        print(
+            f"  indexed {len(stream) / elapsed:10.0f} event/s  total={elapsed:6.2f}s  awards={awards}  "
+            f"evaluasi/event={stats['evaluations'] / max(1, stats['events']):.1f}"
+        )
+        report("    per grading", latencies, unit="us")
+
+        # Baseline naive + konsistensi di prefix yang sama
+        indexed = AchievementEngine()
+        indexed.set_rules(definitions)
+        run(indexed, prefix, len(prefix) + 1)
+        naive = NaiveEngine()
+        naive.set_rules(definitions)
+        elapsed, latencies, _ = run(naive, prefix, max(1, len(prefix) // 5_000))
+        stats = naive.stats()
+        print(
+            f"  naive   {len(prefix) / elapsed:10.0f} event/s  total={elapsed:6.2f}s  "
+            f"evaluasi/event={stats['evaluations'] / max(1, stats['events']):.1f}  (prefix {len(prefix)} event)"
+        )
+        report("    per grading", latencies, unit="us")
+        print(f"  indexed == naive: {awarded(indexed) == awarded(naive)}")
+
+        # Backfill: rule state dari state akhir harus sama dengan hasil incremental. Score butuh
+        # event, streak bisa udah putus lagi di akhir, jadi dua-duanya gak ikut dibandingin
+        state_only = [
+            (achievement_id, name, criteria) for achievement_id, name, criteria in definitions
+            if criteria["type"] not in ("score", "perfect_score") and "streak" not in json.dumps(criteria)
+        ]
+        incremental = AchievementEngine()
+        incremental.set_rules(state_only)
+        run(incremental, stream, len(stream) + 1)
+        replay = AchievementEngine()
+        replay._users = {user_id: stats for user_id, stats in incremental._users.items()}
+        expected = awarded(incremental)
+        for stats in replay._users.values():
+            stats.awarded = set()
+        replay.set_rules(state_only)
+        start = time.perf_counter()
+        replay.backfill()
+        print(
+            f"  backfill {(time.perf_counter() - start) * 1000:7.1f}ms  users={len(replay._users)}  "
+            f"backfill == incremental: {awarded(replay) == expected}"
+        )
+
+
+if __name__ == "__main__":
+    main()
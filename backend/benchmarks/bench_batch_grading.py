@@ -0,0 +1,111 @@
+# Data Academy - Benchmark batch grading
+# Regrade satu cohort: submit-code satu-satu (cara lama) vs POST /api/grade/batch
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_batch_grading --submissions 100 --duplicate-ratio 0.3 --latency-ms 300
+#   python -m benchmarks.bench_batch_grading --max-rpm 60   # niru rate limit Groq
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from benchmarks.bench_grading_modes import grading_reply
+from benchmarks.common import setup_standin
+
+# /api/grade/batch khusus admin: key ini dipasang ke env sebelum app di-import
+BENCH_ADMIN_KEY = "bench-admin-key"
+
+CHALLENGE = {
+    "challenge_id": "bench_batch_avg",
+    "language": "python",
+    "challenge_title": "Calculate Average",
+    "challenge_description": "Write a function that calculates the average of a list of numbers",
+}
+
+
+def cohort(size: int, duplicate_ratio: float) -> list[dict]:
+    """Submission cohort; sebagian murid nyerahin code yang sama persis (beda whitespace doang)."""
+    unique = max(1, int(size * (1 - duplicate_ratio)))
+    return [
+        {
+            "submission_id": f"sub_{i:04d}",
+            "code_snippet": f"def average(xs):\n    return sum(xs) / len(xs) + {i % unique}" + "\n" * (i % 3),
+        }
+        for i in range(size)
+    ]
+
+
+async def run_individual(client, submissions: list[dict]) -> float:
+    start = time.perf_counter()
+    for submission in submissions:
+        response = await client.post("/api/grade/submit-code", json={**CHALLENGE, **submission})
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def run_batch(client, submissions: list[dict], concurrency: int, rpm) -> dict:
+    payload = {
+        **CHALLENGE,
+        "submissions": submissions,
+        "concurrency": concurrency,
+        "requests_per_minute": rpm,
+    }
+    summary = {}
+    headers = {"X-Admin-Key": BENCH_ADMIN_KEY}
+    async with client.stream("POST", "/api/grade/batch", json=payload, headers=headers) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line:
+                event = json.loads(line)
+                if event["type"] == "summary":
+                    summary = event
+    return summary
+
+
+async def compare(app, submissions: list[dict], concurrency: int, rpm, skip_individual: bool) -> None:
+    import httpx
+
+    from app.services.grading import grading_cache
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            if not skip_individual:
+                grading_cache.clear()
+                elapsed = await run_individual(client, submissions)
+                print(f"individual   {len(submissions)} submissions in {elapsed:7.2f}s "
+                      f"→ {len(submissions) / elapsed * 60:8.1f} submissions/min")
+
+            grading_cache.clear()
+            summary = await run_batch(client, submissions, concurrency, rpm)
+            print(f"batch        {summary['graded']} submissions in {summary['elapsed_s']:7.2f}s "
+                  f"→ {summary['submissions_per_minute']:8.1f} submissions/min "
+                  f"(unique={summary['unique']}, failed={summary['failed']}, "
+                  f"pacing_waits={summary['rate_limit_waits']})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--submissions", type=int, default=100)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.3)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--max-rpm", type=int, default=None, help="Rate limit stand-in server")
+    parser.add_argument("--rpm", type=int, default=None, help="requests_per_minute di request batch")
+    parser.add_argument("--skip-individual", action="store_true")
+    args = parser.parse_args()
+
+    server = setup_standin(latency_ms=args.latency_ms, reply=grading_reply, max_rpm=args.max_rpm)
+    os.environ["ADMIN_API_KEY"] = BENCH_ADMIN_KEY
+
+    from app.main import app
+
+    submissions = cohort(args.submissions, args.duplicate_ratio)
+    asyncio.run(compare(app, submissions, args.concurrency, args.rpm, args.skip_individual))
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
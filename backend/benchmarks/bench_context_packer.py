@@ -0,0 +1,157 @@
+# Data Academy - Benchmark context packing chat tutor
+# Bandingin ukuran prompt + latency /api/tutor/chat sebelum (5 pesan terakhir + konteks utuh)
+# vs sesudah (pack_context sesuai budget token), untuk history yang isinya paste dataframe gede
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_context_packer --requests 100 --concurrency 8
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.common import report, setup_standin
+
+
+def make_dataframe_dump(rows: int) -> str:
+    lines = ["```", "      order_id  customer_id     amount  status        created_at"]
+    for i in range(rows):
+        lines.append(f"{i:>6}  {100000 + i:>10}  {i * 13 % 997:>9}.50  {'PAID' if i % 3 else 'REFUND':<8}  2024-01-{i % 28 + 1:02d}")
+    lines.append("```")
+    return "\n".join(lines)
+
+
+def make_payload(turns: int, rows: int) -> dict:
+    history = []
+    for i in range(turns):
+        if i % 4 == 0:
+            content = f"Ini output df.head({rows}) aku, kok amount-nya aneh?\n{make_dataframe_dump(rows)}"
+        else:
+            content = f"Pertanyaan ke-{i}: gimana cara groupby customer terus sum amount per bulan?"
+        history.append({"role": "user", "content": content})
+        history.append({"role": "assistant", "content": f"Coba pake df.groupby(['customer_id']).amount.sum() dulu ya ({i})."})
+    return {
+        "message": "Terus gimana cara filter yang REFUND aja?",
+        "tutor_persona": "RENDY",
+        "context": "Level 3: Pandas - Agregasi\n" + make_dataframe_dump(rows),
+        "chat_history": history[-50:],
+    }
+
+
+def legacy_pack_chat_prompt(user_message, context, tutor_persona, chat_history):
+    """Perilaku lama: konteks utuh + 5 pesan terakhir apa adanya."""
+    from app.services.ai_tutor import PERSONA_PROMPTS
+    from app.services.context_packer import PackedContext, count_tokens
+
+    history = (chat_history or [])[-5:]
+    texts = [PERSONA_PROMPTS[tutor_persona], user_message, context or ""]
+    texts += [message["content"] for message in history]
+    return PackedContext(
+        context=context,
+        history=history,
+        prompt_tokens=sum(count_tokens(text) for text in texts),
+    )
+
+
+async def run_load(app, payload: dict, total: int, concurrency: int) -> tuple[list[float], list[int]]:
+    import httpx
+
+    latencies: list[float] = []
+    prompt_tokens: list[int] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def one():
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.post("/api/tutor/chat", json=payload)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    response.raise_for_status()
+                    prompt_tokens.append(response.json()["prompt_tokens"])
+
+            await asyncio.gather(*(one() for _ in range(total)))
+    return latencies, prompt_tokens
+
+
+def bench_packing(payload: dict, rounds: int) -> list[float]:
+    """Waktu pack_context doang (cold = cache count_tokens kosong, warm = history sama)."""
+    from app.services.ai_tutor import pack_chat_prompt
+    from app.services.context_packer import count_tokens
+
+    count_tokens.cache_clear()
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        pack_chat_prompt(payload["message"], payload["context"], "RENDY", payload["chat_history"])
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def check_budget(payload: dict) -> int:
+    """prompt_tokens hasil packing gak boleh lewat budget, termasuk konteks satu baris yang padat."""
+    import random
+    import string
+
+    from app.services.ai_tutor import pack_chat_prompt
+    from app.services.context_packer import TUTOR_PROMPT_TOKEN_BUDGET
+
+    rng = random.Random(0)
+    dense = "".join(rng.choice(string.ascii_letters + string.digits + "{}[]();,.") for _ in range(40000))
+    worst = 0
+    for context in (payload["context"], dense, "x" * 40000):
+        for persona in ("RENDY", "ABDUL"):
+            packed = pack_chat_prompt(payload["message"], context, persona, payload["chat_history"])
+            assert packed.prompt_tokens <= TUTOR_PROMPT_TOKEN_BUDGET, (
+                f"prompt_tokens {packed.prompt_tokens} > budget {TUTOR_PROMPT_TOKEN_BUDGET}"
+            )
+            worst = max(worst, packed.prompt_tokens)
+    return worst
+
+
+async def compare(app, payload: dict, total: int, concurrency: int):
+    from app.services import ai_tutor
+
+    original = ai_tutor.pack_chat_prompt
+    ai_tutor.pack_chat_prompt = legacy_pack_chat_prompt
+    before = await run_load(app, payload, total, concurrency)
+    ai_tutor.pack_chat_prompt = original
+
+    after = await run_load(app, payload, total, concurrency)
+    return before, after
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=25, help="Jumlah pasangan tanya-jawab di history")
+    parser.add_argument("--rows", type=int, default=100, help="Baris dataframe yang di-paste")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Delay dasar stand-in server")
+    parser.add_argument("--ms-per-kchar", type=float, default=2.0, help="Delay prefill per 1000 karakter prompt")
+    args = parser.parse_args()
+
+    server = setup_standin(latency_ms=args.latency_ms, ms_per_kchar=args.ms_per_kchar)
+
+    from app.main import app
+    from app.services.context_packer import _ENCODING
+
+    payload = make_payload(args.turns, args.rows)
+    print(f"tokenizer: {'tiktoken cl100k' if _ENCODING is not None else 'perkiraan regex'}")
+
+    timings = bench_packing(payload, 200)
+    print(f"pack cold    {timings[0]:9.3f}ms  warm p50={statistics.median(timings[1:]):9.3f}ms")
+    print(f"budget check ok (max prompt_tokens={check_budget(payload)})")
+
+    (before, before_tokens), (after, after_tokens) = asyncio.run(
+        compare(app, payload, args.requests, args.concurrency)
+    )
+    print(f"prompt_tokens before={before_tokens[0]} after={after_tokens[0]}")
+    report("before", before)
+    report("after", after)
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# Data Academy - Benchmark curriculum store
+# Kurikulum sintetis (clone file level asli dengan nomor level + id modul baru) di folder temp,
+# dari puluhan sampe ratusan level. Diukur:
+#   - load awal (parse + validasi + bangun index) dan reload setelah satu file diedit
+#   - cek perubahan (scan mtime) pas gak ada yang berubah, alias biaya tiap putaran hot reload
+#   - latency get_challenge() vs scan linear semua modul (cara tanpa index)
+#   - ukuran body submit-code: konteks lengkap dari client vs cuma challenge_id
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_curriculum --levels 10,100,500 --lookups 200000
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import report
+
+
+def synthesize(source_dir: Path, target_dir: Path, levels: int) -> list[str]:
+    """Clone level-1 tiap track jadi `levels` level per track. Return semua id modul."""
+    ids = []
+    for source in sorted(source_dir.glob("*/level-*.json")):
+        base = json.loads(source.read_text(encoding="utf-8"))
+        prefix = base["modules"][0]["id"].split("-")[0]
+        track_dir = target_dir / source.parent.name
+        track_dir.mkdir(parents=True, exist_ok=True)
+        for number in range(1, levels + 1):
+            level = dict(base, level=number, title=f"{base['title']} {number}")
+            level["modules"] = [
+                dict(module, id=module["id"].replace(f"{prefix}-L1-", f"{prefix}-L{number}-"))
+                for module in base["modules"]
+            ]
+            ids.extend(module["id"] for module in level["modules"])
+            (track_dir / f"level-{number}.json").write_text(json.dumps(level), encoding="utf-8")
+    return ids
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def lookup_latencies(fn, ids: list[str], count: int) -> list[float]:
+    latencies = []
+    for challenge_id in random.choices(ids, k=count):
+        start = time.perf_counter_ns()
+        fn(challenge_id)
+        latencies.append((time.perf_counter_ns() - start) / 1000)
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--levels", default="10,100,500", help="Jumlah level per track (dipisah koma)")
+    parser.add_argument("--lookups", type=int, default=200_000)
+    args = parser.parse_args()
+
+    from app.services.curriculum import DEFAULT_CURRICULUM_DIR, CurriculumStore
+
+    random.seed(7)
+    for levels in (int(value) for value in args.levels.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            ids = synthesize(DEFAULT_CURRICULUM_DIR, directory, levels)
+            store = CurriculumStore(directory=directory, reload_interval=0)
+
+            load_ms = timed(store.load)
+            stats = store.stats()
+            assert not stats["errors"], stats["errors"]
+            scan_ms = [timed(store.reload_if_changed) for _ in range(20)]
+
+            # Edit satu file → cuma file itu yang di-parse ulang
+            edited = next(directory.glob("*/level-1.json"))
+            os.utime(edited, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+            reload_ms = timed(store.reload_if_changed)
+
+            print(
+                f"levels={stats['levels']:<5} modules={stats['modules']:<6} load={load_ms:8.1f}ms "
+                f"reload 1 file={reload_ms:7.1f}ms scan tanpa perubahan={min(scan_ms):6.2f}ms"
+            )
+
+            modules = [
+                (context.challenge_id, context)
+                for context in (store.get_challenge(challenge_id) for challenge_id in ids)
+            ]
+
+            def linear(challenge_id: str):
+                return next(context for module_id, context in modules if module_id == challenge_id)
+
+            report("  index", lookup_latencies(store.get_challenge, ids, args.lookups), unit="us")
+            report("  linear", lookup_latencies(linear, ids, min(args.lookups, 20_000)), unit="us")
+
+            context = store.get_challenge(ids[-1])
+            full_body = {
+                "code_snippet": "def runway(cash, burn):\n    return cash / burn\n",
+                "challenge_id": context.challenge_id,
+                "language": "python",
+                "challenge_title": context.title,
+                "challenge_description": context.description,
+                "expected_behavior": context.expected_behavior,
+                "difficulty": context.difficulty,
+                "passing_score": context.passing_score,
+            }
+            id_only = {key: full_body[key] for key in ("code_snippet", "challenge_id", "language")}
+            print(f"  body submit-code: lengkap={len(json.dumps(full_body))}B cuma id={len(json.dumps(id_only))}B")
+
+
+if __name__ == "__main__":
+    main()
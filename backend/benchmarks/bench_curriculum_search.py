@@ -0,0 +1,100 @@
+# Data Academy - Benchmark curriculum search (BM25)
+# Kurikulum sintetis (sama kayak bench_curriculum) dari puluhan sampe ratusan level per track.
+# Diukur:
+#   - waktu build index (jalan di thread reload, bukan di request)
+#   - latency search() dan context_for() (search + packing ke budget token) per pesan chat
+#   - pembanding: skor BM25 per dokumen tanpa inverted index (loop semua snippet)
+# Plus contoh hit buat beberapa pertanyaan murid di kurikulum asli.
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_curriculum_search --levels 1,100,500 --queries 20000
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_curriculum import synthesize
+from benchmarks.common import report
+
+
+QUERIES = [
+    ("ANALYST", "gimana cara hitung runway startup?"),
+    ("ANALYST", "VLOOKUP vs INDEX MATCH mana yang lebih bagus"),
+    ("ANALYST", "pivot table buat analisis penjualan per region"),
+    ("ANALYST", "kenapa format tanggal di spreadsheet aku kacau"),
+    ("ANALYST", "makasih kak!"),
+    ("SCIENTIST", "kenapa numpy lebih cepat dari loop python"),
+    ("SCIENTIST", "apa itu teorema bayes dan contohnya"),
+    ("SCIENTIST", "gradient descent learning rate terlalu besar"),
+    ("SCIENTIST", "how do I compute a correlation matrix with pandas"),
+    ("SCIENTIST", "matrix multiplication tidak komutatif maksudnya apa"),
+]
+
+
+def timed_us(fn, count: int) -> list[float]:
+    latencies = []
+    for track, query in random.choices(QUERIES, k=count):
+        start = time.perf_counter_ns()
+        fn(query, track)
+        latencies.append((time.perf_counter_ns() - start) / 1000)
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--levels", default="1,100,500", help="Jumlah level per track (dipisah koma)")
+    parser.add_argument("--queries", type=int, default=20_000)
+    args = parser.parse_args()
+
+    from app.services.curriculum import DEFAULT_CURRICULUM_DIR, CurriculumStore
+    from app.services.curriculum_search import CurriculumSearch, tokenize
+
+    random.seed(11)
+    for levels in (int(value) for value in args.levels.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            synthesize(DEFAULT_CURRICULUM_DIR, directory, levels)
+            store = CurriculumStore(directory=directory, reload_interval=0)
+            search = CurriculumSearch(store)
+            store.load()
+            stats = search.stats()
+            print(
+                f"levels/track={levels:<4} snippets={stats['snippets']:<6} terms={stats['terms']:<6} "
+                f"postings={stats['postings']:<7} build={stats['last_build_ms']:8.1f}ms"
+            )
+
+            report("  search", timed_us(lambda q, t: search.search(q, track_code=t), args.queries), unit="us")
+            report("  context", timed_us(lambda q, t: search.context_for(q, t), args.queries), unit="us")
+
+            # Tanpa inverted index: bobot per dokumen disimpen, tiap query nge-loop semua snippet
+            index = search._index
+            doc_weights = [dict() for _ in index.snippets]
+            for term, term_id in index.vocab.items():
+                start, end = index.offsets[term_id], index.offsets[term_id + 1]
+                for doc, weight in zip(index.doc_ids[start:end], index.weights[start:end]):
+                    doc_weights[doc][term] = float(weight)
+
+            def scan(query: str, track: str):
+                terms = set(tokenize(query))
+                scored = [
+                    (sum(weights.get(term, 0.0) for term in terms), doc)
+                    for doc, weights in enumerate(doc_weights)
+                    if index.snippets[doc].track_code == track
+                ]
+                return sorted(scored, reverse=True)[:3]
+
+            report("  scan", timed_us(scan, min(args.queries, 2_000)), unit="us")
+
+    # Contoh hasil di kurikulum asli
+    store = CurriculumStore(directory=DEFAULT_CURRICULUM_DIR, reload_interval=0)
+    search = CurriculumSearch(store)
+    store.load()
+    for track, query in QUERIES:
+        hits = search.search(query, track_code=track)
+        print(f"{track:<9} {query:<52} {[(hit.snippet.snippet_id, round(hit.score, 1)) for hit in hits]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# Data Academy - Benchmark deadline + cancel on disconnect
+# App dijalanin beneran di uvicorn (biar disconnect-nya disconnect TCP beneran), Groq diganti stand-in.
+#
+# 1. Disconnect: murid nutup tab di tengah grading (client timeout < latency Groq).
+#    Bandingin jumlah call ke Groq dengan CANCEL_ON_DISCONNECT mati vs nyala.
+# 2. Deadline: budget cukup → grade + suggestions; budget mepet → grade tanpa suggestions
+#    (partial); budget habis duluan → 504 pas deadline, bukan nunggu Groq.
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_deadlines --students 20 --latency-ms 400
+
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import report, setup_standin
+from benchmarks.standin_groq import start_standin_server
+
+
+upstream_calls = {"grading": 0, "suggestions": 0}
+
+
+def reply(body: dict) -> str:
+    system = body["messages"][0]["content"]
+    if "mentor coding yang helpful" in system:
+        upstream_calls["suggestions"] += 1
+        return "1. Handle list kosong\n2. Tambahin type hints"
+    upstream_calls["grading"] += 1
+    return json.dumps({
+        "score": 60,
+        "criteria": {"correctness": 20, "efficiency": 15, "style": 10, "business_insight": 8},
+        "feedback_text": "Udah jalan, tapi list kosong belum di-handle.",
+        "strengths": ["Ringkas"],
+        "improvements": ["Handle list kosong"],
+        "passed": False,
+        "confidence": 0.95,
+    })
+
+
+def payload(i: int, tag: str) -> dict:
+    # difficulty 3 → langsung model besar (gak ada eskalasi yang nambah call); two_step = 2 call
+    return {
+        "code_snippet": f"def average_{tag}_{i}(xs):\n    return sum(xs) / len(xs)\n",
+        "challenge_id": f"bench_deadline_{tag}",
+        "language": "python",
+        "difficulty": 3,
+        "grading_mode": "two_step",
+    }
+
+
+async def disconnect_burst(base_url: str, students: int, client_timeout_s: float, settle_s: float) -> dict:
+    import httpx
+
+    upstream_calls.update(grading=0, suggestions=0)
+    async with httpx.AsyncClient(base_url=base_url, timeout=client_timeout_s) as client:
+        async def one(i: int):
+            try:
+                await client.post("/api/grade/submit-code", json=payload(i, f"dc{time.monotonic_ns()}"))
+            except httpx.TimeoutException:
+                pass  # Tab ditutup
+
+        await asyncio.gather(*(one(i) for i in range(students)))
+    await asyncio.sleep(settle_s)  # Kasih waktu kerjaan yang gak di-cancel buat kelar
+    return dict(upstream_calls)
+
+
+async def deadline_case(base_url: str, requests: int, tag: str) -> tuple[list[float], dict]:
+    import httpx
+
+    latencies: list[float] = []
+    outcomes: dict[str, int] = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        async def one(i: int):
+            start = time.perf_counter()
+            response = await client.post("/api/grade/submit-code", json=payload(i, tag))
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code == 200:
+                outcome = "partial" if response.json()["partial"] else "full"
+            else:
+                outcome = str(response.status_code)
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+        await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies, outcomes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=400.0, help="Delay stand-in per call")
+    args = parser.parse_args()
+
+    latency_s = args.latency_ms / 1000
+    standin = setup_standin(latency_ms=args.latency_ms, reply=reply)
+
+    from app.main import app
+    from app.routers import grade, streaming
+    from app.services.metrics import metrics
+
+    base_url, server = start_standin_server(app)
+
+    def counters() -> dict:
+        snapshot = metrics.snapshot()["counters"]
+        return {
+            name: snapshot.get(name, 0)
+            for name in ("disconnect.cancelled.grading", "llm_scheduler.cancelled.grading",
+                         "llm_scheduler.cancelled_in_flight", "deadline.skipped.suggestions", "llm.tokens_saved")
+        }
+
+    # 1. Disconnect di tengah grading
+    for enabled in (False, True):
+        streaming.CANCEL_ON_DISCONNECT = enabled
+        before = counters()
+        calls = asyncio.run(disconnect_burst(base_url, args.students, latency_s / 2, latency_s * 8))
+        after = counters()
+        label = "cancel" if enabled else "no cancel"
+        print(
+            f"{label:<12} groq calls: grading={calls['grading']} suggestions={calls['suggestions']} "
+            f"(dari {args.students} submit, client pergi setelah {latency_s / 2:.2f}s)"
+        )
+        print(f"{'':<12} {({name: after[name] - before[name] for name in after})}")
+
+    # 2. Deadline: cukup / mepet / habis duluan
+    streaming.CANCEL_ON_DISCONNECT = True
+    grade.DEADLINE_SUGGESTIONS_MIN_SECONDS = latency_s * 1.2
+    for label, budget in (("cukup", latency_s * 6), ("mepet", latency_s * 2.5), ("habis", latency_s * 0.5)):
+        grade.GRADE_DEADLINE_SECONDS = budget
+        latencies, outcomes = asyncio.run(deadline_case(base_url, args.students, f"dl_{label}"))
+        report(f"{label} {budget:.2f}s", latencies)
+        print(f"{'':<12} outcome={outcomes}")
+    print(f"total: {counters()}")
+
+    server.should_exit = True
+    standin.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
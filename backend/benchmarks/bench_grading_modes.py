@@ -0,0 +1,83 @@
+# Data Academy - Benchmark grading modes
+# Bandingin latency /api/grade/submit-code: two_step (grading + suggestions) vs single (satu LLM call)
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_grading_modes --requests 50 --latency-ms 300
+
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import report, setup_standin
+
+
+def grading_reply(body: dict) -> str:
+    """Bales JSON grading (plus suggestions) atau teks saran, tergantung prompt-nya."""
+    system = body["messages"][0]["content"]
+    if "mentor coding yang helpful" in system:
+        return "1. Tambahin type hints\n2. Handle list kosong\n3. Tambahin docstring"
+    return json.dumps({
+        "score": 75,
+        "criteria": {"correctness": 32, "efficiency": 18, "style": 11, "business_insight": 14},
+        "feedback_text": "Udah jalan, tapi edge case belum ditangani.",
+        "strengths": ["Logika utamanya bener"],
+        "improvements": ["Handle list kosong"],
+        "passed": True,
+        "suggestions": ["Tambahin type hints", "Handle list kosong", "Tambahin docstring"],
+    })
+
+
+async def run_mode(app, mode: str, total: int, concurrency: int) -> list[float]:
+    import httpx
+
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        async def one(i: int):
+            payload = {
+                # Code beda tiap request biar gak kena grading cache
+                "code_snippet": f"def average(xs):\n    return sum(xs) / len(xs) + {i}",
+                "challenge_id": "bench_avg",
+                "language": "python",
+                "grading_mode": mode,
+            }
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/api/grade/submit-code", json=payload)
+                latencies.append((time.perf_counter() - start) * 1000)
+                response.raise_for_status()
+
+        offset = 0 if mode == "two_step" else total
+        await asyncio.gather(*(one(offset + i) for i in range(total)))
+    return latencies
+
+
+async def compare(app, total: int, concurrency: int) -> dict[str, list[float]]:
+    results = {}
+    async with app.router.lifespan_context(app):
+        for mode in ("two_step", "single"):
+            results[mode] = await run_mode(app, mode, total, concurrency)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Delay stand-in server per LLM call")
+    args = parser.parse_args()
+
+    server = setup_standin(latency_ms=args.latency_ms, reply=grading_reply)
+
+    from app.main import app
+
+    results = asyncio.run(compare(app, args.requests, args.concurrency))
+    for mode, latencies in results.items():
+        report(mode, latencies)
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Data Academy - Benchmark hint cache
+# Satu kelas minta hint level 1 buat challenge yang sama, code-nya starter code
+# atau starter code yang cuma beda whitespace/komentar. Bandingin tanpa cache vs pake cache.
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_hint_cache --students 60 --concurrency 16
+
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.common import report, setup_standin
+
+
+CHALLENGE = "Hitung total revenue per kategori dari DataFrame `orders`, urutkan dari yang terbesar."
+STARTER_CODE = "import pandas as pd\n\ndef revenue_per_category(orders):\n    # TODO: tulis code kamu di sini\n    pass\n"
+
+
+def student_code(rng: random.Random) -> str:
+    """Starter code dengan edit receh: spasi, komentar, baris kosong."""
+    variants = [
+        STARTER_CODE,
+        STARTER_CODE.replace("# TODO: tulis code kamu di sini", "# mulai dari sini"),
+        STARTER_CODE + "\n\n",
+        STARTER_CODE.replace("    pass", "    pass  # nanti dulu"),
+        "# nama: murid\n" + STARTER_CODE,
+    ]
+    return rng.choice(variants)
+
+
+async def run_class(app, students: int, concurrency: int, use_cache: bool) -> list[float]:
+    import httpx
+
+    rng = random.Random(7)
+    payloads = [
+        {
+            "challenge_description": CHALLENGE,
+            "challenge_id": "pandas-groupby-01",
+            "user_code": student_code(rng),
+            "tutor_persona": rng.choice(["RENDY", "ABDUL"]),
+            "hint_level": 1,
+            "use_cache": use_cache,
+        }
+        for _ in range(students)
+    ]
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def one(payload: dict):
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.post("/api/tutor/hint", json=payload)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    response.raise_for_status()
+
+            await asyncio.gather(*(one(payload) for payload in payloads))
+    return latencies
+
+
+async def compare(app, students: int, concurrency: int):
+    from app.services.ai_tutor import hint_cache
+
+    before = await run_class(app, students, concurrency, use_cache=False)
+    hint_cache.clear()
+    after = await run_class(app, students, concurrency, use_cache=True)
+    return before, after, hint_cache.stats()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=400.0, help="Delay stand-in (model 70B)")
+    args = parser.parse_args()
+
+    server = setup_standin(latency_ms=args.latency_ms)
+
+    from app.main import app
+
+    before, after, stats = asyncio.run(compare(app, args.students, args.concurrency))
+    report("no cache", before)
+    report("cache", after)
+    print(
+        f"cache: entries={stats['size']} hits={stats['hits']} misses={stats['misses']} "
+        f"hit_rate={stats['hit_rate']} saved={stats['saved_latency_ms']}ms"
+    )
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# Data Academy - Benchmark parse + repair output JSON grading
+# Corpus output rusak (benchmarks/fixtures/grading_outputs.json) di-parse dua cara:
+#   - lama: JsonOutputParser + GradingResult (gagal = eskalasi / 500)
+#   - baru: StreamingJSONExtractor di-feed per chunk kecil (kayak token streaming) + normalisasi
+# Dicek: hasil per fixture sesuai `expect` (ok / reask / error) dan latency parse-nya.
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_json_repair --rounds 500 --chunk 8
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from benchmarks.common import report
+
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "grading_outputs.json"
+
+
+def parse_old(parser, output: str) -> str:
+    from app.services.grading import GradingResult
+
+    try:
+        result = parser.parse(output)
+        result.pop("confidence", None)
+        GradingResult(**result)
+    except Exception:
+        return "error"
+    return "ok"
+
+
+def parse_new(output: str, chunk: int) -> tuple[str, list[str]]:
+    from app.services.grading import _normalize_grading_output
+    from app.services.json_repair import JSONRepairError, StreamingJSONExtractor
+
+    extractor = StreamingJSONExtractor()
+    for start in range(0, len(output), chunk):
+        if extractor.feed(output[start:start + chunk]):
+            break
+    try:
+        parsed = extractor.finish()
+    except JSONRepairError:
+        return "error", []
+    repairs = list(parsed.repairs)
+    _, missing = _normalize_grading_output(parsed.value, False, repairs)
+    return ("reask" if missing else "ok"), list(dict.fromkeys(repairs))
+
+
+def timed(fn, rounds: int) -> list[float]:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument("--chunk", type=int, default=8, help="Ukuran chunk streaming (karakter)")
+    args = parser.parse_args()
+
+    from langchain_core.output_parsers import JsonOutputParser
+
+    from app.services.grading import GradingResult
+
+    corpus = json.loads(FIXTURES.read_text(encoding="utf-8"))
+    json_parser = JsonOutputParser(pydantic_object=GradingResult)
+
+    old_ok = new_ok = mismatches = 0
+    for case in corpus:
+        old = parse_old(json_parser, case["output"])
+        new, repairs = parse_new(case["output"], args.chunk)
+        old_ok += old == "ok"
+        new_ok += new == "ok"
+        mark = "" if new == case["expect"] else f"  <-- expect {case['expect']}"
+        mismatches += bool(mark)
+        print(f"{case['name']:<24} lama={old:<6} baru={new:<6} repairs={repairs}{mark}")
+    print(f"langsung kepake tanpa LLM call lagi: lama={old_ok}/{len(corpus)} baru={new_ok}/{len(corpus)}")
+
+    outputs = [case["output"] for case in corpus]
+    report("lama", timed(lambda: [parse_old(json_parser, output) for output in outputs], args.rounds))
+    report("baru", timed(lambda: [parse_new(output, args.chunk) for output in outputs], args.rounds))
+    report("baru utuh", timed(lambda: [parse_new(output, 1 << 20) for output in outputs], args.rounds))
+    assert mismatches == 0, f"{mismatches} fixture hasilnya beda dari expect"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# Data Academy - Benchmark LLM scheduler
+# 1. Priority lane: banjir grading background, lalu murid chat → latency chat dengan/tanpa lane
+# 2. Error sementara (429/503): success rate tanpa retry vs retry scheduler
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_llm_scheduler --background 64 --interactive 16 --latency-ms 200
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.bench_grading_modes import grading_reply
+from benchmarks.common import report, setup_standin
+
+
+async def priority_scenario(background: int, interactive: int, lanes: bool) -> None:
+    from app.services.ai_tutor import get_ai_response
+    from app.services.grading import grade_code_submission
+
+    background_latencies: list[float] = []
+    interactive_latencies: list[float] = []
+
+    async def grade(i: int):
+        start = time.perf_counter()
+        await grade_code_submission(
+            code_snippet=f"def average(xs):\n    return sum(xs) / len(xs) + {i}",
+            challenge_id="bench_scheduler",
+            language="python",
+            use_cache=False,
+            priority="background",
+        )
+        background_latencies.append((time.perf_counter() - start) * 1000)
+
+    async def chat(i: int):
+        await asyncio.sleep(0.05)  # Murid nanya pas batch udah jalan
+        start = time.perf_counter()
+        await get_ai_response(f"Bedanya mean sama median apa? ({i})")
+        interactive_latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(grade(i) for i in range(background)), *(chat(i) for i in range(interactive)))
+    suffix = "lanes" if lanes else "fifo"
+    report(f"bg/{suffix}", background_latencies)
+    report(f"chat/{suffix}", interactive_latencies)
+
+
+async def retry_scenario(total: int) -> int:
+    from app.services.ai_tutor import get_ai_response
+
+    async def one(i: int) -> bool:
+        try:
+            await get_ai_response(f"Pertanyaan {i}")
+            return True
+        except Exception:
+            return False
+
+    results = await asyncio.gather(*(one(i) for i in range(total)))
+    return sum(results)
+
+
+async def run_all(args, reply) -> None:
+    from app.services import llm_scheduler
+    from app.services.llm_pool import registry
+    from app.services.llm_scheduler import scheduler
+
+    scheduler.max_in_flight = args.max_in_flight
+    lane_cap = max(1, int(args.max_in_flight * 0.75))
+
+    # FIFO = semua lane dianggap sama (background boleh pake semua slot, chat ikut antri di belakang)
+    llm_scheduler._LANE_ORDER["interactive"] = 1
+    scheduler.background_max_in_flight = args.max_in_flight
+    await priority_scenario(args.background, args.interactive, lanes=False)
+
+    llm_scheduler._LANE_ORDER["interactive"] = 0
+    scheduler.background_max_in_flight = lane_cap
+    await priority_scenario(args.background, args.interactive, lanes=True)
+
+    # Client lama masih nunjuk ke server pertama; bikin ulang setelah base URL diganti
+    await registry.shutdown()
+    flaky = setup_standin(latency_ms=20, reply=reply, error_rate=args.error_rate)
+    total = 100
+    scheduler.max_retries = 0
+    without_retry = await retry_scenario(total)
+    scheduler.max_retries = 3
+    with_retry = await retry_scenario(total)
+    print(
+        f"\nerror_rate={args.error_rate}: tanpa retry {without_retry}/{total} sukses, "
+        f"dengan retry scheduler {with_retry}/{total} sukses"
+    )
+    flaky.should_exit = True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--background", type=int, default=64)
+    parser.add_argument("--interactive", type=int, default=16)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--error-rate", type=float, default=0.3)
+    args = parser.parse_args()
+
+    def reply(body: dict) -> str:
+        # Chat tutor dapet teks biasa, grading dapet JSON
+        if body["messages"][-1]["content"].startswith(("Bedanya", "Pertanyaan")):
+            return "Mean itu rata-rata, median itu nilai tengah."
+        return grading_reply(body)
+
+    server = setup_standin(latency_ms=args.latency_ms, reply=reply)
+    asyncio.run(run_all(args, reply))
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# Data Academy - Benchmark routing model (cascade 8B → 70B)
+# Campuran request hint (level 1-3) dan submit-code (difficulty 1-5, skor random) dijalanin
+# dua kali: config "semua 70B" (perilaku lama) vs config/model_routing.json.
+# Stand-in 8B lebih cepet, kadang bales JSON rusak / confidence rendah biar eskalasi kepake.
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_model_routing --requests 200 --concurrency 16
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import report, setup_standin
+
+
+SMALL = "llama-3.1-8b-instant"
+LARGE = "llama-3.1-70b-versatile"
+ALL_LARGE = {"models": {"small": SMALL, "large": LARGE}, "routes": {"tutor.summary": {"model": "small"}}}
+
+
+def make_reply(seed: int = 3):
+    rng = random.Random(seed)
+    calls = {SMALL: 0, LARGE: 0}
+
+    def reply(body: dict) -> str:
+        model = body.get("model")
+        calls[model] = calls.get(model, 0) + 1
+        system = body["messages"][0]["content"]
+        if "CORRECTNESS" not in system:
+            return "Coba cek lagi kolom yang di-group, udah bener belum?"
+        if model == SMALL and rng.random() < 0.05:
+            return '{"score": 80, "criteria": {"correctness": 35,'  # JSON kepotong
+        correctness, efficiency, style, insight = rng.randint(10, 40), rng.randint(5, 25), rng.randint(5, 15), rng.randint(5, 20)
+        return json.dumps({
+            "score": correctness + efficiency + style + insight,
+            "criteria": {"correctness": correctness, "efficiency": efficiency, "style": style, "business_insight": insight},
+            "feedback_text": "Udah jalan, tinggal rapihin dikit.",
+            "strengths": ["Logika utamanya bener"],
+            "improvements": ["Tambahin handling data kosong"],
+            "passed": True,
+            "confidence": round(rng.uniform(0.5, 1.0) if model == SMALL else 0.95, 2),
+        })
+
+    return reply, calls
+
+
+def make_payloads(total: int, seed: int = 11) -> list[tuple[str, dict]]:
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(total):
+        if i % 2:
+            payloads.append(("/api/tutor/hint", {
+                "challenge_description": f"Challenge {i}: hitung revenue per kategori",
+                "user_code": f"SELECT kategori FROM orders -- {i}",
+                "hint_level": rng.choice([1, 1, 1, 2, 3]),
+                "use_cache": False,
+            }))
+        else:
+            payloads.append(("/api/grade/submit-code", {
+                "code_snippet": f"def solve(orders):\n    return orders.groupby('kategori')['revenue_{i}'].sum()",
+                "challenge_id": f"bench_routing_{i % 7}",
+                "language": "python",
+                "difficulty": rng.choice([1, 1, 2, 2, 3, 4, 5]),
+                "grading_mode": "single",
+            }))
+    return payloads
+
+
+async def run_config(app, config: Path, payloads: list[tuple[str, dict]], concurrency: int, calls: dict):
+    import httpx
+
+    from app.services.grading import grading_cache
+    from app.services.model_router import model_router
+
+    grading_cache.clear()
+    model_router.config_path = config
+    model_router.load()
+    model_router._stats.clear()
+    calls.update({SMALL: 0, LARGE: 0})
+
+    latencies: dict[str, list[float]] = {"/api/tutor/hint": [], "/api/grade/submit-code": []}
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        async def one(path: str, payload: dict):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(path, json=payload)
+                latencies[path].append((time.perf_counter() - start) * 1000)
+                response.raise_for_status()
+
+        await asyncio.gather(*(one(path, payload) for path, payload in payloads))
+    return latencies, dict(calls), model_router.stats()["routes"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--small-ms", type=float, default=120.0, help="Delay stand-in 8B")
+    parser.add_argument("--large-ms", type=float, default=600.0, help="Delay stand-in 70B")
+    args = parser.parse_args()
+
+    reply, calls = make_reply()
+    server = setup_standin(reply=reply, model_latency_ms={SMALL: args.small_ms, LARGE: args.large_ms})
+
+    from app.main import app
+    from app.services.model_router import DEFAULT_CONFIG_PATH
+
+    payloads = make_payloads(args.requests)
+
+    async def compare():
+        async with app.router.lifespan_context(app):
+            with tempfile.TemporaryDirectory() as directory:
+                baseline = Path(directory) / "all_large.json"
+                baseline.write_text(json.dumps(ALL_LARGE))
+                before = await run_config(app, baseline, payloads, args.concurrency, calls)
+            after = await run_config(app, DEFAULT_CONFIG_PATH, payloads, args.concurrency, calls)
+        return before, after
+
+    before, after = asyncio.run(compare())
+    for label, (latencies, model_calls, routes) in (("all 70B", before), ("cascade", after)):
+        report(f"{label} hint", latencies["/api/tutor/hint"])
+        report(f"{label} grade", latencies["/api/grade/submit-code"])
+        print(f"{label:<12} groq calls: 8B={model_calls[SMALL]} 70B={model_calls[LARGE]}")
+        grading = routes.get("grading", {})
+        print(f"{label:<12} grading escalations={grading.get('escalations')} rate={grading.get('escalation_rate')}")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# Data Academy - Benchmark persistence (write-behind vs insert per request)
+# Banyak request grading barengan yang masing-masing nyimpen satu Submission + satu UserProgress.
+# Diukur:
+#   - "direct": tiap request nulis sendiri ke database (1 INSERT + 1 upsert di jalur request)
+#   - "buffered": tiap request cuma naruh record di buffer, flusher nulis per batch
+#     (latency per request + throughput end-to-end sampe semua record beneran ketulis)
+#   - backpressure: database yang sengaja dilambatin + buffer kecil → berapa yang ditolak
+#
+# Default pake stand-in SQLite di folder temp. `--postgres` = pake DATABASE_URL
+# (tabel Prisma harus udah ada: `npx prisma migrate deploy`).
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_persistence --requests 5000 --concurrency 64
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.common import report
+
+
+def make_records(index: int, users: int, levels: int):
+    from app.services.persistence import ProgressRecord, SubmissionRecord, utcnow
+
+    user_id = f"user-{index % users}"
+    submission = SubmissionRecord(
+        user_id=user_id,
+        challenge_id=f"DA-L{index % levels + 1}-C01",
+        code="def runway(cash, burn):\n    return cash / burn\n",
+        language="PYTHON",
+        status="COMPLETED",
+        score=random.randint(40, 100),
+        score_breakdown={"correctness": 30, "efficiency": 20, "style": 12, "business_insight": 15},
+        ai_feedback="Logika udah bener, tinggal handle burn = 0.",
+        ai_suggestions=["Tambahin guard buat burn <= 0"],
+        execution_output="3 / 3 test lulus",
+        execution_time_ms=random.randint(5, 80),
+        graded_at=utcnow(),
+    )
+    progress = ProgressRecord(
+        user_id=user_id,
+        level_id=f"level-{index % levels + 1}",
+        status="IN_PROGRESS",
+        current_score=submission.score,
+        completed_challenges=1,
+        started_at=utcnow(),
+    )
+    return submission, progress
+
+
+async def run_requests(
+    save, count: int, concurrency: int, users: int, levels: int, arrival_per_s: float = 0
+) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(index: int):
+        submission, progress = make_records(index, users, levels)
+        if arrival_per_s:
+            await asyncio.sleep(index / arrival_per_s)
+        async with semaphore:
+            start = time.perf_counter()
+            await save(submission, progress)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one(index) for index in range(count)))
+    return latencies
+
+
+def create_backend(postgres: bool, directory: str, name: str):
+    from app.services.persistence import PostgresPersistence, SQLitePersistence
+
+    if postgres:
+        return PostgresPersistence(os.environ["DATABASE_URL"])
+    return SQLitePersistence(os.path.join(directory, f"{name}.db"))
+
+
+async def bench_direct(args, directory: str) -> None:
+    backend = create_backend(args.postgres, directory, "direct")
+    await backend.open()
+
+    async def save(submission, progress):
+        await backend.insert_submissions([submission])
+        await backend.upsert_progress([progress])
+
+    start = time.perf_counter()
+    latencies = await run_requests(save, args.requests, args.concurrency, args.users, args.levels)
+    elapsed = time.perf_counter() - start
+    report("direct", latencies)
+    print(f"{'':<12} total={elapsed * 1000:9.1f}ms  {args.requests / elapsed:9.0f} request/s")
+    await backend.close()
+
+
+async def bench_buffered(args, directory: str) -> None:
+    from app.services.persistence import PersistenceManager
+
+    manager = PersistenceManager(create_backend(args.postgres, directory, "buffered"))
+    await manager.startup()
+
+    async def save(submission, progress):
+        await manager.save_submission(submission)
+        await manager.save_progress(progress)
+
+    start = time.perf_counter()
+    latencies = await run_requests(save, args.requests, args.concurrency, args.users, args.levels)
+    await manager.flush()
+    elapsed = time.perf_counter() - start
+    stats = manager.stats()
+    report("buffered", latencies)
+    print(
+        f"{'':<12} total={elapsed * 1000:9.1f}ms  {args.requests / elapsed:9.0f} request/s  "
+        f"batches={stats['batches']} submissions={stats['flushed_submissions']} "
+        f"progress={stats['flushed_progress']} (coalesced)"
+    )
+    await manager.shutdown()
+
+
+async def bench_backpressure(args, directory: str) -> None:
+    from app.services.persistence import PersistenceBackpressure, PersistenceManager
+
+    backend = create_backend(False, directory, "slow")
+    write = backend.insert_submissions
+
+    async def slow_insert(records):
+        await asyncio.sleep(0.05)  # Database yang lagi kewalahan
+        await write(records)
+
+    backend.insert_submissions = slow_insert
+    manager = PersistenceManager(
+        backend, buffer_max=200, batch_size=50, flush_interval_ms=20, enqueue_timeout_s=0.2
+    )
+    await manager.startup()
+    rejected = 0
+
+    async def save(submission, progress):
+        nonlocal rejected
+        try:
+            manager.check_capacity()
+            await manager.save_submission(submission)
+        except PersistenceBackpressure:
+            rejected += 1
+
+    # Database ini cuma kuat ~1000 record/s (50 per 50ms), request dateng 2000/s
+    latencies = await run_requests(save, 5_000, args.concurrency, args.users, args.levels, arrival_per_s=2_000)
+    await manager.flush()
+    stats = manager.stats()
+    report("backpressure", latencies)
+    print(
+        f"{'':<12} ditolak={rejected} ketulis={stats['flushed_submissions']} "
+        f"buffer maksimal={stats['buffer_max']}"
+    )
+    await manager.shutdown()
+
+
+async def main_async(args) -> None:
+    random.seed(5)
+    with tempfile.TemporaryDirectory() as directory:
+        await bench_direct(args, directory)
+        await bench_buffered(args, directory)
+        await bench_backpressure(args, directory)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--levels", type=int, default=10)
+    parser.add_argument("--postgres", action="store_true", help="Pake DATABASE_URL, bukan SQLite temp")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# Data Academy - Benchmark progress engine
+# Jutaan hasil grading sintetis (user acak, challenge condong ke level awal kayak murid beneran,
+# skor ~ normal) di kurikulum sintetis beberapa track x puluhan level. Diukur:
+#   - throughput + latency record_grade() per event (update incremental)
+#   - rebuild bulk dari row mentah per submission dan dari agregat GROUP BY (kayak best_scores()),
+#     plus tanpa bikin record (jalur startup)
+#   - baca progress satu user per page load: agregat vs hitung ulang dari semua submission user
+# Plus cek konsistensi: state hasil incremental == hasil rebuild buat semua user.
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_progress --events 2000000 --users 20000
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from benchmarks.common import report
+
+
+def synthetic_plans(tracks: int, levels: int, challenges: int):
+    from app.services.progress import LevelPlan, build_plans, level_id_for
+
+    plans = []
+    for track in range(tracks):
+        code = f"T{track}"
+        for level in range(1, levels + 1):
+            plans.append(LevelPlan(
+                level_id=level_id_for(code, level),
+                track_code=code,
+                sequence=level,
+                min_passing_score=70,
+                challenge_ids=tuple(f"{code}-L{level}-C{index:02d}" for index in range(challenges)),
+            ))
+    return build_plans(plans, version=1)
+
+
+def synthetic_events(count: int, users: int, plans, seed: int = 3) -> list[tuple]:
+    """(user, challenge, skor, gradedAt): murid lebih sering di level awal, skor makin lama makin bagus."""
+    rng = np.random.default_rng(seed)
+    by_track: dict[str, list[str]] = {}
+    for plan in sorted(plans.levels.values(), key=lambda plan: plan.sequence):
+        by_track.setdefault(plan.track_code, []).extend(plan.challenge_ids)
+    track_codes = sorted(by_track)
+    per_track = len(by_track[track_codes[0]])
+
+    user_ids = rng.integers(0, users, size=count)
+    # Tiap user cuma di satu track (kayak currentPath)
+    positions = np.minimum(rng.exponential(scale=per_track / 3, size=count).astype(np.int64), per_track - 1)
+    scores = np.clip(rng.normal(72, 18, size=count), 0, 100).astype(np.int64)
+    start = datetime(2026, 1, 1)
+    return [
+        (
+            f"user-{user}",
+            by_track[track_codes[user % len(track_codes)]][position],
+            int(score),
+            start + timedelta(seconds=index),
+        )
+        for index, (user, position, score) in enumerate(zip(user_ids.tolist(), positions.tolist(), scores.tolist()))
+    ]
+
+
+def snapshot(engine, user_ids) -> dict:
+    return {
+        user_id: [
+            (level["level_id"], level["status"], level["current_score"], level["completed_challenges"])
+            for level in engine.user_progress(user_id)
+        ]
+        for user_id in user_ids
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--tracks", type=int, default=2)
+    parser.add_argument("--levels", type=int, default=20)
+    parser.add_argument("--challenges", type=int, default=5, help="Challenge per level")
+    parser.add_argument("--page-loads", type=int, default=2_000)
+    args = parser.parse_args()
+
+    from app.services.progress import ProgressEngine
+
+    plans = synthetic_plans(args.tracks, args.levels, args.challenges)
+    start = time.perf_counter()
+    events = synthetic_events(args.events, args.users, plans)
+    print(
+        f"levels={len(plans.levels)} challenges={len(plans.challenges)} users={args.users} "
+        f"events={len(events)} (generate {time.perf_counter() - start:.1f}s)"
+    )
+
+    # Incremental: semua event, latency per event di-sample
+    engine = ProgressEngine()
+    engine.set_plans(plans)
+    record_grade = engine.record_grade
+    sample_every = max(1, len(events) // 100_000)
+    latencies = []
+    updates = 0
+    start = time.perf_counter()
+    for index, (user_id, challenge_id, score, graded_at) in enumerate(events):
+        if index % sample_every:
+            updates += len(record_grade(user_id, challenge_id, score, graded_at))
+            continue
+        began = time.perf_counter_ns()
+        updates += len(record_grade(user_id, challenge_id, score, graded_at))
+        latencies.append((time.perf_counter_ns() - began) / 1000)
+    elapsed = time.perf_counter() - start
+    stats = engine.stats()
+    print(
+        f"incremental  {len(events) / elapsed:10.0f} event/s  total={elapsed:6.2f}s  "
+        f"progress updates={updates} completions={stats['completions']} aggregates={stats['aggregates']}"
+    )
+    report("  per event", latencies, unit="us")
+
+    # Rebuild dari row mentah (satu row per submission) dan dari hasil GROUP BY
+    raw_rows = [(user_id, challenge_id, score, graded_at, graded_at) for user_id, challenge_id, score, graded_at in events]
+    grouped: dict[tuple[str, str], list] = {}
+    for user_id, challenge_id, score, graded_at in events:
+        row = grouped.get((user_id, challenge_id))
+        if row is None:
+            grouped[(user_id, challenge_id)] = [user_id, challenge_id, score, graded_at, graded_at]
+        else:
+            row[2] = max(row[2], score)
+            row[4] = graded_at
+    grouped_rows = [tuple(row) for row in grouped.values()]
+
+    rebuilt = ProgressEngine()
+    rebuilt.set_plans(plans)
+    start = time.perf_counter()
+    records = rebuilt.rebuild(raw_rows)
+    print(f"rebuild raw     rows={len(raw_rows):<9} {(time.perf_counter() - start) * 1000:9.1f}ms  records={len(records)}")
+    start = time.perf_counter()
+    records = rebuilt.rebuild(grouped_rows)
+    print(f"rebuild grouped rows={len(grouped_rows):<9} {(time.perf_counter() - start) * 1000:9.1f}ms  records={len(records)}")
+    start = time.perf_counter()
+    rebuilt.rebuild(grouped_rows, emit=False)
+    print(f"rebuild startup rows={len(grouped_rows):<9} {(time.perf_counter() - start) * 1000:9.1f}ms  (emit=False)")
+
+    user_ids = [f"user-{user}" for user in range(args.users)]
+    consistent = snapshot(engine, user_ids) == snapshot(rebuilt, user_ids)
+    print(f"incremental == rebuild: {consistent}")
+
+    # Page load: baca agregat vs hitung ulang dari semua submission user
+    per_user: dict[str, list[tuple]] = {}
+    for row in raw_rows:
+        per_user.setdefault(row[0], []).append(row)
+    scratch = ProgressEngine()
+    scratch.set_plans(plans)
+    random.seed(1)
+    sample = random.choices(list(per_user), k=args.page_loads)
+
+    def timed(fn) -> list[float]:
+        latencies = []
+        for user_id in sample:
+            began = time.perf_counter_ns()
+            fn(user_id)
+            latencies.append((time.perf_counter_ns() - began) / 1000)
+        return latencies
+
+    print(f"page load (rata-rata {len(raw_rows) / len(per_user):.0f} submission per user):")
+    report("  aggregate", timed(engine.user_progress), unit="us")
+    report("  recompute", timed(lambda user_id: (scratch.rebuild(per_user[user_id], emit=False), scratch.user_progress(user_id))), unit="us")
+
+
+if __name__ == "__main__":
+    main()
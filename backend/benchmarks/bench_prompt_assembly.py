@@ -0,0 +1,183 @@
+# Data Academy - Micro-benchmark susun prompt
+# Bandingin biaya assembly prompt sebelum (ChatPromptTemplate.from_messages tiap request,
+# konteks + history disisipin ke system message) vs sesudah (template di-compile pas import)
+# plus panjang prefix yang sama persis antar request (yang bisa di-cache provider)
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_prompt_assembly --rounds 2000
+
+import argparse
+import json
+import time
+
+from langchain_core.prompts import ChatPromptTemplate
+
+from benchmarks.common import report
+
+
+# ============================================
+# ASSEMBLY LAMA (disalin dari versi sebelum template di-compile)
+# ============================================
+
+def legacy_chat_messages(persona: str, history: list[dict], packed, user_message: str):
+    from app.services.ai_tutor import PERSONA_PROMPTS
+
+    # Versi lama: 5 pesan terakhir doang, jadi history-nya geser tiap giliran
+    history = history[-5:]
+    context_section = f"\n\nKONTEKS SAAT INI:\n{packed.context}" if packed.context else ""
+    history_section = ""
+    if history:
+        history_messages = "\n".join(
+            f"{'Murid' if msg['role'] == 'user' else 'Mentor'}: {msg['content']}" for msg in history
+        )
+        history_section = f"\n\nPERCAKAPAN SEBELUMNYA:\n{history_messages}"
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "{system_prompt}"),
+        ("human", "{input}"),
+    ])
+    system_prompt = f"{PERSONA_PROMPTS[persona]}{context_section}{history_section}"
+    return prompt.format_messages(system_prompt=system_prompt, input=user_message)
+
+
+def legacy_hint_messages(persona: str, level: int, challenge: str, code: str):
+    from app.services.ai_tutor import HINT_HUMAN_TEMPLATE, hint_system_prompt
+
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", hint_system_prompt(persona, level)),
+        ("human", HINT_HUMAN_TEMPLATE),
+    ])
+    return prompt.format_messages(challenge=challenge, code=code)
+
+
+def legacy_grading_messages(inputs: dict):
+    from app.services.grading import CHALLENGE_CONTEXT_TEMPLATE, GRADING_SYSTEM_PROMPT, SUGGESTIONS_INSTRUCTION
+
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", GRADING_SYSTEM_PROMPT),
+        ("human", CHALLENGE_CONTEXT_TEMPLATE + SUGGESTIONS_INSTRUCTION),
+    ])
+    return prompt.format_messages(**inputs)
+
+
+# ============================================
+# ASSEMBLY BARU
+# ============================================
+
+def chat_messages(persona: str, packed, user_message: str):
+    from app.services.ai_tutor import CHAT_PROMPTS, _build_chat_inputs
+
+    return CHAT_PROMPTS[persona].format_messages(**_build_chat_inputs(packed, user_message))
+
+
+def hint_messages(persona: str, level: int, challenge: str, code: str):
+    from app.services.ai_tutor import HINT_PROMPTS
+
+    return HINT_PROMPTS[(persona, level)].format_messages(challenge=challenge, code=code)
+
+
+def grading_messages(inputs: dict):
+    from app.services.grading import GRADING_PROMPTS
+
+    return GRADING_PROMPTS[True].format_messages(**inputs)
+
+
+# ============================================
+# HELPERS
+# ============================================
+
+def serialize(messages) -> str:
+    """Bentuk kasar body request ke provider (urutan role + content)."""
+    return json.dumps([{"role": m.type, "content": m.content} for m in messages], ensure_ascii=False)
+
+
+def shared_prefix(a: str, b: str) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def timed(fn, rounds: int) -> list[float]:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def make_packed(turn: int):
+    """Prompt chat giliran ke-`turn` di lesson yang sama."""
+    from app.services.ai_tutor import pack_chat_prompt
+
+    history = []
+    for i in range(turn):
+        history.append({"role": "user", "content": f"Pertanyaan ke-{i}: cara pake GROUP BY gimana?"})
+        history.append({"role": "assistant", "content": f"Jawaban ke-{i}: SELECT kategori, SUM(x) ..."})
+    packed = pack_chat_prompt(f"Pertanyaan ke-{turn}", "Level 2: SQL Fundamentals", "RENDY", history)
+    return history, packed
+
+
+def grading_inputs(code: str) -> dict:
+    return {
+        "challenge_title": "Top Customers",
+        "challenge_description": "Cari 5 customer dengan total order terbesar.",
+        "language": "sql",
+        "difficulty": 2,
+        "passing_score": 70,
+        "expected_behavior": "Urut desc by total",
+        "test_cases": "Tidak ada test cases spesifik.",
+        "student_code": code,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    (history_a, packed_a), (history_b, packed_b) = make_packed(3), make_packed(4)
+    code_a = "SELECT customer_id, SUM(amount) FROM orders GROUP BY 1 ORDER BY 2 DESC LIMIT 5"
+    code_b = "SELECT customer_id FROM orders LIMIT 5"
+
+    cases = [
+        (
+            "chat",
+            lambda: legacy_chat_messages("RENDY", history_a, packed_a, "Pertanyaan ke-3"),
+            lambda: chat_messages("RENDY", packed_a, "Pertanyaan ke-3"),
+            (
+                legacy_chat_messages("RENDY", history_a, packed_a, "q"),
+                legacy_chat_messages("RENDY", history_b, packed_b, "q"),
+            ),
+            (chat_messages("RENDY", packed_a, "q"), chat_messages("RENDY", packed_b, "q")),
+        ),
+        (
+            "hint",
+            lambda: legacy_hint_messages("ABDUL", 2, "Hitung mean", "x = {1, 2}"),
+            lambda: hint_messages("ABDUL", 2, "Hitung mean", "x = {1, 2}"),
+            (legacy_hint_messages("ABDUL", 2, "a", "x"), legacy_hint_messages("ABDUL", 2, "b", "y")),
+            (hint_messages("ABDUL", 2, "a", "x"), hint_messages("ABDUL", 2, "b", "y")),
+        ),
+        (
+            "grade",
+            lambda: legacy_grading_messages(grading_inputs(code_a)),
+            lambda: grading_messages(grading_inputs(code_a)),
+            (legacy_grading_messages(grading_inputs(code_a)), legacy_grading_messages(grading_inputs(code_b))),
+            (grading_messages(grading_inputs(code_a)), grading_messages(grading_inputs(code_b))),
+        ),
+    ]
+
+    for name, legacy, compiled, legacy_pair, compiled_pair in cases:
+        # Warm-up dulu biar import/JIT cache gak kehitung
+        legacy(), compiled()
+        report(f"{name} before", timed(legacy, args.rounds))
+        report(f"{name} after", timed(compiled, args.rounds))
+        before_prefix = shared_prefix(*(serialize(m) for m in legacy_pair))
+        after_prefix = shared_prefix(*(serialize(m) for m in compiled_pair))
+        print(f"{name:<12} shared prefix antar request: before={before_prefix} chars, after={after_prefix} chars")
+
+
+if __name__ == "__main__":
+    main()
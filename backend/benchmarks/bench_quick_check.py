@@ -0,0 +1,105 @@
+# Data Academy - Benchmark quick check
+# Simulasi murid ngetik solusi karakter per karakter, ukur latency quick check per keystroke.
+# Target: p99 < 5 ms.
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_quick_check --repeat 3
+
+import argparse
+
+from benchmarks.common import percentile, report
+
+SOLUTION = '''import pandas as pd
+
+
+def load_orders(path):
+    df = pd.read_csv(path, parse_dates=["order_date"])
+    return df.dropna(subset=["customer_id"])
+
+
+def monthly_revenue(df):
+    df = df.copy()
+    df["month"] = df["order_date"].dt.to_period("M")
+    summary = (
+        df.groupby("month")
+        .agg(revenue=("amount", "sum"), orders=("order_id", "nunique"))
+        .reset_index()
+    )
+    summary["aov"] = summary["revenue"] / summary["orders"]
+    return summary
+
+
+def top_customers(df, n=10):
+    totals = df.groupby("customer_id")["amount"].sum()
+    return totals.sort_values(ascending=False).head(n)
+
+
+def churn_flags(df, cutoff):
+    last_order = df.groupby("customer_id")["order_date"].max()
+    flags = {}
+    for customer_id, last in last_order.items():
+        try:
+            flags[customer_id] = last < cutoff
+        except TypeError:
+            flags[customer_id] = None
+    return flags
+
+
+if __name__ == "__main__":
+    orders = load_orders("orders.csv")
+    print(monthly_revenue(orders))
+    print(top_customers(orders))
+'''
+
+SQL_SOLUTION = '''SELECT c.customer_id,
+       c.name,
+       COUNT(DISTINCT o.order_id) AS total_orders,
+       SUM(oi.quantity * oi.unit_price) AS revenue
+FROM customers c
+JOIN orders o ON o.customer_id = c.customer_id
+JOIN order_items oi ON oi.order_id = o.order_id
+WHERE o.status = 'completed'
+GROUP BY c.customer_id, c.name
+HAVING SUM(oi.quantity * oi.unit_price) > 1000
+ORDER BY revenue DESC
+LIMIT 10;
+'''
+
+
+def keystrokes(text: str) -> list[str]:
+    return [text[:i] for i in range(1, len(text) + 1)]
+
+
+def run(checker, snapshots: list[str], language: str, document_id=None) -> list[float]:
+    return [
+        checker.check(code, language=language, document_id=document_id).elapsed_ms
+        for code in snapshots
+    ]
+
+
+def main() -> None:
+    from app.services.quick_check import QuickChecker
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    python_snapshots = keystrokes(SOLUTION) * args.repeat
+    sql_snapshots = keystrokes(SQL_SOLUTION) * args.repeat
+
+    # cache_size=0 → tiap keystroke beneran di-parse
+    results = {
+        "py_full": run(QuickChecker(cache_size=0), python_snapshots, "python"),
+        "py_incr": run(QuickChecker(cache_size=0), python_snapshots, "python", document_id="bench"),
+        "py_cached": run(QuickChecker(), python_snapshots, "python", document_id="bench"),
+        "sql": run(QuickChecker(cache_size=0), sql_snapshots, "sql"),
+    }
+    for label, latencies in results.items():
+        report(label, latencies)
+
+    worst = max(percentile(latencies, 99) for latencies in results.values())
+    print(f"\nworst p99 = {worst:.3f}ms ({'OK' if worst < 5 else 'MELEBIHI'} target 5ms)")
+
+
+if __name__ == "__main__":
+    main()
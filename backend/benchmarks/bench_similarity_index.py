@@ -0,0 +1,112 @@
+# Data Academy - Benchmark index near-duplicate submission
+# Isi index satu challenge sampe 100k submission sintetis, lalu ukur latency lookup
+# (LSH) vs scan semua signature, plus recall buat submission yang cuma beda nama variabel
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_similarity_index --submissions 100000 --queries 1000
+
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import report
+
+
+# Beberapa "gaya" solusi buat challenge revenue per kategori
+TEMPLATES = [
+    "import pandas as pd\ndef {f}({df}):\n    {g} = {df}.groupby('{col}')['{val}'].{agg}()\n    return {g}.sort_values(ascending={asc}).head({n})\n",
+    "def {f}({df}):\n    {res} = {{}}\n    for {row} in {df}.itertuples():\n        {res}[{row}.{col}] = {res}.get({row}.{col}, 0) + {row}.{val}\n    return sorted({res}.items(), key=lambda {kv}: {kv}[1], reverse={rev})[:{n}]\n",
+    "def {f}({df}):\n    {tmp} = {df}[{df}['{val}'] > {thr}]\n    {g} = {tmp}.pivot_table(index='{col}', values='{val}', aggfunc='{agg}')\n    return {g}.nlargest({n}, '{val}')\n",
+    "import numpy as np\ndef {f}({df}):\n    {keys} = {df}['{col}'].unique()\n    {out} = [({k}, np.{agg}({df}.loc[{df}['{col}'] == {k}, '{val}'])) for {k} in {keys}]\n    {out}.sort(key=lambda {kv}: -{kv}[1])\n    return {out}[:{n}]\n",
+]
+NAMES = ["df", "data", "orders", "x", "tbl", "frame", "d", "items", "hasil", "temp", "res", "acc", "row", "r", "k", "key", "kv", "item", "g", "grouped", "out", "keys", "cats", "tmp", "filtered"]
+COLUMNS = ["category", "kategori", "product_type", "segment", "region", "channel"]
+VALUES = ["revenue", "amount", "sales", "total", "price"]
+AGGS = ["sum", "mean", "max", "median"]
+
+
+def make_submission(rng: random.Random, template: int) -> str:
+    names = rng.sample(NAMES, 12)
+    return TEMPLATES[template].format(
+        f=rng.choice(["solve", "revenue_per_category", "hitung", "top_kategori", "jawab"]),
+        df=names[0], g=names[1], res=names[2], row=names[3], kv=names[4], tmp=names[5],
+        keys=names[6], out=names[7], k=names[8],
+        col=rng.choice(COLUMNS), val=rng.choice(VALUES), agg=rng.choice(AGGS),
+        asc=rng.choice(["False", "True"]), rev=rng.choice(["True", "False"]),
+        n=rng.randint(1, 20), thr=rng.randint(0, 500),
+    )
+
+
+def rename_variables(code: str) -> str:
+    """Near-duplicate: semua nama variabel diganti (atribut kayak .items() gak disentuh)."""
+    # (?!=) biar keyword argument kayak key=... gak ikut keganti
+    return re.sub(r"(?<![.\w])(" + "|".join(NAMES) + r")\b(?!=)", lambda m: m.group(1) + "_baru", code)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--submissions", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    from app.services.similarity_index import SimilarityIndex, minhash_signature
+
+    rng = random.Random(42)
+    codes = [make_submission(rng, rng.randrange(len(TEMPLATES))) for _ in range(args.submissions)]
+    result = {"score": 80, "criteria": {"correctness": 35, "efficiency": 20, "style": 10, "business_insight": 15}}
+
+    index = SimilarityIndex(threshold=0.9, directory=None, max_per_challenge=args.submissions)
+    start = time.perf_counter()
+    added = sum(index.add("revenue-01", "python", code, "ctx", result) for code in codes)
+    elapsed = time.perf_counter() - start
+    print(f"insert       {args.submissions} submissions in {elapsed:.1f}s ({args.submissions / elapsed:,.0f}/s, {added} unique signature)")
+
+    queries = [rename_variables(codes[rng.randrange(len(codes))]) for _ in range(args.queries)]
+
+    lsh_latencies, matched = [], []
+    for code in queries:
+        t0 = time.perf_counter()
+        match = index.lookup("revenue-01", "python", code, "ctx")
+        lsh_latencies.append((time.perf_counter() - t0) * 1000)
+        if match is not None:
+            matched.append(code)
+    report("lsh lookup", lsh_latencies)
+
+    # Baseline: estimasi Jaccard ke SEMUA signature (tanpa LSH)
+    challenge = index._indexes["revenue-01:python"]
+    signatures = challenge.signatures[: challenge.size]
+    scan_latencies, scan_matched = [], 0
+    for code in queries:
+        t0 = time.perf_counter()
+        similarity = (signatures == minhash_signature(code, "python")).mean(axis=1)
+        best = float(similarity.max())
+        scan_latencies.append((time.perf_counter() - t0) * 1000)
+        scan_matched += best >= index.threshold
+    report("full scan", scan_latencies)
+    print(
+        f"match rate   lsh={len(matched) / len(queries):.3f} "
+        f"full_scan={scan_matched / len(queries):.3f} (threshold {index.threshold})"
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        index.directory = directory
+        start = time.perf_counter()
+        index.save()
+        saved = time.perf_counter() - start
+        reloaded = SimilarityIndex(threshold=0.9, directory=directory)
+        start = time.perf_counter()
+        reloaded.load()
+        loaded = time.perf_counter() - start
+        size_mb = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory)) / 1e6
+        same = all(reloaded.lookup("revenue-01", "python", code, "ctx") is not None for code in matched[:100])
+        print(f"persist      save={saved:.2f}s load={loaded:.2f}s size={size_mb:.1f}MB reload_match={same}")
+    print(f"memory       signatures={signatures.nbytes / 1e6:.1f}MB ({np.dtype(np.uint32).itemsize * signatures.shape[1]} B/submission)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# Data Academy - Benchmark single-flight
+# Satu kelas live pencet hint / submit code yang sama persis di detik yang sama.
+# Bandingin jumlah call ke Groq dan latency dengan coalescing mati vs nyala,
+# plus cek follower tetep dapet hasil kalau leader-nya disconnect duluan.
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_single_flight --students 40 --latency-ms 400
+
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import report, setup_standin
+
+
+CHALLENGE = "Hitung rata-rata nilai dari list `xs`."
+CODE = "def average(xs):\n    return sum(xs) / len(xs)\n"
+upstream_calls = {"hint": 0, "grading": 0, "suggestions": 0}
+
+
+def reply(body: dict) -> str:
+    system = body["messages"][0]["content"]
+    if "mentor coding yang helpful" in system:
+        upstream_calls["suggestions"] += 1
+        return "1. Handle list kosong\n2. Tambahin type hints"
+    if "CORRECTNESS" in system:
+        upstream_calls["grading"] += 1
+        return json.dumps({
+            "score": 80,
+            "criteria": {"correctness": 35, "efficiency": 20, "style": 10, "business_insight": 15},
+            "feedback_text": "Udah bener, tinggal handle list kosong.",
+            "strengths": ["Ringkas"],
+            "improvements": ["Handle list kosong"],
+            "passed": True,
+        })
+    upstream_calls["hint"] += 1
+    return "Coba pikirin dulu: kalau list-nya kosong, len(xs) jadi berapa?"
+
+
+async def burst(client, students: int) -> tuple[list[float], list[float]]:
+    hint_payload = {"challenge_description": CHALLENGE, "user_code": CODE, "tutor_persona": "RENDY", "hint_level": 1}
+    grade_payload = {"code_snippet": CODE, "challenge_id": "bench_avg", "language": "python"}
+    hint_latencies: list[float] = []
+    grade_latencies: list[float] = []
+
+    async def one(path: str, payload: dict, latencies: list[float]):
+        start = time.perf_counter()
+        response = await client.post(path, json=payload)
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+
+    await asyncio.gather(
+        *(one("/api/tutor/hint", hint_payload, hint_latencies) for _ in range(students)),
+        *(one("/api/grade/submit-code", grade_payload, grade_latencies) for _ in range(students)),
+    )
+    return hint_latencies, grade_latencies
+
+
+async def leader_disconnect(followers: int) -> bool:
+    """Leader di-cancel di tengah jalan; semua follower harus tetep dapet hint."""
+    from app.services.ai_tutor import get_contextual_hint
+
+    leader = asyncio.create_task(get_contextual_hint(CHALLENGE, CODE + "# disconnect\n", use_cache=False))
+    await asyncio.sleep(0.01)
+    others = [
+        asyncio.create_task(get_contextual_hint(CHALLENGE, CODE + "# disconnect\n", use_cache=False))
+        for _ in range(followers)
+    ]
+    await asyncio.sleep(0.05)
+    leader.cancel()
+    results = await asyncio.gather(*others, return_exceptions=True)
+    return all(isinstance(result, str) and result for result in results)
+
+
+async def run(app, students: int):
+    import httpx
+
+    from app.services.ai_tutor import hint_cache, hint_flights
+    from app.services.grading import grading_cache, grading_flights
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            for enabled in (False, True):
+                hint_flights.enabled = grading_flights.enabled = enabled
+                hint_cache.clear()
+                grading_cache.clear()
+                upstream_calls.update(hint=0, grading=0, suggestions=0)
+                latencies = await burst(client, students)
+                results[enabled] = (latencies, dict(upstream_calls))
+        survived = await leader_disconnect(followers=5)
+    return results, survived, hint_flights.stats(), grading_flights.stats()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=400.0, help="Delay stand-in (model 70B)")
+    args = parser.parse_args()
+
+    server = setup_standin(latency_ms=args.latency_ms, reply=reply)
+
+    from app.main import app
+
+    results, survived, hint_stats, grading_stats = asyncio.run(run(app, args.students))
+    for enabled, ((hint_latencies, grade_latencies), calls) in results.items():
+        label = "coalesce" if enabled else "no coalesce"
+        report(f"{label} hint", hint_latencies)
+        report(f"{label} grade", grade_latencies)
+        print(
+            f"{label:<12} groq calls: hint={calls['hint']} grading={calls['grading']} "
+            f"suggestions={calls['suggestions']} (dari {args.students} hint + {args.students} submit)"
+        )
+    print(f"single-flight hint={hint_stats} grading={grading_stats}")
+    print(f"leader disconnect: follower tetep dapet hasil = {survived}")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Data Academy - Benchmark analisis statis (pre-scorer efficiency + style)
+# Ukur latency analyzer per submission (Python + SQL), dan bandingin ukuran prompt grading
+# + contoh output JSON: LLM nilai 4 kriteria vs cuma correctness + business insight
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_static_analysis --rounds 2000
+
+import argparse
+import json
+import time
+
+from benchmarks.common import report
+
+
+PYTHON_SUBMISSIONS = [
+    # Vectorized, rapi
+    "import pandas as pd\n\n\ndef revenue_per_category(orders: pd.DataFrame) -> pd.Series:\n"
+    "    return orders.groupby('category')['revenue'].sum().sort_values(ascending=False)\n",
+    # iterrows + append DataFrame di loop + loop bersarang
+    "import pandas as pd\nimport os\n\ndef Hitung(df):\n    out = pd.DataFrame()\n"
+    "    for idx, row in df.iterrows():\n        for j in range(len(df)):\n"
+    "            if df.loc[j, 'category'] == row['category']:\n                out = out.append(row)\n    return out\n",
+    # Loop append biasa + apply axis=1
+    "def total(df):\n    hasil = []\n    for v in df['revenue']:\n        hasil.append(v * 1.1)\n"
+    "    df['pajak'] = df.apply(lambda r: r['revenue'] * 0.1, axis=1)\n    return sum(hasil)\n",
+]
+SQL_SUBMISSIONS = [
+    "SELECT c.name, SUM(o.amount) AS total\nFROM customers c\nJOIN orders o ON o.customer_id = c.id\n"
+    "GROUP BY c.name\nORDER BY total DESC\nLIMIT 5",
+    "select c.name, (SELECT SUM(o.amount) FROM orders o WHERE o.customer_id = c.id)\n"
+    "FROM customers c WHERE lower(c.city) = 'jakarta'",
+    "SELECT * FROM orders, customers",
+]
+
+FULL_OUTPUT = {
+    "score": 72,
+    "criteria": {"correctness": 32, "efficiency": 15, "style": 10, "business_insight": 15},
+    "feedback_text": "Logikanya udah bener, tapi loop per baris bikin lambat di data besar. "
+                     "Penamaan variabel juga bisa lebih jelas. Insight bisnisnya udah oke.",
+    "strengths": ["Hasil akhirnya bener", "Paham tujuan analisisnya"],
+    "improvements": ["Ganti iterrows pakai groupby", "Pakai nama variabel yang deskriptif"],
+    "passed": True,
+    "confidence": 0.8,
+}
+STATIC_OUTPUT = {
+    "criteria": {"correctness": 32, "business_insight": 15},
+    "feedback_text": "Logikanya udah bener dan insight bisnisnya oke.",
+    "strengths": ["Hasil akhirnya bener"],
+    "improvements": ["Handle kategori kosong"],
+    "confidence": 0.8,
+}
+
+
+def timed(fn, rounds: int) -> list[float]:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    from app.services.context_packer import count_tokens
+    from app.services.grading import GRADING_PROMPTS, STATIC_GRADING_PROMPTS
+    from app.services.static_analysis import analyze_code
+
+    # __wrapped__ = tanpa lru_cache, biar yang keukur analisisnya beneran
+    for language, submissions in (("python", PYTHON_SUBMISSIONS), ("sql", SQL_SUBMISSIONS)):
+        for index, code in enumerate(submissions):
+            result = analyze_code.__wrapped__(code, language)
+            codes = sorted({finding.code for finding in result.findings})
+            report(f"{language}#{index}", timed(lambda: analyze_code.__wrapped__(code, language), args.rounds), unit="ms")
+            print(f"{'':<12} efficiency={result.efficiency}/25 style={result.style}/15 findings={codes}")
+        # Deterministik: dianalisis ulang hasilnya sama persis
+        assert all(analyze_code.__wrapped__(c, language).model_dump(exclude={"elapsed_ms"})
+                   == analyze_code.__wrapped__(c, language).model_dump(exclude={"elapsed_ms"}) for c in submissions)
+
+    inputs = {
+        "challenge_title": "Revenue per kategori",
+        "challenge_description": "Hitung total revenue per kategori, urut dari yang terbesar.",
+        "language": "python",
+        "difficulty": 2,
+        "passing_score": 70,
+        "expected_behavior": "Series revenue per kategori, urut desc",
+        "test_cases": "Tidak ada test cases spesifik.",
+        "student_code": PYTHON_SUBMISSIONS[1],
+    }
+    for label, prompts, output in (("4 kriteria", GRADING_PROMPTS, FULL_OUTPUT), ("static", STATIC_GRADING_PROMPTS, STATIC_OUTPUT)):
+        messages = prompts[False].format_messages(**inputs)
+        prompt_tokens = sum(count_tokens(message.content) for message in messages)
+        output_tokens = count_tokens(json.dumps(output, ensure_ascii=False))
+        print(f"{label:<12} prompt={prompt_tokens} tokens, contoh output={output_tokens} tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# Data Academy - Benchmark submission queue
+# Spike N submission barengan: submit-code sync vs enqueue (POST /submissions) + nunggu via SSE
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_submission_queue --requests 100 --latency-ms 300
+#   SUBMISSION_QUEUE_BACKEND=sqlite python -m benchmarks.bench_submission_queue
+
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.bench_grading_modes import grading_reply
+from benchmarks.common import report, setup_standin
+
+
+def payload(i: int, tag: str) -> dict:
+    return {
+        # Code beda tiap request biar gak kena grading cache (komentar ikut kebuang pas normalisasi)
+        "code_snippet": f"def average(xs):\n    return sum(xs) / len(xs) + {i} - len('{tag}')",
+        "challenge_id": "bench_queue_avg",
+        "language": "python",
+    }
+
+
+async def run_sync(client, total: int) -> list[float]:
+    latencies: list[float] = []
+
+    async def one(i: int):
+        start = time.perf_counter()
+        response = await client.post("/api/grade/submit-code", json=payload(i, "sync"))
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return latencies
+
+
+async def run_queued(client, total: int) -> tuple[list[float], list[float]]:
+    submit_latencies: list[float] = []
+    result_latencies: list[float] = []
+
+    async def one(i: int):
+        start = time.perf_counter()
+        response = await client.post("/api/grade/submissions", json=payload(i, "queued"))
+        submit_latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+        job_id = response.json()["job_id"]
+
+        status = None
+        async with client.stream("GET", f"/api/grade/submissions/{job_id}/events") as events:
+            async for line in events.aiter_lines():
+                if line.startswith("data: "):
+                    status = json.loads(line[6:])["status"]
+        if status != "COMPLETED":
+            raise RuntimeError(f"Job {job_id} selesai dengan status {status}")
+        result_latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return submit_latencies, result_latencies
+
+
+async def compare(app, total: int) -> None:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            report("sync", await run_sync(client, total))
+            submit, result = await run_queued(client, total)
+            report("enqueue", submit)
+            report("q_result", result)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    args = parser.parse_args()
+
+    server = setup_standin(latency_ms=args.latency_ms, reply=grading_reply)
+
+    from app.main import app
+
+    asyncio.run(compare(app, args.requests))
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# Data Academy - Benchmark /api/tutor/chat
+# Bandingin latency p50/p99 sebelum (ChatGroq baru tiap request) vs sesudah (client registry)
+#
+# Jalanin dari folder backend:
+#   python -m benchmarks.bench_tutor_chat --requests 200 --concurrency 8
+
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import report, setup_standin
+
+
+async def run_load(app, total: int, concurrency: int) -> list[float]:
+    import httpx
+
+    payload = {"message": "Gimana cara JOIN dua tabel?", "tutor_persona": "RENDY"}
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def one():
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.post("/api/tutor/chat", json=payload)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    response.raise_for_status()
+
+            await asyncio.gather(*(one() for _ in range(total)))
+    return latencies
+
+
+async def compare(app, total: int, concurrency: int) -> tuple[list[float], list[float]]:
+    from app.services import ai_tutor
+
+    original = ai_tutor.get_pooled_llm
+    ai_tutor.get_pooled_llm = legacy_pooled_llm
+    before = await run_load(app, total, concurrency)
+    ai_tutor.get_pooled_llm = original
+
+    await close_legacy_llms()
+
+    after = await run_load(app, total, concurrency)
+    return before, after
+
+
+# Client legacy ditahan di sini biar gak di-GC di tengah benchmark
+_legacy_llms: list = []
+
+
+def legacy_pooled_llm(model: str, temperature: float):
+    """Perilaku lama: ChatGroq baru (plus connection pool baru) tiap request."""
+    from langchain_groq import ChatGroq
+    from app.services.llm_pool import PooledLLM
+
+    llm = ChatGroq(model=model, temperature=temperature, api_key=os.environ["GROQ_API_KEY"])
+    _legacy_llms.append(llm)
+    return PooledLLM(model=model, temperature=temperature, llm=llm)
+
+
+async def close_legacy_llms() -> None:
+    for llm in _legacy_llms:
+        await llm.async_client._client.close()
+        llm.client._client.close()
+    _legacy_llms.clear()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Delay stand-in server")
+    args = parser.parse_args()
+
+    server = setup_standin(latency_ms=args.latency_ms)
+
+    from app.main import app
+
+    before, after = asyncio.run(compare(app, args.requests, args.concurrency))
+
+    report("before", before)
+    report("after", after)
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
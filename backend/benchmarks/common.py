@@ -0,0 +1,56 @@
+# Data Academy - Benchmark Helpers
+# Utility bareng buat semua script benchmark
+
+import os
+import statistics
+from typing import Callable, Optional, Union
+
+from benchmarks.standin_groq import DEFAULT_REPLY, create_standin_app, start_standin_server
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label: str, latencies: list[float], unit: str = "ms") -> None:
+    print(
+        f"{label:<12} n={len(latencies):<7} "
+        f"p50={percentile(latencies, 50):9.3f}{unit} "
+        f"p99={percentile(latencies, 99):9.3f}{unit} "
+        f"mean={statistics.mean(latencies):9.3f}{unit}"
+    )
+
+
+def setup_standin(
+    latency_ms: float = 20.0,
+    reply: Union[str, Callable[[dict], str]] = DEFAULT_REPLY,
+    api_key: Optional[str] = None,
+    max_rpm: Optional[int] = None,
+    error_rate: float = 0.0,
+    ms_per_kchar: float = 0.0,
+    near_duplicates: bool = False,
+    model_latency_ms: Optional[dict[str, float]] = None,
+):
+    """
+    Jalanin stand-in Groq server dan arahin app ke sana.
+    Harus dipanggil SEBELUM import `app.main`. Return object server (set `should_exit` buat stop).
+    Reuse grading near-duplicate dimatiin kecuali `near_duplicates=True`, biar benchmark
+    yang sengaja variasiin code tetep ngukur jalur LLM.
+    """
+    if not near_duplicates:
+        os.environ.setdefault("GRADING_SIMILARITY_THRESHOLD", "1.0")
+    base_url, server = start_standin_server(
+        create_standin_app(
+            latency_ms=latency_ms, reply=reply, max_rpm=max_rpm, error_rate=error_rate,
+            ms_per_kchar=ms_per_kchar, model_latency_ms=model_latency_ms,
+        )
+    )
+    os.environ["GROQ_API_BASE"] = base_url
+    os.environ["GROQ_API_KEY"] = api_key or os.environ.get("GROQ_API_KEY") or "bench-key"
+
+    from app.services import llm_pool
+
+    llm_pool.registry.api_key = os.environ["GROQ_API_KEY"]
+    return server
@@ -0,0 +1,122 @@
+# Data Academy - Stand-in Groq Server
+# Server lokal yang niru endpoint chat completions Groq (OpenAI-compatible) buat benchmark
+
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional, Union
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+DEFAULT_REPLY = "Nah gini nih, jawabannya simpel aja."
+
+
+def create_standin_app(
+    latency_ms: float = 20.0,
+    reply: Union[str, Callable[[dict], str]] = DEFAULT_REPLY,
+    max_rpm: Optional[int] = None,
+    error_rate: float = 0.0,
+    ms_per_kchar: float = 0.0,
+    model_latency_ms: Optional[dict[str, float]] = None,
+) -> FastAPI:
+    """
+    Bikin app yang bales chat completion dengan delay tetap.
+    `reply` bisa string tetap atau fungsi yang nerima body request.
+    `max_rpm` niru rate limit Groq: request lebih dari itu per 60 detik dibales 429 + Retry-After.
+    `error_rate` = peluang request dibales error sementara (429 Retry-After 0.2s atau 503).
+    `ms_per_kchar` niru waktu prefill: delay nambah sebanding panjang prompt (ms per 1000 karakter).
+    `model_latency_ms` = delay per nama model (misal 8B lebih cepet dari 70B), sisanya pake `latency_ms`.
+    """
+    app = FastAPI()
+    accepted: deque[float] = deque()
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if error_rate and random.random() < error_rate:
+            if random.random() < 0.5:
+                return JSONResponse(
+                    {"error": {"message": "Rate limit reached", "code": "rate_limit_exceeded"}},
+                    status_code=429,
+                    headers={"retry-after": "0.2"},
+                )
+            return JSONResponse({"error": {"message": "Service unavailable"}}, status_code=503)
+        if max_rpm is not None:
+            now = time.monotonic()
+            while accepted and accepted[0] <= now - 60:
+                accepted.popleft()
+            if len(accepted) >= max_rpm:
+                retry_after = max(0.1, accepted[0] + 60 - now)
+                return JSONResponse(
+                    {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                    status_code=429,
+                    headers={"retry-after": f"{retry_after:.2f}"},
+                )
+            accepted.append(now)
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in body.get("messages", []))
+        base_ms = (model_latency_ms or {}).get(body.get("model"), latency_ms)
+        await asyncio.sleep((base_ms + ms_per_kchar * prompt_chars / 1000) / 1000)
+        content = reply(body) if callable(reply) else reply
+        model = body.get("model", "stand-in")
+        created = int(time.time())
+
+        if body.get("stream"):
+            async def events():
+                for token in content.split(" "):
+                    chunk = {
+                        "id": "chatcmpl-standin",
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [{"index": 0, "delta": {"content": token + " "}, "finish_reason": None}],
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                    await asyncio.sleep(0.001)
+                done = {
+                    "id": "chatcmpl-standin",
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                }
+                yield f"data: {json.dumps(done)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        return JSONResponse({
+            "id": "chatcmpl-standin",
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120},
+        })
+
+    return app
+
+
+def start_standin_server(app: FastAPI) -> tuple[str, uvicorn.Server]:
+    """Jalanin app di thread terpisah, return (base_url, server)."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}", server